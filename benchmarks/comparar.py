@@ -0,0 +1,78 @@
+# benchmarks/comparar.py
+# Compara dos resultados de benchmarks/suite.py (p. ej. el commit base y el de un cambio).
+#
+# Uso:
+#   python -m benchmarks.comparar base.json nuevo.json [--umbral 0.10] [--fallar]
+import argparse
+import json
+import sys
+from typing import Dict, List, Optional, Tuple
+
+# Diferencias de metadatos que hacen que los números no sean comparables
+CLAVES_ENTORNO = ('cpus', 'python', 'paquetes', 'entorno', 'parametros')
+
+def cargar(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+def _por_clave(reporte: dict) -> Dict[Tuple[str, int], dict]:
+    return {(r["caso"], r["tamano"]): r for r in reporte["resultados"]}
+
+def _cambio(base: float, nuevo: float) -> float:
+    return (nuevo - base) / base if base else 0.0
+
+def comparar(base: dict, nuevo: dict, umbral: float = 0.10) -> List[dict]:
+    """
+    Una fila por caso presente en los dos reportes, con el cambio relativo de la latencia
+    (p50 y p99) y del throughput. Un caso empeora si su p50 sube más que `umbral`
+    y mejora si baja más que `umbral`.
+    """
+    filas = []
+    resultados_base, resultados_nuevo = _por_clave(base), _por_clave(nuevo)
+    for clave in sorted(resultados_base.keys() & resultados_nuevo.keys()):
+        b, n = resultados_base[clave], resultados_nuevo[clave]
+        cambio_p50 = _cambio(b["p50_ms"], n["p50_ms"])
+        filas.append({
+            "caso": clave[0],
+            "tamano": clave[1],
+            "p50_base_ms": b["p50_ms"],
+            "p50_nuevo_ms": n["p50_ms"],
+            "cambio_p50": cambio_p50,
+            "cambio_p99": _cambio(b["p99_ms"], n["p99_ms"]),
+            "cambio_throughput": _cambio(b["filas_por_segundo"], n["filas_por_segundo"]),
+            "veredicto": "peor" if cambio_p50 > umbral else "mejor" if cambio_p50 < -umbral else "igual",
+        })
+    return filas
+
+def diferencias_de_entorno(base: dict, nuevo: dict) -> List[str]:
+    return [clave for clave in CLAVES_ENTORNO if base["meta"].get(clave) != nuevo["meta"].get(clave)]
+
+def imprimir(filas: List[dict], base: dict, nuevo: dict):
+    print(f"Base:  {base['meta'].get('commit')} ({base['meta'].get('fecha')})")
+    print(f"Nuevo: {nuevo['meta'].get('commit')} ({nuevo['meta'].get('fecha')})")
+    distintas = diferencias_de_entorno(base, nuevo)
+    if distintas:
+        print(f"❌ Las corridas difieren en {distintas}: las diferencias pueden no deberse al código.")
+
+    print(f"{'caso':<28}{'tamaño':>8}{'p50 base':>12}{'p50 nuevo':>12}{'p50':>9}{'p99':>9}{'filas/s':>9}")
+    for f in filas:
+        marca = {"peor": " ❌", "mejor": " ✅", "igual": ""}[f["veredicto"]]
+        print(f"{f['caso']:<28}{f['tamano']:>8}{f['p50_base_ms']:>10.2f}ms{f['p50_nuevo_ms']:>10.2f}ms"
+              f"{f['cambio_p50']:>+9.1%}{f['cambio_p99']:>+9.1%}{f['cambio_throughput']:>+9.1%}{marca}")
+
+def parsear_argumentos(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compara dos resultados de benchmarks/suite.py.")
+    parser.add_argument('base', help="JSON de la corrida de referencia")
+    parser.add_argument('nuevo', help="JSON de la corrida a evaluar")
+    parser.add_argument('--umbral', type=float, default=0.10,
+                        help="Cambio relativo del p50 a partir del cual un caso mejora o empeora (por defecto %(default)s)")
+    parser.add_argument('--fallar', action='store_true', help="Termina con código 1 si algún caso empeora")
+    return parser.parse_args(argv)
+
+if __name__ == '__main__':
+    args = parsear_argumentos()
+    base, nuevo = cargar(args.base), cargar(args.nuevo)
+    filas = comparar(base, nuevo, args.umbral)
+    imprimir(filas, base, nuevo)
+    if args.fallar and any(f["veredicto"] == "peor" for f in filas):
+        sys.exit(1)
@@ -0,0 +1,176 @@
+# benchmarks/datos.py
+# Datos sintéticos y determinísticos para los benchmarks: propiedades crudas con el formato
+# del scrapping, el modelo chico entrenado con el pipeline de src/ml/train.py y una base
+# SQLite en memoria con la tabla `propiedades` para medir los endpoints sin MySQL.
+import os
+import sqlite3
+from decimal import Decimal
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from scripts.poblar_db import BARRIOS_OFICIALES, transformar_datos, COLUMNAS_FINALES
+from src.ml.similares import CONSULTA_INDICE_SIMILARES
+
+SEMILLA = 42
+
+# Precio base por m² (USD) de algunos barrios; el resto usa el valor por defecto
+PRECIO_M2_BARRIO = {"Puerto Madero": 6000, "Palermo": 3300, "Recoleta": 3200, "Belgrano": 3100,
+                    "Nuñez": 3000, "Caballito": 2400, "Almagro": 2200, "Flores": 1900, "La Boca": 1500}
+PRECIO_M2_POR_DEFECTO = 2300
+
+PALABRAS = [
+    "luminoso", "balcon", "terraza", "pileta", "amenities", "cochera", "reciclado", "estrenar",
+    "seguridad", "vista", "frente", "contrafrente", "parrilla", "lavadero", "placard", "cocina",
+    "integrada", "living", "comedor", "suite", "dependencia", "subte", "plaza", "escuelas",
+    "credito", "apto", "profesional", "sum", "gimnasio", "solarium", "piso", "madera",
+    "porcelanato", "calefaccion", "central", "aire", "acondicionado", "patio", "jardin", "quincho",
+]
+
+def propiedades_crudas(n: int, semilla: int = SEMILLA) -> pd.DataFrame:
+    """`n` propiedades con las columnas y los formatos de texto del scrapping."""
+    rng = np.random.default_rng(semilla)
+    barrios = rng.choice(BARRIOS_OFICIALES, n)
+    superficie = rng.integers(25, 300, n)
+    ambientes = np.clip(superficie // 30 + rng.integers(0, 2, n), 1, 7)
+    dormitorios = np.maximum(ambientes - 1, 0)
+    banos = 1 + (superficie > 90) + (superficie > 180)
+    cocheras = (rng.random(n) < 0.3).astype(int)
+    precio_m2 = np.array([PRECIO_M2_BARRIO.get(b, PRECIO_M2_POR_DEFECTO) for b in barrios])
+    precio = (superficie * precio_m2 * rng.lognormal(0, 0.15, n) + cocheras * 15000).round(-3).astype(int)
+
+    descripciones = [" ".join(rng.choice(PALABRAS, k)) for k in rng.integers(10, 60, n)]
+    features = [[f"{s} m² tot.", f"{a} amb.", f"{d} dorm.", f"{b} baños" if b > 1 else "1 baño"]
+                + ([f"{c} coch."] if c else [])
+                for s, a, d, b, c in zip(superficie, ambientes, dormitorios, banos, cocheras)]
+    fechas = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 30, n), unit="D")
+
+    return pd.DataFrame({
+        'id': [f"MLA-{i}" for i in range(n)],
+        'Price': [f"USD {p:,}".replace(",", ".") for p in precio],
+        'Expensas': [f"$ {e:,}".replace(",", ".") for e in rng.integers(20_000, 400_000, n)],
+        'Location': [f"{b}, Capital Federal" for b in barrios],
+        'Features': features,
+        'Address': [f"Calle {i % 997} {100 + i % 4000}" for i in range(n)],
+        'Description': descripciones,
+        'Link': [f"https://ejemplo/MLA-{i}" for i in range(n)],
+        'scrap_date': fechas.strftime("%Y-%m-%d %H:%M:%S"),
+    })
+
+def propiedades_transformadas(n: int, semilla: int = SEMILLA) -> pd.DataFrame:
+    return transformar_datos(propiedades_crudas(n, semilla), verbose=False)
+
+def entradas_prediccion(df: pd.DataFrame) -> List[dict]:
+    """Filas transformadas con el formato de `PredictionInput`."""
+    columnas = ['barrio', 'ambientes', 'dormitorios', 'banos', 'superficie_total_m2', 'cocheras', 'description']
+    entradas = df.dropna(subset=['barrio', 'superficie_total_m2'])[columnas].to_dict('records')
+    for entrada in entradas:
+        entrada['superficie_total_m2'] = int(entrada['superficie_total_m2'])
+    return entradas
+
+def entrenar_modelo(directorio: str, n: int = 3000, modelo: str = 'RandomForest', semilla: int = SEMILLA) -> dict:
+    """
+    Entrena con `src.ml.train.entrenar` un modelo chico y fijo (un solo candidato, sin
+    búsqueda) y escribe los artefactos en `directorio`. Mismos datos y semilla, mismo modelo.
+    """
+    from src.ml.train import entrenar, preparar_datos
+
+    df = propiedades_transformadas(n, semilla)
+    df = preparar_datos(df[df['price_usd'].notna() & df['superficie_total_m2'].notna()])
+    grillas = {
+        'RandomForest': {'n_estimators': [100], 'max_depth': [16], 'min_samples_split': [2],
+                         'min_samples_leaf': [1], 'max_features': ['sqrt']},
+        'XGBoost': {'n_estimators': [200], 'learning_rate': [0.1], 'max_depth': [6],
+                    'subsample': [1.0], 'colsample_bytree': [1.0]},
+    }
+    return entrenar(df, salida=directorio, directorio_cache=os.path.join(directorio, 'cache'),
+                    modelos=(modelo,), n_iter=1, cv=3, n_jobs=1, grillas=grillas)
+
+# --- Base SQLite con el esquema de `propiedades` ---
+
+class CursorSqliteAsync:
+    """Cursor con la interfaz asíncrona de `aiomysql.DictCursor` sobre SQLite (placeholders `%s`)."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._cursor = conn.cursor()
+
+    async def execute(self, query, params=None):
+        self._cursor.execute(query.replace('%s', '?'), tuple(params or ()))
+
+    async def fetchone(self):
+        return self._cursor.fetchone()
+
+    async def fetchall(self):
+        return self._cursor.fetchall()
+
+def base_sqlite(df: pd.DataFrame) -> sqlite3.Connection:
+    """
+    Base en memoria con `propiedades` (las filas que insertaría `cargar_datos`, con los
+    índices de schema.sql) y `estadisticas_barrio` ya acumulada.
+    """
+    sqlite3.register_adapter(Decimal, float)
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = lambda cur, fila: {col[0]: valor for col, valor in zip(cur.description, fila)}
+    conn.execute("""
+        CREATE TABLE propiedades (
+            id INTEGER PRIMARY KEY, source_id TEXT UNIQUE NOT NULL, price_usd REAL, expensas_ars REAL,
+            barrio TEXT NOT NULL, address TEXT, ambientes INTEGER, dormitorios INTEGER, banos INTEGER,
+            superficie_total_m2 INTEGER, cocheras INTEGER, description TEXT, link TEXT, scrap_date TEXT
+        )
+    """)
+    for indice in ("barrio, price_usd, id", "barrio, ambientes, superficie_total_m2", "barrio, scrap_date, id",
+                   "price_usd, id", "superficie_total_m2, id", "scrap_date, id", "dormitorios, price_usd, id"):
+        conn.execute(f"CREATE INDEX idx_{indice.replace(', ', '_')} ON propiedades ({indice})")
+
+    filas = df.rename(columns={'id': 'source_id'}).dropna(subset=['price_usd', 'barrio'])[COLUMNAS_FINALES]
+    filas = filas.astype(object).where(pd.notnull(filas), None)
+    conn.executemany(f"INSERT INTO propiedades ({', '.join(COLUMNAS_FINALES)}) "
+                     f"VALUES ({', '.join('?' * len(COLUMNAS_FINALES))})", filas.to_numpy().tolist())
+
+    conn.execute("""
+        CREATE TABLE estadisticas_barrio (
+            barrio TEXT PRIMARY KEY, cantidad INTEGER, cantidad_precio INTEGER, suma_precio REAL,
+            suma_precio_m2 REAL, precio_min REAL, precio_max REAL
+        )
+    """)
+    conn.execute("""
+        INSERT INTO estadisticas_barrio
+        SELECT barrio, COUNT(*), COUNT(price_usd), COALESCE(SUM(price_usd), 0),
+               COALESCE(SUM(price_usd / superficie_total_m2), 0), MIN(price_usd), MAX(price_usd)
+        FROM propiedades
+        WHERE superficie_total_m2 IS NOT NULL AND superficie_total_m2 > 0
+        GROUP BY barrio
+    """)
+    conn.commit()
+    return conn
+
+def filas_indice_similares(conn: sqlite3.Connection) -> List[dict]:
+    return conn.execute(CONSULTA_INDICE_SIMILARES).fetchall()
+
+class ConexionNula:
+    """Conexión que acepta y descarta las sentencias: mide el costo de `cargar_datos` del lado de Python."""
+
+    class _Cursor:
+        def execute(self, query, params=None):
+            pass
+
+        def executemany(self, query, params):
+            # Consumir el iterable, como haría el conector al serializar las filas
+            for _ in params:
+                pass
+
+        def fetchone(self):
+            return {'n': 1}
+
+        def close(self):
+            pass
+
+    def cursor(self):
+        return self._Cursor()
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
@@ -0,0 +1,44 @@
+# benchmarks/medicion.py
+# Medición de latencias: percentiles por llamada y throughput, con un presupuesto de tiempo
+# por caso para que los tamaños grandes no hagan eterna la corrida.
+import time
+from typing import Any, Callable, Sequence
+
+import numpy as np
+
+def resumir(tiempos: Sequence[float], segundos_totales: float, filas: int = 1) -> dict:
+    """Percentiles (ms) de las llamadas y throughput en llamadas y filas por segundo."""
+    ms = np.asarray(tiempos, dtype=np.float64) * 1000
+    p50, p90, p99 = np.percentile(ms, [50, 90, 99])
+    return {
+        "repeticiones": len(ms),
+        "filas": filas,
+        "p50_ms": float(p50),
+        "p90_ms": float(p90),
+        "p99_ms": float(p99),
+        "media_ms": float(ms.mean()),
+        "min_ms": float(ms.min()),
+        "max_ms": float(ms.max()),
+        "llamadas_por_segundo": len(ms) / segundos_totales,
+        "filas_por_segundo": len(ms) * filas / segundos_totales,
+    }
+
+def medir(funcion: Callable[[int], Any], filas: int = 1, repeticiones: int = 200, minimo: int = 5,
+          presupuesto_s: float = 3.0, calentamiento: int = 1) -> dict:
+    """
+    Llama a `funcion(i)` hasta `repeticiones` veces, o hasta agotar `presupuesto_s` segundos
+    una vez hechas `minimo` llamadas. `i` permite usar una entrada distinta en cada llamada.
+    Las llamadas de calentamiento no se cuentan.
+    """
+    for i in range(calentamiento):
+        funcion(-1 - i)
+
+    tiempos = []
+    inicio = time.perf_counter()
+    for i in range(repeticiones):
+        t = time.perf_counter()
+        funcion(i)
+        tiempos.append(time.perf_counter() - t)
+        if len(tiempos) >= minimo and time.perf_counter() - inicio > presupuesto_s:
+            break
+    return resumir(tiempos, sum(tiempos), filas)
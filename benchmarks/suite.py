@@ -0,0 +1,310 @@
+# benchmarks/suite.py
+# Benchmarks de los caminos críticos de la API, el modelo y el ETL sobre datos sintéticos.
+# Entrena un modelo chico y determinístico con el pipeline de src/ml/train.py, mide cada
+# caso en varios tamaños y guarda los resultados en JSON para comparar commits.
+#
+# Uso (desde la raíz del proyecto):
+#   python -m benchmarks.suite                                      # todos los casos
+#   python -m benchmarks.suite --casos ml. etl.transformar --tamanos 1000 50000
+#   python -m benchmarks.comparar benchmarks/resultados/abc123.json benchmarks/resultados/def456.json
+#
+# No necesita MySQL: los endpoints consultan una base SQLite en memoria con el esquema de
+# `propiedades` y `cargar_datos` escribe en una conexión que descarta las filas, así que
+# miden el costo del lado de Python (consultas armadas, validación, serialización).
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from importlib import metadata
+from typing import Callable, List, Optional
+
+from .datos import (
+    SEMILLA, ConexionNula, CursorSqliteAsync, base_sqlite, entradas_prediccion, entrenar_modelo,
+    filas_indice_similares, propiedades_crudas, propiedades_transformadas
+)
+from .medicion import medir, resumir
+
+DIRECTORIO_RESULTADOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resultados')
+VERSION_BENCHMARK = 'benchmark'
+
+TAMANOS = [1000, 10000]
+LOTES = [1, 10, 100, 1000]
+# SHAP exacto crece mucho con el lote: los lotes más grandes solo se miden en modo aproximado
+MAX_LOTE_EXPLICACION_EXACTA = 10
+CONCURRENCIA = 64
+
+# Paquetes cuyas versiones cambian los resultados
+PAQUETES = ['numpy', 'pandas', 'scikit-learn', 'xgboost', 'shap', 'fastapi', 'pydantic', 'starlette']
+# Variables de entorno que cambian el camino que se mide
+PREFIJOS_ENTORNO = ('ML_', 'PREDICT_')
+
+class Corrida:
+    """Acumula los resultados y decide qué casos se ejecutan según `--casos`."""
+
+    def __init__(self, filtros: List[str], presupuesto_s: float, repeticiones: int):
+        self.filtros = filtros
+        self.presupuesto_s = presupuesto_s
+        self.repeticiones = repeticiones
+        self.resultados: List[dict] = []
+
+    def incluye(self, caso: str) -> bool:
+        return not self.filtros or any(caso.startswith(filtro) for filtro in self.filtros)
+
+    def incluye_grupo(self, prefijo: str) -> bool:
+        return not self.filtros or any(f.startswith(prefijo) or prefijo.startswith(f) for f in self.filtros)
+
+    def registrar(self, caso: str, tamano: int, stats: dict):
+        self.resultados.append({"caso": caso, "tamano": tamano, **stats})
+        print(f"  {caso} [{tamano}]: p50 {stats['p50_ms']:.2f} ms | p99 {stats['p99_ms']:.2f} ms | "
+              f"{stats['llamadas_por_segundo']:,.1f} llamadas/s | {stats['filas_por_segundo']:,.0f} filas/s "
+              f"({stats['repeticiones']} repeticiones)")
+
+    def medir(self, caso: str, tamano: int, funcion: Callable[[int], object], filas: int = 1, minimo: int = 5):
+        if self.incluye(caso):
+            self.registrar(caso, tamano, medir(funcion, filas=filas, repeticiones=self.repeticiones,
+                                               minimo=minimo, presupuesto_s=self.presupuesto_s))
+
+def _lote(entradas: List[dict], i: int, tamano: int) -> List[dict]:
+    """El i-ésimo lote de `tamano` entradas, recorriendo la lista de forma circular."""
+    inicio = (i * tamano) % len(entradas)
+    return [entradas[(inicio + j) % len(entradas)] for j in range(tamano)]
+
+# --- Modelo ---
+
+def benchmarks_ml(corrida: Corrida, lotes: List[int], entradas: List[dict]):
+    from src.ml.predict import predict_price, predict_prices, explain_properties, obtener_artefactos
+
+    print("ML:")
+    corrida.medir("ml.predict_price", 1, lambda i: predict_price(entradas[i % len(entradas)]))
+    for lote in lotes:
+        corrida.medir("ml.predict_prices", lote, lambda i: predict_prices(_lote(entradas, i, lote)), filas=lote)
+
+    bundle = obtener_artefactos()
+    if bundle.uncertainty_engine is not None:
+        for lote in lotes:
+            X = bundle.feature_encoder.transform(entradas[:lote])
+            predicciones, por_arbol = bundle.predecir(X)
+            corrida.medir("ml.intervalos", lote,
+                          lambda i: bundle.uncertainty_engine.intervalos(X, predicciones, por_arbol), filas=lote)
+
+    for lote in lotes:
+        if lote <= MAX_LOTE_EXPLICACION_EXACTA:
+            corrida.medir("ml.explain", lote, lambda i: explain_properties(_lote(entradas, i, lote)),
+                          filas=lote, minimo=3)
+        corrida.medir("ml.explain_aproximada", lote,
+                      lambda i: explain_properties(_lote(entradas, i, lote), aproximada=True), filas=lote, minimo=3)
+
+# --- ETL ---
+
+def benchmarks_etl(corrida: Corrida, tamanos: List[int]):
+    from scripts.poblar_db import transformar_datos, cargar_datos
+    from src.ml.feature_engineering import crear_features_nlp
+
+    print("ETL:")
+    for tamano in tamanos:
+        crudas = propiedades_crudas(tamano)
+        transformadas = transformar_datos(crudas, verbose=False)
+        corrida.medir("etl.transformar_datos", tamano, lambda i: transformar_datos(crudas, verbose=False),
+                      filas=tamano, minimo=3)
+        corrida.medir("etl.crear_features_nlp", tamano, lambda i: crear_features_nlp(transformadas, 'description'),
+                      filas=tamano, minimo=3)
+        corrida.medir("etl.cargar_datos", tamano, lambda i: cargar_datos(transformadas, ConexionNula(), verbose=False),
+                      filas=tamano, minimo=3)
+
+# --- Endpoints ---
+
+def benchmarks_api(corrida: Corrida, tamanos: List[int], entradas: List[dict], concurrencia: int):
+    import httpx
+    from scripts.poblar_db import BARRIOS_OFICIALES
+    from pydantic import ValidationError
+    from src.api.main import app
+    from src.api.db_async import get_async_cursor
+    from src.api.schemas import PredictionInput
+    from src.ml.similares import indice_similares
+
+    def valida(entrada: dict) -> bool:
+        try:
+            PredictionInput.model_validate(entrada)
+            return True
+        except ValidationError:
+            return False
+    # POST /predict/ valida el barrio contra su propia lista
+    entradas = [entrada for entrada in entradas if valida(entrada)]
+
+    print("API:")
+    loop = asyncio.new_event_loop()
+    cliente = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark")
+
+    def pedido(metodo: str, url: str, **kwargs) -> httpx.Response:
+        respuesta = loop.run_until_complete(cliente.request(metodo, url, **kwargs))
+        if respuesta.status_code != 200:
+            raise RuntimeError(f"{metodo} {url} respondió {respuesta.status_code}: {respuesta.text[:200]}")
+        return respuesta
+
+    try:
+        for tamano in tamanos:
+            conn = base_sqlite(propiedades_transformadas(tamano))
+
+            async def cursor_sqlite():
+                yield CursorSqliteAsync(conn)
+            app.dependency_overrides[get_async_cursor] = cursor_sqlite
+
+            corrida.medir("api.propiedades", tamano, lambda i: pedido(
+                "GET", "/propiedades/", params={"barrio": BARRIOS_OFICIALES[i % len(BARRIOS_OFICIALES)],
+                                                "sort_by": "price_usd", "limit": 100}))
+
+            # Páginas siguientes del listado completo ordenado por precio (paginación por keyset)
+            tokens, token = [], None
+            while len(tokens) < 20:
+                params = {"sort_by": "price_usd", "limit": 100, **({"cursor": token} if token else {})}
+                token = pedido("GET", "/propiedades/", params=params).headers.get("X-Next-Cursor")
+                if token is None:
+                    break
+                tokens.append(token)
+            if tokens:
+                corrida.medir("api.propiedades_cursor", tamano, lambda i: pedido(
+                    "GET", "/propiedades/", params={"sort_by": "price_usd", "limit": 100, "cursor": tokens[i % len(tokens)]}))
+
+            corrida.medir("api.estadisticas_barrio", tamano,
+                          lambda i: pedido("GET", "/propiedades/estadisticas/precio-por-barrio/"))
+            corrida.medir("api.evolucion_mercado", tamano,
+                          lambda i: pedido("GET", "/propiedades/estadisticas/evolucion-mercado/"))
+
+            # POST /predict/ no depende del tamaño de la base: se mide una vez, con el índice de similares cargado
+            if tamano == tamanos[-1] and corrida.incluye("api.predict_concurrente"):
+                indice_similares.cargar(filas_indice_similares(conn))
+
+                async def rafaga(i: int):
+                    tiempos = []
+
+                    async def uno(entrada: dict):
+                        inicio = time.perf_counter()
+                        respuesta = await cliente.post("/predict/", json=entrada)
+                        if respuesta.status_code != 200:
+                            raise RuntimeError(f"POST /predict/ respondió {respuesta.status_code}: {respuesta.text[:200]}")
+                        tiempos.append(time.perf_counter() - inicio)
+
+                    inicio = time.perf_counter()
+                    await asyncio.gather(*(uno(entrada) for entrada in _lote(entradas, i, concurrencia)))
+                    return tiempos, time.perf_counter() - inicio
+
+                # Latencia de cada pedido dentro de ráfagas de `concurrencia` pedidos simultáneos
+                loop.run_until_complete(rafaga(-1))
+                tiempos, total = [], 0.0
+                for i in range(max(3, corrida.repeticiones // 20)):
+                    tiempos_rafaga, segundos = loop.run_until_complete(rafaga(i))
+                    tiempos += tiempos_rafaga
+                    total += segundos
+                corrida.registrar("api.predict_concurrente", concurrencia, resumir(tiempos, total))
+            conn.close()
+    finally:
+        app.dependency_overrides.pop(get_async_cursor, None)
+        loop.run_until_complete(cliente.aclose())
+        loop.close()
+
+# --- Corrida completa ---
+
+def _git(*args: str) -> Optional[str]:
+    try:
+        return subprocess.run(['git', *args], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(DIRECTORIO_RESULTADOS)).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def metadatos(args: argparse.Namespace, entorno: dict, metricas_modelo: dict, segundos_entrenamiento: float) -> dict:
+    versiones = {}
+    for paquete in PAQUETES:
+        try:
+            versiones[paquete] = metadata.version(paquete)
+        except metadata.PackageNotFoundError:
+            versiones[paquete] = None
+    return {
+        "commit": _git('rev-parse', 'HEAD'),
+        "cambios_sin_commit": bool(_git('status', '--porcelain', '--untracked-files=no')),
+        "fecha": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+        "paquetes": versiones,
+        "entorno": entorno,
+        "parametros": {
+            "tamanos": args.tamanos, "lotes": args.lotes, "concurrencia": args.concurrencia,
+            "modelo": args.modelo, "filas_entrenamiento": args.filas_entrenamiento, "semilla": SEMILLA,
+            "presupuesto_s": args.presupuesto, "repeticiones": args.repeticiones, "casos": args.casos,
+        },
+        "modelo": {"segundos_entrenamiento": round(segundos_entrenamiento, 2),
+                   **{k: metricas_modelo.get(k) for k in ("model", "r2_score_mean", "rmse_usd_mean", "datos")}},
+    }
+
+def ruta_por_defecto(meta: dict) -> str:
+    nombre = (meta["commit"] or "sin-git")[:12] + ("-con-cambios" if meta["cambios_sin_commit"] else "")
+    return os.path.join(DIRECTORIO_RESULTADOS, f"{nombre}.json")
+
+def parsear_argumentos(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmarks de la API, el modelo y el ETL sobre datos sintéticos.")
+    parser.add_argument('--casos', nargs='*', default=[],
+                        help="Prefijos de los casos a correr, p. ej. 'ml.' o 'api.propiedades' (por defecto, todos)")
+    parser.add_argument('--tamanos', nargs='+', type=int, default=TAMANOS,
+                        help="Filas de los datos del ETL y de la base de los endpoints (por defecto %(default)s)")
+    parser.add_argument('--lotes', nargs='+', type=int, default=LOTES,
+                        help="Propiedades por llamada en los casos del modelo (por defecto %(default)s)")
+    parser.add_argument('--concurrencia', type=int, default=CONCURRENCIA,
+                        help="Pedidos simultáneos en api.predict_concurrente (por defecto %(default)s)")
+    parser.add_argument('--modelo', choices=['RandomForest', 'XGBoost'], default='RandomForest')
+    parser.add_argument('--filas-entrenamiento', type=int, default=3000,
+                        help="Propiedades sintéticas para entrenar el modelo (por defecto %(default)s)")
+    parser.add_argument('--presupuesto', type=float, default=3.0,
+                        help="Segundos máximos por caso, una vez hechas las repeticiones mínimas (por defecto %(default)s)")
+    parser.add_argument('--repeticiones', type=int, default=200, help="Repeticiones máximas por caso (por defecto %(default)s)")
+    parser.add_argument('--salida', help="Archivo JSON de resultados (por defecto benchmarks/resultados/<commit>.json)")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> dict:
+    args = parsear_argumentos(argv)
+    corrida = Corrida(args.casos, args.presupuesto, args.repeticiones)
+    # Antes de apuntar la API al modelo de benchmark: se registra lo que configuró quien corre la suite
+    entorno = {k: v for k, v in sorted(os.environ.items()) if k.startswith(PREFIJOS_ENTORNO)}
+
+    with tempfile.TemporaryDirectory(prefix='benchmark-') as directorio:
+        inicio = time.perf_counter()
+        metricas_modelo = entrenar_modelo(os.path.join(directorio, VERSION_BENCHMARK), args.filas_entrenamiento,
+                                          args.modelo)
+        segundos_entrenamiento = time.perf_counter() - inicio
+
+        # La API carga el modelo de benchmark como versión activa; las caches se desactivan
+        # para medir el cálculo y no los aciertos
+        os.environ.update({"ML_VERSIONES_DIR": directorio, "ML_VERSION_ACTIVA": VERSION_BENCHMARK,
+                           "PREDICTION_CACHE_SIZE": "0", "EXPLAIN_CACHE_SIZE": "0"})
+        os.environ.pop("PREDICTION_CACHE_REDIS_URL", None)
+        from src.ml.predict import registro, ejecutor
+        for nombre in ('src.ml.predict', 'httpx'):
+            logging.getLogger(nombre).setLevel(logging.WARNING)
+        registro.activa().precalentar()
+        ejecutor.iniciar(registro.activa().directorio)
+
+        entradas = entradas_prediccion(propiedades_transformadas(max(2000, *args.lotes, args.concurrencia), SEMILLA + 1))
+        try:
+            if corrida.incluye_grupo("ml."):
+                benchmarks_ml(corrida, args.lotes, entradas)
+            if corrida.incluye_grupo("etl."):
+                benchmarks_etl(corrida, args.tamanos)
+            if corrida.incluye_grupo("api."):
+                benchmarks_api(corrida, args.tamanos, entradas, args.concurrencia)
+        finally:
+            ejecutor.cerrar()
+
+    reporte = {"meta": metadatos(args, entorno, metricas_modelo, segundos_entrenamiento), "resultados": corrida.resultados}
+    salida = args.salida or ruta_por_defecto(reporte["meta"])
+    os.makedirs(os.path.dirname(os.path.abspath(salida)), exist_ok=True)
+    with open(salida, 'w') as f:
+        json.dump(reporte, f, indent=2, ensure_ascii=False)
+    print(f"✅ {len(corrida.resultados)} resultados guardados en {salida}")
+    return reporte
+
+if __name__ == '__main__':
+    main()
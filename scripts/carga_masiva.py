@@ -0,0 +1,168 @@
+# scripts/carga_masiva.py
+# Backends de carga masiva para el ETL (scripts/poblar_db.py --backend): INSERT de muchas
+# filas por sentencia (hasta max_allowed_packet) o LOAD DATA LOCAL INFILE desde un TSV temporal, índices secundarios
+# quitados y reconstruidos alrededor de una recarga completa, y medición de cada etapa.
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+BACKENDS = ['executemany', 'multifila', 'load-data']
+
+# Índices secundarios de `propiedades` (los mismos de scripts/schema.sql). El UNIQUE de
+# `source_id` no se toca: es el que evita duplicados durante la carga.
+INDICES_SECUNDARIOS = {
+    'idx_barrio_precio': '(barrio, price_usd, id)',
+    'idx_barrio_amb_sup': '(barrio, ambientes, superficie_total_m2)',
+    'idx_barrio_scrap_date': '(barrio, scrap_date, id)',
+    'idx_precio': '(price_usd, id)',
+    'idx_superficie': '(superficie_total_m2, id)',
+    'idx_scrap_date': '(scrap_date, id)',
+    'idx_dormitorios_precio': '(dormitorios, price_usd, id)',
+}
+
+# Fracción de `max_allowed_packet` que puede ocupar cada sentencia del backend `multifila`:
+# el tamaño de cada fila se estima antes de escapar los valores
+FRACCION_PAQUETE = 0.8
+# `max_allowed_packet` si el servidor no lo informa (el mínimo por defecto entre versiones de MySQL)
+MAX_ALLOWED_PACKET_POR_DEFECTO = 4 * 1024 * 1024
+
+class MedidorEtapas:
+    """Acumula tiempo y filas por etapa (lectura, transformación, carga...) para informar filas/s."""
+
+    def __init__(self):
+        self.etapas: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+        self._inicio = time.perf_counter()
+
+    def sumar(self, etapa: str, segundos: float, filas: int):
+        with self._lock:
+            acumulado = self.etapas.setdefault(etapa, [0.0, 0])
+            acumulado[0] += segundos
+            acumulado[1] += filas
+
+    @contextmanager
+    def medir(self, etapa: str, filas: int = 0):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.sumar(etapa, time.perf_counter() - inicio, filas)
+
+    def iterar(self, etapa: str, lotes: Iterable):
+        """Recorre `lotes` sumando a `etapa` el tiempo de obtener cada uno y sus filas."""
+        iterador = iter(lotes)
+        while True:
+            inicio = time.perf_counter()
+            lote = next(iterador, None)
+            if lote is None:
+                return
+            self.sumar(etapa, time.perf_counter() - inicio, len(lote))
+            yield lote
+
+    def reporte(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                etapa: {"segundos": segundos, "filas": filas, "filas_por_segundo": filas / segundos if segundos else 0.0}
+                for etapa, (segundos, filas) in self.etapas.items()
+            }
+
+    def imprimir(self):
+        print("ETL: Rendimiento por etapa:")
+        for etapa, datos in self.reporte().items():
+            detalle = f", {datos['filas_por_segundo']:,.0f} filas/s" if datos['filas'] else ""
+            print(f"  - {etapa}: {datos['filas']:,} filas en {datos['segundos']:.2f}s{detalle}")
+        print(f"  - total: {time.perf_counter() - self._inicio:.2f}s")
+
+def max_allowed_packet(cursor) -> int:
+    cursor.execute("SELECT @@max_allowed_packet")
+    fila = cursor.fetchone()
+    return int(fila[0]) if fila and fila[0] else MAX_ALLOWED_PACKET_POR_DEFECTO
+
+def _bytes_fila(fila: tuple) -> int:
+    # Valor entre comillas más la coma; los textos se miden en UTF-8
+    return sum(len(v.encode('utf-8')) if isinstance(v, str) else len(str(v)) for v in fila) + 4 * len(fila) + 4
+
+def insertar_multifila(cursor, tabla: str, columnas: Sequence[str], filas: Sequence[tuple],
+                       max_bytes: Optional[int] = None) -> int:
+    """
+    Arma sentencias `INSERT ... VALUES (...), (...), ...` con tantas filas como entren en
+    `max_bytes` (por defecto, una fracción del `max_allowed_packet` del servidor) y las
+    ejecuta con `execute`. Devuelve la cantidad de sentencias ejecutadas.
+    """
+    if max_bytes is None:
+        max_bytes = int(max_allowed_packet(cursor) * FRACCION_PAQUETE)
+    prefijo = f"INSERT INTO {tabla} ({', '.join(columnas)}) VALUES "
+    valores_fila = "(" + ", ".join(["%s"] * len(columnas)) + ")"
+
+    sentencias = 0
+    grupo, tamano = [], len(prefijo)
+    for fila in filas:
+        bytes_fila = _bytes_fila(fila)
+        if grupo and tamano + bytes_fila > max_bytes:
+            cursor.execute(prefijo + ", ".join([valores_fila] * len(grupo)), [v for f in grupo for v in f])
+            sentencias += 1
+            grupo, tamano = [], len(prefijo)
+        grupo.append(fila)
+        tamano += bytes_fila
+    if grupo:
+        cursor.execute(prefijo + ", ".join([valores_fila] * len(grupo)), [v for f in grupo for v in f])
+        sentencias += 1
+    return sentencias
+
+def campo_tsv(valor: Any) -> str:
+    """Un valor con el formato que espera LOAD DATA: `\\N` para NULL y separadores escapados."""
+    if valor is None:
+        return '\\N'
+    if isinstance(valor, str):
+        return valor.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+    return str(valor)
+
+def escribir_tsv(filas: Sequence[tuple], archivo):
+    for fila in filas:
+        archivo.write('\t'.join(map(campo_tsv, fila)))
+        archivo.write('\n')
+
+def insertar_load_data(cursor, tabla: str, columnas: Sequence[str], filas: Sequence[tuple]) -> int:
+    """
+    Escribe las filas en un TSV temporal y las carga con LOAD DATA LOCAL INFILE. La conexión
+    debe abrirse con `allow_local_infile=True` y el servidor debe tener `local_infile` activado.
+    Devuelve las filas insertadas: con LOCAL, las que repiten una clave única se omiten (como IGNORE).
+    """
+    with tempfile.NamedTemporaryFile('w', suffix='.tsv', encoding='utf-8', newline='', delete=False) as archivo:
+        escribir_tsv(filas, archivo)
+    try:
+        cursor.execute(
+            f"LOAD DATA LOCAL INFILE %s INTO TABLE {tabla} CHARACTER SET utf8mb4 "
+            "FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' LINES TERMINATED BY '\\n' "
+            f"({', '.join(columnas)})",
+            (archivo.name,)
+        )
+    finally:
+        os.unlink(archivo.name)
+    return cursor.rowcount if cursor.rowcount >= 0 else len(filas)
+
+def indices_existentes(cursor, tabla: str = 'propiedades') -> List[str]:
+    cursor.execute(f"SHOW INDEX FROM {tabla}")
+    columnas = [d[0] for d in cursor.description]
+    posicion = columnas.index('Key_name')
+    return sorted({fila[posicion] for fila in cursor.fetchall()})
+
+def quitar_indices_secundarios(cursor, tabla: str = 'propiedades') -> List[str]:
+    """Elimina los índices secundarios presentes en una sola sentencia y devuelve sus nombres."""
+    presentes = [nombre for nombre in indices_existentes(cursor, tabla) if nombre in INDICES_SECUNDARIOS]
+    if presentes:
+        cursor.execute(f"ALTER TABLE {tabla} " + ", ".join(f"DROP INDEX {nombre}" for nombre in presentes))
+    return presentes
+
+def crear_indices_secundarios(cursor, tabla: str = 'propiedades') -> List[str]:
+    """Crea los índices secundarios que falten en una sola sentencia (un único recorrido de la tabla)."""
+    presentes = set(indices_existentes(cursor, tabla))
+    faltantes = [nombre for nombre in INDICES_SECUNDARIOS if nombre not in presentes]
+    if faltantes:
+        cursor.execute(f"ALTER TABLE {tabla} " + ", ".join(
+            f"ADD INDEX {nombre} {INDICES_SECUNDARIOS[nombre]}" for nombre in faltantes
+        ))
+    return faltantes
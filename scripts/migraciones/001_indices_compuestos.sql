@@ -0,0 +1,15 @@
+-- scripts/migraciones/001_indices_compuestos.sql
+-- Reemplaza los índices de una sola columna por los índices compuestos de scripts/schema.sql.
+
+ALTER TABLE propiedades
+    DROP INDEX idx_barrio,
+    DROP INDEX idx_price,
+    DROP INDEX idx_superficie,
+    DROP INDEX idx_scrap_date,
+    ADD INDEX idx_barrio_precio (barrio, price_usd, id),
+    ADD INDEX idx_barrio_amb_sup (barrio, ambientes, superficie_total_m2),
+    ADD INDEX idx_barrio_scrap_date (barrio, scrap_date, id),
+    ADD INDEX idx_precio (price_usd, id),
+    ADD INDEX idx_superficie (superficie_total_m2, id),
+    ADD INDEX idx_scrap_date (scrap_date, id),
+    ADD INDEX idx_dormitorios_precio (dormitorios, price_usd, id);
@@ -1,30 +1,48 @@
 # scripts/poblar_db.py
 import pandas as pd
+import numpy as np
 import mysql.connector
 from mysql.connector import Error
 from mysql.connector.abstracts import MySQLConnectionAbstract
 from mysql.connector.connection import MySQLConnection
 import re
 import ast
-from typing import Dict, Any, Optional, List
+import argparse
+import hashlib
+from typing import Dict, Any, Optional, List, Iterator, Iterable, Callable, Tuple
 import unicodedata
 import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
 from dotenv import load_dotenv
 
+# Permite importar los módulos de `src` al ejecutar el script desde la raíz del proyecto
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.api.estadisticas import asegurar_tabla_estadisticas, acumular_filas, reconstruir_estadisticas
+from scripts.carga_masiva import (
+    BACKENDS, MedidorEtapas, insertar_multifila, insertar_load_data,
+    quitar_indices_secundarios, crear_indices_secundarios
+)
+
 load_dotenv()
 
 DATA_FILE_PATH = './data/ventas_deptos.pkl' 
 
-def conectar_db() -> Optional[MySQLConnectionAbstract]:
+def conectar_db(local_infile: bool = False) -> Optional[MySQLConnectionAbstract]:
     """
     Establece la conexión con la base de datos MySQL usando variables de entorno.
+    `local_infile` habilita LOAD DATA LOCAL INFILE (backend `load-data`).
     """
     try:
         conexion = mysql.connector.connect(
             host=os.getenv("DB_HOST"),
             user=os.getenv("DB_USER"),
             password=os.getenv("DB_PASSWORD"),
-            database=os.getenv("DB_NAME")
+            database=os.getenv("DB_NAME"),
+            allow_local_infile=local_infile
         )
         if conexion.is_connected():
             print("✅ Conexión a la base de datos MySQL exitosa.")
@@ -33,12 +51,82 @@ def conectar_db() -> Optional[MySQLConnectionAbstract]:
         print(f"❌ Error al conectar a MySQL: {e}")
         return None
 
+# Formatos de entrada según la extensión del archivo
+FORMATOS_ENTRADA = {
+    '.pkl': 'pickle', '.pickle': 'pickle', '.csv': 'csv',
+    '.jsonl': 'jsonl', '.ndjson': 'jsonl', '.parquet': 'parquet'
+}
+
+# En CSV estas columnas se leen siempre como texto, igual que en el pickle del scrapping
+COLUMNAS_TEXTO = ['Price', 'Expensas', 'Location', 'Features', 'Address', 'Description', 'Link', 'scrap_date']
+
+def detectar_formato(path: str) -> str:
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in FORMATOS_ENTRADA:
+        raise ValueError(f"Formato de entrada no soportado: '{extension}'. Use uno de {sorted(FORMATOS_ENTRADA)}.")
+    return FORMATOS_ENTRADA[extension]
+
+def _a_lista(valor: Any) -> Any:
+    """En CSV las listas de features llegan como texto y en Parquet como arrays."""
+    if isinstance(valor, str):
+        try:
+            valor = ast.literal_eval(valor)
+        except (ValueError, SyntaxError):
+            return valor
+    if isinstance(valor, (np.ndarray, tuple)):
+        return list(valor)
+    return valor
+
+def _normalizar_lote(df: pd.DataFrame) -> pd.DataFrame:
+    if 'Features' in df.columns:
+        df['Features'] = df['Features'].map(_a_lista)
+    return df
+
+def _porciones(df: pd.DataFrame, chunksize: int) -> Iterator[pd.DataFrame]:
+    for inicio in range(0, len(df), chunksize):
+        yield df.iloc[inicio:inicio + chunksize]
+
+def leer_datos_en_lotes(path: str, chunksize: int, columnas: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+    """
+    Recorre el archivo de entrada en lotes de `chunksize` filas. CSV, JSON Lines y Parquet
+    se leen por partes, sin cargarlos completos. Un pickle no se puede leer parcialmente:
+    se carga entero y se recorre en porciones, así que la memoria es la del archivo completo
+    (para acotarla, convertirlo antes a Parquet o JSON Lines). Parquet requiere `pyarrow`.
+    """
+    formato = detectar_formato(path)
+
+    if formato == 'pickle':
+        df = pd.read_pickle(path)
+        yield from _porciones(df[columnas] if columnas is not None else df, chunksize)
+
+    elif formato == 'csv':
+        tipos = {col: str for col in COLUMNAS_TEXTO if columnas is None or col in columnas}
+        for lote in pd.read_csv(path, chunksize=chunksize, usecols=columnas, dtype=tipos):
+            yield _normalizar_lote(lote)
+
+    elif formato == 'jsonl':
+        with pd.read_json(path, lines=True, chunksize=chunksize, dtype=False, convert_dates=False) as lector:
+            for lote in lector:
+                yield lote[columnas] if columnas is not None else lote
+
+    else:
+        try:
+            import pyarrow.parquet as pq  # Dependencia opcional: solo para leer Parquet
+        except ImportError:
+            raise ImportError("Para leer archivos Parquet se necesita el paquete 'pyarrow'.")
+        archivo = pq.ParquetFile(path)
+        for lote in archivo.iter_batches(batch_size=chunksize, columns=columnas):
+            yield _normalizar_lote(lote.to_pandas())
+
 def leer_datos_crudos(path: str) -> Optional[pd.DataFrame]:
     """
-    Lee los datos crudos desde el archivo .pkl.
+    Lee los datos crudos completos desde el archivo (.pkl, .csv, .jsonl o .parquet).
     """
     try:
-        df = pd.read_pickle(path)
+        if detectar_formato(path) == 'pickle':
+            df = pd.read_pickle(path)
+        else:
+            df = pd.concat(leer_datos_en_lotes(path, chunksize=100_000), ignore_index=True)
         print(f"✅ {len(df)} registros leídos correctamente desde {path}.")
         return df
     except FileNotFoundError:
@@ -81,33 +169,35 @@ def normalizar_texto(texto: str) -> str:
     nfkd_form = unicodedata.normalize('NFKD', texto)
     return "".join([c for c in nfkd_form if not unicodedata.combining(c)]).lower()
 
+# Barrios oficiales de CABA para validación y normalización
+BARRIOS_OFICIALES = [
+    "Recoleta", "Palermo", "Belgrano", "Caballito", "Almagro", "Villa Crespo",
+    "Nuñez", "Saavedra", "Villa Urquiza", "Flores", "San Nicolas", "Retiro",
+    "Balvanera", "Monserrat", "San Telmo", "La Boca", "Barracas", "Constitucion",
+    "Parque Patricios", "Boedo", "San Cristobal", "Liniers", "Mataderos",
+    "Villa Lugano", "Villa Riachuelo", "Villa Soldati", "Pompeya", "Parque Chacabuco",
+    "Parque Avellaneda", "Versalles", "Villa Real", "Monte Castro", "Villa Devoto",
+    "Villa del Parque", "Villa Santa Rita", "Agronomia", "Chacarita", "Paternal",
+    "Villa Ortuzar", "Coghlan", "Colegiales", "Puerto Madero", "Parque Chas", 
+    "Floresta", "Villa Luro", "Villa Pueyrredon", "Villa General Mitre", "Velez Sarsfield"
+]
+BARRIOS_OFICIALES_NORM = {normalizar_texto(b): b for b in BARRIOS_OFICIALES}
+
+# Sub-barrios y zonas comerciales que se asignan al barrio oficial que los contiene
+MAPA_EXCEPCIONES = {
+    "barrio norte": "Recoleta", "centro / microcentro": "San Nicolas",
+    "congreso": "Balvanera", "once": "Balvanera", "abasto": "Almagro",
+    "parque centenario": "Caballito", "tribunales": "San Nicolas",
+    "la paternal": "Paternal", "catalinas": "Retiro"
+}
+
 def estandarizar_barrio(location_original: Any) -> Optional[str]:
     if not isinstance(location_original, str):
         return None
 
-    # Mapa de barrios oficiales para validación y normalización
-    barrios_oficiales = [
-        "Recoleta", "Palermo", "Belgrano", "Caballito", "Almagro", "Villa Crespo",
-        "Nuñez", "Saavedra", "Villa Urquiza", "Flores", "San Nicolas", "Retiro",
-        "Balvanera", "Monserrat", "San Telmo", "La Boca", "Barracas", "Constitucion",
-        "Parque Patricios", "Boedo", "San Cristobal", "Liniers", "Mataderos",
-        "Villa Lugano", "Villa Riachuelo", "Villa Soldati", "Pompeya", "Parque Chacabuco",
-        "Parque Avellaneda", "Versalles", "Villa Real", "Monte Castro", "Villa Devoto",
-        "Villa del Parque", "Villa Santa Rita", "Agronomia", "Chacarita", "Paternal",
-        "Villa Ortuzar", "Coghlan", "Colegiales", "Puerto Madero", "Parque Chas", 
-        "Floresta", "Villa Luro", "Villa Pueyrredon", "Villa General Mitre", "Velez Sarsfield"
-    ]
-    barrios_oficiales_norm = {normalizar_texto(b): b for b in barrios_oficiales}
-
-    mapa_excepciones = {
-        "barrio norte": "Recoleta", "centro / microcentro": "San Nicolas",
-        "congreso": "Balvanera", "once": "Balvanera", "abasto": "Almagro",
-        "parque centenario": "Caballito", "tribunales": "San Nicolas",
-        "la paternal": "Paternal", "catalinas": "Retiro"
-    }
     location_normalizada = normalizar_texto(location_original.split(',')[0].strip())
-    if location_normalizada in mapa_excepciones:
-        return mapa_excepciones[location_normalizada].title()
+    if location_normalizada in MAPA_EXCEPCIONES:
+        return MAPA_EXCEPCIONES[location_normalizada].title()
 
     if ',' in location_original:
         partes = location_original.split(',')
@@ -115,11 +205,11 @@ def estandarizar_barrio(location_original: Any) -> Optional[str]:
             posible_barrio = partes[1].strip()
             posible_barrio_norm = normalizar_texto(posible_barrio)
             # PASO 3: Validar que el resultado sea un barrio oficial.
-            if posible_barrio_norm in barrios_oficiales_norm:
-                return barrios_oficiales_norm[posible_barrio_norm]
+            if posible_barrio_norm in BARRIOS_OFICIALES_NORM:
+                return BARRIOS_OFICIALES_NORM[posible_barrio_norm]
 
-    if location_normalizada in barrios_oficiales_norm:
-        return barrios_oficiales_norm[location_normalizada]
+    if location_normalizada in BARRIOS_OFICIALES_NORM:
+        return BARRIOS_OFICIALES_NORM[location_normalizada]
     
     return None
 
@@ -159,30 +249,181 @@ def parsear_features(features_list: Any) -> Dict[str, Optional[int]]:
             
     return parsed_data
 
-def transformar_datos(df: pd.DataFrame) -> pd.DataFrame:
-    print("ETL: Iniciando Fase de Transformación...")
+# --- Transformación vectorizada ---
+# Las funciones de arriba procesan un valor por vez y documentan cada regla; las de abajo
+# aplican exactamente las mismas reglas a una columna completa con métodos `.str` de pandas,
+# regex compiladas y tablas de normalización armadas una sola vez.
+
+COLUMNAS_FEATURES = ['ambientes', 'dormitorios', 'banos', 'superficie_total_m2', 'cocheras']
+
+# Marcador de cada feature en el texto, en el mismo orden de prioridad que `parsear_features`
+MARCADORES_FEATURES = [
+    ('amb.', 'ambientes'), ('dorm.', 'dormitorios'), ('baño', 'banos'),
+    ('m² tot.', 'superficie_total_m2'), ('coch.', 'cocheras')
+]
+
+PATRON_NUMERO = re.compile(r'(\d+)')
+
+# Excepciones ya con el formato final que devuelve `estandarizar_barrio`
+MAPA_EXCEPCIONES_TITULO = {clave: barrio.title() for clave, barrio in MAPA_EXCEPCIONES.items()}
+
+def _solo_textos(serie: pd.Series) -> pd.Series:
+    """La serie como `object`, con NaN en lugar de los valores que no son str."""
+    serie = serie.astype(object)
+    return serie.where(serie.apply(isinstance, args=(str,)))
+
+def _float_o_nan(texto: str) -> float:
+    try:
+        return float(texto)
+    except (ValueError, TypeError):
+        return np.nan
+
+def _a_float(textos: pd.Series) -> pd.Series:
+    """`float(texto)` para cada elemento (NaN si no es un número)."""
+    numeros = pd.to_numeric(textos, errors='coerce').astype(float)
+    # Lo poco que pd.to_numeric no reconoce (p. ej. "1_000") se resuelve con float() para respetar sus reglas
+    dudosos = numeros.isna() & textos.notna() & (textos != '')
+    if dudosos.any():
+        numeros[dudosos] = textos[dudosos].map(_float_o_nan)
+    return numeros
+
+def _normalizar_serie(textos: pd.Series) -> pd.Series:
+    """`normalizar_texto` calculado una sola vez por valor distinto."""
+    tabla = {texto: normalizar_texto(texto) for texto in textos.dropna().unique()}
+    return textos.map(tabla)
+
+def limpiar_precios(serie: pd.Series) -> pd.Series:
+    """Equivalente vectorizado de `limpiar_y_validar_precio`."""
+    textos = (_solo_textos(serie).str.strip().str.upper()
+              .str.replace("USD", "", regex=False).str.replace(".", "", regex=False).str.strip())
+    precios = _a_float(textos)
+    return precios.mask(precios < 10000)
+
+def limpiar_expensas(serie: pd.Series) -> pd.Series:
+    """Equivalente vectorizado de `limpiar_y_validar_expensas`."""
+    textos = _solo_textos(serie).str.strip().str.upper()
+    for token in ("ARS", "$", ".", "EXPENSAS"):
+        textos = textos.str.replace(token, "", regex=False)
+    expensas = _a_float(textos.str.strip())
+    # Validacion contra el limite de la BBDD (DECIMAL 10,2)
+    return expensas.mask((expensas < 100) | (expensas >= 100_000_000))
+
+def estandarizar_barrios(serie: pd.Series) -> pd.Series:
+    """Equivalente vectorizado de `estandarizar_barrio`."""
+    partes = _solo_textos(serie).str.split(',')
+    primera = _normalizar_serie(partes.str[0].str.strip())
+    segunda = _normalizar_serie(partes.str[1].str.strip())  # NaN si no hay coma
+
+    # Misma prioridad que la versión fila a fila: excepción, barrio tras la coma, primera parte
+    return (primera.map(MAPA_EXCEPCIONES_TITULO)
+            .fillna(segunda.map(BARRIOS_OFICIALES_NORM))
+            .fillna(primera.map(BARRIOS_OFICIALES_NORM)))
+
+def _entero_o_nan(texto: str):
+    try:
+        return int(texto)
+    except ValueError:
+        return np.nan
+
+def extraer_features(serie: pd.Series) -> pd.DataFrame:
+    """
+    Equivalente vectorizado de `parsear_features`: una columna por feature, alineada con
+    `serie`. Los ítems de todas las listas se procesan juntos (explode) y, si una feature
+    aparece más de una vez en la misma lista, vale la última.
+    """
+    listas = pd.Series(serie.to_numpy(dtype=object), dtype=object)
+    items = listas.where(listas.apply(isinstance, args=(list,))).explode()
+    items = _solo_textos(items).str.lower()
+
+    numeros = items.str.extract(PATRON_NUMERO, expand=False)
+    tipos = np.select(
+        [items.str.contains(marcador, regex=False, na=False).to_numpy() for marcador, _ in MARCADORES_FEATURES],
+        [columna for _, columna in MARCADORES_FEATURES],
+        default=''
+    )
+    validos = (numeros.notna() & (tipos != '')).to_numpy()
+
+    tabla = pd.DataFrame({
+        'fila': items.index[validos],
+        'columna': tipos[validos],
+        'valor': numeros[validos].map(_entero_o_nan).to_numpy()
+    }).dropna(subset=['valor']).drop_duplicates(subset=['fila', 'columna'], keep='last')
+
+    features = (tabla.pivot(index='fila', columns='columna', values='valor')
+                .reindex(index=range(len(listas)), columns=COLUMNAS_FEATURES)
+                .astype(float))
+    features.index = serie.index
+    features.columns.name = None
+    return features
+
+# Columnas crudas que requieren trabajo de CPU; el resto pasa sin cambios
+COLUMNAS_A_LIMPIAR = ['Price', 'Expensas', 'Location', 'Features']
+
+def _limpiar_columnas(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Parte CPU-bound de la transformación: precio, expensas (sin imputar), barrio y
+    features. Es lo único que se reparte entre procesos con `workers` > 1.
+    """
+    limpias = pd.DataFrame({
+        'price_usd': limpiar_precios(df['Price']),
+        'expensas_ars': limpiar_expensas(df['Expensas']),
+        'barrio': estandarizar_barrios(df['Location']),
+    }, index=df.index)
+    return pd.concat([limpias, extraer_features(df['Features'])], axis=1)
+
+def _limpiar_particion(crudas: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    Tarea de cada proceso del pool: recibe y devuelve arreglos por columna (no DataFrames),
+    que se serializan con menos overhead que un DataFrame con su índice y sus bloques.
+    """
+    limpias = _limpiar_columnas(pd.DataFrame(crudas))
+    return {col: limpias[col].to_numpy() for col in limpias.columns}
+
+def _columnas_a_limpiar(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    return {col: df[col].to_numpy() for col in COLUMNAS_A_LIMPIAR}
+
+def _unir_particiones(resultados: List[Dict[str, np.ndarray]], indice: pd.Index) -> pd.DataFrame:
+    return pd.DataFrame({col: np.concatenate([r[col] for r in resultados]) for col in resultados[0]}, index=indice)
+
+def _limpiar_en_paralelo(df: pd.DataFrame, workers: int) -> pd.DataFrame:
+    """Divide `df` en `workers` particiones contiguas; `map` conserva el orden, así el resultado es determinista."""
+    if len(df) == 0:
+        return _limpiar_columnas(df)
+    particiones = [df.iloc[i] for i in np.array_split(np.arange(len(df)), min(workers, len(df)))]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        resultados = list(executor.map(_limpiar_particion, map(_columnas_a_limpiar, particiones)))
+    return _unir_particiones(resultados, df.index)
+
+def transformar_datos(df: pd.DataFrame, mediana_expensas: Optional[float] = None, verbose: bool = True,
+                      workers: int = 1, limpias: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    Limpia y normaliza los datos crudos. Las expensas faltantes se imputan con
+    `mediana_expensas` o, si no se indica, con la mediana del propio DataFrame
+    (en modo por lotes se pasa la mediana de todo el archivo). Con `workers` > 1 la
+    limpieza se reparte entre procesos; `limpias` permite pasarla ya calculada.
+    """
+    log = print if verbose else (lambda *args, **kwargs: None)
+    log("ETL: Iniciando Fase de Transformación...")
     
-    df_transformado = pd.DataFrame()
+    if limpias is None:
+        limpias = _limpiar_en_paralelo(df, workers) if workers > 1 else _limpiar_columnas(df)
+    df_transformado = limpias.copy()
     
-    df_transformado['price_usd'] = df['Price'].apply(limpiar_y_validar_precio)
-    print(f"  - Columna 'Price' transformada. Registros inválidos: {df_transformado['price_usd'].isnull().sum()}")
+    log(f"  - Columna 'Price' transformada. Registros inválidos: {df_transformado['price_usd'].isnull().sum()}")
 
-    df_transformado['expensas_ars'] = df['Expensas'].apply(limpiar_y_validar_expensas)
     nulos_antes = df_transformado['expensas_ars'].isnull().sum()
-    print(f"  - Columna 'Expensas' transformada. Registros nulos/inválidos antes de imputar: {nulos_antes}")
+    log(f"  - Columna 'Expensas' transformada. Registros nulos/inválidos antes de imputar: {nulos_antes}")
     
-    mediana_expensas = df_transformado['expensas_ars'].median()
+    if mediana_expensas is None:
+        mediana_expensas = df_transformado['expensas_ars'].median()
     df_transformado['expensas_ars'] = df_transformado['expensas_ars'].fillna(mediana_expensas)
-    print(f"  - Valores nulos de 'expensas_ars' imputados con la mediana: ${mediana_expensas:,.2f} ARS")
+    log(f"  - Valores nulos de 'expensas_ars' imputados con la mediana: ${mediana_expensas:,.2f} ARS")
 
-    df_transformado['barrio'] = df['Location'].apply(estandarizar_barrio)
-    print(f"  - Columna 'Location' estandarizada a 'barrio'. Registros no mapeados: {df_transformado['barrio'].isnull().sum()}")
+    log(f"  - Columna 'Location' estandarizada a 'barrio'. Registros no mapeados: {df_transformado['barrio'].isnull().sum()}")
 
-    features_df = df['Features'].apply(parsear_features).apply(pd.Series)
-    df_transformado = pd.concat([df_transformado, features_df], axis=1)
-    print("  - Parseando columna 'Features'...")
-    for col in ['ambientes', 'dormitorios', 'banos', 'superficie_total_m2', 'cocheras']:
-        print(f"    - {col.replace('_', ' ').capitalize()} extraídos: {df_transformado[col].notnull().sum()}")
+    log("  - Parseando columna 'Features'...")
+    for col in COLUMNAS_FEATURES:
+        log(f"    - {col.replace('_', ' ').capitalize()} extraídos: {df_transformado[col].notnull().sum()}")
 
     for col in ['ambientes', 'dormitorios', 'banos', 'cocheras']:
         df_transformado[col] = df_transformado[col].fillna(0).astype(int)
@@ -191,64 +432,604 @@ def transformar_datos(df: pd.DataFrame) -> pd.DataFrame:
     df_transformado[columnas_originales] = df[columnas_originales]
     df_transformado.rename(columns={'Address': 'address', 'Description': 'description', 'Link': 'link'}, inplace=True)
     
-    print("ETL: Fase de Transformación completada.")
+    log("ETL: Fase de Transformación completada.")
     return df_transformado
 
-def cargar_datos(df: pd.DataFrame, conn: MySQLConnectionAbstract, batch_size: int = 1000):
-    print("ETL: Iniciando Fase de Carga...")
+def transformar_lotes(lotes: Iterable[pd.DataFrame], mediana_expensas: float, workers: int = 1,
+                      medidor: Optional[MedidorEtapas] = None) -> Iterator[Tuple[pd.DataFrame, pd.DataFrame]]:
+    """
+    Transforma un flujo de lotes y devuelve pares (crudo, transformado) en el orden de
+    lectura. Con `workers` > 1 la limpieza de cada lote se resuelve en un proceso del pool
+    mientras se leen los siguientes, con a lo sumo `2 * workers` lotes en vuelo para que
+    la memoria siga acotada. `medidor` registra el tiempo que el proceso principal
+    espera por la transformación.
+    """
+    medidor = medidor or MedidorEtapas()
+    if workers <= 1:
+        for lote in lotes:
+            with medidor.medir('transformación', len(lote)):
+                transformado = transformar_datos(lote, mediana_expensas=mediana_expensas, verbose=False)
+            yield lote, transformado
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        en_vuelo = deque()
+
+        def siguiente():
+            lote, futuro = en_vuelo.popleft()
+            with medidor.medir('transformación', len(lote)):
+                limpias = _unir_particiones([futuro.result()], lote.index)
+                transformado = transformar_datos(lote, mediana_expensas=mediana_expensas, verbose=False, limpias=limpias)
+            return lote, transformado
+
+        for lote in lotes:
+            en_vuelo.append((lote, executor.submit(_limpiar_particion, _columnas_a_limpiar(lote))))
+            if len(en_vuelo) >= 2 * workers:
+                yield siguiente()
+        while en_vuelo:
+            yield siguiente()
+
+def calcular_mediana_expensas(path: str, chunksize: int) -> float:
+    """
+    Primera pasada del modo por lotes: lee solo la columna de expensas para imputar con
+    la mediana de todo el archivo, igual que al procesarlo completo.
+    """
+    return _mediana_expensas(lote['Expensas'] for lote in leer_datos_en_lotes(path, chunksize, columnas=['Expensas']))
+
+def _mediana_expensas(columnas: Iterable[pd.Series]) -> float:
+    valores = [limpiar_expensas(columna).dropna().to_numpy() for columna in columnas]
+    valores = np.concatenate(valores) if valores else np.empty(0)
+    return float(np.median(valores)) if len(valores) else float('nan')
+
+def mediana_y_lotes(path: str, chunksize: int) -> Tuple[float, Iterator[pd.DataFrame]]:
+    """
+    Mediana de expensas de todo el archivo y el iterador de sus lotes. Un pickle se
+    deserializa una sola vez para las dos cosas; los demás formatos se recorren dos veces
+    (la primera, solo la columna de expensas) para no cargarlos completos.
+    """
+    if detectar_formato(path) == 'pickle':
+        df = pd.read_pickle(path)
+        return _mediana_expensas([df['Expensas']]), _porciones(df, chunksize)
+    return calcular_mediana_expensas(path, chunksize), leer_datos_en_lotes(path, chunksize)
+
+COLUMNAS_FINALES = [
+    'source_id', 'price_usd', 'expensas_ars', 'barrio', 'address', 
+    'ambientes', 'dormitorios', 'banos', 'superficie_total_m2', 
+    'cocheras', 'description', 'link', 'scrap_date'
+]
+
+SQL_INSERT_PROPIEDADES = """
+    INSERT INTO propiedades (
+        source_id, price_usd, expensas_ars, barrio, address, 
+        ambientes, dormitorios, banos, superficie_total_m2, 
+        cocheras, description, link, scrap_date
+    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+def cargar_datos(df: pd.DataFrame, conn: MySQLConnectionAbstract, batch_size: int = 1000,
+                 verbose: bool = True) -> Optional[int]:
+    """
+    Inserta las filas transformadas en lotes de `batch_size`, confirmando cada lote junto
+    con las estadísticas por barrio. Las tuplas se arman lote a lote para no duplicar en
+    memoria todo el DataFrame. Devuelve la cantidad insertada, o None si hubo un error.
+    """
+    log = print if verbose else (lambda *args, **kwargs: None)
+    log("ETL: Iniciando Fase de Carga...")
     cursor = None
+    insertados = 0
     try:
         cursor = conn.cursor()
-        
-        columnas_finales = [
-            'source_id', 'price_usd', 'expensas_ars', 'barrio', 'address', 
-            'ambientes', 'dormitorios', 'banos', 'superficie_total_m2', 
-            'cocheras', 'description', 'link', 'scrap_date'
-        ]
+        asegurar_tabla_estadisticas(cursor)
+        conn.commit()
         
         df_final = df.rename(columns={'id': 'source_id'})
         df_final = df_final.dropna(subset=['price_usd', 'barrio'])
         
         registros_descartados = len(df) - len(df_final)
-        print(f"  - Se descartaron {registros_descartados} registros por tener precio o barrio nulos.")
+        log(f"  - Se descartaron {registros_descartados} registros por tener precio o barrio nulos.")
 
-        df_para_cargar = df_final[columnas_finales]
+        df_para_cargar = df_final[COLUMNAS_FINALES]
         
-        datos_para_insertar = [tuple(row) for row in df_para_cargar.where(pd.notnull(df_para_cargar), None).to_numpy()]
-        
-        sql = """
-            INSERT INTO propiedades (
-                source_id, price_usd, expensas_ars, barrio, address, 
-                ambientes, dormitorios, banos, superficie_total_m2, 
-                cocheras, description, link, scrap_date
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """
-        
-        for i in range(0, len(datos_para_insertar), batch_size):
-            lote = datos_para_insertar[i:i + batch_size]
-            cursor.executemany(sql, lote)
+        for i in range(0, len(df_para_cargar), batch_size):
+            porcion = df_para_cargar.iloc[i:i + batch_size]
+            # En columnas float, `where(..., None)` deja NaN: se pasa a object para que lleguen como NULL
+            lote = [tuple(row) for row in porcion.astype(object).where(pd.notnull(porcion), None).to_numpy()]
+            cursor.executemany(SQL_INSERT_PROPIEDADES, lote)
+            # Las estadísticas por barrio se actualizan en la misma transacción que el lote
+            acumular_filas(cursor, (dict(zip(COLUMNAS_FINALES, fila)) for fila in lote))
             conn.commit()
-            print(f"  - Lote de {len(lote)} registros insertado.")
+            insertados += len(lote)
+            log(f"  - Lote de {len(lote)} registros insertado.")
             
-        print(f"✅ ¡Carga exitosa! Se han insertado {len(datos_para_insertar)} registros en la tabla 'propiedades'.")
+        log(f"✅ ¡Carga exitosa! Se han insertado {insertados} registros en la tabla 'propiedades'.")
+        return insertados
         
     except mysql.connector.Error as e:
         print(f"❌ Error durante la carga de datos: {e}")
         conn.rollback()
+        return None
     finally:
         if cursor:
             cursor.close()
 
+def ejecutar_etl_por_lotes(path: str, conn: MySQLConnectionAbstract, chunksize: int, batch_size: int = 1000,
+                           workers: int = 1) -> int:
+    """
+    Modo streaming: lee, transforma e inserta un lote de `chunksize` filas antes de leer
+    el siguiente, por lo que la memoria no crece con el tamaño del archivo (salvo con un
+    pickle, que se carga completo). Hace una primera pasada solo por la columna de
+    expensas para calcular la mediana de imputación.
+    Con `workers` > 1 los lotes se transforman en paralelo (ver `transformar_lotes`).
+    """
+    if not os.path.exists(path):
+        print(f"❌ Error: El archivo no se encontró en la ruta especificada: {path}")
+        return 0
+
+    mediana_expensas, lotes_crudos = mediana_y_lotes(path, chunksize)
+    print(f"ETL: Mediana de expensas del archivo: ${mediana_expensas:,.2f} ARS")
+
+    leidos = insertados = 0
+    lotes = transformar_lotes(lotes_crudos, mediana_expensas, workers)
+    for numero, (lote, transformado) in enumerate(lotes, start=1):
+        cargados = cargar_datos(transformado, conn, batch_size, verbose=False)
+        if cargados is None:
+            print(f"❌ Se detuvo la carga en el lote {numero}; los lotes anteriores quedaron confirmados.")
+            break
+        leidos += len(lote)
+        insertados += cargados
+        print(f"  - Lote {numero}: {len(lote)} registros leídos, {cargados} insertados (acumulado: {insertados}).")
+
+    print(f"✅ Carga por lotes finalizada: {leidos} registros leídos, {insertados} insertados en 'propiedades'.")
+    return insertados
+
+# --- Carga incremental ---
+
+# Huella del contenido de cada propiedad y corrida en la que se vio por última vez
+CREAR_TABLA_ETL_ESTADO = """
+    CREATE TABLE IF NOT EXISTS etl_estado (
+        source_id VARCHAR(255) PRIMARY KEY,
+        hash CHAR(16) NOT NULL,
+        visto_en CHAR(16) NOT NULL,
+        baja_en DATETIME NULL,
+        INDEX idx_visto_en (visto_en)
+    )
+"""
+
+# Último lote confirmado de cada archivo de entrada, para poder reanudar una carga cortada
+CREAR_TABLA_ETL_CHECKPOINTS = """
+    CREATE TABLE IF NOT EXISTS etl_checkpoints (
+        corrida CHAR(16) PRIMARY KEY,
+        archivo VARCHAR(500) NOT NULL,
+        chunksize INT NOT NULL,
+        ultimo_lote INT NOT NULL DEFAULT 0,
+        completa BOOLEAN NOT NULL DEFAULT FALSE,
+        actualizado DATETIME NOT NULL
+    )
+"""
+
+# Columnas que definen si una propiedad cambió. `scrap_date` cambia en cada scrapping y no cuenta.
+COLUMNAS_HASH = [col for col in COLUMNAS_FINALES if col not in ('source_id', 'scrap_date')]
+
+SQL_UPSERT_PROPIEDADES = """
+    INSERT INTO propiedades (
+        source_id, price_usd, expensas_ars, barrio, address, 
+        ambientes, dormitorios, banos, superficie_total_m2, 
+        cocheras, description, link, scrap_date
+    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        price_usd = VALUES(price_usd), expensas_ars = VALUES(expensas_ars), barrio = VALUES(barrio),
+        address = VALUES(address), ambientes = VALUES(ambientes), dormitorios = VALUES(dormitorios),
+        banos = VALUES(banos), superficie_total_m2 = VALUES(superficie_total_m2), cocheras = VALUES(cocheras),
+        description = VALUES(description), link = VALUES(link), scrap_date = VALUES(scrap_date)
+"""
+
+SQL_UPSERT_ETL_ESTADO = """
+    INSERT INTO etl_estado (source_id, hash, visto_en) VALUES (%s, %s, %s)
+    ON DUPLICATE KEY UPDATE hash = VALUES(hash), visto_en = VALUES(visto_en), baja_en = NULL
+"""
+
+def huella_archivo(path: str) -> str:
+    """Identifica una corrida: el mismo archivo sin modificar tiene siempre la misma huella."""
+    stat = os.stat(path)
+    datos = f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+    return hashlib.sha256(datos.encode()).hexdigest()[:16]
+
+# Marcador de los faltantes en el texto canónico de cada registro
+NULO_HUELLA = '\\N'
+
+def _valor_canonico(valor) -> str:
+    if valor is None or (isinstance(valor, float) and np.isnan(valor)) or valor is pd.NA or valor is pd.NaT:
+        return NULO_HUELLA
+    if isinstance(valor, (int, float, np.integer, np.floating)) and not isinstance(valor, (bool, np.bool_)):
+        return '%.2f' % valor
+    return str(valor)
+
+def _texto_canonico(serie: pd.Series) -> pd.Series:
+    """
+    Texto de cada valor independiente de la versión de pandas y del dtype: los faltantes
+    (None, NaN, NA) son `NULO_HUELLA` y los números se escriben con dos decimales, así
+    3, 3.0 y np.int64(3) dan lo mismo.
+    """
+    if pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie):
+        valores = serie.to_numpy(dtype=np.float64, na_value=np.nan)
+        texto = np.char.mod('%.2f', valores).astype(object)
+        texto[np.isnan(valores)] = NULO_HUELLA
+        return pd.Series(texto, index=serie.index, dtype=object)
+    return pd.Series([_valor_canonico(v) for v in serie.to_numpy(dtype=object)], index=serie.index, dtype=object)
+
+def huellas_de_registros(df: pd.DataFrame) -> List[str]:
+    """
+    Hash del registro normalizado (columnas de `COLUMNAS_HASH`). Las expensas se toman
+    antes de imputar: la mediana cambia entre scrappings y no debe marcar todo como modificado.
+    """
+    canonico = _texto_canonico(df[COLUMNAS_HASH[0]])
+    for col in COLUMNAS_HASH[1:]:
+        canonico = canonico.str.cat(_texto_canonico(df[col]), sep='\x1f')
+    return [hashlib.sha256(texto.encode()).hexdigest()[:16] for texto in canonico]
+
+def _consultar_por_ids(cursor, query: str, ids: List[str], tamano: int = 1000) -> Dict[str, Any]:
+    """Ejecuta `query` (con un `IN ({})`) por tandas de ids y devuelve {source_id: valor}."""
+    resultado = {}
+    for i in range(0, len(ids), tamano):
+        tanda = ids[i:i + tamano]
+        cursor.execute(query.format(', '.join(['%s'] * len(tanda))), tanda)
+        resultado.update({str(fila[0]): fila[1] for fila in cursor.fetchall()})
+    return resultado
+
+def _filas_para_insertar(df: pd.DataFrame) -> List[tuple]:
+    df = df[COLUMNAS_FINALES]
+    return [tuple(row) for row in df.astype(object).where(pd.notnull(df), None).to_numpy()]
+
+def cargar_lote_incremental(cursor, df: pd.DataFrame, expensas_sin_imputar: pd.Series, corrida: str,
+                            batch_size: int = 1000) -> Dict[str, int]:
+    """
+    Compara cada propiedad del lote con su huella en `etl_estado` y solo escribe las nuevas
+    o modificadas (INSERT ... ON DUPLICATE KEY UPDATE). Las estadísticas por barrio se suman
+    para las nuevas y se recalculan para los barrios con propiedades modificadas. No confirma
+    la transacción: lo hace quien llama, junto con el checkpoint.
+    """
+    df_final = df.rename(columns={'id': 'source_id'}).assign(expensas_origen=expensas_sin_imputar.to_numpy())
+    df_final = df_final.dropna(subset=['price_usd', 'barrio'])
+    descartados = len(df) - len(df_final)
+
+    df_final = df_final.assign(source_id=df_final['source_id'].astype(str))
+    # Si un source_id se repite dentro del lote, vale la última aparición
+    df_final = df_final[~df_final['source_id'].duplicated(keep='last')]
+
+    huellas = huellas_de_registros(df_final.assign(expensas_ars=df_final['expensas_origen']))
+    ids = df_final['source_id'].tolist()
+    guardadas = _consultar_por_ids(cursor, "SELECT source_id, hash FROM etl_estado WHERE source_id IN ({})", ids)
+    cambiadas = np.array([guardadas.get(i) != h for i, h in zip(ids, huellas)], dtype=bool)
+
+    a_cargar = df_final[cambiadas]
+    # Las que ya están en `propiedades` (p. ej. de una carga completa anterior) son modificaciones
+    barrios_previos = _consultar_por_ids(
+        cursor, "SELECT source_id, barrio FROM propiedades WHERE source_id IN ({})", a_cargar['source_id'].tolist()
+    )
+
+    filas = _filas_para_insertar(a_cargar)
+    for i in range(0, len(filas), batch_size):
+        cursor.executemany(SQL_UPSERT_PROPIEDADES, filas[i:i + batch_size])
+
+    nuevas = [dict(zip(COLUMNAS_FINALES, fila)) for fila in filas if fila[0] not in barrios_previos]
+    acumular_filas(cursor, nuevas)
+    modificadas = a_cargar[a_cargar['source_id'].isin(list(barrios_previos))]
+    barrios_afectados = set(barrios_previos.values()) | set(modificadas['barrio'])
+    if barrios_afectados:
+        reconstruir_estadisticas(cursor, barrios_afectados)
+
+    estado = [(i, h, corrida) for i, h in zip(ids, huellas)]
+    for i in range(0, len(estado), batch_size):
+        cursor.executemany(SQL_UPSERT_ETL_ESTADO, estado[i:i + batch_size])
+
+    return {
+        "nuevas": len(nuevas),
+        "modificadas": len(modificadas),
+        "sin_cambios": int((~cambiadas).sum()),
+        "descartadas": descartados
+    }
+
+def _guardar_checkpoint(cursor, corrida: str, path: str, chunksize: int, ultimo_lote: int, completa: bool = False):
+    cursor.execute("""
+        INSERT INTO etl_checkpoints (corrida, archivo, chunksize, ultimo_lote, completa, actualizado)
+        VALUES (%s, %s, %s, %s, %s, NOW())
+        ON DUPLICATE KEY UPDATE chunksize = VALUES(chunksize), ultimo_lote = VALUES(ultimo_lote),
+            completa = VALUES(completa), actualizado = VALUES(actualizado)
+    """, (corrida, os.path.abspath(path)[-500:], chunksize, ultimo_lote, completa))
+
+def ejecutar_etl_incremental(path: str, conn: MySQLConnectionAbstract, chunksize: int, batch_size: int = 1000,
+                             marcar_ausentes: bool = False, desde_cero: bool = False,
+                             workers: int = 1) -> Optional[Dict[str, int]]:
+    """
+    Carga incremental e idempotente sobre el modo por lotes: cada lote se confirma junto con
+    las huellas y el checkpoint, así que si la carga se corta basta con volver a ejecutarla
+    para que siga desde el último lote confirmado (`desde_cero` ignora el checkpoint). Con
+    `marcar_ausentes`, las propiedades que no aparecen en el archivo quedan con `baja_en`
+    en `etl_estado` (no se borran de `propiedades`). Devuelve los totales, o None si falló.
+    """
+    if not os.path.exists(path):
+        print(f"❌ Error: El archivo no se encontró en la ruta especificada: {path}")
+        return None
+
+    corrida = huella_archivo(path)
+    cursor = conn.cursor()
+    totales = {"nuevas": 0, "modificadas": 0, "sin_cambios": 0, "descartadas": 0, "ausentes": 0}
+    try:
+        cursor.execute(CREAR_TABLA_ETL_ESTADO)
+        cursor.execute(CREAR_TABLA_ETL_CHECKPOINTS)
+        asegurar_tabla_estadisticas(cursor)
+        conn.commit()
+
+        desde = 0
+        cursor.execute("SELECT chunksize, ultimo_lote, completa FROM etl_checkpoints WHERE corrida = %s", (corrida,))
+        checkpoint = cursor.fetchone()
+        if checkpoint is not None and not desde_cero:
+            chunksize_previo, lote_previo, completa = checkpoint
+            if completa:
+                print(f"✅ El archivo ya se cargó por completo (corrida {corrida}); no hay cambios que aplicar.")
+                return totales
+            if chunksize_previo == chunksize:
+                desde = lote_previo
+                print(f"ETL: Reanudando la corrida {corrida} después del lote {desde}.")
+            else:
+                print(f"❌ El checkpoint usa --chunksize {chunksize_previo}; se vuelve a recorrer el archivo desde el principio.")
+        _guardar_checkpoint(cursor, corrida, path, chunksize, desde)
+        conn.commit()
+
+        mediana_expensas, lotes_crudos = mediana_y_lotes(path, chunksize)
+        ultimo_lote = desde
+        # Los lotes ya confirmados se saltean antes de transformarlos
+        pendientes = (lote for numero, lote in enumerate(lotes_crudos, start=1) if numero > desde)
+        for numero, (lote, transformado) in enumerate(transformar_lotes(pendientes, mediana_expensas, workers),
+                                                       start=desde + 1):
+            conteos = cargar_lote_incremental(cursor, transformado, limpiar_expensas(lote['Expensas']), corrida, batch_size)
+            _guardar_checkpoint(cursor, corrida, path, chunksize, numero)
+            conn.commit()
+            ultimo_lote = numero
+            for clave, valor in conteos.items():
+                totales[clave] += valor
+            print(f"  - Lote {numero}: {conteos['nuevas']} nuevas, {conteos['modificadas']} modificadas, "
+                  f"{conteos['sin_cambios']} sin cambios.")
+
+        if marcar_ausentes:
+            cursor.execute(
+                "UPDATE etl_estado SET baja_en = NOW() WHERE visto_en <> %s AND baja_en IS NULL", (corrida,)
+            )
+            totales["ausentes"] = cursor.rowcount
+        _guardar_checkpoint(cursor, corrida, path, chunksize, ultimo_lote, completa=True)
+        conn.commit()
+
+        print(f"✅ Carga incremental finalizada: {totales['nuevas']} nuevas, {totales['modificadas']} modificadas, "
+              f"{totales['sin_cambios']} sin cambios, {totales['ausentes']} marcadas como ausentes.")
+        return totales
+
+    except mysql.connector.Error as e:
+        print(f"❌ Error durante la carga incremental: {e}. Vuelva a ejecutarla para continuar desde el último lote confirmado.")
+        conn.rollback()
+        return None
+    finally:
+        cursor.close()
+
+# --- Carga masiva ---
+
+def _insertar_con_backend(cursor, backend: str, filas: List[tuple], batch_size: int) -> int:
+    """Inserta las filas y devuelve cuántas se insertaron (con load-data se omiten los `source_id` repetidos)."""
+    if backend == 'load-data':
+        return insertar_load_data(cursor, 'propiedades', COLUMNAS_FINALES, filas)
+    if backend == 'multifila':
+        insertar_multifila(cursor, 'propiedades', COLUMNAS_FINALES, filas)
+    else:
+        for i in range(0, len(filas), batch_size):
+            cursor.executemany(SQL_INSERT_PROPIEDADES, filas[i:i + batch_size])
+    return len(filas)
+
+def _vaciar_tablas(cursor):
+    """Recarga completa: también se descarta el estado de la carga incremental, que ya no es válido."""
+    cursor.execute(CREAR_TABLA_ETL_ESTADO)
+    cursor.execute(CREAR_TABLA_ETL_CHECKPOINTS)
+    for tabla in ('propiedades', 'estadisticas_barrio', 'etl_estado', 'etl_checkpoints'):
+        cursor.execute(f"TRUNCATE TABLE {tabla}")
+
+def ejecutar_carga_masiva(path: str, conectar: Callable[[], Optional[MySQLConnectionAbstract]], chunksize: int,
+                          backend: str = 'multifila', conexiones: int = 1, batch_size: int = 1000,
+                          vaciar: bool = False, sin_indices: bool = False, workers: int = 1,
+                          medidor: Optional[MedidorEtapas] = None) -> Optional[int]:
+    """
+    Recarga rápida en modo streaming. Cada lote transformado se inserta con el backend
+    elegido y se confirma con un único commit; con `conexiones` > 1 los lotes (disjuntos)
+    se reparten entre varias conexiones abiertas con `conectar`. Las estadísticas por
+    barrio se reconstruyen una sola vez al final en lugar de acumularse lote a lote.
+    Con `vaciar` se parte de tablas vacías y con `sin_indices` los índices secundarios
+    se quitan durante la carga y se vuelven a crear al terminar. `workers` > 1 transforma
+    los lotes en paralelo.
+
+    Con `load-data`, MySQL descarta con un warning las filas con `source_id` repetido
+    (LOCAL implica IGNORE); los otros backends fallan como la carga tradicional.
+    Devuelve la cantidad insertada, o None si hubo un error.
+    """
+    if not os.path.exists(path):
+        print(f"❌ Error: El archivo no se encontró en la ruta especificada: {path}")
+        return None
+
+    principal = conectar()
+    if principal is None:
+        return None
+    medidor = medidor or MedidorEtapas()
+    cursor = principal.cursor()
+    locales = threading.local()
+    abiertas: List[MySQLConnectionAbstract] = []
+    lock = threading.Lock()
+
+    def conexion_del_hilo() -> MySQLConnectionAbstract:
+        if conexiones == 1:
+            return principal
+        if not hasattr(locales, 'conn'):
+            conn = conectar()
+            if conn is None:
+                raise Error("No se pudo abrir una conexión adicional")
+            with lock:
+                abiertas.append(conn)
+            locales.conn = conn
+        return locales.conn
+
+    def cargar_lote(filas: List[tuple]) -> int:
+        nonlocal duplicados
+        conn = conexion_del_hilo()
+        cursor_lote = conn.cursor()
+        try:
+            inicio = time.perf_counter()
+            n = _insertar_con_backend(cursor_lote, backend, filas, batch_size)
+            conn.commit()
+            # Las filas/s de la carga cuentan solo lo que efectivamente se insertó
+            medidor.sumar('carga', time.perf_counter() - inicio, n)
+            with lock:
+                duplicados += len(filas) - n
+            return n
+        except Error:
+            conn.rollback()
+            raise
+        finally:
+            cursor_lote.close()
+
+    leidos = insertados = descartados = duplicados = 0
+    quitados: List[str] = []
+    error = None
+    try:
+        asegurar_tabla_estadisticas(cursor)
+        if vaciar:
+            _vaciar_tablas(cursor)
+        if sin_indices:
+            quitados = quitar_indices_secundarios(cursor)
+            print(f"ETL: Índices secundarios quitados durante la carga: {', '.join(quitados) or 'ninguno'}")
+        principal.commit()
+
+        with medidor.medir('mediana de expensas'):
+            mediana_expensas, lotes_crudos = mediana_y_lotes(path, chunksize)
+
+        lotes = transformar_lotes(medidor.iterar('lectura', lotes_crudos),
+                                  mediana_expensas, workers, medidor)
+        pendientes = set()
+        with ThreadPoolExecutor(max_workers=conexiones) as executor:
+            for lote, transformado in lotes:
+                if error is not None:
+                    break
+                leidos += len(lote)
+                with medidor.medir('preparación', len(lote)):
+                    validos = transformado.rename(columns={'id': 'source_id'}).dropna(subset=['price_usd', 'barrio'])
+                    filas = _filas_para_insertar(validos)
+                descartados += len(transformado) - len(validos)
+
+                if conexiones == 1:
+                    insertados += cargar_lote(filas)
+                    continue
+                pendientes.add(executor.submit(cargar_lote, filas))
+                # A lo sumo dos lotes en vuelo por conexión: la memoria sigue acotada
+                if len(pendientes) >= 2 * conexiones:
+                    terminados, pendientes = wait(pendientes, return_when=FIRST_COMPLETED)
+                    for futuro in terminados:
+                        if futuro.exception():
+                            error = futuro.exception()
+                        else:
+                            insertados += futuro.result()
+            for futuro in wait(pendientes).done:
+                if futuro.exception():
+                    error = error or futuro.exception()
+                else:
+                    insertados += futuro.result()
+    except Error as e:
+        error = e
+    finally:
+        try:
+            # Aun si la carga se cortó, los lotes confirmados quedan indexados y contados
+            if sin_indices:
+                with medidor.medir('índices', insertados):
+                    crear_indices_secundarios(cursor)
+            with medidor.medir('estadísticas'):
+                reconstruir_estadisticas(cursor)
+            principal.commit()
+        except Error as e:
+            error = error or e
+        cursor.close()
+        for conn in [principal] + abiertas:
+            conn.close()
+
+    if error is not None:
+        print(f"❌ Error durante la carga masiva: {error}. {insertados} registros quedaron confirmados.")
+        return None
+    print(f"  - Se descartaron {descartados} registros por tener precio o barrio nulos.")
+    if duplicados:
+        print(f"  - Se omitieron {duplicados} registros con source_id ya existente.")
+    print(f"✅ Carga masiva ({backend}, {conexiones} conexión/es): {leidos} registros leídos, "
+          f"{insertados} insertados en 'propiedades'.")
+    medidor.imprimir()
+    return insertados
+
+def parsear_argumentos(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="ETL: carga los datos crudos del scrapping en la tabla 'propiedades'.")
+    parser.add_argument('archivo', nargs='?', default=DATA_FILE_PATH,
+                        help="Archivo de entrada: .pkl, .csv, .jsonl o .parquet (por defecto %(default)s)")
+    parser.add_argument('--chunksize', type=int, default=50_000,
+                        help="Filas por lote en modo streaming; 0 procesa el archivo completo de una vez (por defecto %(default)s). "
+                             "Acota la memoria con .csv, .jsonl y .parquet; un .pkl siempre se carga completo")
+    parser.add_argument('--batch-size', type=int, default=1000,
+                        help="Filas por INSERT y commit (por defecto %(default)s)")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Solo inserta o actualiza las propiedades nuevas o modificadas y se puede reanudar")
+    parser.add_argument('--marcar-ausentes', action='store_true',
+                        help="Con --incremental, marca en etl_estado las propiedades que ya no aparecen")
+    parser.add_argument('--desde-cero', action='store_true',
+                        help="Con --incremental, ignora el checkpoint y recorre todo el archivo")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Procesos que transforman los datos en paralelo; 0 usa todos los núcleos (por defecto %(default)s)")
+    parser.add_argument('--backend', choices=BACKENDS, default='executemany',
+                        help="Cómo se insertan las filas: executemany (por defecto), multifila "
+                             "(INSERT ... VALUES (...), (...) del tamaño de max_allowed_packet) o load-data (LOAD DATA LOCAL INFILE)")
+    parser.add_argument('--conexiones', type=int, default=1,
+                        help="Conexiones que cargan lotes en paralelo (por defecto %(default)s)")
+    parser.add_argument('--vaciar', action='store_true',
+                        help="Recarga completa: vacía 'propiedades' y el estado incremental antes de cargar")
+    parser.add_argument('--sin-indices', action='store_true',
+                        help="Quita los índices secundarios durante la carga y los reconstruye al final")
+    args = parser.parse_args(argv)
+    if args.workers < 0:
+        parser.error("--workers no puede ser negativo")
+    args.workers = args.workers or os.cpu_count() or 1
+    args.masiva = args.backend != 'executemany' or args.conexiones != 1 or args.vaciar or args.sin_indices
+    if args.conexiones < 1:
+        parser.error("--conexiones debe ser al menos 1")
+    if args.masiva and (args.incremental or args.chunksize <= 0):
+        parser.error("--backend, --conexiones, --vaciar y --sin-indices requieren --chunksize mayor a 0 y no se combinan con --incremental")
+    if args.incremental and args.chunksize <= 0:
+        parser.error("--incremental requiere --chunksize mayor a 0")
+    if (args.marcar_ausentes or args.desde_cero) and not args.incremental:
+        parser.error("--marcar-ausentes y --desde-cero solo se usan con --incremental")
+    return args
+
 if __name__ == '__main__':
-    conn = conectar_db()
+    args = parsear_argumentos()
+    if args.masiva:
+        # Abre y cierra sus propias conexiones (una por cada carga en paralelo)
+        ejecutar_carga_masiva(args.archivo, lambda: conectar_db(local_infile=args.backend == 'load-data'),
+                              args.chunksize, args.backend, args.conexiones, args.batch_size,
+                              vaciar=args.vaciar, sin_indices=args.sin_indices, workers=args.workers)
+        print("✅ Proceso ETL completado.")
+    else:
+        conn = conectar_db()
     
-    if conn:
-        df_crudo = leer_datos_crudos(DATA_FILE_PATH)
-        
-        if df_crudo is not None:
-            df_transformado = transformar_datos(df_crudo)
+        if conn:
+            if args.incremental:
+                ejecutar_etl_incremental(args.archivo, conn, args.chunksize, args.batch_size,
+                                         marcar_ausentes=args.marcar_ausentes, desde_cero=args.desde_cero,
+                                         workers=args.workers)
+            elif args.chunksize > 0:
+                ejecutar_etl_por_lotes(args.archivo, conn, args.chunksize, args.batch_size, workers=args.workers)
+            else:
+                df_crudo = leer_datos_crudos(args.archivo)
             
-            cargar_datos(df_transformado, conn)
+                if df_crudo is not None:
+                    df_transformado = transformar_datos(df_crudo, workers=args.workers)
+                
+                    cargar_datos(df_transformado, conn, args.batch_size)
 
-        conn.close()
-        print("✅ Proceso ETL completado y conexión cerrada.")
\ No newline at end of file
+            conn.close()
+            print("✅ Proceso ETL completado y conexión cerrada.")
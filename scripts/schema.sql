@@ -0,0 +1,60 @@
+-- scripts/schema.sql
+-- Esquema de la base de datos `inmobiliario`.
+
+CREATE TABLE IF NOT EXISTS propiedades (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    source_id VARCHAR(255) UNIQUE NOT NULL,
+    price_usd DECIMAL(12,2),
+    expensas_ars DECIMAL(10,2),
+    barrio VARCHAR(100) NOT NULL,
+    address TEXT,
+    ambientes INT,
+    dormitorios INT,
+    banos INT,
+    superficie_total_m2 INT,
+    cocheras INT,
+    description TEXT,
+    link VARCHAR(500),
+    scrap_date DATETIME,
+
+    -- Índices compuestos alineados con los filtros y órdenes de GET /propiedades.
+    -- Terminan en `id` para que la paginación por keyset (valor de orden, id) sea un rango del índice.
+    INDEX idx_barrio_precio (barrio, price_usd, id),
+    INDEX idx_barrio_amb_sup (barrio, ambientes, superficie_total_m2),
+    INDEX idx_barrio_scrap_date (barrio, scrap_date, id),
+    INDEX idx_precio (price_usd, id),
+    INDEX idx_superficie (superficie_total_m2, id),
+    INDEX idx_scrap_date (scrap_date, id),
+    INDEX idx_dormitorios_precio (dormitorios, price_usd, id)
+);
+
+-- Acumulados por barrio para /propiedades/estadisticas/precio-por-barrio/ (ver src/api/estadisticas.py)
+CREATE TABLE IF NOT EXISTS estadisticas_barrio (
+    barrio VARCHAR(100) PRIMARY KEY,
+    cantidad INT NOT NULL DEFAULT 0,
+    cantidad_precio INT NOT NULL DEFAULT 0,
+    suma_precio DECIMAL(20,2) NOT NULL DEFAULT 0,
+    suma_precio_m2 DOUBLE NOT NULL DEFAULT 0,
+    precio_min DECIMAL(12,2),
+    precio_max DECIMAL(12,2)
+);
+
+-- Estado de la carga incremental del ETL (ver scripts/poblar_db.py --incremental):
+-- huella del contenido de cada propiedad y corrida en la que se vio por última vez
+CREATE TABLE IF NOT EXISTS etl_estado (
+    source_id VARCHAR(255) PRIMARY KEY,
+    hash CHAR(16) NOT NULL,
+    visto_en CHAR(16) NOT NULL,
+    baja_en DATETIME NULL,
+    INDEX idx_visto_en (visto_en)
+);
+
+-- Último lote confirmado de cada archivo de entrada, para reanudar una carga cortada
+CREATE TABLE IF NOT EXISTS etl_checkpoints (
+    corrida CHAR(16) PRIMARY KEY,
+    archivo VARCHAR(500) NOT NULL,
+    chunksize INT NOT NULL,
+    ultimo_lote INT NOT NULL DEFAULT 0,
+    completa BOOLEAN NOT NULL DEFAULT FALSE,
+    actualizado DATETIME NOT NULL
+);
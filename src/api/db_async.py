@@ -0,0 +1,171 @@
+# src/api/db_async.py
+# Pool de conexiones asíncrono (aiomysql) para los endpoints de la API: mientras una
+# consulta espera a MySQL el event loop sigue atendiendo otras peticiones, en lugar de
+# ocupar un worker del threadpool. Los scripts (ETL) siguen usando db_connection.py.
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+
+import aiomysql
+import pymysql
+from dotenv import load_dotenv
+from fastapi import HTTPException, status
+
+from .metricas_pool import ConfiguracionPool, EstadisticasPool, pool_no_disponible
+
+load_dotenv()
+
+class GestorPoolAsync:
+    """
+    Pool de aiomysql con espera acotada, validación de conexiones inactivas y
+    recreación diferida.
+
+    Un semáforo del tamaño del pool ordena a los pedidos: si no hay conexiones libres se
+    espera hasta `timeout` segundos, y si ya hay `max_espera` pedidos esperando se responde
+    503 con Retry-After de inmediato. Las conexiones que estuvieron inactivas más de
+    `validar_inactivas` segundos se validan con un ping (que reconecta si hace falta)
+    antes de entregarlas. Si el pool no se pudo crear, se reintenta en pedidos posteriores.
+    """
+
+    def __init__(self, config: ConfiguracionPool):
+        self.config = config
+        self.estadisticas = EstadisticasPool("async", config)
+        self._pool: Optional[aiomysql.Pool] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._semaforo: Optional[asyncio.Semaphore] = None
+        self._ultimo_fallo = float('-inf')
+
+    @property
+    def disponible(self) -> bool:
+        return self._pool is not None
+
+    async def _obtener_pool(self) -> aiomysql.Pool:
+        if self._pool is not None:
+            return self._pool
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            if self._pool is None:
+                if time.monotonic() - self._ultimo_fallo < self.config.retry_after:
+                    raise pool_no_disponible(self.config, "No se pudo establecer conexión con la base de datos (pool no disponible)")
+                try:
+                    self._pool = await aiomysql.create_pool(
+                        host=os.getenv("DB_HOST") or "localhost",
+                        port=int(os.getenv("DB_PORT", "3306")),
+                        user=os.getenv("DB_USER"),
+                        password=os.getenv("DB_PASSWORD") or "",
+                        db=os.getenv("DB_NAME"),
+                        minsize=1,
+                        maxsize=self.config.tamano,
+                        autocommit=False
+                    )
+                    self.estadisticas.registrar_creacion()
+                    print("✅ Pool de conexiones asíncrono creado exitosamente.")
+                except (pymysql.MySQLError, OSError) as e:
+                    self._ultimo_fallo = time.monotonic()
+                    self.estadisticas.registrar_error(str(e))
+                    print(f"❌ Error al crear el pool de conexiones asíncrono: {e}")
+                    raise pool_no_disponible(self.config, "No se pudo establecer conexión con la base de datos (pool no disponible)")
+        return self._pool
+
+    async def _esperar_turno(self):
+        if self._semaforo is None:
+            self._semaforo = asyncio.Semaphore(self.config.tamano)
+
+        ocupado = self._semaforo.locked()
+        if not self.estadisticas.puede_esperar(pool_ocupado=ocupado):
+            raise pool_no_disponible(self.config, "Pool de conexiones saturado, reintente en unos segundos")
+
+        inicio = time.monotonic()
+        try:
+            await asyncio.wait_for(self._semaforo.acquire(), timeout=self.config.timeout)
+        except asyncio.TimeoutError:
+            self.estadisticas.fin_espera(time.monotonic() - inicio, obtenida=False)
+            raise pool_no_disponible(self.config, "Tiempo de espera agotado para obtener una conexión a la base de datos")
+        except BaseException:
+            self.estadisticas.fin_espera(time.monotonic() - inicio, obtenida=False)
+            raise
+        self.estadisticas.fin_espera(time.monotonic() - inicio, obtenida=True)
+
+    def _liberar_turno(self):
+        self.estadisticas.liberada()
+        self._semaforo.release()
+
+    async def _validar(self, conn):
+        if asyncio.get_running_loop().time() - conn.last_usage <= self.config.validar_inactivas:
+            return
+        self.estadisticas.revalidada()
+        await conn.ping(reconnect=True)
+
+    @asynccontextmanager
+    async def conexion(self):
+        """Conexión del pool, devuelta al salir del bloque."""
+        await self._esperar_turno()
+        try:
+            pool = await self._obtener_pool()
+            try:
+                conn = await pool.acquire()
+            except (pymysql.MySQLError, OSError) as e:
+                self.estadisticas.registrar_error(str(e))
+                raise pool_no_disponible(self.config, f"No se pudo establecer conexión con la base de datos: {e}")
+            try:
+                try:
+                    await self._validar(conn)
+                except (pymysql.MySQLError, OSError) as e:
+                    self.estadisticas.registrar_error(str(e))
+                    raise pool_no_disponible(self.config, f"No se pudo establecer conexión con la base de datos: {e}")
+                yield conn
+            finally:
+                pool.release(conn)
+        finally:
+            self._liberar_turno()
+
+    async def cerrar(self):
+        if self._pool is not None:
+            self._pool.close()
+            await self._pool.wait_closed()
+            self._pool = None
+
+    def stats(self) -> dict:
+        return self.estadisticas.snapshot(self.disponible)
+
+gestor_pool_async = GestorPoolAsync(ConfiguracionPool.desde_entorno())
+
+async def cerrar_pool():
+    await gestor_pool_async.cerrar()
+
+@asynccontextmanager
+async def cursor_async():
+    """
+    Conexión del pool con un cursor de diccionario. Confirma la transacción al salir
+    sin errores y la revierte si hubo una excepción.
+    """
+    async with gestor_pool_async.conexion() as conn:
+        async with conn.cursor(aiomysql.DictCursor) as cursor:
+            try:
+                yield cursor
+                await conn.commit()
+            except BaseException:
+                await conn.rollback()
+                raise
+
+async def confirmar(cursor):
+    """
+    Confirma la transacción del cursor antes de que termine el pedido, para los efectos
+    fuera de la base (p. ej. el índice de similares) que solo deben aplicarse si el commit
+    salió bien. El commit posterior de la dependencia no tiene nada pendiente.
+    """
+    await cursor.connection.commit()
+
+async def get_async_cursor():
+    """
+    Dependencia de FastAPI equivalente a `get_db_cursor` pero sin bloquear el event loop.
+    """
+    try:
+        async with cursor_async() as cursor:
+            yield cursor
+    except pymysql.MySQLError as err:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Error de base de datos: {err}")
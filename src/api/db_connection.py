@@ -1,43 +1,130 @@
 # src/api/db_connection.py
+import threading
+import time
 import mysql.connector
 from mysql.connector import pooling
 from mysql.connector.pooling import PooledMySQLConnection
 from fastapi import HTTPException, status
 import os
+from typing import Optional
 from dotenv import load_dotenv
+from .metricas_pool import ConfiguracionPool, EstadisticasPool, pool_no_disponible
 
 load_dotenv()
 
-try:
-    connection_pool = mysql.connector.pooling.MySQLConnectionPool(
-        pool_name="propiedades_pool",
-        pool_size=5,
-        host=os.getenv("DB_HOST"),
-        user=os.getenv("DB_USER"),
-        password=os.getenv("DB_PASSWORD"),
-        database=os.getenv("DB_NAME")
-    )
-    print("✅ Pool de conexiones a la base de datos creado exitosamente.")
-
-except mysql.connector.Error as e:
-    print(f"❌ Error al crear el pool de conexiones: {e}")
-    connection_pool = None
-
-def get_db_connection() -> PooledMySQLConnection:
+class _ConexionGestionada:
+    """Conexión del pool que devuelve su lugar en el gestor al cerrarse."""
+
+    def __init__(self, conn: PooledMySQLConnection, gestor: "GestorPool"):
+        self._conn = conn
+        self._gestor = gestor
+        self._cerrada = False
+
+    def __getattr__(self, nombre):
+        return getattr(self._conn, nombre)
+
+    def close(self):
+        if self._cerrada:
+            return
+        self._cerrada = True
+        try:
+            self._conn.close()
+        finally:
+            self._gestor._liberar()
+
+class GestorPool:
+    """
+    Pool de `mysql.connector` con espera acotada.
+
+    Un semáforo del mismo tamaño que el pool ordena a los pedidos: si no hay conexiones
+    libres se espera hasta `timeout` segundos, y si ya hay `max_espera` pedidos esperando
+    se responde 503 de inmediato. El pool se crea en el primer uso y, si la base no estaba
+    disponible, se vuelve a intentar en pedidos posteriores. `get_connection` de
+    mysql.connector ya valida cada conexión (ping) y la reconecta antes de entregarla.
+    """
+
+    def __init__(self, config: ConfiguracionPool):
+        self.config = config
+        self.estadisticas = EstadisticasPool("sync", config)
+        self._pool: Optional[pooling.MySQLConnectionPool] = None
+        self._lock = threading.Lock()
+        self._semaforo = threading.BoundedSemaphore(config.tamano)
+        self._ultimo_fallo = float('-inf')
+
+    @property
+    def disponible(self) -> bool:
+        return self._pool is not None
+
+    def _obtener_pool(self) -> pooling.MySQLConnectionPool:
+        if self._pool is not None:
+            return self._pool
+        with self._lock:
+            if self._pool is None:
+                if time.monotonic() - self._ultimo_fallo < self.config.retry_after:
+                    raise pool_no_disponible(self.config, "No se pudo establecer conexión con la base de datos (pool no disponible)")
+                try:
+                    self._pool = mysql.connector.pooling.MySQLConnectionPool(
+                        pool_name="propiedades_pool",
+                        pool_size=self.config.tamano,
+                        host=os.getenv("DB_HOST"),
+                        user=os.getenv("DB_USER"),
+                        password=os.getenv("DB_PASSWORD"),
+                        database=os.getenv("DB_NAME")
+                    )
+                    self.estadisticas.registrar_creacion()
+                    print("✅ Pool de conexiones a la base de datos creado exitosamente.")
+                except mysql.connector.Error as e:
+                    self._ultimo_fallo = time.monotonic()
+                    self.estadisticas.registrar_error(str(e))
+                    print(f"❌ Error al crear el pool de conexiones: {e}")
+                    raise pool_no_disponible(self.config, "No se pudo establecer conexión con la base de datos (pool no disponible)")
+        return self._pool
+
+    def obtener_conexion(self) -> _ConexionGestionada:
+        ocupado = not self._semaforo.acquire(blocking=False)
+        if ocupado:
+            if not self.estadisticas.puede_esperar(pool_ocupado=True):
+                raise pool_no_disponible(self.config, "Pool de conexiones saturado, reintente en unos segundos")
+            inicio = time.monotonic()
+            obtenida = self._semaforo.acquire(timeout=self.config.timeout)
+            self.estadisticas.fin_espera(time.monotonic() - inicio, obtenida)
+            if not obtenida:
+                raise pool_no_disponible(self.config, "Tiempo de espera agotado para obtener una conexión a la base de datos")
+        else:
+            self.estadisticas.puede_esperar(pool_ocupado=False)
+            self.estadisticas.fin_espera(0.0, True)
+
+        try:
+            conn = self._obtener_pool().get_connection()
+        except mysql.connector.Error as e:
+            self._liberar()
+            self.estadisticas.registrar_error(str(e))
+            raise pool_no_disponible(self.config, f"No se pudo establecer conexión con la base de datos: {e}")
+        except BaseException:
+            self._liberar()
+            raise
+        return _ConexionGestionada(conn, self)
+
+    def _liberar(self):
+        self.estadisticas.liberada()
+        self._semaforo.release()
+
+    def stats(self) -> dict:
+        return self.estadisticas.snapshot(self.disponible)
+
+gestor_pool = GestorPool(ConfiguracionPool.desde_entorno())
+
+def get_db_connection() -> _ConexionGestionada:
     """
-    Obtiene una conexión del pool.
-    El tipo de retorno ahora es más específico.
+    Obtiene una conexión del pool. Si el pool está saturado o la base no responde
+    lanza un 503 con el header Retry-After.
     """
-    if connection_pool:
-        return connection_pool.get_connection()
-    raise HTTPException(
-        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-        detail="No se pudo establecer conexión con la base de datos (pool no disponible)"
-    )
+    return gestor_pool.obtener_conexion()
 
 def get_db_cursor():
     """
     Dependencia de FastAPI que gestiona el ciclo de vida de la conexión y el cursor.
+    Confirma la transacción si el request terminó sin errores y la revierte si no.
     """
     conn = None
     cursor = None
@@ -45,11 +132,17 @@ def get_db_cursor():
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
         yield cursor
+        conn.commit()
     except mysql.connector.Error as err:
+        if conn and conn.is_connected():
+            conn.rollback()
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Error de base de datos: {err}")
+    except BaseException:
+        if conn and conn.is_connected():
+            conn.rollback()
+        raise
     finally:
         if cursor:
             cursor.close()
-        if conn and conn.is_connected():
+        if conn:
             conn.close()
-
@@ -0,0 +1,257 @@
+# src/api/estadisticas.py
+# Estadísticas por barrio materializadas en la tabla `estadisticas_barrio`.
+# Se mantienen de forma incremental desde los endpoints de escritura y desde el ETL
+# (por eso este módulo no depende de FastAPI). Como el mínimo y el máximo no se pueden
+# "deshacer", al borrar o modificar la propiedad que los define se recalcula solo ese barrio.
+from decimal import Decimal
+from typing import Generator, Iterable, List, Optional, Tuple
+
+CREAR_TABLA_ESTADISTICAS = """
+    CREATE TABLE IF NOT EXISTS estadisticas_barrio (
+        barrio VARCHAR(100) PRIMARY KEY,
+        cantidad INT NOT NULL DEFAULT 0,
+        cantidad_precio INT NOT NULL DEFAULT 0,
+        suma_precio DECIMAL(20,2) NOT NULL DEFAULT 0,
+        suma_precio_m2 DOUBLE NOT NULL DEFAULT 0,
+        precio_min DECIMAL(12,2),
+        precio_max DECIMAL(12,2)
+    )
+"""
+
+# Mismo criterio que la consulta original: solo propiedades con superficie válida
+_AGREGADOS_DESDE_PROPIEDADES = """
+    SELECT
+        barrio,
+        COUNT(*),
+        COUNT(price_usd),
+        COALESCE(SUM(price_usd), 0),
+        COALESCE(SUM(price_usd / superficie_total_m2), 0),
+        MIN(price_usd),
+        MAX(price_usd)
+    FROM propiedades
+    WHERE superficie_total_m2 IS NOT NULL AND superficie_total_m2 > 0
+"""
+
+_ACUMULAR = """
+    INSERT INTO estadisticas_barrio
+        (barrio, cantidad, cantidad_precio, suma_precio, suma_precio_m2, precio_min, precio_max)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        cantidad = cantidad + VALUES(cantidad),
+        cantidad_precio = cantidad_precio + VALUES(cantidad_precio),
+        suma_precio = suma_precio + VALUES(suma_precio),
+        suma_precio_m2 = suma_precio_m2 + VALUES(suma_precio_m2),
+        precio_min = LEAST(COALESCE(precio_min, VALUES(precio_min)), COALESCE(VALUES(precio_min), precio_min)),
+        precio_max = GREATEST(COALESCE(precio_max, VALUES(precio_max)), COALESCE(VALUES(precio_max), precio_max))
+"""
+
+# Cada operación es un generador de pasos (query, params, modo) que recibe el resultado de
+# cada paso con `send`. Así la misma lógica se ejecuta con un cursor síncrono (ETL,
+# mysql.connector) o asíncrono (API, aiomysql) sin duplicar las sentencias.
+_EJECUTAR, _FETCHONE, _EJECUTAR_MUCHAS = 'execute', 'fetchone', 'executemany'
+
+def _ejecutar(cursor, pasos: Generator):
+    resultado = None
+    try:
+        while True:
+            query, params, modo = pasos.send(resultado)
+            resultado = None
+            if modo == _EJECUTAR_MUCHAS:
+                cursor.executemany(query, params)
+            else:
+                cursor.execute(query, params)
+                if modo == _FETCHONE:
+                    resultado = cursor.fetchone()
+    except StopIteration:
+        pass
+
+async def _ejecutar_async(cursor, pasos: Generator):
+    resultado = None
+    try:
+        while True:
+            query, params, modo = pasos.send(resultado)
+            resultado = None
+            if modo == _EJECUTAR_MUCHAS:
+                await cursor.executemany(query, params)
+            else:
+                await cursor.execute(query, params)
+                if modo == _FETCHONE:
+                    resultado = await cursor.fetchone()
+    except StopIteration:
+        pass
+
+def _pasos_asegurar_tabla():
+    yield CREAR_TABLA_ESTADISTICAS, None, _EJECUTAR
+    fila = yield "SELECT COUNT(*) AS n FROM estadisticas_barrio", None, _FETCHONE
+    n = fila['n'] if isinstance(fila, dict) else fila[0]
+    if n == 0:
+        yield from _pasos_reconstruir(None)
+
+def _pasos_reconstruir(barrios: Optional[Iterable[str]]):
+    if barrios is None:
+        yield "DELETE FROM estadisticas_barrio", None, _EJECUTAR
+        yield f"""
+            INSERT INTO estadisticas_barrio
+                (barrio, cantidad, cantidad_precio, suma_precio, suma_precio_m2, precio_min, precio_max)
+            {_AGREGADOS_DESDE_PROPIEDADES}
+            GROUP BY barrio
+        """, None, _EJECUTAR
+        return
+
+    for barrio in set(barrios):
+        yield "DELETE FROM estadisticas_barrio WHERE barrio = %s", (barrio,), _EJECUTAR
+        yield f"""
+            INSERT INTO estadisticas_barrio
+                (barrio, cantidad, cantidad_precio, suma_precio, suma_precio_m2, precio_min, precio_max)
+            {_AGREGADOS_DESDE_PROPIEDADES} AND barrio = %s
+            GROUP BY barrio
+        """, (barrio,), _EJECUTAR
+
+def _cuenta(fila: dict) -> bool:
+    superficie = fila.get('superficie_total_m2')
+    return fila.get('barrio') is not None and superficie is not None and superficie > 0
+
+def _aporte(fila: dict) -> Tuple:
+    precio = fila.get('price_usd')
+    if precio is None:
+        return (fila['barrio'], 1, 0, 0, 0.0, None, None)
+    return (fila['barrio'], 1, 1, precio, float(precio) / fila['superficie_total_m2'], precio, precio)
+
+def _pasos_acumular(filas: Iterable[dict]):
+    por_barrio = {}
+    for fila in filas:
+        if not _cuenta(fila):
+            continue
+        barrio, cantidad, cantidad_precio, suma, suma_m2, minimo, maximo = _aporte(fila)
+        actual = por_barrio.get(barrio)
+        if actual is None:
+            por_barrio[barrio] = [cantidad, cantidad_precio, suma, suma_m2, minimo, maximo]
+            continue
+        actual[0] += cantidad
+        actual[1] += cantidad_precio
+        actual[2] += suma
+        actual[3] += suma_m2
+        if minimo is not None:
+            actual[4] = minimo if actual[4] is None else min(actual[4], minimo)
+            actual[5] = maximo if actual[5] is None else max(actual[5], maximo)
+
+    if por_barrio:
+        yield _ACUMULAR, [
+            (
+                barrio, int(cantidad), int(cantidad_precio), float(suma), float(suma_m2),
+                float(minimo) if minimo is not None else None,
+                float(maximo) if maximo is not None else None
+            )
+            for barrio, (cantidad, cantidad_precio, suma, suma_m2, minimo, maximo) in por_barrio.items()
+        ], _EJECUTAR_MUCHAS
+
+def _pasos_baja(fila: dict):
+    # Devuelve True si recalculó el barrio desde `propiedades` en lugar de restar
+    if not _cuenta(fila):
+        return False
+
+    actual = yield (
+        # Bloqueada hasta el fin de la transacción: otra alta o baja del barrio no puede cambiar
+        # los extremos entre esta lectura y la resta
+        "SELECT precio_min, precio_max FROM estadisticas_barrio WHERE barrio = %s FOR UPDATE",
+        (fila['barrio'],), _FETCHONE
+    )
+    precio = fila.get('price_usd')
+    if actual is None or _es_extremo(precio, actual):
+        yield from _pasos_reconstruir([fila['barrio']])
+        return True
+
+    _, _, cantidad_precio, suma, suma_m2, _, _ = _aporte(fila)
+    yield """
+        UPDATE estadisticas_barrio
+        SET cantidad = cantidad - 1,
+            cantidad_precio = cantidad_precio - %s,
+            suma_precio = suma_precio - %s,
+            suma_precio_m2 = suma_precio_m2 - %s
+        WHERE barrio = %s
+    """, (cantidad_precio, suma, suma_m2, fila['barrio']), _EJECUTAR
+    yield "DELETE FROM estadisticas_barrio WHERE barrio = %s AND cantidad <= 0", (fila['barrio'],), _EJECUTAR
+    return False
+
+def _pasos_modificacion(anterior: dict, nueva: dict):
+    # Una baja seguida de un alta. Se llama después del UPDATE: si la baja recalculó el barrio
+    # desde `propiedades`, ese cálculo ya puede incluir la fila nueva, así que en lugar de
+    # sumarla se recalcula también su barrio.
+    recalculado = yield from _pasos_baja(anterior)
+    if not _cuenta(nueva):
+        return
+    if recalculado:
+        if nueva['barrio'] != anterior.get('barrio'):
+            yield from _pasos_reconstruir([nueva['barrio']])
+    else:
+        yield from _pasos_acumular([nueva])
+
+def _es_extremo(precio, actual) -> bool:
+    if precio is None:
+        return False
+    minimo = actual['precio_min'] if isinstance(actual, dict) else actual[0]
+    maximo = actual['precio_max'] if isinstance(actual, dict) else actual[1]
+    precio = Decimal(str(precio))
+    return (minimo is not None and precio <= minimo) or (maximo is not None and precio >= maximo)
+
+def asegurar_tabla_estadisticas(cursor):
+    """Crea la tabla si no existe y la llena la primera vez que se usa."""
+    _ejecutar(cursor, _pasos_asegurar_tabla())
+
+def reconstruir_estadisticas(cursor, barrios: Optional[Iterable[str]] = None):
+    """Recalcula desde `propiedades` todos los barrios, o solo los indicados."""
+    _ejecutar(cursor, _pasos_reconstruir(barrios))
+
+def acumular_filas(cursor, filas: Iterable[dict]):
+    """Suma un conjunto de propiedades nuevas a las estadísticas (agrupadas por barrio)."""
+    _ejecutar(cursor, _pasos_acumular(filas))
+
+def registrar_alta(cursor, fila: dict):
+    """Suma una propiedad recién creada."""
+    _ejecutar(cursor, _pasos_acumular([fila]))
+
+def registrar_baja(cursor, fila: dict):
+    """Resta una propiedad eliminada; recalcula el barrio si era su mínimo o máximo."""
+    _ejecutar(cursor, _pasos_baja(fila))
+
+def registrar_modificacion(cursor, anterior: dict, nueva: dict):
+    """
+    Aplica el cambio de una propiedad ya actualizada en `propiedades` como una baja
+    seguida de un alta.
+    """
+    _ejecutar(cursor, _pasos_modificacion(anterior, nueva))
+
+# Variantes para cursores asíncronos (aiomysql)
+async def asegurar_tabla_estadisticas_async(cursor):
+    await _ejecutar_async(cursor, _pasos_asegurar_tabla())
+
+async def registrar_alta_async(cursor, fila: dict):
+    await _ejecutar_async(cursor, _pasos_acumular([fila]))
+
+async def registrar_baja_async(cursor, fila: dict):
+    await _ejecutar_async(cursor, _pasos_baja(fila))
+
+async def registrar_modificacion_async(cursor, anterior: dict, nueva: dict):
+    await _ejecutar_async(cursor, _pasos_modificacion(anterior, nueva))
+
+CONSULTA_ESTADISTICAS = """
+    SELECT
+        barrio,
+        cantidad AS cantidad_propiedades,
+        ROUND(suma_precio / cantidad_precio, 2) AS precio_promedio_usd,
+        ROUND(precio_min, 2) AS precio_min_usd,
+        ROUND(precio_max, 2) AS precio_max_usd,
+        ROUND(suma_precio_m2 / cantidad_precio, 2) AS precio_promedio_m2_usd
+    FROM estadisticas_barrio
+    WHERE cantidad > 0
+    ORDER BY barrio
+"""
+
+def leer_estadisticas(cursor) -> List[dict]:
+    """Lee las estadísticas materializadas: una fila por barrio."""
+    cursor.execute(CONSULTA_ESTADISTICAS)
+    return cursor.fetchall()
+
+async def leer_estadisticas_async(cursor) -> List[dict]:
+    await cursor.execute(CONSULTA_ESTADISTICAS)
+    return await cursor.fetchall()
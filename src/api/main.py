@@ -1,7 +1,79 @@
+from contextlib import asynccontextmanager
+import asyncio
+import os
 from fastapi import FastAPI
-from .routers import propiedades, predictions
+from starlette.concurrency import run_in_threadpool
+from .routers import propiedades, predictions, health
+from .db_async import cursor_async, cerrar_pool
+from .estadisticas import asegurar_tabla_estadisticas_async
+from . import repositorio
+from ..ml.similares import indice_similares
+from ..ml.predict import registro, ejecutor
+
+# Si es "0", el explainer de SHAP no se precalienta y se construye en la primera explicación
+PRECARGAR_EXPLAINER = os.getenv("ML_PRECARGAR_EXPLAINER", "1") != "0"
+
+# Cada cuántos segundos se revisa si cambiaron los archivos del modelo activo (0 desactiva la recarga)
+RECARGA_MODELO_SECONDS = float(os.getenv("ML_RECARGA_SEGUNDOS", "60"))
+
+# Cada cuántos segundos se reconstruye el índice de propiedades similares desde la base
+SIMILARES_RESYNC_SECONDS = float(os.getenv("SIMILARES_RESYNC_SECONDS", "300"))
+
+async def sincronizar_indice_similares():
+    """Recarga el índice en memoria de propiedades similares desde MySQL."""
+    try:
+        async with cursor_async() as cursor:
+            filas = await repositorio.filas_indice_similares(cursor)
+        # Construir el índice es CPU: se hace fuera del event loop
+        await run_in_threadpool(indice_similares.cargar, filas)
+        print(f"✅ Índice de propiedades similares sincronizado ({len(indice_similares)} propiedades).")
+    except Exception as e:
+        print(f"❌ Error al sincronizar el índice de propiedades similares: {e}")
+
+async def preparar_estadisticas():
+    """Crea y llena la tabla de estadísticas por barrio si todavía no existe."""
+    try:
+        async with cursor_async() as cursor:
+            await asegurar_tabla_estadisticas_async(cursor)
+        print("✅ Estadísticas por barrio listas.")
+    except Exception as e:
+        print(f"❌ Error al preparar las estadísticas por barrio: {e}")
+
+async def _resincronizacion_periodica():
+    await preparar_estadisticas()
+    while True:
+        await sincronizar_indice_similares()
+        await asyncio.sleep(SIMILARES_RESYNC_SECONDS)
+
+async def _recarga_periodica_del_modelo():
+    # Tras reentrenar, basta con reemplazar los artefactos: se verifican y se activan sin reiniciar
+    while True:
+        await asyncio.sleep(RECARGA_MODELO_SECONDS)
+        await run_in_threadpool(registro.recargar_si_cambio)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # El worker acepta pedidos de inmediato; /health/ready indica cuándo el modelo está cargado
+    if ejecutor.multiproceso:
+        # Predicen y explican los procesos del ejecutor: la API solo necesita codificar las
+        # propiedades, así que no construye el explainer; cada worker carga el suyo
+        registro.activa().iniciar_precarga(explainer=False)
+        ejecutor.iniciar(registro.activa().directorio, explainer=PRECARGAR_EXPLAINER)
+    else:
+        registro.activa().iniciar_precarga(explainer=PRECARGAR_EXPLAINER)
+    tareas = [asyncio.create_task(_resincronizacion_periodica())]
+    if RECARGA_MODELO_SECONDS > 0:
+        tareas.append(asyncio.create_task(_recarga_periodica_del_modelo()))
+    yield
+    for tarea in tareas:
+        tarea.cancel()
+    await asyncio.gather(*tareas, return_exceptions=True)
+    # Las inferencias en curso terminan antes de liberar los workers
+    await run_in_threadpool(ejecutor.cerrar)
+    await cerrar_pool()
 
 app = FastAPI(
+    lifespan=lifespan,
     title="API de Análisis Inmobiliario CABA",
     description="Una API para consultar y analizar datos de propiedades ubicadas en CABA, y predecir sus precios.",
     version="1.0.0"
@@ -15,6 +87,8 @@ app.include_router(
     tags=["Predicciones"]
 )
 
+app.include_router(health.router, prefix="/health", tags=["Salud"])
+
 @app.get("/", tags=["Root"])
 def read_root():
     return {"message": "Bienvenido a la API de Análisis Inmobiliario CABA. Visite /docs para la documentación."}
@@ -0,0 +1,128 @@
+# src/api/metricas_pool.py
+# Configuración y métricas comunes a los pools de conexiones (síncrono y asíncrono).
+import os
+import threading
+from typing import Optional
+
+from fastapi import HTTPException, status
+
+# Límites superiores (ms) de los buckets del histograma de espera por una conexión
+LIMITES_ESPERA_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+class ConfiguracionPool:
+    """
+    Parámetros del pool leídos del entorno:
+    DB_POOL_SIZE (conexiones), DB_POOL_TIMEOUT (segundos máximos esperando una conexión),
+    DB_POOL_MAX_WAITING (pedidos que pueden esperar a la vez; el resto recibe 503 de inmediato),
+    DB_POOL_RETRY_AFTER (segundos sugeridos en el header Retry-After y entre intentos de recrear
+    el pool) y DB_POOL_VALIDATE_IDLE (segundos de inactividad tras los cuales se valida la conexión).
+    """
+
+    def __init__(self, tamano: int = 10, timeout: float = 5.0, max_espera: int = 50,
+                 retry_after: int = 2, validar_inactivas: float = 30.0):
+        self.tamano = tamano
+        self.timeout = timeout
+        self.max_espera = max_espera
+        self.retry_after = retry_after
+        self.validar_inactivas = validar_inactivas
+
+    @classmethod
+    def desde_entorno(cls) -> "ConfiguracionPool":
+        return cls(
+            tamano=int(os.getenv("DB_POOL_SIZE", "10")),
+            timeout=float(os.getenv("DB_POOL_TIMEOUT", "5")),
+            max_espera=int(os.getenv("DB_POOL_MAX_WAITING", "50")),
+            retry_after=int(os.getenv("DB_POOL_RETRY_AFTER", "2")),
+            validar_inactivas=float(os.getenv("DB_POOL_VALIDATE_IDLE", "30"))
+        )
+
+def pool_no_disponible(config: ConfiguracionPool, detalle: str) -> HTTPException:
+    """503 con Retry-After: el cliente puede reintentar en lugar de recibir un 500."""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=detalle,
+        headers={"Retry-After": str(config.retry_after)}
+    )
+
+class EstadisticasPool:
+    """Contadores del pool e histograma del tiempo de espera por una conexión."""
+
+    def __init__(self, nombre: str, config: ConfiguracionPool):
+        self.nombre = nombre
+        self.config = config
+        self._lock = threading.Lock()
+        self.en_uso = 0
+        self.esperando = 0
+        self.adquisiciones = 0
+        self.rechazos_saturado = 0
+        self.timeouts = 0
+        self.conexiones_revalidadas = 0
+        self.recreaciones = 0
+        self.ultimo_error: Optional[str] = None
+        self._buckets = [0] * (len(LIMITES_ESPERA_MS) + 1)
+        self._espera_total = 0.0
+
+    def puede_esperar(self, pool_ocupado: bool) -> bool:
+        """Reserva un lugar en la cola de espera; False si hay que esperar y la cola está llena."""
+        with self._lock:
+            if pool_ocupado and self.esperando >= self.config.max_espera:
+                self.rechazos_saturado += 1
+                return False
+            self.esperando += 1
+            return True
+
+    def fin_espera(self, segundos: float, obtenida: bool):
+        with self._lock:
+            self.esperando -= 1
+            if not obtenida:
+                self.timeouts += 1
+                return
+            self.adquisiciones += 1
+            self.en_uso += 1
+            self._espera_total += segundos
+            ms = segundos * 1000
+            for i, limite in enumerate(LIMITES_ESPERA_MS):
+                if ms <= limite:
+                    self._buckets[i] += 1
+                    break
+            else:
+                self._buckets[-1] += 1
+
+    def liberada(self):
+        with self._lock:
+            self.en_uso -= 1
+
+    def revalidada(self):
+        with self._lock:
+            self.conexiones_revalidadas += 1
+
+    def registrar_creacion(self):
+        with self._lock:
+            self.recreaciones += 1
+            self.ultimo_error = None
+
+    def registrar_error(self, error: str):
+        with self._lock:
+            self.ultimo_error = error
+
+    def snapshot(self, disponible: bool) -> dict:
+        with self._lock:
+            histograma = {f"le_{limite}ms": n for limite, n in zip(LIMITES_ESPERA_MS, self._buckets)}
+            histograma["gt_5000ms"] = self._buckets[-1]
+            return {
+                "pool": self.nombre,
+                "disponible": disponible,
+                "tamano": self.config.tamano,
+                "en_uso": self.en_uso,
+                "esperando": self.esperando,
+                "max_espera": self.config.max_espera,
+                "timeout_segundos": self.config.timeout,
+                "adquisiciones": self.adquisiciones,
+                "rechazos_saturado": self.rechazos_saturado,
+                "timeouts": self.timeouts,
+                "conexiones_revalidadas": self.conexiones_revalidadas,
+                "creaciones_pool": self.recreaciones,
+                "ultimo_error": self.ultimo_error,
+                "espera_promedio_ms": (self._espera_total / self.adquisiciones * 1000) if self.adquisiciones else 0.0,
+                "histograma_espera": histograma
+            }
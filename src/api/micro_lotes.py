@@ -0,0 +1,209 @@
+# src/api/micro_lotes.py
+# Agrupa los pedidos concurrentes de POST /predict/ en lotes: cada pedido deja su propiedad
+# en una cola y espera; el lote se despacha cuando junta `max_lote` propiedades o cuando la
+# más vieja esperó `max_espera_ms`, y se predice con una sola llamada a `predict_prices`.
+# El costo fijo por llamada (codificación, modelo, intervalos) se paga una vez por lote.
+import asyncio
+import os
+import threading
+from typing import Any, Callable, List, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from ..ml.ejecutor import EjecutorSaturado
+
+# Límites superiores de los buckets del histograma de tamaño de lote
+LIMITES_LOTE = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+# Límites superiores (ms) de los buckets del histograma de espera en la cola
+LIMITES_DEMORA_MS = (0.5, 1, 2, 5, 10, 25, 50, 100)
+
+class ConfiguracionMicroLotes:
+    """
+    Parámetros leídos del entorno:
+    PREDICT_MICROBATCH_MAX_WAIT_MS (espera máxima de un pedido antes de despachar su lote;
+    0 desactiva el agrupamiento), PREDICT_MICROBATCH_MAX_SIZE (propiedades por lote) y
+    PREDICT_MICROBATCH_MAX_CONCURRENT (lotes prediciéndose a la vez; mientras están todos
+    ocupados los pedidos nuevos se acumulan para el lote siguiente) y
+    PREDICT_MICROBATCH_MAX_PENDING (pedidos esperando en la cola; los siguientes se rechazan).
+    """
+
+    def __init__(self, max_espera_ms: float = 2.0, max_lote: int = 64, max_concurrentes: int = 2,
+                 max_pendientes: int = 1024):
+        self.max_espera_ms = max_espera_ms
+        self.max_lote = max_lote
+        self.max_concurrentes = max_concurrentes
+        self.max_pendientes = max_pendientes
+
+    @property
+    def habilitado(self) -> bool:
+        return self.max_espera_ms > 0 and self.max_lote > 1
+
+    @classmethod
+    def desde_entorno(cls) -> "ConfiguracionMicroLotes":
+        return cls(
+            max_espera_ms=float(os.getenv("PREDICT_MICROBATCH_MAX_WAIT_MS", "2")),
+            max_lote=int(os.getenv("PREDICT_MICROBATCH_MAX_SIZE", "64")),
+            max_concurrentes=max(1, int(os.getenv("PREDICT_MICROBATCH_MAX_CONCURRENT", "2"))),
+            max_pendientes=max(1, int(os.getenv("PREDICT_MICROBATCH_MAX_PENDING", "1024")))
+        )
+
+def _bucket(buckets: List[int], limites, valor: float):
+    for i, limite in enumerate(limites):
+        if valor <= limite:
+            buckets[i] += 1
+            return
+    buckets[-1] += 1
+
+def _histograma(limites, buckets: List[int], sufijo: str = "") -> dict:
+    histograma = {f"le_{limite}{sufijo}": n for limite, n in zip(limites, buckets)}
+    histograma[f"gt_{limites[-1]}{sufijo}"] = buckets[-1]
+    return histograma
+
+class EstadisticasMicroLotes:
+    """Lotes despachados, pedidos rechazados, histogramas de tamaño de lote y de espera en la cola."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.lotes = 0
+        self.items = 0
+        self.errores = 0
+        self.rechazados = 0
+        self.demora_total = 0.0
+        self.demora_max = 0.0
+        self._buckets_lote = [0] * (len(LIMITES_LOTE) + 1)
+        self._buckets_demora = [0] * (len(LIMITES_DEMORA_MS) + 1)
+
+    def registrar_lote(self, demoras: List[float]):
+        with self._lock:
+            self.lotes += 1
+            self.items += len(demoras)
+            _bucket(self._buckets_lote, LIMITES_LOTE, len(demoras))
+            for segundos in demoras:
+                self.demora_total += segundos
+                self.demora_max = max(self.demora_max, segundos)
+                _bucket(self._buckets_demora, LIMITES_DEMORA_MS, segundos * 1000)
+
+    def registrar_error(self):
+        with self._lock:
+            self.errores += 1
+
+    def registrar_rechazo(self):
+        with self._lock:
+            self.rechazados += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "batches": self.lotes,
+                "items": self.items,
+                "errors": self.errores,
+                "rejected": self.rechazados,
+                "mean_batch_size": self.items / self.lotes if self.lotes else 0.0,
+                "mean_queue_delay_ms": self.demora_total * 1000 / self.items if self.items else 0.0,
+                "max_queue_delay_ms": self.demora_max * 1000,
+                "batch_size_histogram": _histograma(LIMITES_LOTE, self._buckets_lote),
+                "queue_delay_histogram": _histograma(LIMITES_DEMORA_MS, self._buckets_demora, "ms"),
+            }
+
+class MicroBatcher:
+    """
+    Agrupador de pedidos para una función de lote `funcion_lote(items) -> resultados`
+    (alineados con `items`). Cada `await enviar(item)` devuelve el resultado de su ítem; si
+    el lote falla, todos sus pedidos reciben la excepción, y un resultado `{"error": ...}`
+    se convierte en `ValueError` solo para su pedido. Con `max_pendientes` pedidos en la
+    cola, los siguientes reciben `EjecutorSaturado` en lugar de esperar sin límite.
+
+    La cola vive en el event loop (no necesita locks); la función de lote corre en el
+    threadpool para no bloquearlo.
+    """
+
+    def __init__(self, funcion_lote: Callable[[List[Any]], List[Any]],
+                 config: Optional[ConfiguracionMicroLotes] = None):
+        self.funcion_lote = funcion_lote
+        self.config = config or ConfiguracionMicroLotes()
+        self.estadisticas = EstadisticasMicroLotes()
+        # Pedidos en espera: (item, future, instante de llegada según el reloj del loop)
+        self._pendientes: List[tuple] = []
+        self._en_curso = 0
+        self._temporizador: Optional[asyncio.TimerHandle] = None
+        self._tareas = set()
+
+    @property
+    def habilitado(self) -> bool:
+        return self.config.habilitado
+
+    async def enviar(self, item: Any) -> Any:
+        # Solo `max_concurrentes` lotes llegan al ejecutor: su límite no ve a los pedidos encolados acá
+        if len(self._pendientes) >= self.config.max_pendientes:
+            self.estadisticas.registrar_rechazo()
+            raise EjecutorSaturado(
+                f"Hay {len(self._pendientes)} pedidos esperando lote (máximo {self.config.max_pendientes})."
+            )
+        loop = asyncio.get_running_loop()
+        futuro = loop.create_future()
+        self._pendientes.append((item, futuro, loop.time()))
+        self._programar()
+        return await futuro
+
+    def _programar(self):
+        """Despacha un lote si está lleno o venció la espera del más viejo; si no, agenda el vencimiento."""
+        if not self._pendientes or self._en_curso >= self.config.max_concurrentes:
+            return
+        loop = asyncio.get_running_loop()
+        vence = self._pendientes[0][2] + self.config.max_espera_ms / 1000
+        if len(self._pendientes) < self.config.max_lote and loop.time() < vence:
+            if self._temporizador is None:
+                self._temporizador = loop.call_later(vence - loop.time(), self._al_vencer)
+            return
+
+        if self._temporizador is not None:
+            self._temporizador.cancel()
+            self._temporizador = None
+        lote = self._pendientes[:self.config.max_lote]
+        del self._pendientes[:self.config.max_lote]
+        self._en_curso += 1
+        tarea = loop.create_task(self._ejecutar(lote, loop.time()))
+        self._tareas.add(tarea)
+        tarea.add_done_callback(self._tareas.discard)
+        # Puede quedar otro lote lleno (o vencido) y lugar para despacharlo
+        self._programar()
+
+    def _al_vencer(self):
+        self._temporizador = None
+        self._programar()
+
+    async def _ejecutar(self, lote: List[tuple], inicio: float):
+        try:
+            self.estadisticas.registrar_lote([inicio - llegada for _, _, llegada in lote])
+            try:
+                resultados = await run_in_threadpool(self.funcion_lote, [item for item, _, _ in lote])
+            except Exception as e:
+                self.estadisticas.registrar_error()
+                for _, futuro, _ in lote:
+                    if not futuro.done():
+                        futuro.set_exception(e)
+                return
+
+            for (_, futuro, _), resultado in zip(lote, resultados):
+                # El pedido pudo cancelarse (cliente desconectado) mientras se predecía
+                if futuro.done():
+                    continue
+                if isinstance(resultado, dict) and "error" in resultado:
+                    futuro.set_exception(ValueError(resultado["error"]))
+                else:
+                    futuro.set_result(resultado)
+        finally:
+            self._en_curso -= 1
+            self._programar()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.habilitado,
+            "max_wait_ms": self.config.max_espera_ms,
+            "max_batch_size": self.config.max_lote,
+            "max_concurrent_batches": self.config.max_concurrentes,
+            "max_pending": self.config.max_pendientes,
+            "pending": len(self._pendientes),
+            "in_flight": self._en_curso,
+            **self.estadisticas.snapshot(),
+        }
@@ -0,0 +1,104 @@
+# src/api/paginacion.py
+import base64
+import binascii
+import json
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from typing import Any, List, Optional, Tuple
+
+# Columnas por las que se puede ordenar el listado. Todas tienen un índice compuesto (columna, id).
+COLUMNAS_ORDEN = ('id', 'price_usd', 'superficie_total_m2', 'scrap_date')
+
+class CursorInvalido(ValueError):
+    """El token de paginación no se pudo decodificar o no corresponde al orden pedido."""
+
+def _serializar(valor: Any):
+    if isinstance(valor, datetime):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return str(valor)
+    return valor
+
+def _deserializar(columna: str, valor: Any):
+    if columna == 'scrap_date':
+        return datetime.fromisoformat(valor)
+    if columna == 'price_usd':
+        return Decimal(str(valor))
+    return int(valor)
+
+def codificar_cursor(fila: dict, sort_by: str, order: str) -> str:
+    """Token opaco con la clave de orden y el id de la última fila devuelta."""
+    contenido = {"s": sort_by, "o": order, "v": _serializar(fila[sort_by]), "id": fila['id']}
+    return base64.urlsafe_b64encode(json.dumps(contenido).encode()).decode().rstrip('=')
+
+def decodificar_cursor(token: str, sort_by: str, order: str) -> Tuple[Any, int]:
+    try:
+        relleno = '=' * (-len(token) % 4)
+        contenido = json.loads(base64.urlsafe_b64decode(token + relleno))
+        valor = _deserializar(sort_by, contenido['v'])
+        ultimo_id = int(contenido['id'])
+    except (binascii.Error, ValueError, KeyError, TypeError, InvalidOperation) as e:
+        raise CursorInvalido(f"Cursor de paginación inválido: {e}")
+
+    if contenido.get('s') != sort_by or contenido.get('o') != order:
+        raise CursorInvalido("El cursor fue generado con otro orden; repita la consulta con los mismos 'sort_by' y 'order'.")
+    return valor, ultimo_id
+
+def construir_consulta_propiedades(
+    filtros: List[Tuple[str, Any]],
+    sort_by: str = 'id',
+    order: str = 'asc',
+    cursor_token: Optional[str] = None,
+    limit: int = 10,
+    skip: int = 0,
+) -> Tuple[str, list]:
+    """
+    Arma el SELECT del listado de propiedades.
+
+    `filtros` es una lista de pares (condición SQL con %s, valor). Con `cursor_token` se
+    pagina por keyset: en lugar de `OFFSET` se continúa desde la última clave
+    (valor de orden, id), por lo que cada página cuesta lo mismo sin importar su profundidad.
+    """
+    if sort_by not in COLUMNAS_ORDEN:
+        raise ValueError(f"Columna de orden inválida: {sort_by}")
+
+    condiciones = [condicion for condicion, _ in filtros]
+    params = [valor for _, valor in filtros]
+
+    # Las filas con NULL en la columna de orden no tienen posición definida en el keyset
+    if sort_by != 'id':
+        condiciones.append(f"{sort_by} IS NOT NULL")
+
+    comparador = '>' if order == 'asc' else '<'
+    if cursor_token:
+        valor, ultimo_id = decodificar_cursor(cursor_token, sort_by, order)
+        if sort_by == 'id':
+            condiciones.append(f"id {comparador} %s")
+            params.append(ultimo_id)
+        else:
+            condiciones.append(f"({sort_by} {comparador} %s OR ({sort_by} = %s AND id {comparador} %s))")
+            params.extend([valor, valor, ultimo_id])
+
+    query = "SELECT * FROM propiedades"
+    if condiciones:
+        query += " WHERE " + " AND ".join(condiciones)
+
+    direccion = 'ASC' if order == 'asc' else 'DESC'
+    if sort_by == 'id':
+        query += f" ORDER BY id {direccion}"
+    else:
+        query += f" ORDER BY {sort_by} {direccion}, id {direccion}"
+
+    query += " LIMIT %s"
+    params.append(limit)
+    if skip and not cursor_token:
+        query += " OFFSET %s"
+        params.append(skip)
+
+    return query, params
+
+def siguiente_cursor(filas: List[dict], sort_by: str, order: str, limit: int) -> Optional[str]:
+    """Devuelve el token de la página siguiente, o None si ésta fue la última."""
+    if len(filas) < limit:
+        return None
+    return codificar_cursor(filas[-1], sort_by, order)
@@ -0,0 +1,120 @@
+# src/api/repositorio.py
+# Consultas asíncronas de la API sobre `propiedades` y las estadísticas. Reciben un cursor
+# de diccionario de aiomysql (ver db_async.py) y no conocen nada de HTTP.
+from decimal import Decimal
+from typing import Any, List, Optional, Tuple
+
+import pymysql
+
+from .paginacion import construir_consulta_propiedades
+from .estadisticas import (
+    leer_estadisticas_async, registrar_alta_async, registrar_baja_async, registrar_modificacion_async
+)
+from ..ml.similares import CONSULTA_PROMEDIO_SIMILARES, CONSULTA_INDICE_SIMILARES, parametros_similares
+
+ERROR_TABLA_INEXISTENTE = 1146
+
+CONSULTA_ESTADISTICAS_DESDE_PROPIEDADES = """
+    SELECT
+        barrio,
+        COUNT(*) as cantidad_propiedades,
+        ROUND(AVG(price_usd), 2) as precio_promedio_usd,
+        ROUND(MIN(price_usd), 2) as precio_min_usd,
+        ROUND(MAX(price_usd), 2) as precio_max_usd,
+        ROUND(AVG(price_usd / superficie_total_m2), 2) as precio_promedio_m2_usd
+    FROM propiedades
+    WHERE superficie_total_m2 IS NOT NULL AND superficie_total_m2 > 0
+    GROUP BY barrio ORDER BY barrio;
+"""
+
+CONSULTA_EVOLUCION_MERCADO = """
+    SELECT
+        scrap_date,
+        COUNT(*) as cantidad_propiedades,
+        ROUND(AVG(price_usd), 2) as precio_promedio_usd
+    FROM propiedades
+    GROUP BY scrap_date ORDER BY scrap_date;
+"""
+
+async def listar_propiedades(
+    cursor, filtros: List[Tuple[str, Any]], sort_by: str, order: str,
+    cursor_token: Optional[str], limit: int, skip: int
+) -> List[dict]:
+    """Página del listado; puede lanzar `CursorInvalido`."""
+    query, params = construir_consulta_propiedades(filtros, sort_by, order, cursor_token, limit, skip)
+    await cursor.execute(query, tuple(params))
+    return list(await cursor.fetchall())
+
+async def obtener_propiedad(cursor, propiedad_id: int, bloquear: bool = False) -> Optional[dict]:
+    """Con `bloquear`, la fila queda tomada (FOR UPDATE) hasta el fin de la transacción."""
+    query = "SELECT * FROM propiedades WHERE id = %s" + (" FOR UPDATE" if bloquear else "")
+    await cursor.execute(query, (propiedad_id,))
+    return await cursor.fetchone()
+
+async def crear_propiedad(cursor, datos: dict) -> int:
+    """Inserta la propiedad, actualiza las estadísticas y devuelve el id generado."""
+    columnas = ", ".join(datos.keys())
+    placeholders = ", ".join(["%s"] * len(datos))
+    await cursor.execute(f"INSERT INTO propiedades ({columnas}) VALUES ({placeholders})", list(datos.values()))
+    nuevo_id = cursor.lastrowid
+    await registrar_alta_async(cursor, datos)
+    return nuevo_id
+
+async def actualizar_propiedad(cursor, propiedad_id: int, cambios: dict) -> Optional[dict]:
+    """Aplica los cambios y devuelve la propiedad actualizada, o None si no existe."""
+    # La fila queda bloqueada: dos PUT concurrentes no restan dos veces la misma versión anterior
+    anterior = await obtener_propiedad(cursor, propiedad_id, bloquear=True)
+    if not anterior:
+        return None
+
+    set_clause = ", ".join([f"{key} = %s" for key in cambios.keys()])
+    await cursor.execute(f"UPDATE propiedades SET {set_clause} WHERE id = %s", [*cambios.values(), propiedad_id])
+    if cursor.rowcount == 0:
+        # Sin cambios efectivos: las estadísticas no se tocan
+        return anterior
+
+    propiedad = await obtener_propiedad(cursor, propiedad_id)
+    await registrar_modificacion_async(cursor, anterior, propiedad)
+    return propiedad
+
+async def eliminar_propiedad(cursor, propiedad_id: int) -> Optional[dict]:
+    """Elimina la propiedad y devuelve la fila borrada, o None si no existía."""
+    anterior = await obtener_propiedad(cursor, propiedad_id, bloquear=True)
+    if not anterior:
+        return None
+
+    await cursor.execute("DELETE FROM propiedades WHERE id = %s", (propiedad_id,))
+    if cursor.rowcount == 0:
+        # Otro pedido la borró primero: ya restó la fila de las estadísticas
+        return None
+    await registrar_baja_async(cursor, anterior)
+    return anterior
+
+async def estadisticas_por_barrio(cursor) -> List[dict]:
+    """Lee la tabla materializada; si todavía no existe, agrega sobre `propiedades`."""
+    try:
+        return list(await leer_estadisticas_async(cursor))
+    except pymysql.MySQLError as err:
+        if not err.args or err.args[0] != ERROR_TABLA_INEXISTENTE:
+            raise
+
+    await cursor.execute(CONSULTA_ESTADISTICAS_DESDE_PROPIEDADES)
+    return list(await cursor.fetchall())
+
+async def evolucion_mercado(cursor) -> List[dict]:
+    await cursor.execute(CONSULTA_EVOLUCION_MERCADO)
+    return list(await cursor.fetchall())
+
+async def promedio_similares(cursor, data: dict) -> Optional[float]:
+    """Misma consulta que `get_similar_properties_avg` cuando el índice no está cargado."""
+    await cursor.execute(CONSULTA_PROMEDIO_SIMILARES, parametros_similares(data))
+    result = await cursor.fetchone()
+    avg_price = result['avg_price'] if result and result.get('avg_price') is not None else None
+    if isinstance(avg_price, Decimal):
+        return float(avg_price)
+    return avg_price
+
+async def filas_indice_similares(cursor) -> List[dict]:
+    """Filas para reconstruir `indice_similares`."""
+    await cursor.execute(CONSULTA_INDICE_SIMILARES)
+    return list(await cursor.fetchall())
@@ -0,0 +1,44 @@
+# src/api/routers/health.py
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from ..db_async import gestor_pool_async
+from ..db_connection import gestor_pool
+from ...ml.predict import registro, ejecutor
+
+router = APIRouter()
+
+@router.get("/live", summary="El proceso está vivo")
+def get_live():
+    """Responde mientras el proceso atiende pedidos, aunque el modelo todavía se esté cargando."""
+    return {"status": "alive"}
+
+@router.get("/ready", summary="El servicio está listo para predecir")
+def get_ready():
+    """
+    200 cuando el modelo, las columnas y el vectorizer están cargados; 503 mientras se
+    cargan o si alguno falló. Incluye el estado y el tiempo de carga de cada artefacto
+    (el explainer de SHAP se construye después, en segundo plano o en la primera explicación).
+    """
+    reporte = registro.activa().reporte()
+    reporte["version_activa"] = registro.nombre_activa
+    reporte["status"] = "ready" if reporte["listo"] else "not_ready"
+    return JSONResponse(status_code=200 if reporte["listo"] else 503, content=reporte)
+
+@router.get("/db-pool", summary="Estado de los pools de conexiones a la base de datos")
+def get_db_pool_stats():
+    """
+    Conexiones en uso, pedidos esperando, rechazos por saturación, timeouts e
+    histograma del tiempo de espera de cada pool (el asíncrono de la API y el síncrono).
+    """
+    return {
+        "async": gestor_pool_async.stats(),
+        "sync": gestor_pool.stats()
+    }
+
+@router.get("/inference-executor", summary="Estado del ejecutor de inferencia")
+def get_inference_executor_stats():
+    """
+    Backend (hilos o procesos), workers listos, tareas en curso, rechazos por saturación,
+    timeouts, reinicios del pool e histograma de la duración de cada tarea de inferencia.
+    """
+    return ejecutor.stats()
@@ -1,71 +1,163 @@
 # src/api/routers/predictions.py
-from fastapi import APIRouter, HTTPException, Depends
-from ..schemas import PredictionInput, PredictionOutput, ModelInfo, PredictionExplanation, ShapValue
+from fastapi import APIRouter, HTTPException, Body
+from pydantic import ValidationError
+from typing import List, Any
+from ..schemas import (
+    PredictionInput, PredictionOutput, ModelInfo, PredictionExplanation,
+    BatchPredictionItem, BatchPredictionOutput, CacheStats, ModelRegistryStatus,
+    BatchExplanationItem, BatchExplanationOutput, MicroBatchStats
+)
 from ...ml.predict import (
-    predict_price, get_similar_properties_avg, 
-    model, model_columns, vectorizer, explainer
+    predict_price, predict_prices, get_similar_properties_avg,
+    obtener_artefactos, ArtefactosNoDisponibles, prediction_cache,
+    explain_properties, explanation_cache,
+    registro, VersionInconsistente, VersionInexistente,
+    ejecutor, EjecutorSaturado, TiempoInferenciaAgotado
 )
-from ...ml.feature_engineering import crear_features_nlp
-from ..db_connection import get_db_cursor
-from mysql.connector.cursor import MySQLCursorDict
-import json
+from ...ml.similares import indice_similares
+from ..db_async import cursor_async
+from ..micro_lotes import MicroBatcher, ConfiguracionMicroLotes
+from .. import repositorio
+from starlette.concurrency import run_in_threadpool
 import os
-import pandas as pd
-import numpy as np
-
-# ruta de de forma relativa y robusta
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-ML_DIR = os.path.join(BASE_DIR, '..', '..', 'ml')
-METRICS_PATH = os.path.join(ML_DIR, 'metrics.json')
 
-try:
-    with open(METRICS_PATH, 'r') as f:
-        model_metrics = json.load(f)
-    print("✅ Métricas del modelo cargadas exitosamente.")
-except FileNotFoundError:
-    print(f"❌ Error: No se encontró el archivo de métricas en {METRICS_PATH}")
-    #  métricas por defecto si el archivo no existe
-    model_metrics = {"r2_score": "N/A", "rmse_usd": "N/A"}
+# Tamaño máximo de lote aceptado por /predict/batch
+MAX_BATCH_SIZE = int(os.getenv("PREDICT_MAX_BATCH_SIZE", "5000"))
 
+# Tamaño máximo de lote aceptado por /predict/explain/batch (SHAP exacto es mucho más caro que predecir)
+MAX_EXPLAIN_BATCH_SIZE = int(os.getenv("PREDICT_MAX_EXPLAIN_BATCH_SIZE", "500"))
 
 router = APIRouter()
 
+# Los pedidos concurrentes de POST /predict/ se predicen juntos en un solo lote
+agrupador_predicciones = MicroBatcher(predict_prices, ConfiguracionMicroLotes.desde_entorno())
+
+def _modelo_no_disponible(e: Exception) -> HTTPException:
+    print(f"❌ Modelo de predicción no disponible: {e}")
+    return HTTPException(
+        status_code=503,
+        detail="Modelo de predicción no está disponible. Revise los logs del servidor."
+    )
+
+def _error_del_ejecutor(e: Exception) -> HTTPException:
+    """503 con Retry-After si el ejecutor de inferencia está saturado; 504 si la tarea excedió su timeout."""
+    if isinstance(e, EjecutorSaturado):
+        return HTTPException(
+            status_code=503,
+            detail="El servicio de predicción está saturado. Reintente en unos instantes.",
+            headers={"Retry-After": str(ejecutor.config.retry_after)}
+        )
+    return HTTPException(status_code=504, detail=str(e))
+
+async def _promedio_similares(data_dict: dict):
+    """Usa el índice en memoria; solo si todavía no se cargó recurre a la base."""
+    if indice_similares.listo:
+        return get_similar_properties_avg(data_dict)
+
+    try:
+        async with cursor_async() as cursor:
+            return await repositorio.promedio_similares(cursor, data_dict)
+    except Exception as e:
+        print(f"Error calculando promedio de propiedades similares: {e}")
+        return None
+
 @router.post("/", response_model=PredictionOutput, summary="Predecir el precio de una propiedad")
-def predict_property_price(input_data: PredictionInput, cursor: MySQLCursorDict = Depends(get_db_cursor)):
+async def predict_property_price(input_data: PredictionInput):
     """
     Recibe las características de una propiedad y devuelve una predicción de su precio en USD
     con intervalo de confianza y promedio de propiedades similares.
     """
-    if model is None or model_columns is None:
-        raise HTTPException(
-            status_code=503, 
-            detail="Modelo de predicción no está disponible. Revise los logs del servidor."
-        )
-    
     try:
         data_dict = input_data.model_dump()
         
-        prediction_result = predict_price(data_dict)
+        # La inferencia es CPU: corre en el threadpool para no bloquear el event loop, junto
+        # con los demás pedidos que llegaron en los últimos milisegundos si el agrupador está activo
+        if agrupador_predicciones.habilitado:
+            prediction_result = await agrupador_predicciones.enviar(data_dict)
+        else:
+            prediction_result = await run_in_threadpool(predict_price, data_dict)
         
-        similar_avg = get_similar_properties_avg(data_dict, cursor)
+        similar_avg = await _promedio_similares(data_dict)
         
         return PredictionOutput(
             predicted_price_usd=prediction_result["predicted_price_usd"],
             confidence_interval=prediction_result["confidence_interval"],
             similar_properties_avg=similar_avg
         )
+    except (EjecutorSaturado, TiempoInferenciaAgotado) as e:
+        raise _error_del_ejecutor(e)
+    except ArtefactosNoDisponibles as e:
+        raise _modelo_no_disponible(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al realizar la predicción: {e}")
 
+def _predecir_lote(items: List[Any]) -> BatchPredictionOutput:
+    """Valida y predice un lote completo; es CPU, por eso se ejecuta en el threadpool."""
+    results = [BatchPredictionItem(index=i) for i in range(len(items))]
+    validos, datos_validos = [], []
+    for i, item in enumerate(items):
+        try:
+            datos_validos.append(PredictionInput.model_validate(item).model_dump())
+            validos.append(i)
+        except ValidationError as e:
+            results[i].error = "; ".join(
+                f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}" for err in e.errors()
+            )
+
+    # Sin ítems válidos no hace falta el modelo: el lote responde con los errores de validación
+    predicciones = predict_prices(datos_validos) if datos_validos else []
+
+    for i, data_dict, prediccion in zip(validos, datos_validos, predicciones):
+        if "error" in prediccion:
+            results[i].error = prediccion["error"]
+        else:
+            results[i].prediction = PredictionOutput(
+                **prediccion,
+                similar_properties_avg=get_similar_properties_avg(data_dict)
+            )
+
+    n_errors = sum(1 for r in results if r.error is not None)
+    return BatchPredictionOutput(results=results, n_success=len(results) - n_errors, n_errors=n_errors)
+
+@router.post("/batch", response_model=BatchPredictionOutput, summary="Predecir el precio de un lote de propiedades")
+async def predict_property_prices_batch(items: List[Any] = Body(..., description="Lista de propiedades con el formato de PredictionInput")):
+    """
+    Recibe un lote de propiedades y devuelve una predicción por ítem.
+
+    Cada ítem se valida por separado: los inválidos devuelven su error sin hacer
+    fallar al resto del lote. Los válidos se procesan en una única pasada vectorizada.
+    El promedio de propiedades similares se incluye solo si el índice en memoria está cargado.
+    """
+    if len(items) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"El lote supera el máximo de {MAX_BATCH_SIZE} propiedades."
+        )
+
+    try:
+        return await run_in_threadpool(_predecir_lote, items)
+    except (EjecutorSaturado, TiempoInferenciaAgotado) as e:
+        raise _error_del_ejecutor(e)
+    except ArtefactosNoDisponibles as e:
+        raise _modelo_no_disponible(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al realizar la predicción por lote: {e}")
+
 @router.get("/model-info", response_model=ModelInfo, summary="Información del modelo y feature importance")
 def get_model_info():
     """
     Devuelve metadata del modelo: tipo, métricas, y features más importantes.
     """
-    if model is None:
+    try:
+        bundle = obtener_artefactos()
+        # Con el modelo plano, model.pkl se lee recién acá y su carga todavía puede fallar
+        model = bundle.model
+        if model is None:
+            raise ArtefactosNoDisponibles("No se pudo cargar model.pkl.")
+    except ArtefactosNoDisponibles:
         raise HTTPException(status_code=503, detail="Modelo no disponible")
     
-    feature_names = model_columns
+    feature_names = bundle.model_columns
     importances = model.feature_importances_
     
     feature_importance = [
@@ -79,58 +171,151 @@ def get_model_info():
     
     return {
         "model_type": type(model).__name__,
-        "n_features": len(model_columns),
+        "n_features": len(bundle.model_columns),
         "n_estimators": model.n_estimators,
-        "metrics": model_metrics, 
-        "top_features": feature_importance
+        "metrics": bundle.metricas, 
+        "top_features": feature_importance,
+        "active_version": registro.nombre_activa,
+        "artifacts_version": bundle.version,
+        "shadow_version": registro.nombre_sombra
     }
 
+@router.get("/models", response_model=ModelRegistryStatus, summary="Versiones del modelo")
+def get_models():
+    """
+    Devuelve la versión activa, la versión en sombra (si hay) con la comparación de sus
+    predicciones contra la activa, y las versiones cargadas y disponibles en disco.
+    """
+    return registro.reporte()
+
+def _error_de_version(e: VersionInconsistente) -> HTTPException:
+    return HTTPException(status_code=404 if isinstance(e, VersionInexistente) else 422, detail=str(e))
+
+@router.post("/models/{version}/activate", response_model=ModelRegistryStatus, summary="Activar una versión del modelo")
+def activate_model(version: str, reload: bool = False, background: bool = False):
+    """
+    Carga y verifica una versión y la activa sin interrumpir los pedidos en curso.
+    Con `reload=true` se vuelven a leer los archivos aunque la versión ya esté cargada;
+    con `background=true` la activación sigue en segundo plano y responde de inmediato.
+    """
+    if background:
+        if version not in registro.disponibles():
+            raise HTTPException(status_code=404, detail=f"No existe la versión {version!r}")
+        registro.activar_en_segundo_plano(version)
+        return registro.reporte()
+    try:
+        registro.activar(version, recargar=reload)
+    except VersionInconsistente as e:
+        raise _error_de_version(e)
+    prediction_cache.set_version(registro.activa().version)
+    return registro.reporte()
+
+@router.post("/models/{version}/shadow", response_model=ModelRegistryStatus, summary="Correr una versión en sombra")
+def set_shadow_model(version: str):
+    """
+    Ejecuta una versión en paralelo a la activa sobre las mismas propiedades y registra las
+    diferencias en `/predict/models`. Las respuestas siguen saliendo de la versión activa.
+    """
+    try:
+        registro.establecer_sombra(version)
+    except VersionInconsistente as e:
+        raise _error_de_version(e)
+    return registro.reporte()
+
+@router.delete("/models/shadow", response_model=ModelRegistryStatus, summary="Desactivar la versión en sombra")
+def clear_shadow_model():
+    registro.establecer_sombra(None)
+    return registro.reporte()
+
+@router.get("/cache-stats", response_model=CacheStats, summary="Estadísticas de la cache de predicciones")
+def get_cache_stats():
+    """
+    Devuelve el tamaño, los aciertos y fallos de la cache de predicciones y la versión
+    de los artefactos con la que se generaron sus entradas.
+    """
+    return prediction_cache.stats()
+
+@router.get("/batcher-stats", response_model=MicroBatchStats, summary="Estadísticas del agrupador de predicciones")
+def get_batcher_stats():
+    """
+    Devuelve la configuración del agrupamiento de POST /predict/, los lotes despachados
+    y los histogramas de tamaño de lote y de espera de cada pedido en la cola.
+    """
+    return agrupador_predicciones.stats()
+
+@router.get("/explain/cache-stats", response_model=CacheStats, summary="Estadísticas de la cache de explicaciones")
+def get_explanation_cache_stats():
+    """
+    Devuelve el tamaño, los aciertos y fallos de la cache de explicaciones SHAP.
+    """
+    return explanation_cache.stats()
+
+def _explicador_no_disponible() -> HTTPException:
+    return HTTPException(
+        status_code=503, 
+        detail="El explicador del modelo no está disponible."
+    )
+
 @router.post("/explain", response_model=PredictionExplanation, summary="Explicar una predicción de precio")
-def explain_property_price(input_data: PredictionInput):
+def explain_property_price(input_data: PredictionInput, approximate: bool = False):
     """
     Recibe las características de una propiedad y devuelve un análisis de SHAP
     que explica cómo cada característica contribuye a la predicción final.
-    """
-    if explainer is None or model is None or model_columns is None or vectorizer is None:
-        raise HTTPException(
-            status_code=503, 
-            detail="El explicador del modelo no está disponible."
-        )
 
+    Con `approximate=true` se usa el método de Saabas: mucho más rápido, pensado para
+    interfaces interactivas, con un reparto entre features menos preciso.
+    """
     try:
-        # --- Replicar el pipeline de transformación de datos ---
-        data_dict = input_data.model_dump()
-        input_df = pd.DataFrame([data_dict])
-        
-        nlp_features_df, _ = crear_features_nlp(input_df, 'description', vectorizer=vectorizer)
-        
-        input_df_no_desc = input_df.drop(columns=['description'], errors='ignore')
-        input_enriquecido = pd.concat([input_df_no_desc, nlp_features_df], axis=1)
+        return explain_properties([input_data.model_dump()], aproximada=approximate)[0]
+    except (EjecutorSaturado, TiempoInferenciaAgotado) as e:
+        raise _error_del_ejecutor(e)
+    except ArtefactosNoDisponibles:
+        raise _explicador_no_disponible()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al generar la explicación: {e}")
 
-        input_encoded = pd.get_dummies(input_enriquecido, columns=['barrio'], dtype=int)
-        
-        final_df = input_encoded.reindex(columns=model_columns, fill_value=0)
-        
-        # --- Calcular valores SHAP ---
-        shap_values = explainer.shap_values(final_df)
-        
-        # Formatear la salida
-        shap_values_list = []
-        for feature, shap_value in zip(final_df.columns, shap_values[0]):
-            # Solo incluir features que tienen un impacto (no son cero)
-            if shap_value != 0:
-                shap_values_list.append(ShapValue(feature=feature, value=shap_value))
-        
-        # Ordenar por valor absoluto para mostrar los más importantes primero
-        shap_values_list.sort(key=lambda x: abs(x.value), reverse=True)
-        
-        base_value = explainer.expected_value
-        prediction = np.sum(shap_values[0]) + base_value
+def _explicar_lote(items: List[Any], aproximada: bool) -> BatchExplanationOutput:
+    """Valida y explica un lote completo con una sola llamada a SHAP; se ejecuta en el threadpool."""
+    results = [BatchExplanationItem(index=i) for i in range(len(items))]
+    validos, datos_validos = [], []
+    for i, item in enumerate(items):
+        try:
+            datos_validos.append(PredictionInput.model_validate(item).model_dump())
+            validos.append(i)
+        except ValidationError as e:
+            results[i].error = "; ".join(
+                f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}" for err in e.errors()
+            )
 
-        return PredictionExplanation(
-            base_value=base_value,
-            shap_values=shap_values_list[:15], # Devolver solo los 15 más importantes
-            prediction_usd=prediction
+    if datos_validos:
+        for i, explicacion in zip(validos, explain_properties(datos_validos, aproximada=aproximada)):
+            results[i].explanation = PredictionExplanation(**explicacion)
+
+    n_errors = sum(1 for r in results if r.error is not None)
+    return BatchExplanationOutput(results=results, n_success=len(results) - n_errors, n_errors=n_errors)
+
+@router.post("/explain/batch", response_model=BatchExplanationOutput, summary="Explicar un lote de predicciones")
+async def explain_property_prices_batch(
+    items: List[Any] = Body(..., description="Lista de propiedades con el formato de PredictionInput"),
+    approximate: bool = False
+):
+    """
+    Recibe un lote de propiedades y devuelve la explicación SHAP de cada una.
+
+    Cada ítem se valida por separado, y los válidos que no están en la cache se explican
+    juntos en una sola llamada al explainer.
+    """
+    if len(items) > MAX_EXPLAIN_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"El lote supera el máximo de {MAX_EXPLAIN_BATCH_SIZE} propiedades."
         )
+
+    try:
+        return await run_in_threadpool(_explicar_lote, items, approximate)
+    except (EjecutorSaturado, TiempoInferenciaAgotado) as e:
+        raise _error_del_ejecutor(e)
+    except ArtefactosNoDisponibles:
+        raise _explicador_no_disponible()
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error al generar la explicación: {e}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error al generar las explicaciones: {e}")
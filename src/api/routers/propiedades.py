@@ -1,46 +1,73 @@
 # src/api/routers/propiedades.py
-from fastapi import APIRouter, HTTPException, Query, status, Depends
-from typing import List, Optional
-import mysql.connector
-from mysql.connector.cursor import MySQLCursorDict
-from ..db_connection import get_db_cursor
+from fastapi import APIRouter, HTTPException, Query, Response, status, Depends
+from typing import List, Optional, Literal
+from datetime import datetime
+import pymysql
+from aiomysql import DictCursor
+from ..db_async import get_async_cursor, confirmar
+from ..paginacion import siguiente_cursor, CursorInvalido
+from .. import repositorio
+from ...ml.similares import indice_similares
 from ..schemas import Propiedad, EstadisticasBarrio, PropiedadCreate, PropiedadUpdate, EvolucionMercado
 
 router = APIRouter()
 
 @router.get("/", response_model=List[Propiedad], summary="Obtener un listado de propiedades con filtros")
-def get_propiedades(
+async def get_propiedades(
+    response: Response,
     barrio: Optional[str] = Query(None, description="Filtrar propiedades por barrio"),
     ambientes_min: Optional[int] = Query(None, description="Número mínimo de ambientes"),
+    dormitorios: Optional[int] = Query(None, ge=0, description="Cantidad exacta de dormitorios"),
+    price_min_usd: Optional[float] = Query(None, description="Precio mínimo en USD"),
     price_max_usd: Optional[float] = Query(None, description="Precio máximo en USD"),
-    skip: int = Query(0, ge=0, description="Número de registros a omitir (para paginación)"),
+    superficie_min: Optional[int] = Query(None, description="Superficie total mínima en m²"),
+    superficie_max: Optional[int] = Query(None, description="Superficie total máxima en m²"),
+    scrap_date_desde: Optional[datetime] = Query(None, description="Fecha de scraping desde (inclusive)"),
+    scrap_date_hasta: Optional[datetime] = Query(None, description="Fecha de scraping hasta (inclusive)"),
+    sort_by: Literal['id', 'price_usd', 'superficie_total_m2', 'scrap_date'] = Query('id', description="Columna de orden"),
+    order: Literal['asc', 'desc'] = Query('asc', description="Dirección del orden"),
+    cursor_token: Optional[str] = Query(None, alias="cursor", description="Token 'X-Next-Cursor' de la página anterior (paginación por keyset)"),
+    skip: int = Query(0, ge=0, description="Número de registros a omitir (paginación por OFFSET; preferir 'cursor')"),
     limit: int = Query(10, ge=1, le=100, description="Número máximo de registros a devolver"),
-    cursor: MySQLCursorDict = Depends(get_db_cursor) # Inyección de dependencia
+    cursor: DictCursor = Depends(get_async_cursor) # Inyección de dependencia
 ):
-    query = "SELECT * FROM propiedades WHERE 1=1"
-    params = []
-    
-    if barrio:
-        query += " AND barrio = %s"
-        params.append(barrio)
-    if ambientes_min is not None:
-        query += " AND ambientes >= %s"
-        params.append(ambientes_min)
-    if price_max_usd is not None:
-        query += " AND price_usd <= %s"
-        params.append(price_max_usd)
-        
-    query += " ORDER BY id LIMIT %s OFFSET %s"
-    params.extend([limit, skip])
-    
-    cursor.execute(query, tuple(params))
-    return cursor.fetchall()
+    """
+    Lista propiedades con filtros y orden configurable.
+
+    Si hay más resultados, la respuesta incluye el header `X-Next-Cursor`; pasarlo como
+    `cursor` devuelve la página siguiente sin recorrer las anteriores. Al ordenar por una
+    columna distinta de `id` se omiten las propiedades con esa columna en NULL.
+    """
+    if cursor_token and skip:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No se puede combinar 'cursor' con 'skip'")
+
+    filtros = [
+        (condicion, valor) for condicion, valor in [
+            ("barrio = %s", barrio),
+            ("ambientes >= %s", ambientes_min),
+            ("dormitorios = %s", dormitorios),
+            ("price_usd >= %s", price_min_usd),
+            ("price_usd <= %s", price_max_usd),
+            ("superficie_total_m2 >= %s", superficie_min),
+            ("superficie_total_m2 <= %s", superficie_max),
+            ("scrap_date >= %s", scrap_date_desde),
+            ("scrap_date <= %s", scrap_date_hasta),
+        ] if valor is not None
+    ]
+
+    try:
+        propiedades = await repositorio.listar_propiedades(cursor, filtros, sort_by, order, cursor_token, limit, skip)
+    except CursorInvalido as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    next_cursor = siguiente_cursor(propiedades, sort_by, order, limit)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return propiedades
 
 @router.get("/{propiedad_id}", response_model=Propiedad, summary="Obtener una propiedad por su ID")
-def get_propiedad_by_id(propiedad_id: int, cursor: MySQLCursorDict = Depends(get_db_cursor)):
-    query = "SELECT * FROM propiedades WHERE id = %s"
-    cursor.execute(query, (propiedad_id,))
-    propiedad = cursor.fetchone()
+async def get_propiedad_by_id(propiedad_id: int, cursor: DictCursor = Depends(get_async_cursor)):
+    propiedad = await repositorio.obtener_propiedad(cursor, propiedad_id)
     
     if not propiedad:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Propiedad no encontrada")
@@ -48,85 +75,51 @@ def get_propiedad_by_id(propiedad_id: int, cursor: MySQLCursorDict = Depends(get
     return propiedad
 
 @router.get("/estadisticas/precio-por-barrio/", response_model=List[EstadisticasBarrio], summary="Obtener estadísticas de precios por barrio")
-def get_estadisticas_por_barrio(cursor: MySQLCursorDict = Depends(get_db_cursor)):
-    query = """
-        SELECT 
-            barrio,
-            COUNT(*) as cantidad_propiedades,
-            ROUND(AVG(price_usd), 2) as precio_promedio_usd,
-            ROUND(MIN(price_usd), 2) as precio_min_usd,
-            ROUND(MAX(price_usd), 2) as precio_max_usd,
-            ROUND(AVG(price_usd / superficie_total_m2), 2) as precio_promedio_m2_usd
-        FROM propiedades
-        WHERE superficie_total_m2 IS NOT NULL AND superficie_total_m2 > 0
-        GROUP BY barrio ORDER BY barrio;
-    """
-    cursor.execute(query)
-    return cursor.fetchall()
+async def get_estadisticas_por_barrio(cursor: DictCursor = Depends(get_async_cursor)):
+    # Se leen los acumulados de `estadisticas_barrio`: O(cantidad de barrios) en lugar de recorrer la tabla
+    return await repositorio.estadisticas_por_barrio(cursor)
 
 @router.get("/estadisticas/evolucion-mercado/", response_model=List[EvolucionMercado], summary="Obtener la evolución del mercado por fecha de scraping")
-def get_evolucion_mercado(cursor: MySQLCursorDict = Depends(get_db_cursor)):
-    query = """
-        SELECT 
-            scrap_date,
-            COUNT(*) as cantidad_propiedades,
-            ROUND(AVG(price_usd), 2) as precio_promedio_usd
-        FROM propiedades
-        GROUP BY scrap_date ORDER BY scrap_date;
-    """
-    cursor.execute(query)
-    return cursor.fetchall()
+async def get_evolucion_mercado(cursor: DictCursor = Depends(get_async_cursor)):
+    return await repositorio.evolucion_mercado(cursor)
 
 @router.post("/", response_model=Propiedad, status_code=status.HTTP_201_CREATED, summary="Añadir una nueva propiedad")
-def create_propiedad(propiedad: PropiedadCreate, cursor: MySQLCursorDict = Depends(get_db_cursor)):
+async def create_propiedad(propiedad: PropiedadCreate, cursor: DictCursor = Depends(get_async_cursor)):
     try:
         datos_propiedad = propiedad.model_dump()
-        columnas = ", ".join(datos_propiedad.keys())
-        placeholders = ", ".join(["%s"] * len(datos_propiedad))
-        query = f"INSERT INTO propiedades ({columnas}) VALUES ({placeholders})"
-        
-        cursor.execute(query, list(datos_propiedad.values()))
-        
-        nuevo_id = cursor.lastrowid
+        nuevo_id = await repositorio.crear_propiedad(cursor, datos_propiedad)
+        # El índice en memoria se toca recién con la fila confirmada: si el commit falla, no queda una fila fantasma
+        await confirmar(cursor)
+        indice_similares.upsert({"id": nuevo_id, **datos_propiedad})
         
         return {"id": nuevo_id, **datos_propiedad}
 
-    except mysql.connector.Error as err:
-        if err.errno == 1062:
+    except pymysql.MySQLError as err:
+        if err.args and err.args[0] == 1062:
             raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Ya existe una propiedad con ese 'source_id'")
         # Otros errores de base de datos son manejados por la dependencia.
         raise
 
 @router.put("/{propiedad_id}", response_model=Propiedad, summary="Actualizar una propiedad existente")
-def update_propiedad(propiedad_id: int, updates: PropiedadUpdate, cursor: MySQLCursorDict = Depends(get_db_cursor)):
+async def update_propiedad(propiedad_id: int, updates: PropiedadUpdate, cursor: DictCursor = Depends(get_async_cursor)):
     update_data = updates.model_dump(exclude_unset=True)
     if not update_data:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No se proporcionaron datos para actualizar")
 
-    set_clause = ", ".join([f"{key} = %s" for key in update_data.keys()])
-    params = list(update_data.values())
-    params.append(propiedad_id)
-
-    query = f"UPDATE propiedades SET {set_clause} WHERE id = %s"
-    cursor.execute(query, params)
-    
-    if cursor.rowcount == 0:
+    propiedad = await repositorio.actualizar_propiedad(cursor, propiedad_id, update_data)
+    if not propiedad:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Propiedad no encontrada para actualizar")
-    
-    select_query = "SELECT * FROM propiedades WHERE id = %s"
-    cursor.execute(select_query, (propiedad_id,))
-    return cursor.fetchone()
+
+    await confirmar(cursor)
+    indice_similares.upsert(propiedad)
+    return propiedad
 
 @router.delete("/{propiedad_id}", status_code=status.HTTP_204_NO_CONTENT, summary="Eliminar una propiedad")
-def delete_propiedad(propiedad_id: int, cursor: MySQLCursorDict = Depends(get_db_cursor)):
-    query = "DELETE FROM propiedades WHERE id = %s"
-    cursor.execute(query, (propiedad_id,))
-    
-    if cursor.rowcount == 0:
+async def delete_propiedad(propiedad_id: int, cursor: DictCursor = Depends(get_async_cursor)):
+    anterior = await repositorio.eliminar_propiedad(cursor, propiedad_id)
+    if not anterior:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Propiedad no encontrada para eliminar")
-    
-    return None
-
-
-
 
+    await confirmar(cursor)
+    indice_similares.remove(propiedad_id)
+    return None
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, field_validator
-from typing import Optional, List
+from typing import Dict, Optional, List
 from datetime import datetime
 
 # Schemas para Propiedades (CRUD y Listado)
@@ -109,6 +109,48 @@ class PredictionOutput(BaseModel):
             }
         }
 
+class BatchPredictionItem(BaseModel):
+    index: int = Field(..., description="Posición del ítem en el lote recibido")
+    prediction: Optional[PredictionOutput] = None
+    error: Optional[str] = Field(
+        None,
+        description="Motivo por el que el ítem no pudo predecirse (validación o procesamiento)"
+    )
+
+class BatchPredictionOutput(BaseModel):
+    results: List[BatchPredictionItem]
+    n_success: int
+    n_errors: int
+
+class CacheStats(BaseModel):
+    size: int
+    max_size: int
+    ttl_seconds: float
+    hits: int
+    shared_hits: int
+    misses: int
+    hit_rate: float
+    shared_backend: Optional[str] = None
+    version: str
+
+class MicroBatchStats(BaseModel):
+    enabled: bool
+    max_wait_ms: float
+    max_batch_size: int
+    max_concurrent_batches: int
+    max_pending: int
+    pending: int
+    in_flight: int
+    batches: int
+    items: int
+    errors: int
+    rejected: int
+    mean_batch_size: float
+    mean_queue_delay_ms: float
+    max_queue_delay_ms: float
+    batch_size_histogram: Dict[str, int]
+    queue_delay_histogram: Dict[str, int]
+
 class FeatureImportance(BaseModel):
     feature: str
     importance: float
@@ -119,6 +161,27 @@ class ModelInfo(BaseModel):
     n_estimators: int
     metrics: dict
     top_features: List[FeatureImportance]
+    active_version: Optional[str] = None
+    artifacts_version: Optional[str] = None
+    shadow_version: Optional[str] = None
+
+class ShadowComparison(BaseModel):
+    n: int
+    mean_abs_diff_usd: Optional[float] = None
+    mean_rel_diff: Optional[float] = None
+    max_abs_diff_usd: Optional[float] = None
+    errors: int
+    dropped: int = 0
+
+class ModelRegistryStatus(BaseModel):
+    active_version: str
+    active_artifacts: Optional[str] = None
+    shadow_version: Optional[str] = None
+    shadow_artifacts: Optional[str] = None
+    loaded_versions: List[str]
+    available_versions: List[str]
+    loading: bool
+    shadow_comparison: Optional[ShadowComparison] = None
 
 
 class ShapValue(BaseModel):
@@ -129,6 +192,17 @@ class PredictionExplanation(BaseModel):
     base_value: float
     shap_values: List[ShapValue]
     prediction_usd: float
+    approximate: bool = False
+
+class BatchExplanationItem(BaseModel):
+    index: int
+    explanation: Optional[PredictionExplanation] = None
+    error: Optional[str] = None
+
+class BatchExplanationOutput(BaseModel):
+    results: List[BatchExplanationItem]
+    n_success: int
+    n_errors: int
 
 
 
@@ -0,0 +1,253 @@
+# src/ml/artefactos.py
+import json
+import os
+import pickle
+import threading
+import time
+import warnings
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+from .encoder import FeatureEncoder
+from .vectorizer_hashing import HashingTfidfVectorizer, ARCHIVO_HASHING, ARCHIVO_IDF
+from .bosque_plano import BosquePlano, ARCHIVO_NODOS, ARCHIVO_META
+from .motor_arboles import TreeEngine, MOTORES_INFERENCIA
+from .uncertainty import UncertaintyEngine, cargar_calibracion
+from .cache import crear_normalizador_descripcion, version_artefactos
+
+# Lotes de hasta esta cantidad de filas se predicen con el TreeEngine; los más grandes, con el
+# modelo deserializado, que en lotes grandes recorre los árboles más rápido (sobre todo XGBoost)
+MAX_FILAS_MOTOR = int(os.getenv("ML_MOTOR_MAX_FILAS", "64"))
+
+# Métricas que se informan si no existe metrics.json
+METRICAS_POR_DEFECTO = {"r2_score": "N/A", "rmse_usd": "N/A"}
+
+ARCHIVOS = {
+    'modelo': 'model.pkl',
+    'columnas': 'model_columns.pkl',
+    'vectorizer': 'tfidf_vectorizer.pkl',
+    'intervalos': 'intervalos.json',
+    'metricas': 'metrics.json',
+    'bosque_plano': ARCHIVO_NODOS,
+}
+
+class ArtefactosNoDisponibles(RuntimeError):
+    """El modelo, las columnas o el vectorizer no se pudieron cargar."""
+
+def _leer_pickle(path: str):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+def _leer_json(path: str):
+    with open(path) as f:
+        return json.load(f)
+
+class ArtifactBundle:
+    """
+    Artefactos de un modelo entrenado (modelo, columnas, vectorizer, calibración de
+    intervalos y métricas) junto con los objetos que se derivan de ellos.
+
+    Construirlo no lee nada: `cargar()` lee los archivos una sola vez (es seguro llamarlo
+    desde varios hilos) y el explainer de SHAP se construye recién en el primer
+    `obtener_explainer()`, por lo que `shap` solo se importa si se piden explicaciones.
+    `xgboost` se importa únicamente al deserializar un modelo XGBoost. Cada paso registra
+    su estado y su duración, que se exponen en `/health/ready`.
+
+    Con el motor 'numpy' (por defecto) y un modelo plano en el directorio, las predicciones
+    de hasta `MAX_FILAS_MOTOR` filas las hace un `TreeEngine` y `model.pkl` no se deserializa
+    hasta que algo lo pida (un lote más grande, el explainer de SHAP, `/model-info`): un
+    worker que solo atiende predicciones individuales comparte las páginas del .npy.
+    """
+
+    def __init__(self, directorio: str, modo_intervalo: Optional[str] = None,
+                 motor_inferencia: Optional[str] = None):
+        motor_inferencia = motor_inferencia or 'numpy'
+        if motor_inferencia not in MOTORES_INFERENCIA:
+            raise ValueError(f"Motor de inferencia '{motor_inferencia}' inválido. Debe ser uno de: {MOTORES_INFERENCIA}")
+        self.directorio = directorio
+        self.modo_intervalo = modo_intervalo
+        self.motor_inferencia = motor_inferencia
+        self.rutas = {nombre: os.path.join(directorio, archivo) for nombre, archivo in ARCHIVOS.items()}
+        # Alternativa al pickle del vectorizer: TF-IDF por hashing con el IDF en un .npy
+        self.rutas['vectorizer_hashing'] = os.path.join(directorio, ARCHIVO_HASHING)
+        self.rutas['idf_hashing'] = os.path.join(directorio, ARCHIVO_IDF)
+        self.rutas['meta_plano'] = os.path.join(directorio, ARCHIVO_META)
+
+        self.version: Optional[str] = None
+        self._model = None
+        self._modelo_diferido = False
+        self.bosque_plano: Optional[BosquePlano] = None
+        self.tree_engine: Optional[TreeEngine] = None
+        self.model_columns = None
+        self.vectorizer = None
+        self.feature_encoder: Optional[FeatureEncoder] = None
+        self.uncertainty_engine: Optional[UncertaintyEngine] = None
+        self.normalizar_descripcion = None
+        self.metricas = dict(METRICAS_POR_DEFECTO)
+
+        self.estado = {
+            nombre: {"estado": "pendiente", "segundos": None, "error": None}
+            for nombre in [*ARCHIVOS, 'explainer']
+        }
+        self._cargado = False
+        self._explainer = None
+        self._lock = threading.Lock()
+        self._lock_explainer = threading.Lock()
+        self._lock_modelo = threading.Lock()
+
+    @property
+    def model(self):
+        """Modelo deserializado; si se difirió, se lee de `model.pkl` en el primer acceso."""
+        if self._modelo_diferido:
+            with self._lock_modelo:
+                if self._modelo_diferido:
+                    self._model = self._paso('modelo', lambda: _leer_pickle(self.rutas['modelo']))
+                    self._modelo_diferido = False
+        return self._model
+
+    @property
+    def modelo_diferido(self) -> bool:
+        """True si `model.pkl` todavía no se deserializó porque predice el `TreeEngine`."""
+        return self._modelo_diferido
+
+    @property
+    def listo(self) -> bool:
+        """True si se puede predecir: modelo (o modelo plano), columnas y vectorizer cargados."""
+        return (self._cargado and self.feature_encoder is not None
+                and (self.tree_engine is not None or self._model is not None))
+
+    def _paso(self, nombre: str, funcion: Callable[[], Any], opcional: bool = False):
+        inicio = time.perf_counter()
+        try:
+            valor = funcion()
+            self.estado[nombre] = {"estado": "ok", "segundos": time.perf_counter() - inicio, "error": None}
+            return valor
+        except FileNotFoundError as e:
+            estado = "no_encontrado" if opcional else "error"
+            self.estado[nombre] = {"estado": estado, "segundos": time.perf_counter() - inicio, "error": str(e)}
+            if not opcional:
+                print(f"❌ Error: No se encontró el artefacto '{nombre}' en {self.rutas.get(nombre)}")
+        except Exception as e:
+            self.estado[nombre] = {"estado": "error", "segundos": time.perf_counter() - inicio, "error": str(e)}
+            print(f"❌ Error al cargar el artefacto '{nombre}': {e}")
+        return None
+
+    def cargar(self) -> "ArtifactBundle":
+        """Lee los artefactos la primera vez; las llamadas siguientes no hacen nada."""
+        if self._cargado:
+            return self
+        with self._lock:
+            if self._cargado:
+                return self
+
+            self.version = self.huella()
+            # Opcional: los mismos árboles en formato plano, abiertos con mmap
+            self.bosque_plano = self._paso('bosque_plano', lambda: BosquePlano.cargar(self.directorio), opcional=True)
+            if self.bosque_plano is not None and self.motor_inferencia == 'numpy':
+                self.tree_engine = TreeEngine(self.bosque_plano)
+            if self.tree_engine is not None and os.path.exists(self.rutas['modelo']):
+                self._modelo_diferido = True
+                self.estado['modelo']['estado'] = 'diferido'
+            else:
+                self.tree_engine = None
+                self._model = self._paso('modelo', lambda: _leer_pickle(self.rutas['modelo']))
+            self.model_columns = self._paso('columnas', lambda: _leer_pickle(self.rutas['columnas']))
+            self.vectorizer = self._paso('vectorizer', self._leer_vectorizer)
+            calibracion = self._paso('intervalos', lambda: cargar_calibracion(self.rutas['intervalos']))
+            if calibracion is None and self.estado['intervalos']['estado'] == 'ok':
+                self.estado['intervalos']['estado'] = 'no_encontrado'
+            self.metricas = self._paso('metricas', lambda: _leer_json(self.rutas['metricas']), opcional=True) \
+                or dict(METRICAS_POR_DEFECTO)
+
+            if self.model_columns is not None and self.vectorizer is not None:
+                self.feature_encoder = FeatureEncoder(self.model_columns, self.vectorizer)
+                self.normalizar_descripcion = crear_normalizador_descripcion(self.vectorizer)
+
+            predictor = self.tree_engine or self._model
+            if predictor is not None:
+                try:
+                    self.uncertainty_engine = UncertaintyEngine(
+                        predictor, calibracion=calibracion, modo=self.modo_intervalo
+                    )
+                except ValueError as e:
+                    print(f"❌ Error al crear el motor de intervalos: {e}")
+
+            self._cargado = True
+            if self.listo:
+                print(f"✅ Artefactos del modelo cargados (versión {self.version}).")
+        return self
+
+    def predecir(self, X):
+        """
+        Predicción de cada fila y, con el `TreeEngine`, la matriz de predicciones por árbol
+        (None con el modelo de sklearn/XGBoost).
+        """
+        if self.tree_engine is not None and len(X) <= MAX_FILAS_MOTOR:
+            return self.tree_engine.predecir(X)
+        modelo = self.model
+        if modelo is None:
+            raise ArtefactosNoDisponibles("No se pudo cargar model.pkl.")
+        # El modelo se entrenó con un DataFrame pero acá recibe la matriz NumPy del encoder,
+        # cuyas columnas ya están alineadas con `model_columns`
+        with warnings.catch_warnings():
+            warnings.filterwarnings('ignore', message='X does not have valid feature names', category=UserWarning)
+            return modelo.predict(X), None
+
+    def _leer_vectorizer(self):
+        """El vectorizer por hashing tiene prioridad; su IDF se abre con mmap y lo comparten los workers."""
+        if os.path.exists(self.rutas['vectorizer_hashing']):
+            return HashingTfidfVectorizer.cargar(self.directorio)
+        return _leer_pickle(self.rutas['vectorizer'])
+
+    def huella(self) -> str:
+        """Huella de los archivos en disco; cambia cuando se reemplazan los artefactos."""
+        return version_artefactos([self.rutas[nombre] for nombre in
+                                   ('modelo', 'columnas', 'vectorizer', 'vectorizer_hashing', 'idf_hashing',
+                                    'bosque_plano', 'meta_plano', 'intervalos')])
+
+    def requerir(self) -> "ArtifactBundle":
+        """Carga si hace falta y falla con `ArtefactosNoDisponibles` si no se puede predecir."""
+        self.cargar()
+        if not self.listo:
+            raise ArtefactosNoDisponibles("El modelo, las columnas o el vectorizer no se han cargado correctamente.")
+        return self
+
+    def obtener_explainer(self):
+        """TreeExplainer de SHAP, construido en el primer uso (None si no se pudo crear)."""
+        if self._explainer is not None or self.estado['explainer']['estado'] == 'error':
+            return self._explainer
+        self.cargar()
+        if self.model is None:
+            return None
+
+        with self._lock_explainer:
+            if self._explainer is None and self.estado['explainer']['estado'] != 'error':
+                def construir():
+                    import shap  # Importación pesada: solo al pedir la primera explicación
+                    return shap.TreeExplainer(self.model)
+                self._explainer = self._paso('explainer', construir)
+        return self._explainer
+
+    def precalentar(self, explainer: bool = True):
+        """Carga todo y ejecuta una predicción de prueba para que la primera real no pague la inicialización."""
+        self.cargar()
+        if self.listo:
+            self.predecir(np.zeros((1, self.feature_encoder.n_features)))
+        if explainer:
+            self.obtener_explainer()
+
+    def iniciar_precarga(self, explainer: bool = True) -> threading.Thread:
+        """Precalienta en un hilo en segundo plano para que el worker arranque de inmediato."""
+        hilo = threading.Thread(
+            target=self.precalentar, kwargs={"explainer": explainer}, daemon=True, name="precarga-artefactos"
+        )
+        hilo.start()
+        return hilo
+
+    def reporte(self) -> dict:
+        return {
+            "version": self.version,
+            "listo": self.listo,
+            "artefactos": {nombre: dict(estado) for nombre, estado in self.estado.items()}
+        }
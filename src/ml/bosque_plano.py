@@ -0,0 +1,214 @@
+# src/ml/bosque_plano.py
+# Formato plano del modelo: todos los nodos de todos los árboles en un único archivo .npy
+# (un campo detrás de otro, cada uno contiguo y alineado) más un JSON con los metadatos y la
+# ubicación de cada campo. El .npy se abre con mmap en modo solo lectura, así que cargarlo
+# tarda milisegundos y todos los workers de un host comparten las mismas páginas en lugar de
+# deserializar cada uno su copia de model.pkl.
+#
+# Uso (exporta el model.pkl de un directorio de artefactos):
+#   python -m src.ml.bosque_plano src/ml/
+import json
+import os
+import sys
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+ARCHIVO_NODOS = 'modelo_plano.npy'
+ARCHIVO_META = 'modelo_plano.json'
+VERSION_FORMATO = 2
+# Cada campo empieza en un múltiplo de 64 bytes (np.save alinea el inicio de los datos igual)
+ALINEACION = 64
+
+# Un nodo interno manda la fila a `izquierdo` si x[atributo] <= umbral (a `derecho` si no)
+# y a `izquierdo` si el valor falta y `faltante_izq` vale 1. Las hojas apuntan a sí mismas,
+# así que recorrer de más no cambia el resultado; `valor` solo se usa en las hojas.
+# En el archivo los hijos se guardan juntos en `hijos` (n_nodos x 2: izquierdo, derecho).
+DTYPE_NODO = np.dtype([
+    ('atributo', '<i4'),
+    ('umbral', '<f8'),
+    ('izquierdo', '<i4'),
+    ('derecho', '<i4'),
+    ('faltante_izq', 'u1'),
+    ('valor', '<f8'),
+])
+
+def _nodos_vacios(n: int) -> np.ndarray:
+    nodos = np.zeros(n, dtype=DTYPE_NODO)
+    propios = np.arange(n, dtype=np.int32)
+    nodos['izquierdo'], nodos['derecho'] = propios, propios
+    return nodos
+
+def _aplanar_sklearn(modelo) -> Tuple[List[np.ndarray], dict]:
+    arboles = []
+    for estimador in modelo.estimators_:
+        tree = estimador.tree_
+        nodos = _nodos_vacios(tree.node_count)
+        internos = tree.children_left >= 0
+        nodos['atributo'][internos] = tree.feature[internos]
+        nodos['umbral'][internos] = tree.threshold[internos]
+        nodos['izquierdo'][internos] = tree.children_left[internos]
+        nodos['derecho'][internos] = tree.children_right[internos]
+        faltantes = getattr(tree, 'missing_go_to_left', None)
+        if faltantes is not None:
+            nodos['faltante_izq'][internos] = np.asarray(faltantes)[internos]
+        nodos['valor'] = tree.value[:, 0, 0]
+        arboles.append(nodos)
+    return arboles, {"agregacion": "promedio", "base": 0.0, "profundidad": int(max(e.tree_.max_depth for e in modelo.estimators_))}
+
+def _base_score_xgboost(booster) -> float:
+    config = json.loads(booster.save_config())
+    base = config['learner']['learner_model_param']['base_score']
+    return float(str(base).strip('[]'))
+
+def _aplanar_xgboost(modelo) -> Tuple[List[np.ndarray], dict]:
+    booster = modelo.get_booster()
+    objetivo = json.loads(booster.save_config())['learner']['objective']['name']
+    if objetivo != 'reg:squarederror':
+        raise ValueError(f"Solo se exportan modelos XGBoost con objetivo 'reg:squarederror' (este usa '{objetivo}')")
+    nombres = booster.feature_names
+    indice = {nombre: i for i, nombre in enumerate(nombres)} if nombres else None
+
+    def columna(split: str) -> int:
+        return indice[split] if indice is not None else int(split[1:])
+
+    arboles, profundidad = [], 0
+    for volcado in booster.get_dump(dump_format='json'):
+        raiz = json.loads(volcado)
+        planos = []
+        pendientes = [(raiz, 0)]
+        while pendientes:
+            nodo, nivel = pendientes.pop()
+            planos.append(nodo)
+            profundidad = max(profundidad, nivel)
+            pendientes.extend((hijo, nivel + 1) for hijo in nodo.get('children', []))
+        nodos = _nodos_vacios(max(n['nodeid'] for n in planos) + 1)
+        for n in planos:
+            i = n['nodeid']
+            if 'leaf' in n:
+                nodos['valor'][i] = n['leaf']
+                continue
+            # XGBoost compara x < umbral en float32: equivale a x <= el float32 anterior al umbral
+            umbral = np.nextafter(np.float32(n['split_condition']), np.float32(-np.inf))
+            nodos[i] = (columna(n['split']), float(umbral), n['yes'], n['no'], n['missing'] == n['yes'], 0.0)
+        arboles.append(nodos)
+    return arboles, {"agregacion": "suma", "base": _base_score_xgboost(booster), "profundidad": profundidad}
+
+def aplanar_modelo(modelo) -> Tuple[np.ndarray, dict]:
+    """
+    Convierte un bosque de sklearn (RandomForest/ExtraTrees de una salida) o un
+    `XGBRegressor` en el arreglo de nodos y sus metadatos. Los índices de los hijos
+    pasan a ser globales (desplazados por el inicio de cada árbol).
+    """
+    if hasattr(modelo, 'get_booster'):
+        arboles, meta = _aplanar_xgboost(modelo)
+    elif hasattr(modelo, 'estimators_') and all(hasattr(e, 'tree_') for e in np.ravel(modelo.estimators_)):
+        if getattr(modelo, 'n_outputs_', 1) != 1 or type(modelo).__name__.startswith('GradientBoosting'):
+            raise ValueError(f"No se puede exportar un {type(modelo).__name__} al formato plano")
+        arboles, meta = _aplanar_sklearn(modelo)
+    else:
+        raise ValueError(f"No se puede exportar un {type(modelo).__name__} al formato plano")
+
+    raices = np.cumsum([0] + [len(a) for a in arboles[:-1]])
+    for arbol, inicio in zip(arboles, raices):
+        arbol['izquierdo'] += inicio
+        arbol['derecho'] += inicio
+    meta.update({
+        "formato": VERSION_FORMATO,
+        "origen": type(modelo).__name__,
+        "n_features": int(modelo.n_features_in_),
+        "n_arboles": len(arboles),
+        "raices": [int(r) for r in raices],
+    })
+    return np.concatenate(arboles), meta
+
+def _empaquetar(nodos: np.ndarray) -> Tuple[np.ndarray, dict]:
+    """Bytes del archivo (cada campo contiguo y alineado) y la ubicación de cada campo."""
+    arreglos = {
+        'atributo': nodos['atributo'],
+        'umbral': nodos['umbral'],
+        'hijos': np.stack([nodos['izquierdo'], nodos['derecho']], axis=1),
+        'faltante_izq': nodos['faltante_izq'],
+        'valor': nodos['valor'],
+    }
+    partes, campos, offset = [], {}, 0
+    for nombre, arreglo in arreglos.items():
+        relleno = -offset % ALINEACION
+        partes.append(np.zeros(relleno, dtype=np.uint8))
+        offset += relleno
+        campos[nombre] = {"dtype": arreglo.dtype.str, "forma": list(arreglo.shape), "offset": offset}
+        partes.append(np.frombuffer(np.ascontiguousarray(arreglo).tobytes(), dtype=np.uint8))
+        offset += arreglo.nbytes
+    return np.concatenate(partes), campos
+
+def exportar_bosque(modelo, directorio: str) -> dict:
+    """
+    Escribe el formato plano en `directorio`. Cada archivo se reemplaza con `os.replace`:
+    quien tenga abierto el .npy anterior con mmap lo sigue leyendo entero hasta recargar.
+    """
+    nodos, meta = aplanar_modelo(modelo)
+    datos, meta["campos"] = _empaquetar(nodos)
+    os.makedirs(directorio, exist_ok=True)
+
+    def reemplazar(nombre: str, escribir):
+        destino = os.path.join(directorio, nombre)
+        temporal = f"{destino}.tmp"
+        with open(temporal, 'wb') as f:
+            escribir(f)
+        os.replace(temporal, destino)
+
+    reemplazar(ARCHIVO_NODOS, lambda f: np.save(f, datos))
+    reemplazar(ARCHIVO_META, lambda f: f.write(json.dumps(meta).encode()))
+    return meta
+
+class BosquePlano:
+    """
+    Modelo en formato plano abierto con mmap (solo lectura). Expone los campos de los
+    nodos como vistas del mismo archivo y los metadatos del JSON.
+    """
+
+    def __init__(self, datos: np.ndarray, meta: dict):
+        if meta.get("formato") != VERSION_FORMATO:
+            raise ValueError(f"Formato de modelo plano {meta.get('formato')} no soportado (se espera {VERSION_FORMATO})")
+        self.datos = datos
+        self.meta = meta
+
+        def campo(nombre: str) -> np.ndarray:
+            ubicacion = meta["campos"][nombre]
+            dtype = np.dtype(ubicacion["dtype"])
+            n_bytes = int(np.prod(ubicacion["forma"])) * dtype.itemsize
+            return datos[ubicacion["offset"]:ubicacion["offset"] + n_bytes].view(dtype).reshape(ubicacion["forma"])
+
+        self.atributo = campo('atributo')
+        self.umbral = campo('umbral')
+        self.hijos = campo('hijos')
+        self.izquierdo = self.hijos[:, 0]
+        self.derecho = self.hijos[:, 1]
+        self.faltante_izq = campo('faltante_izq')
+        self.valor = campo('valor')
+        self.raices = np.asarray(meta["raices"], dtype=np.intp)
+        self.n_features = meta["n_features"]
+        self.n_arboles = meta["n_arboles"]
+        self.profundidad = meta["profundidad"]
+        self.agregacion = meta["agregacion"]
+        self.base = meta["base"]
+
+    @classmethod
+    def cargar(cls, directorio: str) -> "BosquePlano":
+        with open(os.path.join(directorio, ARCHIVO_META)) as f:
+            meta = json.load(f)
+        return cls(np.load(os.path.join(directorio, ARCHIVO_NODOS), mmap_mode='r'), meta)
+
+def exportar_desde_pickle(directorio: str) -> Optional[dict]:
+    """Exporta el `model.pkl` de un directorio de artefactos ya existente."""
+    import pickle
+
+    with open(os.path.join(directorio, 'model.pkl'), 'rb') as f:
+        modelo = pickle.load(f)
+    return exportar_bosque(modelo, directorio)
+
+if __name__ == '__main__':
+    directorio = sys.argv[1] if len(sys.argv) > 1 else os.path.dirname(os.path.abspath(__file__))
+    meta = exportar_desde_pickle(directorio)
+    print(f"✅ Modelo plano exportado en {directorio}: {meta['n_arboles']} árboles, "
+          f"profundidad {meta['profundidad']} ({meta['origen']}).")
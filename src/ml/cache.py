@@ -0,0 +1,190 @@
+# src/ml/cache.py
+import copy
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional, List
+
+logger = logging.getLogger(__name__)
+
+# Campos de PredictionInput que determinan el resultado de la predicción
+CAMPOS_CLAVE = ['barrio', 'ambientes', 'dormitorios', 'banos', 'superficie_total_m2', 'cocheras']
+
+def crear_normalizador_descripcion(vectorizer) -> Callable[[Optional[str]], str]:
+    """
+    Devuelve una función que normaliza una descripción tal como la "ve" el vectorizer:
+    tokens del analizador, filtrados al vocabulario y ordenados. Dos textos con la misma
+    normalización producen exactamente el mismo vector TF-IDF.
+    """
+    analizador = vectorizer.build_analyzer()
+    vocabulario = getattr(vectorizer, 'vocabulary_', None)
+
+    def normalizar(texto: Optional[str]) -> str:
+        if not isinstance(texto, str):
+            return ''
+        tokens = analizador(texto.lower())
+        if vocabulario is not None:
+            tokens = [t for t in tokens if t in vocabulario]
+        return ' '.join(sorted(tokens))
+
+    return normalizar
+
+def version_artefactos(paths: List[str]) -> str:
+    """Huella de los artefactos del modelo (fecha de modificación y tamaño de cada archivo)."""
+    partes = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            partes.append(f"{os.path.basename(path)}:{stat.st_mtime_ns}:{stat.st_size}")
+        except FileNotFoundError:
+            partes.append(f"{os.path.basename(path)}:-")
+    return hashlib.sha256('|'.join(partes).encode()).hexdigest()[:16]
+
+class RedisBackend:
+    """Backend compartido opcional para que varios workers de uvicorn compartan aciertos."""
+
+    def __init__(self, url: str, ttl_seconds: int, prefijo: str = 'prediccion'):
+        import redis  # Dependencia opcional: solo se necesita si se configura el backend compartido
+
+        self.client = redis.Redis.from_url(url)
+        self.ttl_seconds = ttl_seconds
+        self.prefijo = prefijo
+
+    def get(self, clave: str) -> Optional[dict]:
+        valor = self.client.get(f"{self.prefijo}:{clave}")
+        return json.loads(valor) if valor is not None else None
+
+    def set(self, clave: str, valor: dict):
+        self.client.set(f"{self.prefijo}:{clave}", json.dumps(valor), ex=self.ttl_seconds or None)
+
+class PredictionCache:
+    """
+    Cache LRU en proceso con TTL y tamaño máximo para resultados de predicción.
+
+    Las claves incluyen la versión de los artefactos: al cambiar la versión con
+    `set_version` la cache local se vacía y las entradas del backend compartido dejan
+    de coincidir, por lo que nunca se sirven resultados de un modelo anterior.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl_seconds: float = 3600, backend=None):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.backend = backend
+        self.version = ''
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self._entradas: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def habilitada(self) -> bool:
+        return self.max_size > 0
+
+    def clave(self, data: dict, normalizar_descripcion: Callable[[Optional[str]], str],
+              version: Optional[str] = None) -> str:
+        """
+        Hash canónico de una entrada de predicción. `version` es la de los artefactos que
+        calculan el resultado (por defecto, la registrada con `set_version`).
+        """
+        canonico = {campo: data.get(campo) for campo in CAMPOS_CLAVE}
+        canonico['description'] = normalizar_descripcion(data.get('description'))
+        serializado = json.dumps(canonico, sort_keys=True, ensure_ascii=False, default=str)
+        return f"{version or self.version}:{hashlib.sha256(serializado.encode()).hexdigest()}"
+
+    def set_version(self, version: str):
+        """Registra la versión de los artefactos activos; si cambió, vacía la cache."""
+        with self._lock:
+            if version != self.version:
+                self._entradas.clear()
+                self.version = version
+
+    def get(self, clave: str) -> Optional[dict]:
+        if not self.habilitada:
+            return None
+
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None:
+                expira, valor = entrada
+                if expira >= time.monotonic():
+                    self._entradas.move_to_end(clave)
+                    self.hits += 1
+                    return copy.deepcopy(valor)
+                del self._entradas[clave]
+
+        if self.backend is not None:
+            try:
+                valor = self.backend.get(clave)
+            except Exception as e:
+                logger.warning(f"Error leyendo la cache compartida: {e}")
+                valor = None
+            if valor is not None:
+                self._guardar_local(clave, valor)
+                with self._lock:
+                    self.shared_hits += 1
+                return copy.deepcopy(valor)
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, clave: str, valor: dict):
+        if not self.habilitada:
+            return
+        self._guardar_local(clave, copy.deepcopy(valor))
+        if self.backend is not None:
+            try:
+                self.backend.set(clave, valor)
+            except Exception as e:
+                logger.warning(f"Error escribiendo en la cache compartida: {e}")
+
+    def _guardar_local(self, clave: str, valor: dict):
+        with self._lock:
+            self._entradas[clave] = (time.monotonic() + self.ttl_seconds, valor)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.max_size:
+                self._entradas.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entradas.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            consultas = self.hits + self.shared_hits + self.misses
+            return {
+                "size": len(self._entradas),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.shared_hits) / consultas if consultas else 0.0,
+                "shared_backend": type(self.backend).__name__ if self.backend is not None else None,
+                "version": self.version
+            }
+
+def crear_cache_desde_entorno() -> PredictionCache:
+    """
+    Crea la cache de predicciones a partir de variables de entorno:
+    PREDICTION_CACHE_SIZE (0 la deshabilita), PREDICTION_CACHE_TTL (segundos)
+    y PREDICTION_CACHE_REDIS_URL (opcional, backend compartido).
+    """
+    max_size = int(os.getenv("PREDICTION_CACHE_SIZE", "10000"))
+    ttl_seconds = float(os.getenv("PREDICTION_CACHE_TTL", "3600"))
+
+    backend = None
+    redis_url = os.getenv("PREDICTION_CACHE_REDIS_URL")
+    if redis_url and max_size > 0:
+        try:
+            backend = RedisBackend(redis_url, int(ttl_seconds))
+            print("✅ Cache de predicciones compartida (Redis) configurada.")
+        except ImportError:
+            print("❌ PREDICTION_CACHE_REDIS_URL está definida pero el paquete 'redis' no está instalado. Se usará solo la cache local.")
+
+    return PredictionCache(max_size=max_size, ttl_seconds=ttl_seconds, backend=backend)
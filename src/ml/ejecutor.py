@@ -0,0 +1,330 @@
+# src/ml/ejecutor.py
+# Ejecutor de la inferencia (predicciones con intervalo y valores SHAP). Con el backend
+# 'hilos' las tareas corren directamente en el hilo que las pide (el threadpool de Starlette),
+# sin un segundo pool de por medio; con 'procesos', en un pool de procesos que cargan los
+# artefactos una sola vez, de modo que un único proceso
+# de la API usa todos los núcleos sin que el GIL serialice la inferencia ni frene a los
+# endpoints que solo esperan a la base. Entre procesos viajan solo arreglos de NumPy: la
+# matriz codificada de ida y las predicciones (o los valores SHAP) de vuelta.
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FuturoVencido
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from .artefactos import ArtifactBundle, ArtefactosNoDisponibles
+from .explicaciones import ExplicadorNoDisponible, calcular_shap
+
+BACKENDS_EJECUTOR = ('hilos', 'procesos')
+
+# Límites superiores (ms) de los buckets del histograma de duración de las tareas
+LIMITES_DURACION_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+# Bundles cargados en cada proceso worker (uno por directorio de versión)
+MAX_BUNDLES_WORKER = 2
+
+class EjecutorSaturado(RuntimeError):
+    """Hay `max_pendientes` tareas en curso: el pedido se rechaza en lugar de encolarse sin límite."""
+
+class TiempoInferenciaAgotado(TimeoutError):
+    """La tarea no terminó dentro del timeout configurado."""
+
+class ConfiguracionEjecutor:
+    """
+    Parámetros leídos del entorno:
+    ML_EJECUTOR ('hilos' o 'procesos'), ML_EJECUTOR_WORKERS (procesos del pool; 0 usa la
+    cantidad de núcleos), ML_EJECUTOR_MAX_PENDIENTES (tareas en curso o en cola; las
+    siguientes reciben 503), ML_EJECUTOR_TIMEOUT y ML_EJECUTOR_TIMEOUT_EXPLICACIONES
+    (segundos máximos de espera de una predicción y de una explicación SHAP, solo con
+    'procesos') y ML_EJECUTOR_RETRY_AFTER (segundos sugeridos en el header Retry-After).
+    """
+
+    def __init__(self, backend: str = 'hilos', workers: int = 0, max_pendientes: int = 64,
+                 timeout: float = 10.0, timeout_explicaciones: float = 60.0, retry_after: int = 1):
+        if backend not in BACKENDS_EJECUTOR:
+            raise ValueError(f"Backend del ejecutor '{backend}' inválido. Debe ser uno de: {BACKENDS_EJECUTOR}")
+        self.backend = backend
+        self.workers = workers if workers > 0 else (os.cpu_count() or 1)
+        self.max_pendientes = max_pendientes
+        self.timeout = timeout
+        self.timeout_explicaciones = timeout_explicaciones
+        self.retry_after = retry_after
+
+    @classmethod
+    def desde_entorno(cls) -> "ConfiguracionEjecutor":
+        return cls(
+            backend=os.getenv("ML_EJECUTOR") or 'hilos',
+            workers=int(os.getenv("ML_EJECUTOR_WORKERS", "0")),
+            max_pendientes=int(os.getenv("ML_EJECUTOR_MAX_PENDIENTES", "64")),
+            timeout=float(os.getenv("ML_EJECUTOR_TIMEOUT", "10")),
+            timeout_explicaciones=float(os.getenv("ML_EJECUTOR_TIMEOUT_EXPLICACIONES", "60")),
+            retry_after=int(os.getenv("ML_EJECUTOR_RETRY_AFTER", "1"))
+        )
+
+# --- Inferencia sobre un bundle (la misma en los dos backends) ---
+
+def predecir_arreglos(bundle: ArtifactBundle, X: np.ndarray):
+    """Predice todas las filas de una vez y calcula el IC al 95% cuando hay un motor disponible."""
+    # Con el TreeEngine las predicciones por árbol salen de la misma pasada y el IC no recorre los árboles otra vez
+    predictions, por_arbol = bundle.predecir(X)
+
+    lower_bounds, upper_bounds = None, None
+    if bundle.uncertainty_engine is not None:
+        lower_bounds, upper_bounds = bundle.uncertainty_engine.intervalos(X, predictions, por_arbol)
+
+    return predictions, lower_bounds, upper_bounds
+
+def shap_de_bundle(bundle: ArtifactBundle, X: np.ndarray, aproximada: bool) -> Tuple[np.ndarray, float]:
+    """Valores SHAP y valor base; lanza `ExplicadorNoDisponible` si el explainer no se pudo construir."""
+    explainer = bundle.obtener_explainer()
+    if explainer is None:
+        raise ExplicadorNoDisponible("El explicador del modelo no está disponible.")
+    return calcular_shap(explainer, X, aproximada)
+
+def _compactar(X: np.ndarray, dtype) -> np.ndarray:
+    return np.ascontiguousarray(X, dtype=dtype)
+
+# --- Lado del proceso worker ---
+
+_config_worker: dict = {}
+_bundles_worker: Dict[str, ArtifactBundle] = {}
+
+def _inicializar_worker(directorio: str, modo_intervalo: Optional[str], motor_inferencia: Optional[str],
+                        explainer: bool):
+    """Corre una vez al arrancar cada proceso: carga y precalienta los artefactos de la versión activa."""
+    # Cada worker usa un núcleo: XGBoost no debe abrir un hilo por núcleo en cada proceso
+    os.environ.setdefault("OMP_NUM_THREADS", "1")
+    _config_worker.update(modo_intervalo=modo_intervalo, motor_inferencia=motor_inferencia)
+    try:
+        bundle = ArtifactBundle(directorio, **_config_worker)
+        bundle.precalentar(explainer=explainer)
+        _bundles_worker[directorio] = bundle
+    except Exception as e:
+        # El worker sigue vivo: el primer pedido vuelve a intentar la carga e informa el error
+        print(f"❌ Error al precargar los artefactos en el worker de inferencia {os.getpid()}: {e}")
+
+def _bundle_worker(directorio: str, version: str) -> ArtifactBundle:
+    """
+    Bundle del worker con la misma versión que el de la API; si los archivos cambiaron
+    (reentrenamiento o cambio de versión) se vuelven a leer. No se responde con otra versión.
+    """
+    bundle = _bundles_worker.get(directorio)
+    if bundle is None or bundle.version != version:
+        bundle = ArtifactBundle(directorio, **_config_worker).requerir()
+        _bundles_worker.pop(directorio, None)
+        while len(_bundles_worker) >= MAX_BUNDLES_WORKER:
+            _bundles_worker.pop(next(iter(_bundles_worker)))
+        _bundles_worker[directorio] = bundle
+    if bundle.version != version:
+        raise ArtefactosNoDisponibles(
+            f"Los artefactos en disco ({bundle.version}) no coinciden con la versión activa ({version})."
+        )
+    return bundle.requerir()
+
+def _precalentar_en_worker() -> int:
+    return os.getpid()
+
+def _predecir_en_worker(directorio: str, version: str, X: np.ndarray):
+    return predecir_arreglos(_bundle_worker(directorio, version), X)
+
+def _shap_en_worker(directorio: str, version: str, X: np.ndarray, aproximada: bool):
+    return shap_de_bundle(_bundle_worker(directorio, version), X, aproximada)
+
+# --- Lado de la API ---
+
+def _bucket(buckets, valor: float):
+    for i, limite in enumerate(LIMITES_DURACION_MS):
+        if valor <= limite:
+            buckets[i] += 1
+            return
+    buckets[-1] += 1
+
+class InferenceExecutor:
+    """
+    Ejecuta la inferencia en el hilo que la pide o en un pool de procesos, con contrapresión
+    y, con procesos, timeout por tarea y cierre ordenado.
+
+    Las tareas en curso (en cola o ejecutándose) están acotadas por `max_pendientes`: al
+    llegar al límite se lanza `EjecutorSaturado` de inmediato. Con 'hilos' la tarea se
+    ejecuta en el hilo que llama y no tiene timeout: no hay forma de interrumpirla. Con
+    'procesos', quien espera una tarea más que el timeout recibe `TiempoInferenciaAgotado`;
+    la tarea se cancela si todavía no empezó y, si ya empezó, sigue ocupando su lugar hasta
+    terminar. Cada worker carga los artefactos una vez y los recarga solo si cambia la
+    versión activa; si un worker muere, el pool se recrea en el pedido siguiente.
+    """
+
+    def __init__(self, config: Optional[ConfiguracionEjecutor] = None, modo_intervalo: Optional[str] = None,
+                 motor_inferencia: Optional[str] = None):
+        self.config = config or ConfiguracionEjecutor()
+        self.modo_intervalo = modo_intervalo
+        self.motor_inferencia = motor_inferencia
+        self._pool: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._inicializacion = None
+        self.en_curso = 0
+        self.completadas = 0
+        self.errores = 0
+        self.rechazos_saturado = 0
+        self.timeouts = 0
+        self.reinicios = 0
+        self.workers_listos = 0
+        self._duracion_total = 0.0
+        self._duracion_max = 0.0
+        self._buckets = [0] * (len(LIMITES_DURACION_MS) + 1)
+
+    @property
+    def multiproceso(self) -> bool:
+        return self.config.backend == 'procesos'
+
+    def _obtener_pool(self) -> Executor:
+        # Se llama con el lock tomado; solo con 'procesos'
+        if self._pool is None:
+            # 'spawn': un fork del proceso de la API copiaría sus hilos y locks en un estado inconsistente
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.config.workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_inicializar_worker if self._inicializacion else None,
+                initargs=self._inicializacion or ()
+            )
+        return self._pool
+
+    def iniciar(self, directorio: str, explainer: bool = True):
+        """
+        Con 'procesos', arranca todos los workers sin esperarlos: cada uno carga y precalienta
+        los artefactos de `directorio` (y el explainer de SHAP si `explainer`). Con 'hilos' no hace nada.
+        """
+        if not self.multiproceso:
+            return
+        with self._lock:
+            self._inicializacion = (directorio, self.modo_intervalo, self.motor_inferencia, explainer)
+            pool = self._obtener_pool()
+        # Cada tarea enviada sin workers libres arranca un proceso nuevo, hasta `workers`
+        for _ in range(self.config.workers):
+            pool.submit(_precalentar_en_worker).add_done_callback(self._worker_listo)
+
+    def _worker_listo(self, futuro: Future):
+        if not futuro.cancelled() and futuro.exception() is None:
+            with self._lock:
+                self.workers_listos += 1
+
+    def _registrar_fin(self, segundos: float, error: bool):
+        with self._lock:
+            self.en_curso -= 1
+            if error:
+                self.errores += 1
+                return
+            self.completadas += 1
+            self._duracion_total += segundos
+            self._duracion_max = max(self._duracion_max, segundos)
+            _bucket(self._buckets, segundos * 1000)
+
+    def _terminada(self, inicio: float, futuro: Future):
+        if futuro.cancelled():
+            with self._lock:
+                self.en_curso -= 1
+            return
+        self._registrar_fin(time.perf_counter() - inicio, futuro.exception() is not None)
+
+    def _reservar_lugar(self):
+        # Se llama con el lock tomado
+        if self.en_curso >= self.config.max_pendientes:
+            self.rechazos_saturado += 1
+            raise EjecutorSaturado(
+                f"El ejecutor de inferencia tiene {self.en_curso} tareas en curso (máximo {self.config.max_pendientes})."
+            )
+        self.en_curso += 1
+
+    def _ejecutar_en_el_hilo(self, funcion, *args):
+        # El pedido ya corre en el threadpool de Starlette: un segundo pool solo sumaría un salto
+        with self._lock:
+            self._reservar_lugar()
+        inicio = time.perf_counter()
+        try:
+            resultado = funcion(*args)
+        except BaseException:
+            self._registrar_fin(time.perf_counter() - inicio, error=True)
+            raise
+        self._registrar_fin(time.perf_counter() - inicio, error=False)
+        return resultado
+
+    def _ejecutar(self, timeout: float, funcion, *args):
+        with self._lock:
+            self._reservar_lugar()
+            pool = self._obtener_pool()
+            try:
+                futuro = pool.submit(funcion, *args)
+            except BrokenProcessPool:
+                self.en_curso -= 1
+                self._pool = None
+                self.reinicios += 1
+                raise ArtefactosNoDisponibles("Un worker de inferencia terminó inesperadamente; se reinicia el pool.")
+        futuro.add_done_callback(partial(self._terminada, time.perf_counter()))
+
+        try:
+            return futuro.result(timeout=timeout)
+        except FuturoVencido:
+            futuro.cancel()
+            with self._lock:
+                self.timeouts += 1
+            raise TiempoInferenciaAgotado(f"La inferencia no terminó en {timeout:g} segundos.")
+        except BrokenProcessPool:
+            with self._lock:
+                if self._pool is pool:
+                    self._pool = None
+                    self.reinicios += 1
+            raise ArtefactosNoDisponibles("Un worker de inferencia terminó inesperadamente; se reinicia el pool.")
+
+    def predecir(self, bundle: ArtifactBundle, X: np.ndarray):
+        """(predicciones, límites inferiores, superiores) de cada fila; los límites son None sin motor de intervalos."""
+        if not self.multiproceso:
+            return self._ejecutar_en_el_hilo(predecir_arreglos, bundle, X)
+        # Los árboles comparan en float32: enviar la matriz en float32 no cambia ninguna predicción
+        return self._ejecutar(self.config.timeout, _predecir_en_worker,
+                              bundle.directorio, bundle.version, _compactar(X, np.float32))
+
+    def explicar(self, bundle: ArtifactBundle, X: np.ndarray, aproximada: bool = False) -> Tuple[np.ndarray, float]:
+        """Valores SHAP de cada fila y valor base (ver `calcular_shap`)."""
+        if not self.multiproceso:
+            return self._ejecutar_en_el_hilo(shap_de_bundle, bundle, X, aproximada)
+        return self._ejecutar(self.config.timeout_explicaciones, _shap_en_worker,
+                              bundle.directorio, bundle.version, _compactar(X, np.float64), aproximada)
+
+    def cerrar(self):
+        """
+        Con 'procesos', espera a que terminen las tareas en curso y libera los workers; un uso
+        posterior crea un pool nuevo. Con 'hilos' no hay pool que cerrar.
+        """
+        with self._lock:
+            pool, self._pool = self._pool, None
+            self.workers_listos = 0
+        if pool is not None:
+            pool.shutdown(wait=True)
+            print(f"✅ Ejecutor de inferencia ({self.config.backend}) cerrado.")
+
+    def stats(self) -> dict:
+        with self._lock:
+            histograma = {f"le_{limite}ms": n for limite, n in zip(LIMITES_DURACION_MS, self._buckets)}
+            histograma[f"gt_{LIMITES_DURACION_MS[-1]}ms"] = self._buckets[-1]
+            return {
+                "backend": self.config.backend,
+                "workers": self.config.workers,
+                "workers_listos": self.workers_listos if self.multiproceso else self.config.workers,
+                "max_pendientes": self.config.max_pendientes,
+                "timeout_segundos": self.config.timeout,
+                "timeout_explicaciones_segundos": self.config.timeout_explicaciones,
+                "en_curso": self.en_curso,
+                "completadas": self.completadas,
+                "errores": self.errores,
+                "rechazos_saturado": self.rechazos_saturado,
+                "timeouts": self.timeouts,
+                "reinicios": self.reinicios,
+                "duracion_media_ms": self._duracion_total * 1000 / self.completadas if self.completadas else 0.0,
+                "duracion_max_ms": self._duracion_max * 1000,
+                "histograma_duracion": histograma
+            }
@@ -0,0 +1,59 @@
+# src/ml/encoder.py
+import numpy as np
+from typing import List
+
+# Campos numéricos que se copian tal cual a la matriz de features
+CAMPOS_NUMERICOS = ['ambientes', 'dormitorios', 'banos', 'superficie_total_m2', 'cocheras']
+
+def ancho_vectorizer(vectorizer) -> int:
+    """Columnas que genera el vectorizer: el vocabulario de un TF-IDF o `n_features` de uno por hashing."""
+    vocabulario = getattr(vectorizer, 'vocabulary_', None)
+    return len(vocabulario) if vocabulario is not None else vectorizer.n_features
+
+class FeatureEncoder:
+    """
+    Codifica propiedades directamente en una matriz NumPy alineada con `model_columns`.
+
+    Reemplaza en el camino de predicción a la secuencia `pd.DataFrame` → `crear_features_nlp`
+    → `pd.concat` → `pd.get_dummies` → `reindex`, produciendo exactamente los mismos valores.
+    Los índices de cada columna se calculan una sola vez al construir el encoder.
+    """
+
+    def __init__(self, model_columns: List[str], vectorizer):
+        self.columns = list(model_columns)
+        self.n_features = len(self.columns)
+        self.vectorizer = vectorizer
+
+        indice = {columna: i for i, columna in enumerate(self.columns)}
+        self._idx_numericos = [(campo, indice[campo]) for campo in CAMPOS_NUMERICOS if campo in indice]
+        self._idx_barrio = {
+            columna[len('barrio_'):]: i for columna, i in indice.items() if columna.startswith('barrio_')
+        }
+        # Columna de destino de cada salida del vectorizer (-1 si el modelo no la usa)
+        n_tfidf = ancho_vectorizer(vectorizer)
+        self._idx_tfidf = np.array([indice.get(f'tfidf_{i}', -1) for i in range(n_tfidf)], dtype=np.intp)
+
+    def transform(self, items: List[dict]) -> np.ndarray:
+        """Devuelve una matriz (n_items, n_features) con las features de cada propiedad."""
+        X = np.zeros((len(items), self.n_features), dtype=np.float64)
+
+        for fila, data in enumerate(items):
+            for campo, columna in self._idx_numericos:
+                if campo in data:
+                    valor = data[campo]
+                    X[fila, columna] = np.nan if valor is None else valor
+            columna_barrio = self._idx_barrio.get(data.get('barrio'))
+            if columna_barrio is not None:
+                X[fila, columna_barrio] = 1
+
+        textos = [d.get('description').lower() if isinstance(d.get('description'), str) else '' for d in items]
+        tfidf = self.vectorizer.transform(textos).tocoo()
+        columnas = self._idx_tfidf[tfidf.col]
+        usadas = columnas >= 0
+        X[tfidf.row[usadas], columnas[usadas]] = tfidf.data[usadas]
+
+        return X
+
+    def transform_one(self, data: dict) -> np.ndarray:
+        """Atajo para una sola propiedad; devuelve una matriz de una fila."""
+        return self.transform([data])
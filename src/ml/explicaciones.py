@@ -0,0 +1,64 @@
+# src/ml/explicaciones.py
+import hashlib
+from typing import List, Tuple
+
+import numpy as np
+
+from .artefactos import ArtefactosNoDisponibles
+
+# Cantidad de features con mayor impacto que se devuelven por explicación
+TOP_SHAP_VALUES = 15
+
+class ExplicadorNoDisponible(ArtefactosNoDisponibles):
+    """No se pudo construir el explainer de SHAP para el modelo activo."""
+
+def clave_explicacion(version: str, fila: np.ndarray, aproximada: bool) -> str:
+    """
+    Clave de cache de una explicación: depende solo del vector codificado, por lo que dos
+    propiedades con las mismas features (p. ej. descripciones equivalentes) comparten entrada.
+    """
+    modo = 'aprox' if aproximada else 'exacta'
+    huella = hashlib.sha256(np.ascontiguousarray(fila, dtype=np.float64).tobytes()).hexdigest()
+    return f"{version}:{modo}:{huella}"
+
+def valor_base(explainer) -> float:
+    """`expected_value` como escalar (SHAP lo devuelve como array de un elemento para RF y XGBoost)."""
+    return float(np.ravel(explainer.expected_value)[0])
+
+def calcular_shap(explainer, X: np.ndarray, aproximada: bool = False) -> Tuple[np.ndarray, float]:
+    """
+    Valores SHAP de todas las filas de `X` (una única llamada a `shap_values`) y el valor base.
+
+    Con `aproximada=True` se usa el método de Saabas (`approximate=True` en SHAP): recorre
+    solo el camino de decisión de cada árbol, es órdenes de magnitud más rápido que Tree SHAP
+    exacto y las contribuciones siguen sumando la predicción, aunque su reparto entre
+    features correlacionadas es menos preciso. No se verifica la aditividad.
+    """
+    shap_values = np.asarray(explainer.shap_values(X, approximate=aproximada, check_additivity=False))
+    return shap_values, valor_base(explainer)
+
+def formatear_explicaciones(shap_values: np.ndarray, base: float, columnas: List[str],
+                            aproximada: bool = False) -> List[dict]:
+    """Una explicación por fila; la predicción informada es la suma de las contribuciones más el valor base."""
+    predicciones = shap_values.sum(axis=1) + base
+
+    # Los índices de mayor impacto absoluto de cada fila, de mayor a menor
+    orden = np.argsort(-np.abs(shap_values), axis=1, kind='stable')[:, :TOP_SHAP_VALUES]
+
+    explicaciones = []
+    for fila, indices, prediccion in zip(shap_values, orden, predicciones):
+        explicaciones.append({
+            "base_value": base,
+            # Solo se incluyen las features que tienen impacto (no son cero)
+            "shap_values": [
+                {"feature": columnas[j], "value": float(fila[j])} for j in indices if fila[j] != 0
+            ],
+            "prediction_usd": float(prediccion),
+            "approximate": aproximada
+        })
+    return explicaciones
+
+def explicar_filas(explainer, X: np.ndarray, columnas: List[str], aproximada: bool = False) -> List[dict]:
+    """Explica todas las filas de `X` con una única llamada a `shap_values` (ver `calcular_shap`)."""
+    shap_values, base = calcular_shap(explainer, X, aproximada)
+    return formatear_explicaciones(shap_values, base, columnas, aproximada)
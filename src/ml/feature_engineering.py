@@ -1,36 +1,104 @@
-
+import numpy as np
 import pandas as pd
+from scipy import sparse as sp
 from sklearn.feature_extraction.text import TfidfVectorizer
 import pickle
 
-def crear_features_nlp(df: pd.DataFrame, text_column: str = 'description', vectorizer=None):
+from .vectorizer_hashing import HashingTfidfVectorizer
+from .encoder import ancho_vectorizer
+
+def crear_features_nlp(df: pd.DataFrame, text_column: str = 'description', vectorizer=None,
+                       sparse: bool = False, max_features: int = 100, hashing: bool = False):
     """
     Procesa una columna de texto para crear características TF-IDF.
 
     Args:
         df (pd.DataFrame): DataFrame de entrada.
         text_column (str): Nombre de la columna con el texto.
-        vectorizer (TfidfVectorizer, optional): Vectorizer pre-entrenado. 
+        vectorizer (TfidfVectorizer, optional): Vectorizer pre-entrenado.
             Si es None, se creará y entrenará uno nuevo.
+        sparse (bool): Si es True devuelve la matriz dispersa del vectorizer en lugar
+            de un DataFrame denso (las columnas son `columnas_tfidf(n)`).
+        max_features (int): Tamaño del vocabulario de un vectorizer nuevo (con
+            `hashing`, cantidad de columnas del espacio de hashing).
+        hashing (bool): Si es True, un vectorizer nuevo es un `HashingTfidfVectorizer`:
+            sin vocabulario y con el IDF actualizable con `partial_fit`.
 
     Returns:
-        pd.DataFrame: DataFrame con las características TF-IDF.
-        TfidfVectorizer: El vectorizer utilizado (nuevo o el proporcionado).
+        pd.DataFrame | scipy.sparse.csr_matrix: Características TF-IDF.
+        TfidfVectorizer | HashingTfidfVectorizer: El vectorizer utilizado (nuevo o el proporcionado).
     """
     text_series = df[text_column].str.lower().fillna('')
 
     if vectorizer is None:
-        vectorizer = TfidfVectorizer(max_features=100, stop_words='english')
+        if hashing:
+            vectorizer = HashingTfidfVectorizer(n_features=max_features, stop_words='english')
+        else:
+            vectorizer = TfidfVectorizer(max_features=max_features, stop_words='english')
         tfidf_matrix = vectorizer.fit_transform(text_series)
     else:
         tfidf_matrix = vectorizer.transform(text_series)
 
-    tfidf_df = pd.DataFrame(tfidf_matrix.toarray(), 
-                              columns=[f'tfidf_{i}' for i in range(tfidf_matrix.shape[1])], 
+    if sparse:
+        return tfidf_matrix.tocsr(), vectorizer
+
+    tfidf_df = pd.DataFrame(tfidf_matrix.toarray(),
+                              columns=columnas_tfidf(tfidf_matrix.shape[1]),
                               index=df.index)
-    
+
     return tfidf_df, vectorizer
 
+def columnas_tfidf(n: int) -> list:
+    """Nombres de las columnas TF-IDF, en el formato que esperan `model_columns` y el FeatureEncoder."""
+    return [f'tfidf_{i}' for i in range(n)]
+
+def crear_matriz_de_diseno(df: pd.DataFrame, text_column: str = 'description', vectorizer=None,
+                           sparse: bool = True, max_features: int = 100, hashing: bool = False):
+    """
+    Arma la matriz de diseño completa: columnas numéricas, TF-IDF y barrio one-hot
+    (`drop_first`), en el mismo orden que la secuencia `crear_features_nlp` → `pd.concat`
+    → `pd.get_dummies` del entrenamiento, así que `model_columns` y el FeatureEncoder no
+    cambian. Con `sparse=True` nada pasa por una matriz densa: con miles de términos en
+    el vocabulario la memoria depende de los valores no nulos y no del ancho.
+
+    Args:
+        df (pd.DataFrame): Propiedades con `barrio`, las columnas numéricas y el texto.
+        text_column (str): Nombre de la columna con el texto.
+        vectorizer (TfidfVectorizer, optional): Vectorizer pre-entrenado.
+        sparse (bool): Matriz `scipy.sparse` CSR (por defecto) o DataFrame denso.
+        max_features (int): Tamaño del vocabulario de un vectorizer nuevo.
+        hashing (bool): Usar un `HashingTfidfVectorizer` nuevo (ver `crear_features_nlp`).
+
+    Returns:
+        scipy.sparse.csr_matrix | pd.DataFrame: Matriz de diseño.
+        list: Nombres de las columnas (los `model_columns`).
+        TfidfVectorizer: El vectorizer utilizado.
+    """
+    if not sparse:
+        df_nlp, vectorizer = crear_features_nlp(df, text_column, vectorizer, max_features=max_features,
+                                                hashing=hashing)
+        df_enriquecido = pd.concat([df.drop(columns=[text_column]), df_nlp], axis=1)
+        X = pd.get_dummies(df_enriquecido, columns=['barrio'], drop_first=True, dtype=int)
+        return X, list(X.columns), vectorizer
+
+    tfidf, vectorizer = crear_features_nlp(df, text_column, vectorizer, sparse=True, max_features=max_features,
+                                           hashing=hashing)
+    numericas = [col for col in df.columns if col not in (text_column, 'barrio')]
+    # Mismas categorías que get_dummies: valores presentes ordenados, sin el primero; sin barrio, todo en 0
+    categorias = sorted(df['barrio'].dropna().unique())
+    barrios = categorias[1:]
+    codigos = pd.Categorical(df['barrio'], categories=categorias).codes - 1
+    filas = np.flatnonzero(codigos >= 0)
+    dummies = sp.csr_matrix((np.ones(len(filas)), (filas, codigos[filas])), shape=(len(df), len(barrios)))
+
+    X = sp.hstack([
+        sp.csr_matrix(df[numericas].to_numpy(dtype=np.float64)),
+        tfidf,
+        dummies,
+    ], format='csr')
+    columnas = numericas + columnas_tfidf(ancho_vectorizer(vectorizer)) + [f'barrio_{b}' for b in barrios]
+    return X, columnas, vectorizer
+
 def guardar_vectorizer(vectorizer, path):
     """Guarda el vectorizer en un archivo pickle."""
     with open(path, 'wb') as f:
@@ -0,0 +1,94 @@
+# src/ml/motor_arboles.py
+# Inferencia sobre el modelo plano (bosque_plano.py) con NumPy: recorre todos los árboles
+# para todas las filas del lote a la vez, un nivel por iteración. Evita la validación de
+# entrada, el despacho de joblib y el costo por estimador de `model.predict`, que para una
+# sola fila pesan más que recorrer los árboles. Devuelve además la predicción de cada árbol,
+# que es lo que necesitan los intervalos de confianza.
+from typing import Tuple
+
+import numpy as np
+
+from .bosque_plano import BosquePlano
+
+# 'numpy': TreeEngine si la versión tiene modelo plano; 'sklearn': siempre `model.predict`.
+MOTORES_INFERENCIA = ('numpy', 'sklearn')
+
+# Pares (fila, árbol) que se recorren juntos: con lotes grandes se avanza de a grupos de
+# árboles para que sus nodos sigan en cache mientras se recorren todos los niveles
+PARES_POR_BLOQUE = 2 ** 16
+
+class TreeEngine:
+    """
+    Predice con los arreglos del modelo plano, sin copiarlos: lee directamente las páginas
+    del archivo abierto con mmap. Para las mismas filas da el mismo resultado que el modelo
+    original (RandomForest exacto; XGBoost salvo el redondeo de su acumulación en float32).
+    """
+
+    def __init__(self, bosque: BosquePlano):
+        self.bosque = bosque
+        # Vistas ndarray de los campos (sin la subclase memmap, que agrega costo a cada indexado)
+        self._atributo = np.asarray(bosque.atributo)
+        self._umbral = np.asarray(bosque.umbral)
+        self._hijos = np.asarray(bosque.hijos)
+        self._faltante_izq = np.asarray(bosque.faltante_izq).view(bool)
+        self._valor = np.asarray(bosque.valor)
+        self._raices = bosque.raices.astype(np.int32)
+        self.n_features_in_ = bosque.n_features
+        # Solo los árboles de un bosque son predicciones independientes (en XGBoost son correcciones)
+        self.es_bosque = bosque.agregacion == 'promedio'
+
+    def _recorrer(self, X: np.ndarray, raices: np.ndarray, hay_faltantes: bool) -> np.ndarray:
+        """Hojas (n_filas * len(raices), en orden fila por fila) de un grupo de árboles."""
+        n_filas, n_features = X.shape
+        nodos = np.tile(raices, n_filas)
+        # Para cada par todavía activo: su nodo actual y el inicio de su fila en X aplanada
+        activos = np.flatnonzero(self._hijos[nodos, 0] != nodos)
+        actuales = nodos[activos]
+        inicios = (activos // len(raices)) * n_features
+        X = X.ravel()
+        while activos.size:
+            valores = X[inicios + self._atributo[actuales]]
+            derecha = valores > self._umbral[actuales]
+            if hay_faltantes:
+                faltan = np.isnan(valores)
+                derecha[faltan] = ~self._faltante_izq[actuales[faltan]]
+            actuales = self._hijos[actuales, derecha.view(np.uint8)]
+            nodos[activos] = actuales
+            # Las hojas apuntan a sí mismas: los pares que llegaron a una dejan de recorrerse
+            siguen = self._hijos[actuales, 0] != actuales
+            activos, actuales, inicios = activos[siguen], actuales[siguen], inicios[siguen]
+        return nodos
+
+    def hojas(self, X) -> np.ndarray:
+        """Matriz (n_filas, n_arboles) con el índice global de la hoja a la que llega cada fila."""
+        # Misma conversión que sklearn y XGBoost: se compara el valor float32 contra el umbral
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Se esperaban {self.n_features_in_} features y se recibieron {X.shape[1]}")
+        X = X.astype(np.float64)
+        hay_faltantes = bool(np.isnan(X).any())
+
+        n_arboles = len(self._raices)
+        hojas = np.empty((X.shape[0], n_arboles), dtype=np.int32)
+        bloque = max(1, PARES_POR_BLOQUE // max(X.shape[0], 1))
+        for inicio in range(0, n_arboles, bloque):
+            raices = self._raices[inicio:inicio + bloque]
+            hojas[:, inicio:inicio + bloque] = self._recorrer(X, raices, hay_faltantes).reshape(X.shape[0], len(raices))
+        return hojas
+
+    def predicciones_por_arbol(self, X) -> np.ndarray:
+        """Matriz (n_filas, n_arboles) con el valor de la hoja de cada árbol."""
+        return self._valor[self.hojas(X)]
+
+    def predecir(self, X) -> Tuple[np.ndarray, np.ndarray]:
+        """Predicción de cada fila y la matriz de predicciones por árbol, en una sola pasada."""
+        por_arbol = self.predicciones_por_arbol(X)
+        if self.es_bosque:
+            return por_arbol.mean(axis=1), por_arbol
+        return self.bosque.base + por_arbol.sum(axis=1), por_arbol
+
+    def predict(self, X) -> np.ndarray:
+        """Misma interfaz que el estimador de sklearn."""
+        return self.predecir(X)[0]
@@ -1,129 +1,218 @@
 # src/ml/predict.py
-import pickle
-import pandas as pd
 import numpy as np
 import os
 from mysql.connector.cursor import MySQLCursorDict
 import logging
-from typing import Optional
+from typing import Optional, List
 from decimal import Decimal
 from dotenv import load_dotenv
 
-# Importar nuestra nueva función de feature engineering
-from .feature_engineering import crear_features_nlp
-import shap
+from .artefactos import ArtifactBundle, ArtefactosNoDisponibles
+from .registro import ModelRegistry, VersionInconsistente, VersionInexistente, VERSION_BASE
+from .similares import indice_similares, CONSULTA_PROMEDIO_SIMILARES, parametros_similares
+from .cache import crear_cache_desde_entorno, PredictionCache
+from .explicaciones import ExplicadorNoDisponible, clave_explicacion, formatear_explicaciones
+from .ejecutor import ConfiguracionEjecutor, InferenceExecutor, EjecutorSaturado, TiempoInferenciaAgotado
 
 load_dotenv()
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Rutas a los archivos del modelo
+# Directorio de los artefactos del modelo
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-MODEL_PATH = os.path.join(BASE_DIR, 'model.pkl')
-COLUMNS_PATH = os.path.join(BASE_DIR, 'model_columns.pkl')
-VECTORIZER_PATH = os.path.join(BASE_DIR, 'tfidf_vectorizer.pkl') # Nueva ruta
-
-# Carga de artefactos del modelo.
-explainer = None # Inicializar explainer
-try:
-    with open(MODEL_PATH, 'rb') as f:
-        model = pickle.load(f)
-    print("✅ Modelo cargado exitosamente.")
-    
-    # Crear el explainer de SHAP una vez que el modelo está cargado
-    explainer = shap.TreeExplainer(model)
-    print("✅ Explainer de SHAP creado exitosamente.")
-
-except FileNotFoundError:
-    print(f"❌ Error: No se encontró el archivo del modelo en {MODEL_PATH}")
-    model = None
-
-try:
-    with open(COLUMNS_PATH, 'rb') as f:
-        model_columns = pickle.load(f)
-    print("✅ Columnas del modelo cargadas exitosamente.")
-except FileNotFoundError:
-    print(f"❌ Error: No se encontró el archivo de columnas en {COLUMNS_PATH}")
-    model_columns = None
-
-try:
-    with open(VECTORIZER_PATH, 'rb') as f:
-        vectorizer = pickle.load(f)
-    print("✅ Vectorizer TF-IDF cargado exitosamente.")
-except FileNotFoundError:
-    print(f"❌ Error: No se encontró el archivo del vectorizer en {VECTORIZER_PATH}")
-    vectorizer = None
+
+# Registro de versiones del modelo. La versión activa se carga en el primer uso o con la
+# precarga en segundo plano que lanza la API; importar este módulo no lee el modelo ni importa shap.
+# Modo de los intervalos configurable con ML_INTERVALO_MODO; versiones adicionales en ML_VERSIONES_DIR.
+# ML_MOTOR_INFERENCIA=sklearn predice siempre con model.pkl en lugar del motor NumPy sobre el modelo plano.
+# ML_SOMBRA_MAX_PENDIENTES acota los lotes que esperan a la versión en sombra.
+registro = ModelRegistry(
+    BASE_DIR,
+    directorio_versiones=os.getenv("ML_VERSIONES_DIR") or None,
+    modo_intervalo=os.getenv("ML_INTERVALO_MODO") or None,
+    version_inicial=os.getenv("ML_VERSION_ACTIVA") or VERSION_BASE,
+    motor_inferencia=os.getenv("ML_MOTOR_INFERENCIA") or None,
+    max_pendientes_sombra=int(os.getenv("ML_SOMBRA_MAX_PENDIENTES", "100"))
+)
+
+# Ejecutor de la inferencia: ML_EJECUTOR=procesos predice y explica en un pool de procesos
+# que cargan los artefactos una vez, para usar todos los núcleos desde un solo proceso de la API
+ejecutor = InferenceExecutor(
+    ConfiguracionEjecutor.desde_entorno(),
+    modo_intervalo=registro.modo_intervalo,
+    motor_inferencia=registro.motor_inferencia
+)
+
+# Cache de resultados; la versión de los artefactos forma parte de cada clave
+prediction_cache = crear_cache_desde_entorno()
+
+# Cache de explicaciones SHAP, indexada por el vector codificado (EXPLAIN_CACHE_SIZE=0 la deshabilita)
+explanation_cache = PredictionCache(
+    max_size=int(os.getenv("EXPLAIN_CACHE_SIZE", "2000")),
+    ttl_seconds=float(os.getenv("EXPLAIN_CACHE_TTL", "3600"))
+)
+
+def obtener_artefactos() -> ArtifactBundle:
+    """
+    Artefactos de la versión activa listos para predecir; lanza `ArtefactosNoDisponibles`
+    si faltan. Cada pedido debe tomarlos una sola vez para no mezclar versiones si hay un cambio.
+    """
+    bundle = registro.activa().requerir()
+    prediction_cache.set_version(bundle.version)
+    return bundle
+
+# Campos mínimos que necesita el pipeline de features para cada propiedad
+CAMPOS_REQUERIDOS = ['barrio', 'ambientes', 'dormitorios', 'banos', 'superficie_total_m2', 'cocheras']
+
+def _predecir_con_intervalo(bundle: ArtifactBundle, X: np.ndarray):
+    """Predice todas las filas de una vez y calcula el IC al 95% en el ejecutor de inferencia."""
+    return ejecutor.predecir(bundle, X)
+
+def _formatear_resultado(prediction, lower_bound, upper_bound) -> dict:
+    return {
+        "predicted_price_usd": float(prediction),
+        "confidence_interval": {
+            "lower": float(lower_bound) if lower_bound is not None else None,
+            "upper": float(upper_bound) if upper_bound is not None else None
+        }
+    }
+
+def _clave_cache(bundle: ArtifactBundle, data: dict) -> Optional[str]:
+    if not prediction_cache.habilitada:
+        return None
+    # La clave lleva la versión del bundle que calcula el resultado: un pedido que empezó antes
+    # de un cambio de versión no puede guardar su resultado como si fuera de la nueva
+    return prediction_cache.clave(data, bundle.normalizar_descripcion, bundle.version)
 
 def predict_price(data: dict) -> dict:
     """Retorna predicción + intervalo de confianza, ahora procesando la descripción."""
-    if model is None or model_columns is None or vectorizer is None:
-        raise RuntimeError("El modelo, las columnas o el vectorizer no se han cargado correctamente.")
-
-    # Convertir el diccionario de entrada a un DataFrame
-    input_df = pd.DataFrame([data])
-    
-    # Crear las caractersticas NLP usando el vectorizer CARGADO
-    nlp_features_df, _ = crear_features_nlp(input_df, 'description', vectorizer=vectorizer)
-
-    # unir las características originales con las nuevas características NLP
-    input_df_no_desc = input_df.drop(columns=['description'], errors='ignore')
-    input_enriquecido = pd.concat([input_df_no_desc, nlp_features_df], axis=1)
-
-    input_encoded = pd.get_dummies(input_enriquecido, columns=['barrio'], dtype=int)
-    
-    final_df = input_encoded.reindex(columns=model_columns, fill_value=0)
-    
-    # Realizar la predicción
-    prediction = model.predict(final_df)[0]
-    
-    # Calcular intervalo de confianza solo si el modelo es RandomForest
-    lower_bound, upper_bound = None, None
-    if hasattr(model, 'estimators_'): # Chequeo robusto si el modelo tiene árboles individuales
-        tree_predictions = [tree.predict(final_df)[0] for tree in model.estimators_]
-        std = np.std(tree_predictions)
-        lower_bound = float(prediction - 1.96 * std)
-        upper_bound = float(prediction + 1.96 * std)
-    
+    bundle = obtener_artefactos()
+
+    clave = _clave_cache(bundle, data)
+    if clave is not None:
+        resultado = prediction_cache.get(clave)
+        if resultado is not None:
+            return resultado
+
+    X = bundle.feature_encoder.transform_one(data)
+
+    predictions, lower_bounds, upper_bounds = _predecir_con_intervalo(bundle, X)
+    prediction = predictions[0]
+    registro.puntuar_sombra([data], predictions)
+
     logger.info(
         f"Predicción realizada: {prediction:.2f} USD | "
         f"Barrio: {data.get('barrio')} | "
         f"Superficie: {data.get('superficie_total_m2')} m²"
     )
-    
-    return {
-        "predicted_price_usd": float(prediction),
-        "confidence_interval": {
-            "lower": lower_bound,
-            "upper": upper_bound
-        }
-    }
 
-def get_similar_properties_avg(data: dict, cursor: MySQLCursorDict) -> Optional[float]:
+    resultado = _formatear_resultado(
+        prediction,
+        lower_bounds[0] if lower_bounds is not None else None,
+        upper_bounds[0] if upper_bounds is not None else None
+    )
+    if clave is not None:
+        prediction_cache.set(clave, resultado)
+
+    return resultado
+
+def predict_prices(items: List[dict]) -> List[dict]:
+    """
+    Predice un lote de propiedades en una sola pasada vectorizada.
+
+    TF-IDF, codificación de barrios, alineación de columnas y `model.predict`
+    se ejecutan una única vez sobre todo el lote. Devuelve una lista alineada
+    con la entrada: cada elemento es el mismo dict que retorna `predict_price`
+    o `{"error": "..."}` si ese ítem no pudo procesarse, sin hacer fallar al resto.
+    Los ítems presentes en la cache no se vuelven a calcular. Si ningún ítem es válido
+    no se requieren los artefactos.
+    """
+    resultados: List[dict] = [None] * len(items)
+    validos = []
+    for i, item in enumerate(items):
+        faltantes = [campo for campo in CAMPOS_REQUERIDOS if not isinstance(item, dict) or item.get(campo) is None]
+        if faltantes:
+            resultados[i] = {"error": f"Faltan campos requeridos: {faltantes}"}
+        else:
+            validos.append(i)
+
+    if not validos:
+        return resultados
+
+    bundle = obtener_artefactos()
+
+    pendientes, claves = [], []
+    for i in validos:
+        item = items[i]
+        clave = _clave_cache(bundle, item)
+        if clave is not None:
+            resultados[i] = prediction_cache.get(clave)
+        if resultados[i] is None:
+            pendientes.append(i)
+            claves.append(clave)
+
+    if not pendientes:
+        return resultados
+
+    a_calcular = [items[i] for i in pendientes]
+    X = bundle.feature_encoder.transform(a_calcular)
+    predictions, lower_bounds, upper_bounds = _predecir_con_intervalo(bundle, X)
+    registro.puntuar_sombra(a_calcular, predictions)
+
+    for pos, (i, clave) in enumerate(zip(pendientes, claves)):
+        resultados[i] = _formatear_resultado(
+            predictions[pos],
+            lower_bounds[pos] if lower_bounds is not None else None,
+            upper_bounds[pos] if upper_bounds is not None else None
+        )
+        if clave is not None:
+            prediction_cache.set(clave, resultados[i])
+
+    logger.info(f"Predicción por lote realizada: {len(pendientes)} de {len(items)} propiedades calculadas.")
+
+    return resultados
+
+def explain_properties(items: List[dict], aproximada: bool = False) -> List[dict]:
     """
-    Calcula el precio promedio de propiedades similares usando un cursor existente.
-    (Esta función no requiere cambios)
+    Explica un lote de propiedades con SHAP. Las que no están en la cache se codifican y
+    se explican juntas en una sola llamada al explainer, dentro del ejecutor de inferencia.
+    Lanza `ExplicadorNoDisponible` si el explainer no se pudo construir.
     """
+    bundle = obtener_artefactos()
+    explanation_cache.set_version(bundle.version)
+
+    X = bundle.feature_encoder.transform(items)
+    claves = [clave_explicacion(bundle.version, fila, aproximada) for fila in X] \
+        if explanation_cache.habilitada else [None] * len(items)
+
+    resultados = [explanation_cache.get(clave) if clave is not None else None for clave in claves]
+    pendientes = [i for i, resultado in enumerate(resultados) if resultado is None]
+    if not pendientes:
+        return resultados
+
+    shap_values, base = ejecutor.explicar(bundle, X[pendientes], aproximada)
+    calculadas = formatear_explicaciones(shap_values, base, bundle.feature_encoder.columns, aproximada)
+    for i, explicacion in zip(pendientes, calculadas):
+        resultados[i] = explicacion
+        if claves[i] is not None:
+            explanation_cache.set(claves[i], explicacion)
+
+    logger.info(f"Explicación SHAP realizada: {len(pendientes)} de {len(items)} propiedades calculadas (aproximada={aproximada}).")
+    return resultados
+
+def get_similar_properties_avg(data: dict, cursor: Optional[MySQLCursorDict] = None) -> Optional[float]:
+    """
+    Calcula el precio promedio de propiedades similares.
+    Usa el índice en memoria cuando está cargado; si no, consulta la base con el cursor recibido.
+    """
+    if indice_similares.listo:
+        return indice_similares.promedio_similares(data)
+    if cursor is None:
+        return None
+
     try:
-        query = """
-            SELECT AVG(price_usd) as avg_price
-            FROM propiedades 
-            WHERE barrio = %s 
-            AND ambientes BETWEEN %s AND %s
-            AND superficie_total_m2 BETWEEN %s AND %s
-            AND price_usd IS NOT NULL
-        """
-        
-        ambientes_min = max(1, data['ambientes'] - 1)
-        ambientes_max = data['ambientes'] + 1
-        superficie_min = max(20, int(data['superficie_total_m2'] * 0.8))
-        superficie_max = int(data['superficie_total_m2'] * 1.2)
-        
-        cursor.execute(query, (
-            data['barrio'],
-            ambientes_min, ambientes_max,
-            superficie_min, superficie_max
-        ))
+        cursor.execute(CONSULTA_PROMEDIO_SIMILARES, parametros_similares(data))
         
         result = cursor.fetchone()
         avg_price = result['avg_price'] if result and result.get('avg_price') is not None else None
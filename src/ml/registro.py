@@ -0,0 +1,284 @@
+# src/ml/registro.py
+import logging
+import os
+import queue
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .artefactos import ArtifactBundle
+from .encoder import ancho_vectorizer
+
+logger = logging.getLogger(__name__)
+
+# Nombre de la versión que vive directamente en el directorio base (src/ml/)
+VERSION_BASE = 'base'
+
+class VersionInconsistente(ValueError):
+    """Los artefactos de una versión no se pueden usar juntos (o no se pudieron cargar)."""
+
+class VersionInexistente(VersionInconsistente):
+    """No hay artefactos para la versión pedida."""
+
+def verificar_consistencia(bundle: ArtifactBundle) -> List[str]:
+    """
+    Controles previos a activar una versión: los artefactos cargaron, el modelo (y el
+    modelo plano, si existe) espera tantas features como columnas hay, cada columna
+    `tfidf_i` existe en el vectorizer y una predicción de prueba da un valor finito.
+    Devuelve la lista de problemas encontrados.
+    """
+    bundle.cargar()
+    if not bundle.listo:
+        fallidos = [nombre for nombre, estado in bundle.estado.items() if estado['estado'] == 'error']
+        return [f"No se pudieron cargar los artefactos: {fallidos}"]
+
+    problemas = []
+    n_columnas = len(bundle.model_columns)
+    # Con el modelo diferido no se deserializa model.pkl solo para verificarlo
+    modelo = None if bundle.modelo_diferido else bundle.model
+    n_esperadas = getattr(modelo, 'n_features_in_', n_columnas)
+    if n_esperadas != n_columnas:
+        problemas.append(f"El modelo espera {n_esperadas} features pero hay {n_columnas} columnas")
+
+    plano = bundle.bosque_plano
+    if plano is not None and (plano.n_features != n_columnas
+                              or (modelo is not None and plano.meta["origen"] != type(modelo).__name__)):
+        problemas.append(f"El modelo plano ({plano.meta['origen']}, {plano.n_features} features) "
+                         f"no corresponde al modelo ({type(modelo).__name__}, {n_columnas} columnas)")
+
+    n_tfidf = ancho_vectorizer(bundle.vectorizer)
+    fuera_de_rango = [c for c in bundle.model_columns
+                      if c.startswith('tfidf_') and int(c[len('tfidf_'):]) >= n_tfidf]
+    if fuera_de_rango:
+        problemas.append(f"Columnas TF-IDF que el vectorizer no genera: {fuera_de_rango[:5]}")
+
+    if not problemas:
+        barrios = [c[len('barrio_'):] for c in bundle.model_columns if c.startswith('barrio_')]
+        muestra = {'barrio': barrios[0] if barrios else '', 'ambientes': 2, 'dormitorios': 1, 'banos': 1,
+                   'superficie_total_m2': 50, 'cocheras': 0, 'description': 'departamento luminoso'}
+        prediccion, _ = bundle.predecir(bundle.feature_encoder.transform_one(muestra))
+        if not np.all(np.isfinite(prediccion)):
+            problemas.append("La predicción de prueba no es un número finito")
+    return problemas
+
+class ModelRegistry:
+    """
+    Registro de versiones del modelo.
+
+    Cada versión es un `ArtifactBundle`: la versión `base` son los archivos de `directorio_base`
+    y las demás, los subdirectorios de `directorio_versiones` con los mismos archivos. Una
+    versión nueva se carga y verifica aparte, y recién entonces se activa cambiando una única
+    referencia: los pedidos en curso terminan con el bundle que tomaron al empezar.
+
+    Opcionalmente una segunda versión puede correr "en sombra": recibe las mismas propiedades
+    en un hilo aparte y se registran las diferencias con la activa, sin afectar la respuesta.
+    Si la sombra es más lenta que el tráfico, se encolan a lo sumo `max_pendientes_sombra`
+    lotes y los siguientes se descartan (y se cuentan) en lugar de acumularse en memoria.
+    """
+
+    def __init__(self, directorio_base: str, directorio_versiones: Optional[str] = None,
+                 modo_intervalo: Optional[str] = None, version_inicial: str = VERSION_BASE,
+                 motor_inferencia: Optional[str] = None, max_pendientes_sombra: int = 100):
+        self.directorio_base = directorio_base
+        self.directorio_versiones = directorio_versiones or os.path.join(directorio_base, 'versiones')
+        self.modo_intervalo = modo_intervalo
+        self.motor_inferencia = motor_inferencia
+        self._lock = threading.Lock()
+        self._bundles: Dict[str, ArtifactBundle] = {}
+        # La versión inicial no se lee hasta el primer uso o la precarga
+        self._nombre_activa = version_inicial
+        self._activa = self._nuevo_bundle(version_inicial)
+        self._bundles[version_inicial] = self._activa
+        self._nombre_sombra: Optional[str] = None
+        self._sombra: Optional[ArtifactBundle] = None
+        self._cola_sombra: queue.Queue = queue.Queue(maxsize=max_pendientes_sombra)
+        self._hilo_sombra: Optional[threading.Thread] = None
+        self._comparacion = self._comparacion_vacia()
+        self._recargando = False
+        self._huella_rechazada: Optional[str] = None
+
+    # --- Versiones ---
+
+    def _directorio(self, nombre: str) -> str:
+        if nombre == VERSION_BASE:
+            return self.directorio_base
+        if not nombre or os.sep in nombre or nombre.startswith('.'):
+            raise VersionInexistente(f"Nombre de versión inválido: {nombre!r}")
+        return os.path.join(self.directorio_versiones, nombre)
+
+    def _nuevo_bundle(self, nombre: str) -> ArtifactBundle:
+        return ArtifactBundle(self._directorio(nombre), modo_intervalo=self.modo_intervalo,
+                              motor_inferencia=self.motor_inferencia)
+
+    def disponibles(self) -> List[str]:
+        """Versiones con artefactos en disco."""
+        versiones = [VERSION_BASE]
+        if os.path.isdir(self.directorio_versiones):
+            versiones += sorted(
+                nombre for nombre in os.listdir(self.directorio_versiones)
+                if os.path.isfile(os.path.join(self.directorio_versiones, nombre, 'model.pkl'))
+            )
+        return versiones
+
+    @property
+    def nombre_activa(self) -> str:
+        return self._nombre_activa
+
+    @property
+    def nombre_sombra(self) -> Optional[str]:
+        return self._nombre_sombra
+
+    def activa(self) -> ArtifactBundle:
+        """Bundle activo. Quien lo usa debe tomarlo una vez por pedido."""
+        return self._activa
+
+    def cargar(self, nombre: str, recargar: bool = False) -> ArtifactBundle:
+        """Carga y verifica una versión sin activarla; lanza `VersionInconsistente` si no sirve."""
+        bundle = None if recargar else self._bundles.get(nombre)
+        if bundle is None:
+            if not os.path.isdir(self._directorio(nombre)):
+                raise VersionInexistente(f"No existe la versión {nombre!r}")
+            bundle = self._nuevo_bundle(nombre)
+
+        problemas = verificar_consistencia(bundle)
+        if problemas:
+            raise VersionInconsistente(f"La versión {nombre!r} no es consistente: {'; '.join(problemas)}")
+
+        with self._lock:
+            if not recargar:
+                bundle = self._bundles.setdefault(nombre, bundle)
+        return bundle
+
+    def activar(self, nombre: str, recargar: bool = False) -> ArtifactBundle:
+        """Carga (si hace falta), verifica y activa una versión de forma atómica."""
+        bundle = self.cargar(nombre, recargar=recargar)
+        with self._lock:
+            anterior = self._nombre_activa
+            self._bundles[nombre] = bundle
+            self._activa, self._nombre_activa = bundle, nombre
+            # Se conserva la versión anterior para poder volver atrás sin releer los archivos
+            conservar = {nombre, anterior, self._nombre_sombra}
+            self._bundles = {n: b for n, b in self._bundles.items() if n in conservar}
+        print(f"✅ Versión del modelo '{nombre}' activada (artefactos {bundle.version}).")
+        return bundle
+
+    def recargar_si_cambio(self) -> bool:
+        """
+        Si cambiaron los archivos de la versión activa (por ejemplo, tras reentrenar con el
+        notebook), la vuelve a cargar y la activa. Un bundle inconsistente no se activa.
+        """
+        bundle = self._activa
+        if bundle.version is None:  # Todavía no se cargó
+            return False
+        actual = bundle.huella()
+        if actual in (bundle.version, self._huella_rechazada):
+            return False
+        try:
+            self.activar(self._nombre_activa, recargar=True)
+            return True
+        except VersionInconsistente as e:
+            # No se reintenta hasta que los archivos vuelvan a cambiar
+            self._huella_rechazada = actual
+            print(f"❌ No se recargó el modelo: {e}")
+            return False
+
+    def activar_en_segundo_plano(self, nombre: str) -> threading.Thread:
+        """Carga y activa una versión en un hilo aparte; la versión actual sigue sirviendo mientras tanto."""
+        def tarea():
+            try:
+                self.activar(nombre)
+            except VersionInconsistente as e:
+                print(f"❌ No se activó la versión '{nombre}': {e}")
+            finally:
+                self._recargando = False
+
+        self._recargando = True
+        hilo = threading.Thread(target=tarea, daemon=True, name=f"activar-{nombre}")
+        hilo.start()
+        return hilo
+
+    # --- Sombra ---
+
+    @staticmethod
+    def _comparacion_vacia() -> dict:
+        return {"n": 0, "suma_diferencia_abs": 0.0, "suma_diferencia_rel": 0.0, "max_diferencia_abs": 0.0,
+                "errores": 0, "descartados": 0}
+
+    def establecer_sombra(self, nombre: Optional[str]):
+        """Define la versión que corre en sombra (None para desactivarla)."""
+        bundle = self.cargar(nombre) if nombre is not None else None
+        with self._lock:
+            self._sombra, self._nombre_sombra = bundle, nombre
+            self._comparacion = self._comparacion_vacia()
+            if bundle is not None and self._hilo_sombra is None:
+                self._hilo_sombra = threading.Thread(target=self._atender_sombra, name="sombra", daemon=True)
+                self._hilo_sombra.start()
+
+    def puntuar_sombra(self, items: List[dict], predicciones: np.ndarray):
+        """
+        Encola la predicción de la versión en sombra para comparar; no bloquea al llamador.
+        Con la cola llena la muestra se descarta y se cuenta en `descartados`.
+        """
+        sombra = self._sombra
+        if sombra is None or not items:
+            return
+        try:
+            self._cola_sombra.put_nowait((sombra, list(items), np.asarray(predicciones, dtype=np.float64)))
+        except queue.Full:
+            with self._lock:
+                if sombra is self._sombra:
+                    self._comparacion["descartados"] += len(items)
+
+    def _atender_sombra(self):
+        while True:
+            sombra, items, predicciones = self._cola_sombra.get()
+            try:
+                self._comparar(sombra, items, predicciones)
+            finally:
+                self._cola_sombra.task_done()
+
+    def _comparar(self, sombra: ArtifactBundle, items: List[dict], predicciones: np.ndarray):
+        try:
+            en_sombra, _ = sombra.predecir(sombra.feature_encoder.transform(items))
+        except Exception as e:
+            logger.warning(f"Error en la predicción en sombra: {e}")
+            with self._lock:
+                self._comparacion["errores"] += 1
+            return
+
+        diferencia = np.abs(en_sombra - predicciones)
+        relativa = diferencia / np.maximum(np.abs(predicciones), 1.0)
+        with self._lock:
+            if sombra is not self._sombra:
+                return
+            self._comparacion["n"] += len(items)
+            self._comparacion["suma_diferencia_abs"] += float(diferencia.sum())
+            self._comparacion["suma_diferencia_rel"] += float(relativa.sum())
+            self._comparacion["max_diferencia_abs"] = max(self._comparacion["max_diferencia_abs"], float(diferencia.max()))
+
+    def reporte(self) -> dict:
+        with self._lock:
+            comparacion = dict(self._comparacion)
+            activa, sombra = self._activa, self._sombra
+            nombre_activa, nombre_sombra = self._nombre_activa, self._nombre_sombra
+            cargadas = sorted(self._bundles)
+
+        n = comparacion.pop("n")
+        return {
+            "active_version": nombre_activa,
+            "active_artifacts": activa.version,
+            "shadow_version": nombre_sombra,
+            "shadow_artifacts": sombra.version if sombra is not None else None,
+            "loaded_versions": cargadas,
+            "available_versions": self.disponibles(),
+            "loading": self._recargando,
+            "shadow_comparison": {
+                "n": n,
+                "mean_abs_diff_usd": comparacion["suma_diferencia_abs"] / n if n else None,
+                "mean_rel_diff": comparacion["suma_diferencia_rel"] / n if n else None,
+                "max_abs_diff_usd": comparacion["max_diferencia_abs"] if n else None,
+                "errors": comparacion["errores"],
+                "dropped": comparacion["descartados"]
+            } if nombre_sombra is not None else None
+        }
@@ -0,0 +1,160 @@
+# src/ml/similares.py
+import bisect
+import threading
+import time
+import numpy as np
+from decimal import Decimal
+from typing import Optional, Iterable, Tuple
+
+def rango_similares(data: dict) -> Tuple[int, int, int, int]:
+    """Criterios de similitud: ±1 ambiente y ±20% de superficie (mínimo 20 m²)."""
+    ambientes_min = max(1, data['ambientes'] - 1)
+    ambientes_max = data['ambientes'] + 1
+    superficie_min = max(20, int(data['superficie_total_m2'] * 0.8))
+    superficie_max = int(data['superficie_total_m2'] * 1.2)
+    return ambientes_min, ambientes_max, superficie_min, superficie_max
+
+# Consulta equivalente al índice, usada mientras éste no está cargado
+CONSULTA_PROMEDIO_SIMILARES = """
+    SELECT AVG(price_usd) as avg_price
+    FROM propiedades 
+    WHERE barrio = %s 
+    AND ambientes BETWEEN %s AND %s
+    AND superficie_total_m2 BETWEEN %s AND %s
+    AND price_usd IS NOT NULL
+"""
+
+# Filas con las que se construye el índice
+CONSULTA_INDICE_SIMILARES = """
+    SELECT id, barrio, ambientes, superficie_total_m2, price_usd
+    FROM propiedades
+    WHERE price_usd IS NOT NULL AND ambientes IS NOT NULL AND superficie_total_m2 IS NOT NULL
+"""
+
+def parametros_similares(data: dict) -> Tuple:
+    """Parámetros de `CONSULTA_PROMEDIO_SIMILARES` para una propiedad."""
+    return (data['barrio'], *rango_similares(data))
+
+class _Bucket:
+    """Propiedades de un mismo (barrio, ambientes) ordenadas por superficie, con sumas prefijas de precio."""
+
+    def __init__(self):
+        self.superficies = []
+        self.precios = []
+        self.ids = []
+        self._prefijos = None
+
+    def agregar(self, propiedad_id: int, superficie: int, precio: float):
+        pos = bisect.bisect_right(self.superficies, superficie)
+        self.superficies.insert(pos, superficie)
+        self.precios.insert(pos, precio)
+        self.ids.insert(pos, propiedad_id)
+        self._prefijos = None
+
+    def quitar(self, propiedad_id: int, superficie: int):
+        pos = bisect.bisect_left(self.superficies, superficie)
+        while pos < len(self.ids) and self.superficies[pos] == superficie:
+            if self.ids[pos] == propiedad_id:
+                del self.superficies[pos], self.precios[pos], self.ids[pos]
+                self._prefijos = None
+                return
+            pos += 1
+
+    def suma_y_cantidad(self, superficie_min: int, superficie_max: int) -> Tuple[float, int]:
+        if self._prefijos is None:
+            self._prefijos = np.concatenate(([0.0], np.cumsum(self.precios, dtype=np.float64)))
+        desde = bisect.bisect_left(self.superficies, superficie_min)
+        hasta = bisect.bisect_right(self.superficies, superficie_max)
+        if hasta <= desde:
+            return 0.0, 0
+        return float(self._prefijos[hasta] - self._prefijos[desde]), hasta - desde
+
+class SimilarPropertiesIndex:
+    """
+    Índice en memoria de `propiedades` para responder el promedio de propiedades similares
+    sin consultar MySQL.
+
+    Las propiedades se agrupan por (barrio, ambientes) y, dentro de cada grupo, se ordenan
+    por superficie con sumas prefijas de precio: cada consulta son unas pocas búsquedas
+    binarias. Se mantiene con `upsert`/`remove` desde los endpoints de escritura y se
+    reconstruye completo con `sincronizar` de forma periódica.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._filas = {}
+        self._buckets = {}
+        self.listo = False
+        self.ultima_sincronizacion: Optional[float] = None
+
+    @staticmethod
+    def _normalizar(fila: dict):
+        precio = fila.get('price_usd')
+        ambientes = fila.get('ambientes')
+        superficie = fila.get('superficie_total_m2')
+        if precio is None or ambientes is None or superficie is None or fila.get('barrio') is None:
+            return None
+        if isinstance(precio, Decimal):
+            precio = float(precio)
+        return fila['barrio'], int(ambientes), int(superficie), float(precio)
+
+    def _agregar(self, filas: dict, buckets: dict, propiedad_id: int, fila: dict):
+        valores = self._normalizar(fila)
+        if valores is None:
+            return
+        barrio, ambientes, superficie, precio = valores
+        filas[propiedad_id] = valores
+        buckets.setdefault((barrio, ambientes), _Bucket()).agregar(propiedad_id, superficie, precio)
+
+    def cargar(self, filas: Iterable[dict]):
+        """Reconstruye el índice completo y lo reemplaza de forma atómica."""
+        nuevas_filas, nuevos_buckets = {}, {}
+        for fila in filas:
+            self._agregar(nuevas_filas, nuevos_buckets, fila['id'], fila)
+        with self._lock:
+            self._filas, self._buckets = nuevas_filas, nuevos_buckets
+            self.listo = True
+            self.ultima_sincronizacion = time.time()
+
+    def sincronizar(self, cursor):
+        """Recarga el índice desde la tabla `propiedades` usando un cursor de diccionario."""
+        cursor.execute(CONSULTA_INDICE_SIMILARES)
+        self.cargar(cursor.fetchall())
+
+    def _quitar(self, propiedad_id: int):
+        valores = self._filas.pop(propiedad_id, None)
+        if valores is not None:
+            barrio, ambientes, superficie, _ = valores
+            self._buckets[(barrio, ambientes)].quitar(propiedad_id, superficie)
+
+    def upsert(self, fila: dict):
+        """Agrega o actualiza una propiedad (debe incluir `id`)."""
+        with self._lock:
+            self._quitar(fila['id'])
+            self._agregar(self._filas, self._buckets, fila['id'], fila)
+
+    def remove(self, propiedad_id: int):
+        with self._lock:
+            self._quitar(propiedad_id)
+
+    def promedio(self, barrio: str, ambientes_min: int, ambientes_max: int,
+                 superficie_min: int, superficie_max: int) -> Optional[float]:
+        """Equivalente a `AVG(price_usd)` con los mismos filtros que la consulta SQL."""
+        total, cantidad = 0.0, 0
+        with self._lock:
+            for ambientes in range(ambientes_min, ambientes_max + 1):
+                bucket = self._buckets.get((barrio, ambientes))
+                if bucket is not None:
+                    suma, n = bucket.suma_y_cantidad(superficie_min, superficie_max)
+                    total += suma
+                    cantidad += n
+        return total / cantidad if cantidad else None
+
+    def promedio_similares(self, data: dict) -> Optional[float]:
+        return self.promedio(data['barrio'], *rango_similares(data))
+
+    def __len__(self):
+        return len(self._filas)
+
+# Índice compartido por toda la aplicación
+indice_similares = SimilarPropertiesIndex()
@@ -0,0 +1,334 @@
+# src/ml/train.py
+# Entrenamiento reproducible (el mismo proceso que notebooks/entrenamiento_modelo.ipynb):
+# lee los datos, arma la matriz de diseño una sola vez y la guarda en una cache en disco
+# identificada por la huella de los datos, compara RandomForest y XGBoost con búsqueda
+# aleatoria y escribe los artefactos que carga la API (modelo, columnas, vectorizer,
+# intervalos y metrics.json).
+#
+# Uso:
+#   python -m src.ml.train                                   # datos de MySQL, artefactos en src/ml/
+#   python -m src.ml.train --datos snapshot.pkl --salida src/ml/versiones/2024-06-01
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import sparse as sp
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import r2_score
+from sklearn.model_selection import KFold, RandomizedSearchCV, cross_val_predict
+
+from .feature_engineering import crear_matriz_de_diseno, guardar_vectorizer
+from .uncertainty import calibrar_intervalos, guardar_calibracion
+from .vectorizer_hashing import HashingTfidfVectorizer, ARCHIVO_HASHING, ARCHIVO_IDF, ARCHIVO_FRECUENCIAS
+from .artefactos import ARCHIVOS
+from .bosque_plano import exportar_bosque, ARCHIVO_NODOS, ARCHIVO_META
+
+# Mismo filtro que el notebook; el ORDER BY hace que el orden (y con él los folds) sea repetible
+CONSULTA_ENTRENAMIENTO = """
+    SELECT price_usd, barrio, ambientes, dormitorios, banos, superficie_total_m2, cocheras, description
+    FROM propiedades
+    WHERE price_usd IS NOT NULL AND superficie_total_m2 IS NOT NULL
+    ORDER BY id
+"""
+COLUMNAS_ENTRENAMIENTO = ['price_usd', 'barrio', 'ambientes', 'dormitorios', 'banos',
+                          'superficie_total_m2', 'cocheras', 'description']
+
+GRILLAS = {
+    'RandomForest': {
+        'n_estimators': [100, 200, 300],
+        'max_depth': [10, 20, 30, None],
+        'min_samples_split': [2, 5, 10],
+        'min_samples_leaf': [1, 2, 4],
+        'max_features': ['sqrt', 'log2'],
+    },
+    'XGBoost': {
+        'n_estimators': [100, 200, 300],
+        'learning_rate': [0.01, 0.1, 0.2],
+        'max_depth': [3, 5, 7],
+        'subsample': [0.7, 0.8, 1.0],
+        'colsample_bytree': [0.7, 0.8, 1.0],
+    },
+}
+
+DIRECTORIO_SALIDA = os.path.dirname(os.path.abspath(__file__))
+DIRECTORIO_CACHE = os.getenv("ML_CACHE_DIR", "./data/cache_entrenamiento")
+# Cambiarlo invalida las matrices cacheadas (formato o forma de construirlas)
+VERSION_CACHE = 1
+RANDOM_STATE = 42
+
+def leer_datos_db() -> pd.DataFrame:
+    """Lee las propiedades de entrenamiento de MySQL con las variables de entorno de la API."""
+    import mysql.connector
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    conn = mysql.connector.connect(
+        host=os.getenv("DB_HOST"), user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASSWORD"), database=os.getenv("DB_NAME")
+    )
+    try:
+        cursor = conn.cursor()
+        cursor.execute(CONSULTA_ENTRENAMIENTO)
+        df = pd.DataFrame(cursor.fetchall(), columns=[d[0] for d in cursor.description])
+        cursor.close()
+    finally:
+        conn.close()
+    return preparar_datos(df)
+
+def leer_datos_archivo(path: str) -> pd.DataFrame:
+    """Lee un snapshot exportado (.pkl, .csv o .parquet) con las columnas de la consulta."""
+    extension = os.path.splitext(path)[1].lower()
+    lectores = {'.pkl': pd.read_pickle, '.csv': pd.read_csv, '.parquet': pd.read_parquet}
+    if extension not in lectores:
+        raise ValueError(f"Formato no soportado: '{extension}'. Use .pkl, .csv o .parquet.")
+    df = lectores[extension](path)
+    return preparar_datos(df[df['price_usd'].notna() & df['superficie_total_m2'].notna()])
+
+def preparar_datos(df: pd.DataFrame) -> pd.DataFrame:
+    """Columnas en el orden de la consulta y numéricas como float (MySQL devuelve Decimal)."""
+    df = df[COLUMNAS_ENTRENAMIENTO].reset_index(drop=True)
+    numericas = [c for c in COLUMNAS_ENTRENAMIENTO if c not in ('barrio', 'description')]
+    return df.astype({c: float for c in numericas})
+
+def huella_datos(df: pd.DataFrame, **parametros) -> str:
+    """Huella del snapshot de datos y de los parámetros con los que se arma la matriz."""
+    h = hashlib.sha256()
+    h.update(json.dumps({"version": VERSION_CACHE, "columnas": list(df.columns), **parametros},
+                        sort_keys=True).encode())
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()[:16]
+
+# --- Cache de la matriz de diseño ---
+# Densa: X.npy. Dispersa: los tres arreglos del CSR en .npy separados (un .npz no se puede
+# abrir con mmap). Al cargarlos con mmap, joblib pasa a sus workers una referencia al
+# archivo en lugar de serializar una copia de X para cada uno.
+
+def _guardar_matriz(directorio: str, X, y: np.ndarray, columnas: List[str], vectorizer):
+    if sp.issparse(X):
+        for nombre in ('data', 'indices', 'indptr'):
+            np.save(os.path.join(directorio, f'X_{nombre}.npy'), getattr(X, nombre))
+    else:
+        np.save(os.path.join(directorio, 'X.npy'), X)
+    np.save(os.path.join(directorio, 'y.npy'), y)
+    if isinstance(vectorizer, HashingTfidfVectorizer):
+        vectorizer.guardar(directorio)
+    else:
+        guardar_vectorizer(vectorizer, os.path.join(directorio, ARCHIVOS['vectorizer']))
+    with open(os.path.join(directorio, 'matriz.json'), 'w') as f:
+        json.dump({"columnas": columnas, "forma": list(X.shape), "dispersa": sp.issparse(X)}, f)
+
+def _cargar_matriz(directorio: str):
+    with open(os.path.join(directorio, 'matriz.json')) as f:
+        meta = json.load(f)
+    if meta["dispersa"]:
+        partes = [np.load(os.path.join(directorio, f'X_{nombre}.npy'), mmap_mode='r')
+                  for nombre in ('data', 'indices', 'indptr')]
+        X = sp.csr_matrix(tuple(partes), shape=tuple(meta["forma"]), copy=False)
+    else:
+        X = np.load(os.path.join(directorio, 'X.npy'), mmap_mode='r')
+    y = np.load(os.path.join(directorio, 'y.npy'), mmap_mode='r')
+    if os.path.exists(os.path.join(directorio, ARCHIVO_HASHING)):
+        vectorizer = HashingTfidfVectorizer.cargar(directorio)
+    else:
+        with open(os.path.join(directorio, ARCHIVOS['vectorizer']), 'rb') as f:
+            vectorizer = pickle.load(f)
+    return X, y, meta["columnas"], vectorizer
+
+def obtener_matriz(df: pd.DataFrame, directorio_cache: str = DIRECTORIO_CACHE, max_features: int = 100,
+                   sparse: bool = False, hashing: bool = False) -> Tuple[object, np.ndarray, List[str], object, str, bool]:
+    """
+    Matriz de diseño (float32, el tipo con el que entrenan los árboles de sklearn y XGBoost,
+    así no se convierte en cada fit), target, columnas y vectorizer. Si ya se construyó para
+    estos datos y parámetros se abre de la cache con mmap. Devuelve además la huella y si
+    vino de la cache.
+    """
+    huella = huella_datos(df, max_features=max_features, sparse=sparse, hashing=hashing)
+    directorio = os.path.join(directorio_cache, huella)
+    if os.path.exists(os.path.join(directorio, 'matriz.json')):
+        return (*_cargar_matriz(directorio), huella, True)
+
+    X, columnas, vectorizer = crear_matriz_de_diseno(df.drop(columns=['price_usd']), max_features=max_features,
+                                                     sparse=sparse, hashing=hashing)
+    X = X.astype(np.float32) if sparse else X.to_numpy(dtype=np.float32)
+    y = df['price_usd'].to_numpy(dtype=np.float64)
+
+    # Se escribe en un directorio temporal y se renombra: una corrida cortada no deja una cache a medias
+    os.makedirs(directorio_cache, exist_ok=True)
+    temporal = tempfile.mkdtemp(prefix=f'.{huella}-', dir=directorio_cache)
+    try:
+        _guardar_matriz(temporal, X, y, columnas, vectorizer)
+        os.replace(temporal, directorio)
+    except OSError:
+        shutil.rmtree(temporal, ignore_errors=True)
+        if not os.path.exists(os.path.join(directorio, 'matriz.json')):
+            raise
+    return (*_cargar_matriz(directorio), huella, False)
+
+# --- Búsqueda, evaluación y artefactos ---
+
+def crear_estimador(nombre: str, n_jobs: Optional[int] = None):
+    if nombre == 'XGBoost':
+        from xgboost import XGBRegressor
+        return XGBRegressor(random_state=RANDOM_STATE, n_jobs=n_jobs)
+    return RandomForestRegressor(random_state=RANDOM_STATE, n_jobs=n_jobs)
+
+def buscar_hiperparametros(nombre: str, X, y, n_iter: int = 10, cv: int = 5, n_jobs: int = -1,
+                           grilla: Optional[Dict[str, list]] = None) -> RandomizedSearchCV:
+    """
+    RandomizedSearchCV como en el notebook, pero sin `refit`: el modelo final se entrena
+    una sola vez al terminar. Con búsqueda en paralelo cada candidato usa un solo hilo
+    para no multiplicar procesos por hilos de XGBoost.
+    """
+    busqueda = RandomizedSearchCV(
+        estimator=crear_estimador(nombre, n_jobs=1 if n_jobs != 1 else None),
+        param_distributions=grilla or GRILLAS[nombre],
+        n_iter=n_iter,
+        cv=cv,
+        scoring='neg_root_mean_squared_error',
+        random_state=RANDOM_STATE,
+        n_jobs=n_jobs,
+        refit=False,
+    )
+    return busqueda.fit(X, y)
+
+def evaluar(modelo, X, y, cv: int = 5, n_jobs: int = -1) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Predicciones out-of-fold y R² de cada fold en una sola pasada de validación cruzada
+    (mismos folds que `cross_val_score(cv=cv)`, que el notebook corría por separado).
+    """
+    y = np.asarray(y)
+    y_oof = cross_val_predict(modelo, X, y, cv=cv, n_jobs=n_jobs)
+    r2_scores = np.array([r2_score(y[test], y_oof[test]) for _, test in KFold(cv).split(y)])
+    return r2_scores, y_oof
+
+def guardar_artefactos(directorio: str, modelo, columnas: List[str], vectorizer, metricas: dict, calibracion: dict):
+    """
+    Escribe los artefactos en `directorio`. Cada archivo se escribe aparte y se reemplaza
+    con `os.replace`, y el modelo va último, para que el registro de modelos nunca lea un
+    archivo a medio escribir.
+    """
+    os.makedirs(directorio, exist_ok=True)
+
+    def reemplazar(nombre: str, escribir):
+        temporal = os.path.join(directorio, f'.{nombre}.tmp')
+        escribir(temporal)
+        os.replace(temporal, os.path.join(directorio, nombre))
+
+    def pickle_en(objeto):
+        def escribir(path):
+            with open(path, 'wb') as f:
+                pickle.dump(objeto, f)
+        return escribir
+
+    def json_en(objeto):
+        def escribir(path):
+            with open(path, 'w') as f:
+                json.dump(objeto, f, indent=4)
+        return escribir
+
+    if isinstance(vectorizer, HashingTfidfVectorizer):
+        vectorizer.guardar(directorio)
+    else:
+        reemplazar(ARCHIVOS['vectorizer'], lambda path: guardar_vectorizer(vectorizer, path))
+        # El vectorizer por hashing tiene prioridad al cargar: no puede quedar uno viejo
+        for nombre in (ARCHIVO_HASHING, ARCHIVO_IDF, ARCHIVO_FRECUENCIAS):
+            if os.path.exists(os.path.join(directorio, nombre)):
+                os.remove(os.path.join(directorio, nombre))
+    reemplazar(ARCHIVOS['columnas'], pickle_en(list(columnas)))
+    reemplazar(ARCHIVOS['intervalos'], lambda path: guardar_calibracion(calibracion, path))
+    reemplazar(ARCHIVOS['metricas'], json_en(metricas))
+    try:
+        exportar_bosque(modelo, directorio)
+    except ValueError as e:
+        print(f"❌ No se exportó el modelo plano: {e}")
+        # Un modelo plano viejo no puede quedar junto al modelo nuevo
+        for nombre in (ARCHIVO_NODOS, ARCHIVO_META):
+            if os.path.exists(os.path.join(directorio, nombre)):
+                os.remove(os.path.join(directorio, nombre))
+    reemplazar(ARCHIVOS['modelo'], pickle_en(modelo))
+
+def entrenar(df: pd.DataFrame, salida: str = DIRECTORIO_SALIDA, directorio_cache: str = DIRECTORIO_CACHE,
+             modelos: Tuple[str, ...] = ('RandomForest', 'XGBoost'), n_iter: int = 10, cv: int = 5,
+             n_jobs: int = -1, max_features: int = 100, sparse: bool = False, hashing: bool = False,
+             grillas: Optional[Dict[str, Dict[str, list]]] = None) -> dict:
+    """Pipeline completo; devuelve las métricas que se guardan en metrics.json."""
+    tiempos = {}
+    inicio = time.perf_counter()
+    X, y, columnas, vectorizer, huella, desde_cache = obtener_matriz(df, directorio_cache, max_features, sparse, hashing)
+    tiempos["matriz"] = time.perf_counter() - inicio
+    origen = "cache" if desde_cache else "construida"
+    print(f"✅ Matriz de diseño {X.shape[0]}x{X.shape[1]} ({origen}, huella {huella}) en {tiempos['matriz']:.1f}s")
+
+    busquedas = {}
+    for nombre in modelos:
+        inicio = time.perf_counter()
+        busquedas[nombre] = buscar_hiperparametros(nombre, X, y, n_iter, cv, n_jobs, (grillas or {}).get(nombre))
+        tiempos[f"busqueda_{nombre}"] = time.perf_counter() - inicio
+        print(f"  - {nombre}: mejor RMSE {-busquedas[nombre].best_score_:,.2f} USD "
+              f"({busquedas[nombre].best_params_}) en {tiempos[f'busqueda_{nombre}']:.1f}s")
+
+    # Los scores son negativos: el mayor es el de menor RMSE
+    ganador = max(busquedas, key=lambda nombre: busquedas[nombre].best_score_)
+    mejor = busquedas[ganador]
+    modelo = crear_estimador(ganador, n_jobs=1 if n_jobs != 1 else None).set_params(**mejor.best_params_)
+    print(f"Modelo Ganador: {ganador}")
+
+    inicio = time.perf_counter()
+    r2_scores, y_oof = evaluar(modelo, X, y, cv, n_jobs)
+    calibracion = calibrar_intervalos(y, y_oof)
+    tiempos["evaluacion"] = time.perf_counter() - inicio
+
+    # El ajuste final usa todos los núcleos; el modelo se guarda con el valor por defecto
+    # para que la API no abra un pool de hilos en cada predicción
+    inicio = time.perf_counter()
+    modelo.set_params(n_jobs=None if ganador == 'XGBoost' else n_jobs).fit(X, y)
+    modelo.set_params(n_jobs=None)
+    tiempos["entrenamiento_final"] = time.perf_counter() - inicio
+
+    metricas = {
+        "model": ganador,
+        "best_params": mejor.best_params_,
+        "r2_score_mean": float(np.mean(r2_scores)),
+        "r2_score_std": float(np.std(r2_scores)),
+        "rmse_usd_mean": float(-mejor.best_score_),
+        "rmse_usd_std": float(mejor.cv_results_['std_test_score'][mejor.best_index_]),
+        "datos": {"huella": huella, "filas": int(X.shape[0]), "features": int(X.shape[1])},
+        "tiempos_segundos": {etapa: round(segundos, 2) for etapa, segundos in tiempos.items()},
+    }
+    guardar_artefactos(salida, modelo, columnas, vectorizer, metricas, calibracion)
+    print(f"✅ Artefactos guardados en {salida} (R² {metricas['r2_score_mean']:.3f}, "
+          f"RMSE {metricas['rmse_usd_mean']:,.0f} USD).")
+    return metricas
+
+def parsear_argumentos(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Entrena el modelo de precios y escribe los artefactos de la API.")
+    parser.add_argument('--datos', help="Snapshot .pkl/.csv/.parquet; por defecto se lee la tabla 'propiedades'")
+    parser.add_argument('--salida', default=DIRECTORIO_SALIDA,
+                        help="Directorio de los artefactos, p. ej. src/ml/versiones/<nombre> (por defecto src/ml/)")
+    parser.add_argument('--cache', default=DIRECTORIO_CACHE,
+                        help="Directorio de la cache de matrices (por defecto %(default)s, o ML_CACHE_DIR)")
+    parser.add_argument('--modelos', nargs='+', choices=list(GRILLAS), default=list(GRILLAS))
+    parser.add_argument('--n-iter', type=int, default=10, help="Candidatos por búsqueda (por defecto %(default)s)")
+    parser.add_argument('--cv', type=int, default=5, help="Folds de validación cruzada (por defecto %(default)s)")
+    parser.add_argument('--n-jobs', type=int, default=-1, help="Procesos de joblib (por defecto %(default)s)")
+    parser.add_argument('--max-features', type=int, default=100,
+                        help="Vocabulario TF-IDF, o ancho del hashing con --hashing (por defecto %(default)s)")
+    parser.add_argument('--sparse', action='store_true', help="Matriz de diseño dispersa (CSR)")
+    parser.add_argument('--hashing', action='store_true', help="TF-IDF por hashing (HashingTfidfVectorizer)")
+    return parser.parse_args(argv)
+
+if __name__ == '__main__':
+    args = parsear_argumentos()
+    datos = leer_datos_archivo(args.datos) if args.datos else leer_datos_db()
+    print(f"✅ {len(datos)} propiedades leídas para entrenar.")
+    entrenar(datos, salida=args.salida, directorio_cache=args.cache, modelos=tuple(args.modelos),
+             n_iter=args.n_iter, cv=args.cv, n_jobs=args.n_jobs, max_features=args.max_features,
+             sparse=args.sparse, hashing=args.hashing)
@@ -0,0 +1,133 @@
+# src/ml/uncertainty.py
+import json
+import os
+import numpy as np
+from typing import Optional, Tuple
+
+from .motor_arboles import TreeEngine
+
+# Modos disponibles para el cálculo de intervalos:
+# - 'arboles':   media ± z·std de las predicciones de cada árbol (comportamiento histórico).
+# - 'cuantiles': percentiles empíricos de las predicciones por árbol (modo quantile-forest).
+# - 'conformal': cuantiles de residuos relativos precalculados al entrenar. Es O(1) por fila
+#                y funciona con cualquier modelo, incluido XGBoost (que no tiene `estimators_`).
+MODOS_INTERVALO = ('arboles', 'cuantiles', 'conformal')
+
+def calibrar_intervalos(y_true, y_pred, cobertura: float = 0.95, n_bins: int = 10) -> dict:
+    """
+    Calcula la calibración para el modo 'conformal'.
+
+    Usa residuos relativos |y - ŷ| / ŷ agrupados por tramos de precio predicho, de modo que
+    el ancho del intervalo crezca con el precio. `y_pred` debe provenir de datos no vistos
+    por el modelo (hold-out o predicciones out-of-fold de la validación cruzada).
+    """
+    y_true = np.asarray(y_true, dtype=float)
+    y_pred = np.asarray(y_pred, dtype=float)
+    residuos = np.abs(y_true - y_pred) / np.maximum(np.abs(y_pred), 1.0)
+
+    bordes = np.unique(np.quantile(y_pred, np.linspace(0, 1, n_bins + 1)))
+    tramos = np.clip(np.searchsorted(bordes, y_pred, side='right') - 1, 0, max(len(bordes) - 2, 0))
+
+    q_global = float(np.quantile(residuos, cobertura))
+    cuantiles = []
+    for tramo in range(max(len(bordes) - 1, 1)):
+        residuos_tramo = residuos[tramos == tramo]
+        cuantiles.append(float(np.quantile(residuos_tramo, cobertura)) if len(residuos_tramo) else q_global)
+
+    return {
+        "cobertura": cobertura,
+        "bordes": [float(b) for b in bordes],
+        "cuantiles_relativos": cuantiles,
+        "n_calibracion": int(len(y_true))
+    }
+
+def guardar_calibracion(calibracion: dict, path: str):
+    """Guarda la calibración de intervalos en un archivo JSON."""
+    with open(path, 'w') as f:
+        json.dump(calibracion, f, indent=4)
+
+def cargar_calibracion(path: str) -> Optional[dict]:
+    """Carga la calibración de intervalos, o None si el archivo no existe."""
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+class UncertaintyEngine:
+    """
+    Calcula intervalos de confianza para lotes completos sin iterar árbol por árbol en Python.
+
+    Para bosques de sklearn obtiene la hoja de cada fila en todos los árboles con una única
+    llamada a `model.apply` (paralelizada internamente por sklearn) y luego lee los valores
+    de esas hojas de un arreglo precalculado. `model` también puede ser un `TreeEngine`,
+    que recorre el modelo plano; en ese caso el modelo pickleado no hace falta.
+    """
+
+    def __init__(self, model, calibracion: Optional[dict] = None, modo: Optional[str] = None, z: float = 1.96):
+        self.model = model
+        self.calibracion = calibracion
+        self.z = z
+        self._motor = model if isinstance(model, TreeEngine) else None
+        if self._motor is not None:
+            self._es_bosque = self._motor.es_bosque
+        else:
+            self._es_bosque = hasattr(model, 'estimators_') and hasattr(model, 'apply')
+
+        if modo is None:
+            modo = 'arboles' if self._es_bosque else 'conformal'
+        if modo not in MODOS_INTERVALO:
+            raise ValueError(f"Modo de intervalo '{modo}' inválido. Debe ser uno de: {MODOS_INTERVALO}")
+        if modo in ('arboles', 'cuantiles') and not self._es_bosque:
+            raise ValueError(f"El modo '{modo}' requiere un modelo con árboles independientes (RandomForest).")
+        self.modo = modo
+
+        self._valores_hoja = None
+        self._offsets = None
+        if self._es_bosque and self._motor is None:
+            # Valores de todas las hojas concatenados; cada árbol ocupa un tramo que empieza en su offset
+            valores = [tree.tree_.value[:, 0, 0] for tree in model.estimators_]
+            self._offsets = np.cumsum([0] + [len(v) for v in valores[:-1]])
+            self._valores_hoja = np.concatenate(valores)
+
+    @property
+    def disponible(self) -> bool:
+        """Indica si el motor puede producir intervalos con la configuración actual."""
+        if self.modo == 'conformal':
+            return self.calibracion is not None
+        return True
+
+    def predicciones_por_arbol(self, X) -> np.ndarray:
+        """Devuelve una matriz (n_filas, n_arboles) con la predicción de cada árbol."""
+        if not self._es_bosque:
+            raise ValueError("El modelo no expone predicciones por árbol.")
+        if self._motor is not None:
+            return self._motor.predicciones_por_arbol(X)
+        hojas = self.model.apply(X)
+        return self._valores_hoja[hojas + self._offsets]
+
+    def intervalos(self, X, predictions: np.ndarray,
+                   por_arbol: Optional[np.ndarray] = None) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+        """
+        Calcula los límites inferior y superior para cada fila del lote. `por_arbol` son las
+        predicciones por árbol si ya se calcularon (`TreeEngine.predecir`); si no, se calculan acá.
+        """
+        if not self.disponible:
+            return None, None
+
+        predictions = np.asarray(predictions, dtype=float)
+        if self.modo in ('arboles', 'cuantiles') and por_arbol is None:
+            por_arbol = self.predicciones_por_arbol(X)
+
+        if self.modo == 'arboles':
+            std = np.std(por_arbol, axis=1)
+            return predictions - self.z * std, predictions + self.z * std
+
+        if self.modo == 'cuantiles':
+            lower, upper = np.percentile(por_arbol, [2.5, 97.5], axis=1)
+            return lower, upper
+
+        bordes = np.asarray(self.calibracion["bordes"])
+        cuantiles = np.asarray(self.calibracion["cuantiles_relativos"])
+        tramos = np.clip(np.searchsorted(bordes, predictions, side='right') - 1, 0, len(cuantiles) - 1)
+        ancho = cuantiles[tramos] * np.abs(predictions)
+        return predictions - ancho, predictions + ancho
@@ -0,0 +1,114 @@
+# src/ml/vectorizer_hashing.py
+# TF-IDF sin vocabulario: los términos se asignan a columnas con un hash (HashingVectorizer)
+# y solo se guarda el peso IDF de cada columna. El artefacto es un JSON chico más un arreglo
+# .npy que se abre con mmap, así el ETL y todos los workers comparten las mismas páginas, y
+# las frecuencias se pueden actualizar por lotes a medida que llegan nuevas descripciones.
+import json
+import os
+from typing import Iterable, Optional
+
+import numpy as np
+from scipy import sparse as sp
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+
+ARCHIVO_HASHING = 'hashing_vectorizer.json'
+ARCHIVO_IDF = 'hashing_idf.npy'
+ARCHIVO_FRECUENCIAS = 'hashing_frecuencias.npy'
+
+class HashingTfidfVectorizer:
+    """
+    Equivalente a `TfidfVectorizer` (idf suavizado y norma L2) sobre un espacio de
+    `n_features` columnas de hashing. Se usa igual que el vectorizer pickleado:
+    `transform` y `build_analyzer`, tanto al entrenar como al predecir.
+
+    `partial_fit` suma las frecuencias por documento de un lote de textos; el IDF se
+    recalcula con todo lo visto hasta el momento. Un modelo queda atado al IDF con el que
+    se entrenó: después de actualizarlo hay que guardar el vectorizer junto al modelo nuevo.
+    """
+
+    def __init__(self, n_features: int = 2 ** 12, stop_words: Optional[str] = 'english'):
+        self.n_features = n_features
+        self.stop_words = stop_words
+        self.n_documentos = 0
+        self._frecuencias: Optional[np.ndarray] = None
+        self._ruta_frecuencias: Optional[str] = None
+        self._idf: Optional[np.ndarray] = None
+        self._hashing = HashingVectorizer(n_features=n_features, stop_words=stop_words,
+                                          alternate_sign=False, norm=None)
+
+    @property
+    def frecuencias(self) -> np.ndarray:
+        """Documentos en los que aparece cada columna (se lee del disco solo si se actualiza)."""
+        if self._frecuencias is None:
+            if self._ruta_frecuencias is not None:
+                self._frecuencias = np.array(np.load(self._ruta_frecuencias))
+            else:
+                self._frecuencias = np.zeros(self.n_features, dtype=np.int64)
+        return self._frecuencias
+
+    @property
+    def idf_(self) -> np.ndarray:
+        if self._idf is None:
+            self._idf = np.log((1 + self.n_documentos) / (1 + self.frecuencias)) + 1
+        return self._idf
+
+    def build_analyzer(self):
+        return self._hashing.build_analyzer()
+
+    def partial_fit(self, textos: Iterable[str]) -> "HashingTfidfVectorizer":
+        conteos = self._hashing.transform(textos).tocsr()
+        # En CSR cada columna aparece a lo sumo una vez por fila: contar índices es contar documentos
+        self.frecuencias[:] += np.bincount(conteos.indices, minlength=self.n_features)
+        self.n_documentos += conteos.shape[0]
+        self._idf = None
+        return self
+
+    def fit(self, textos: Iterable[str]) -> "HashingTfidfVectorizer":
+        self.n_documentos = 0
+        self._frecuencias = np.zeros(self.n_features, dtype=np.int64)
+        self._ruta_frecuencias = None
+        return self.partial_fit(textos)
+
+    def transform(self, textos: Iterable[str]) -> sp.csr_matrix:
+        conteos = self._hashing.transform(textos).tocsr()
+        conteos.data = conteos.data * self.idf_[conteos.indices]
+        return normalize(conteos, norm='l2', copy=False)
+
+    def fit_transform(self, textos) -> sp.csr_matrix:
+        textos = list(textos)
+        return self.fit(textos).transform(textos)
+
+    def guardar(self, directorio: str):
+        """
+        Escribe el IDF, las frecuencias y el JSON en `directorio` (junto a los demás
+        artefactos). Cada archivo se reemplaza con `os.replace`: quien tenga abierto el IDF
+        anterior con mmap lo sigue leyendo entero hasta recargar.
+        """
+        os.makedirs(directorio, exist_ok=True)
+        idf, frecuencias = np.array(self.idf_, dtype=np.float64), self.frecuencias
+
+        def reemplazar(nombre: str, escribir):
+            destino = os.path.join(directorio, nombre)
+            temporal = f"{destino}.tmp"
+            with open(temporal, 'wb') as f:
+                escribir(f)
+            os.replace(temporal, destino)
+
+        reemplazar(ARCHIVO_IDF, lambda f: np.save(f, idf))
+        reemplazar(ARCHIVO_FRECUENCIAS, lambda f: np.save(f, frecuencias))
+        config = {"n_features": self.n_features, "stop_words": self.stop_words, "n_documentos": self.n_documentos}
+        reemplazar(ARCHIVO_HASHING, lambda f: f.write(json.dumps(config).encode()))
+
+    @classmethod
+    def cargar(cls, directorio: str) -> "HashingTfidfVectorizer":
+        """Lee el JSON y abre el IDF en modo solo lectura con mmap."""
+        with open(os.path.join(directorio, ARCHIVO_HASHING)) as f:
+            config = json.load(f)
+        vectorizer = cls(n_features=config["n_features"], stop_words=config["stop_words"])
+        vectorizer.n_documentos = config["n_documentos"]
+        vectorizer._idf = np.load(os.path.join(directorio, ARCHIVO_IDF), mmap_mode='r')
+        if vectorizer._idf.shape != (vectorizer.n_features,):
+            raise ValueError(f"El IDF tiene forma {vectorizer._idf.shape} y se esperaban {vectorizer.n_features} columnas")
+        vectorizer._ruta_frecuencias = os.path.join(directorio, ARCHIVO_FRECUENCIAS)
+        return vectorizer
@@ -0,0 +1,99 @@
+import pytest
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+# Añadir el directorio raíz al path para permitir la importación de módulos del proyecto
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.ml.feature_engineering import crear_features_nlp
+from scripts.poblar_db import BARRIOS_OFICIALES, MAPA_EXCEPCIONES
+
+BARRIOS_SINTETICOS = ["Palermo", "Recoleta", "Belgrano", "Caballito", "Flores"]
+PALABRAS_SINTETICAS = ["luminoso", "balcon", "pileta", "amenities", "cochera", "reciclado", "estrenar", "seguridad"]
+
+@pytest.fixture(scope="session")
+def datos_sinteticos():
+    """
+    Dataset sintético y determinístico con el mismo formato que la tabla `propiedades`.
+    Devuelve el DataFrame original, la matriz de diseño codificada, el target y el vectorizer.
+    """
+    rng = np.random.default_rng(42)
+    n = 300
+    df = pd.DataFrame({
+        'barrio': rng.choice(BARRIOS_SINTETICOS, n),
+        'ambientes': rng.integers(1, 6, n),
+        'dormitorios': rng.integers(0, 4, n),
+        'banos': rng.integers(1, 3, n),
+        'superficie_total_m2': rng.integers(25, 300, n),
+        'cocheras': rng.integers(0, 2, n),
+        'description': [" ".join(rng.choice(PALABRAS_SINTETICAS, 4)) for _ in range(n)],
+    })
+    y = df['superficie_total_m2'] * 2500 + df['ambientes'] * 10000 + rng.normal(0, 20000, n)
+
+    df_nlp, vectorizer = crear_features_nlp(df, 'description')
+    df_enriquecido = pd.concat([df.drop(columns=['description']), df_nlp], axis=1)
+    X = pd.get_dummies(df_enriquecido, columns=['barrio'], drop_first=True, dtype=int)
+
+    return df, X, y, vectorizer
+
+@pytest.fixture(scope="session")
+def directorio_artefactos(datos_sinteticos, tmp_path_factory):
+    """
+    Directorio con los artefactos que espera la API (modelo, columnas y vectorizer)
+    generados a partir del dataset sintético, con un Random Forest chico.
+    """
+    import pickle
+    from sklearn.ensemble import RandomForestRegressor
+
+    _, X, y, vectorizer = datos_sinteticos
+    directorio = tmp_path_factory.mktemp("artefactos")
+    modelo = RandomForestRegressor(n_estimators=10, max_depth=6, random_state=0).fit(X, y)
+    for nombre, objeto in [('model.pkl', modelo), ('model_columns.pkl', list(X.columns)),
+                           ('tfidf_vectorizer.pkl', vectorizer)]:
+        with open(directorio / nombre, 'wb') as f:
+            pickle.dump(objeto, f)
+    return directorio
+
+PRECIOS_BORDE = ["USD 150.000", " usd 1.250.000 ", "USD", "", "   ", None, 150000, np.nan,
+                 "9.999", "10.000", "Consultar precio", "USD 1_000_000", "nan", "USD 1e6"]
+EXPENSAS_BORDE = ["$ 45.000", "ARS 12.500", "Expensas $ 80.000", "$ 99", "$ 100", "$ 100.000.000",
+                  "$ 99.999.999", "", None, 3500.0, "EXPEN.SAS 5.000", "sin expensas"]
+LOCATIONS_BORDE = ["Palermo Chico, Palermo", "Barrio Norte", "Once, Balvanera", "Nuñez",
+                   "NUNEZ", "Villa Urquiza, Capital Federal", "Centro / Microcentro, Capital Federal",
+                   "Zona Norte", ",Palermo", "Belgrano R, Belgrano, Capital Federal", "", None, 42,
+                   "Constitución", "la paternal"]
+FEATURES_BORDE = [
+    ["50 m² tot.", "2 amb.", "1 dorm.", "1 baño", "1 coch."],
+    ["3 amb.", "4 amb."], ["Monoambiente"], ["120 m² cub.", "2 baños", None, 5],
+    [], None, "2 amb.", ["1 dorm. 2 baños"], ["Dorm. 3", "COCH. 2"],
+]
+
+def dataset_crudo(n: int, seed: int = 0) -> pd.DataFrame:
+    """Datos crudos con el formato del scrapping, mezclando valores típicos y casos borde."""
+    rng = np.random.default_rng(seed)
+    barrios = BARRIOS_OFICIALES + list(MAPA_EXCEPCIONES)
+
+    def elegir(valores, tipicos):
+        return [valores[i] if rng.random() < 0.2 else t
+                for i, t in zip(rng.integers(0, len(valores), n), tipicos)]
+
+    precios = [f"USD {p:,}".replace(",", ".") for p in rng.integers(5_000, 2_000_000, n)]
+    expensas = [f"$ {e:,}".replace(",", ".") for e in rng.integers(0, 500_000, n)]
+    locations = [f"{rng.choice(['Zona', 'Centro', ''])} {b}, {rng.choice(barrios)}".strip(' ,')
+                 for b in rng.choice(barrios, n)]
+    features = [[f"{rng.integers(20, 300)} m² tot.", f"{rng.integers(1, 6)} amb.",
+                 f"{rng.integers(0, 4)} dorm.", f"{rng.integers(1, 3)} baños"][:rng.integers(0, 5)]
+                for _ in range(n)]
+
+    return pd.DataFrame({
+        'id': np.arange(n), 'Price': elegir(PRECIOS_BORDE, precios),
+        'Expensas': elegir(EXPENSAS_BORDE, expensas), 'Location': elegir(LOCATIONS_BORDE, locations),
+        'Features': elegir(FEATURES_BORDE, features), 'Address': 'Calle 123',
+        'Description': 'Departamento', 'Link': 'https://ejemplo', 'scrap_date': '2024-01-01'
+    }, index=np.arange(n) * 2)  # Índice no consecutivo, como tras filtrar el dataset
+
+@pytest.fixture(scope="session")
+def crudo():
+    """Datos crudos del scrapping (3000 filas) para los tests del ETL."""
+    return dataset_crudo(3000)
@@ -0,0 +1,47 @@
+import shutil
+
+import numpy as np
+import pytest
+
+from src.ml.artefactos import ArtifactBundle, ArtefactosNoDisponibles, METRICAS_POR_DEFECTO
+
+def test_construir_el_bundle_no_lee_archivos(directorio_artefactos):
+    bundle = ArtifactBundle(str(directorio_artefactos))
+
+    assert not bundle.listo and bundle.model is None
+    assert all(estado["estado"] == "pendiente" for estado in bundle.reporte()["artefactos"].values())
+
+def test_cargar_registra_estado_y_tiempos(directorio_artefactos):
+    bundle = ArtifactBundle(str(directorio_artefactos)).cargar()
+    artefactos = bundle.reporte()["artefactos"]
+
+    assert bundle.listo and bundle.version
+    for nombre in ('modelo', 'columnas', 'vectorizer'):
+        assert artefactos[nombre]["estado"] == "ok" and artefactos[nombre]["segundos"] >= 0
+    # Los opcionales faltan en el directorio de prueba
+    assert artefactos['intervalos']["estado"] == "no_encontrado"
+    assert artefactos['metricas']["estado"] == "no_encontrado"
+    assert bundle.metricas == METRICAS_POR_DEFECTO
+    # El explainer no se construye al cargar
+    assert artefactos['explainer']["estado"] == "pendiente"
+
+    fila = np.zeros((1, bundle.feature_encoder.n_features))
+    assert bundle.model.predict(fila).shape == (1,)
+
+def test_explainer_se_construye_en_el_primer_uso(directorio_artefactos):
+    bundle = ArtifactBundle(str(directorio_artefactos))
+
+    explainer = bundle.obtener_explainer()
+
+    assert explainer is not None and bundle.obtener_explainer() is explainer
+    assert bundle.estado['explainer']["estado"] == "ok"
+
+def test_artefacto_faltante_deja_el_bundle_no_listo(directorio_artefactos, tmp_path):
+    for nombre in ('model.pkl', 'model_columns.pkl'):
+        shutil.copy(directorio_artefactos / nombre, tmp_path / nombre)
+    bundle = ArtifactBundle(str(tmp_path))
+
+    with pytest.raises(ArtefactosNoDisponibles):
+        bundle.requerir()
+    assert bundle.estado['vectorizer']["estado"] == "error"
+    assert not bundle.listo
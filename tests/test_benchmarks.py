@@ -0,0 +1,37 @@
+from benchmarks.comparar import comparar, diferencias_de_entorno
+from benchmarks.datos import propiedades_crudas
+from benchmarks.medicion import medir, resumir
+
+def test_resumir_percentiles_y_throughput():
+    stats = resumir([0.001] * 99 + [0.101], segundos_totales=0.2, filas=10)
+    assert stats["repeticiones"] == 100 and stats["p50_ms"] == 1.0
+    assert stats["max_ms"] == 101.0 and stats["p99_ms"] > stats["p90_ms"]
+    assert stats["llamadas_por_segundo"] == 500 and stats["filas_por_segundo"] == 5000
+
+def test_medir_respeta_el_presupuesto_y_el_minimo():
+    llamadas = []
+    stats = medir(llamadas.append, repeticiones=1000, minimo=3, presupuesto_s=0.0, calentamiento=2)
+    assert stats["repeticiones"] == 3
+    # El calentamiento recibe índices negativos y no se cuenta
+    assert llamadas == [-1, -2, 0, 1, 2]
+
+def test_datos_sinteticos_deterministicos():
+    assert propiedades_crudas(50).equals(propiedades_crudas(50))
+    assert not propiedades_crudas(50).equals(propiedades_crudas(50, semilla=1))
+
+def test_comparar_marca_regresiones():
+    def reporte(p50_predict, cpus=4):
+        return {
+            "meta": {"cpus": cpus},
+            "resultados": [
+                {"caso": "ml.predict_price", "tamano": 1, "p50_ms": p50_predict, "p99_ms": 2.0, "filas_por_segundo": 100.0},
+                {"caso": "etl.transformar_datos", "tamano": 1000, "p50_ms": 50.0, "p99_ms": 60.0, "filas_por_segundo": 20000.0},
+            ],
+        }
+
+    filas = {f["caso"]: f for f in comparar(reporte(1.0), reporte(1.5), umbral=0.1)}
+    assert filas["ml.predict_price"]["veredicto"] == "peor"
+    assert filas["ml.predict_price"]["cambio_p50"] == 0.5
+    assert filas["etl.transformar_datos"]["veredicto"] == "igual"
+    assert comparar(reporte(1.0), reporte(0.5))[1]["veredicto"] == "mejor"
+    assert diferencias_de_entorno(reporte(1.0), reporte(1.0, cpus=8)) == ["cpus"]
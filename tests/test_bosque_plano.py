@@ -0,0 +1,85 @@
+import shutil
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+from src.ml.artefactos import ArtifactBundle, ArtefactosNoDisponibles, MAX_FILAS_MOTOR
+from src.ml.bosque_plano import BosquePlano, exportar_bosque
+from src.ml.registro import ModelRegistry, verificar_consistencia
+
+def recorrer(bosque: BosquePlano, x: np.ndarray) -> float:
+    """Recorrido de referencia, fila por fila, con la semántica documentada del formato."""
+    hojas = []
+    for nodo in bosque.raices:
+        while bosque.izquierdo[nodo] != nodo:
+            valor = np.float64(np.float32(x[bosque.atributo[nodo]]))
+            izquierda = bosque.faltante_izq[nodo] if np.isnan(valor) else valor <= bosque.umbral[nodo]
+            nodo = bosque.izquierdo[nodo] if izquierda else bosque.derecho[nodo]
+        hojas.append(bosque.valor[nodo])
+    return np.mean(hojas) if bosque.agregacion == 'promedio' else bosque.base + np.sum(hojas)
+
+@pytest.fixture
+def datos_con_faltantes(datos_sinteticos):
+    _, X, y, _ = datos_sinteticos
+    X = X.to_numpy(dtype=float)
+    X[::7, 0] = np.nan
+    return X, y.to_numpy()
+
+def test_random_forest_exportado_predice_igual(datos_con_faltantes, tmp_path):
+    X, y = datos_con_faltantes
+    modelo = RandomForestRegressor(n_estimators=8, max_depth=6, random_state=0).fit(X, y)
+    meta = exportar_bosque(modelo, str(tmp_path))
+
+    bosque = BosquePlano.cargar(str(tmp_path))
+    assert isinstance(bosque.datos, np.memmap) and not bosque.datos.flags.writeable
+    assert all(campo.ctypes.data % 64 == 0 for campo in (bosque.atributo, bosque.umbral, bosque.hijos, bosque.valor))
+    assert meta["n_arboles"] == 8 and bosque.raices[0] == 0
+    assert len(bosque.valor) == sum(e.tree_.node_count for e in modelo.estimators_)
+    np.testing.assert_allclose([recorrer(bosque, x) for x in X[:60]], modelo.predict(X[:60]), rtol=1e-12)
+
+def test_xgboost_exportado_predice_igual(datos_con_faltantes, tmp_path):
+    xgboost = pytest.importorskip("xgboost")
+    X, y = datos_con_faltantes
+    modelo = xgboost.XGBRegressor(n_estimators=20, max_depth=4, random_state=0).fit(X, y)
+    exportar_bosque(modelo, str(tmp_path))
+
+    bosque = BosquePlano.cargar(str(tmp_path))
+    assert bosque.agregacion == 'suma' and bosque.n_arboles == 20
+    # XGBoost acumula en float32
+    np.testing.assert_allclose([recorrer(bosque, x) for x in X[:60]], modelo.predict(X[:60]), rtol=1e-5)
+
+def test_modelo_no_soportado():
+    from sklearn.linear_model import LinearRegression
+
+    with pytest.raises(ValueError):
+        exportar_bosque(LinearRegression().fit([[0.0], [1.0]], [0.0, 1.0]), "no-se-usa")
+
+def test_bundle_carga_el_modelo_plano(directorio_artefactos, tmp_path):
+    shutil.copytree(directorio_artefactos, tmp_path, dirs_exist_ok=True)
+    bundle = ArtifactBundle(str(tmp_path)).cargar()
+    assert bundle.bosque_plano is None and bundle.estado['bosque_plano']["estado"] == "no_encontrado"
+
+    exportar_bosque(bundle.model, str(tmp_path))
+    bundle = ArtifactBundle(str(tmp_path)).cargar()
+    assert bundle.estado['bosque_plano']["estado"] == "ok"
+    assert bundle.bosque_plano.n_features == len(bundle.model_columns)
+    assert verificar_consistencia(bundle) == []
+
+def test_modelo_diferido_que_no_carga_responde_503(directorio_artefactos, tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+    from src.api.main import app
+    from src.ml import predict
+
+    shutil.copytree(directorio_artefactos, tmp_path, dirs_exist_ok=True)
+    exportar_bosque(ArtifactBundle(str(tmp_path)).cargar().model, str(tmp_path))
+    (tmp_path / 'model.pkl').write_bytes(b"no es un pickle")
+
+    bundle = ArtifactBundle(str(tmp_path)).requerir()
+    assert bundle.modelo_diferido and bundle.model is None
+    # Los lotes grandes usan model.pkl: sin él, el pedido falla como artefacto no disponible
+    with pytest.raises(ArtefactosNoDisponibles):
+        bundle.predecir(np.zeros((MAX_FILAS_MOTOR + 1, len(bundle.model_columns))))
+
+    monkeypatch.setattr(predict, "registro", ModelRegistry(str(tmp_path)))
+    assert TestClient(app).get("/predict/model-info").status_code == 503
@@ -0,0 +1,71 @@
+import time
+
+from src.ml.cache import PredictionCache, crear_normalizador_descripcion
+
+ENTRADA = {
+    "barrio": "Palermo", "ambientes": 2, "dormitorios": 1, "banos": 1,
+    "superficie_total_m2": 50, "cocheras": 0, "description": "Luminoso con balcon"
+}
+
+def test_descripciones_equivalentes_comparten_clave(datos_sinteticos):
+    _, _, _, vectorizer = datos_sinteticos
+    normalizar = crear_normalizador_descripcion(vectorizer)
+    cache = PredictionCache()
+
+    clave = cache.clave(ENTRADA, normalizar)
+    # Mismo contenido para el vectorizer: otro orden, mayúsculas y palabras fuera del vocabulario
+    equivalente = dict(ENTRADA, description="BALCON, luminoso... con")
+    distinta = dict(ENTRADA, description="luminoso con pileta")
+
+    assert cache.clave(equivalente, normalizar) == clave
+    assert cache.clave(distinta, normalizar) != clave
+    assert cache.clave(dict(ENTRADA, description=None), normalizar) == cache.clave(dict(ENTRADA, description=""), normalizar)
+
+def test_lru_descarta_la_entrada_menos_usada():
+    cache = PredictionCache(max_size=2)
+    cache.set("a", {"v": 1})
+    cache.set("b", {"v": 2})
+    cache.get("a")
+    cache.set("c", {"v": 3})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"v": 1}
+    assert cache.get("c") == {"v": 3}
+
+def test_ttl_y_contadores():
+    cache = PredictionCache(ttl_seconds=0.05)
+    cache.set("a", {"v": 1})
+
+    assert cache.get("a") == {"v": 1}
+    time.sleep(0.1)
+    assert cache.get("a") is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+def test_cambio_de_version_vacia_la_cache():
+    cache = PredictionCache()
+    cache.set_version("v1")
+    cache.set("a", {"v": 1})
+
+    cache.set_version("v2")
+
+    assert cache.stats()["size"] == 0
+    assert cache.stats()["version"] == "v2"
+
+def test_backend_compartido_se_consulta_ante_un_fallo_local():
+    class BackendEnMemoria:
+        def __init__(self):
+            self.datos = {}
+        def get(self, clave):
+            return self.datos.get(clave)
+        def set(self, clave, valor):
+            self.datos[clave] = valor
+
+    backend = BackendEnMemoria()
+    PredictionCache(backend=backend).set("a", {"v": 1})
+    otro_worker = PredictionCache(backend=backend)
+
+    assert otro_worker.get("a") == {"v": 1}
+    assert otro_worker.stats()["shared_hits"] == 1
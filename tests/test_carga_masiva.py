@@ -0,0 +1,185 @@
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from scripts.carga_masiva import INDICES_SECUNDARIOS, MedidorEtapas, campo_tsv, insertar_multifila
+from scripts.poblar_db import ejecutar_carga_masiva, ejecutar_etl_por_lotes, COLUMNAS_FINALES
+from tests.test_etl_lotes import ConexionFalsa, escribir
+
+def leer_tsv(path):
+    """Interpreta el TSV como LOAD DATA con ESCAPED BY '\\\\' (NULL como \\N)."""
+    def campo(texto):
+        if texto == '\\N':
+            return None
+        resultado, i = [], 0
+        while i < len(texto):
+            if texto[i] == '\\':
+                resultado.append({'t': '\t', 'n': '\n', 'r': '\r'}.get(texto[i + 1], texto[i + 1]))
+                i += 2
+            else:
+                resultado.append(texto[i])
+                i += 1
+        return ''.join(resultado)
+
+    with open(path, encoding='utf-8', newline='') as f:
+        return [tuple(campo(c) for c in linea.split('\t')) for linea in f.read().split('\n') if linea]
+
+class BaseFalsa:
+    def __init__(self):
+        self.filas = []
+        self.sentencias = []
+        self.indices = set(INDICES_SECUNDARIOS) | {'PRIMARY', 'source_id'}
+        self.conexiones = 0
+        self.hilos = set()
+        self.source_ids = set()
+        self.lock = threading.Lock()
+        self.max_allowed_packet = 64 * 1024
+
+class CursorFalso:
+    def __init__(self, base):
+        self.base = base
+        self.description = [('Table',), ('Non_unique',), ('Key_name',)]
+        self.resultado = []
+        self.rowcount = -1
+        self.fila = (1,)
+
+    def execute(self, query, params=None):
+        query = " ".join(query.split())
+        with self.base.lock:
+            self.base.sentencias.append(query)
+        if query.startswith("INSERT INTO propiedades"):
+            # Multifila: los parámetros llegan aplanados, una tupla por cada `(...)` del VALUES
+            ancho = len(params) // query.count("(%s")
+            self.executemany(query, list(zip(*[iter(params)] * ancho)))
+            return
+        with self.base.lock:
+            if query == "SELECT @@max_allowed_packet":
+                self.fila = (self.base.max_allowed_packet,)
+            elif query.startswith("SHOW INDEX"):
+                self.resultado = [('propiedades', 1, nombre) for nombre in self.base.indices]
+            elif query.startswith("ALTER TABLE propiedades DROP"):
+                self.base.indices -= {p.split()[-1] for p in query.split(',')}
+            elif query.startswith("ALTER TABLE propiedades ADD"):
+                self.base.indices |= {p.split('INDEX ')[1].split()[0] for p in query.split(', ADD ')}
+            elif query.startswith("LOAD DATA LOCAL INFILE"):
+                # Como MySQL con LOCAL: las filas con un source_id que ya existe se omiten
+                nuevas = [fila for fila in leer_tsv(params[0]) if fila[0] not in self.base.source_ids]
+                self.base.source_ids.update(fila[0] for fila in nuevas)
+                self.base.filas.extend(nuevas)
+                self.base.hilos.add(threading.get_ident())
+                self.rowcount = len(nuevas)
+
+    def executemany(self, query, params):
+        if query.strip().startswith("INSERT INTO propiedades"):
+            time.sleep(0.2)  # Simula la latencia del servidor para que los lotes se solapen
+            with self.base.lock:
+                self.base.filas.extend(params)
+                self.base.hilos.add(threading.get_ident())
+
+    def fetchall(self):
+        return self.resultado
+
+    def fetchone(self):
+        return self.fila
+
+    def close(self):
+        pass
+
+class ConexionMasiva:
+    def __init__(self, base):
+        self.base = base
+        self.cerrada = False
+
+    def cursor(self):
+        return CursorFalso(self.base)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.cerrada = True
+
+def conectar(base):
+    def abrir():
+        base.conexiones += 1
+        return ConexionMasiva(base)
+    return abrir
+
+@pytest.fixture
+def archivo(crudo, tmp_path):
+    return escribir(crudo, tmp_path / "crudo.pkl")
+
+@pytest.fixture
+def esperadas(archivo):
+    conn = ConexionFalsa()
+    ejecutar_etl_por_lotes(archivo, conn, chunksize=500)
+    return conn.insertadas
+
+def test_campo_tsv_escapa_separadores_y_nulos():
+    assert campo_tsv(None) == '\\N'
+    assert campo_tsv("a\tb\nc\\d") == 'a\\tb\\nc\\\\d'
+    assert campo_tsv(12.5) == '12.5'
+
+def test_insertar_multifila_parte_por_tamano():
+    base = BaseFalsa()
+    cursor = CursorFalso(base)
+    filas = [(str(i), 'x' * 40) for i in range(10)]
+
+    sentencias = insertar_multifila(cursor, 'propiedades', ['source_id', 'description'], filas, max_bytes=200)
+
+    assert sentencias == len(base.sentencias) > 1
+    assert all(s.startswith("INSERT INTO propiedades (source_id, description) VALUES (%s, %s)") for s in base.sentencias)
+    assert base.filas == filas
+
+def test_multifila_en_paralelo_inserta_lo_mismo(archivo, esperadas):
+    base = BaseFalsa()
+    medidor = MedidorEtapas()
+    insertados = ejecutar_carga_masiva(archivo, conectar(base), chunksize=500, backend='multifila',
+                                       conexiones=3, medidor=medidor)
+
+    assert insertados == len(esperadas)
+    assert sorted(base.filas, key=lambda f: f[0]) == sorted(esperadas, key=lambda f: f[0])
+    assert len(base.hilos) > 1 and base.conexiones > 1
+    # Cada lote de 500 filas no entra en un paquete de 64 KB: se parte en varias sentencias
+    multifila = [s for s in base.sentencias if s.startswith("INSERT INTO propiedades")]
+    assert len(multifila) > 6 and all(len(s) < base.max_allowed_packet for s in multifila)
+    # Las estadísticas se reconstruyen una sola vez al final
+    assert sum(s.startswith("DELETE FROM estadisticas_barrio") for s in base.sentencias) == 1
+    reporte = medidor.reporte()
+    assert reporte['carga']['filas'] == insertados and reporte['lectura']['filas'] == 3000
+
+def test_load_data_con_recarga_completa(archivo, esperadas):
+    base = BaseFalsa()
+    insertados = ejecutar_carga_masiva(archivo, conectar(base), chunksize=1000, backend='load-data',
+                                       vaciar=True, sin_indices=True)
+
+    assert insertados == len(esperadas)
+    # Ida y vuelta por el TSV: mismos valores (como texto, igual que los recibe MySQL)
+    como_texto = [tuple(None if v is None else str(v) for v in fila) for fila in esperadas]
+    assert base.filas == como_texto
+    assert len(base.filas[0]) == len(COLUMNAS_FINALES)
+
+    assert "TRUNCATE TABLE propiedades" in base.sentencias
+    quitar = next(i for i, s in enumerate(base.sentencias) if s.startswith("ALTER TABLE propiedades DROP"))
+    crear = next(i for i, s in enumerate(base.sentencias) if s.startswith("ALTER TABLE propiedades ADD"))
+    primera_carga = next(i for i, s in enumerate(base.sentencias) if s.startswith("LOAD DATA"))
+    assert quitar < primera_carga < crear
+    assert INDICES_SECUNDARIOS.keys() <= base.indices
+
+def test_load_data_no_cuenta_los_source_id_repetidos(crudo, tmp_path, esperadas, capsys):
+    archivo = escribir(pd.concat([crudo, crudo.head(200)]), tmp_path / "con_repetidos.pkl")
+    base = BaseFalsa()
+    medidor = MedidorEtapas()
+    insertados = ejecutar_carga_masiva(archivo, conectar(base), chunksize=1000, backend='load-data',
+                                       conexiones=2, medidor=medidor)
+
+    assert insertados == len(base.filas) == len(esperadas)
+    assert medidor.reporte()['carga']['filas'] == insertados
+    omitidos = sum(1 for fila in crudo.head(200).itertuples() if str(fila.id) in base.source_ids)
+    assert omitidos > 0
+    assert f"Se omitieron {omitidos} registros con source_id ya existente" in capsys.readouterr().out
@@ -0,0 +1,176 @@
+import asyncio
+import os
+
+import pymysql
+import pytest
+
+from src.api import repositorio
+from src.api.estadisticas import registrar_baja, registrar_baja_async
+
+class CursorAsyncFalso:
+    """Versión asíncrona del cursor falso: registra las sentencias y devuelve filas fijas."""
+    def __init__(self, fila=None, filas=None, error_en=None, rowcount=1):
+        self.fila = fila
+        self.filas = filas or []
+        self.error_en = error_en
+        self.rowcount = rowcount
+        self.sentencias = []
+
+    async def execute(self, query, params=None):
+        query = " ".join(query.split())
+        if self.error_en and self.error_en in query:
+            raise pymysql.err.ProgrammingError(1146, "Table doesn't exist")
+        self.sentencias.append((query, params))
+
+    async def executemany(self, query, params):
+        self.sentencias.append((" ".join(query.split()), list(params)))
+
+    async def fetchone(self):
+        return self.fila
+
+    async def fetchall(self):
+        return self.filas
+
+class CursorSincronoFalso(CursorAsyncFalso):
+    def execute(self, query, params=None):
+        self.sentencias.append((" ".join(query.split()), params))
+
+    def executemany(self, query, params):
+        self.sentencias.append((" ".join(query.split()), list(params)))
+
+    def fetchone(self):
+        return self.fila
+
+def test_estadisticas_async_ejecuta_las_mismas_sentencias_que_la_version_sincrona():
+    fila = {'barrio': 'Palermo', 'price_usd': 300000.0, 'superficie_total_m2': 100}
+    extremos = {'precio_min': 100000, 'precio_max': 300000}
+
+    sincrono = CursorSincronoFalso(fila=extremos)
+    registrar_baja(sincrono, fila)
+    asincrono = CursorAsyncFalso(fila=extremos)
+    asyncio.run(registrar_baja_async(asincrono, fila))
+
+    assert asincrono.sentencias == sincrono.sentencias
+
+def test_estadisticas_por_barrio_sin_tabla_materializada_agrega_sobre_propiedades():
+    cursor = CursorAsyncFalso(filas=[{'barrio': 'Palermo'}], error_en="FROM estadisticas_barrio")
+    filas = asyncio.run(repositorio.estadisticas_por_barrio(cursor))
+
+    assert filas == [{'barrio': 'Palermo'}]
+    (query, _), = cursor.sentencias
+    assert "FROM propiedades" in query and "GROUP BY barrio" in query
+
+def test_baja_concurrente_que_no_borra_nada_no_toca_las_estadisticas():
+    fila = {'id': 7, 'barrio': 'Palermo', 'price_usd': 200000.0, 'superficie_total_m2': 100}
+    # Otro pedido ya la borró: el DELETE no afecta filas
+    cursor = CursorAsyncFalso(fila=fila, rowcount=0)
+
+    assert asyncio.run(repositorio.eliminar_propiedad(cursor, 7)) is None
+    queries = [q for q, _ in cursor.sentencias]
+    assert queries[0] == "SELECT * FROM propiedades WHERE id = %s FOR UPDATE"
+    assert not any("estadisticas_barrio" in q for q in queries)
+
+def test_modificacion_bloquea_la_fila_anterior():
+    # El cursor falso devuelve la misma fila en cada fetchone: sirve de propiedad y de estadísticas
+    fila = {'id': 7, 'barrio': 'Palermo', 'price_usd': 200000.0, 'superficie_total_m2': 100,
+            'precio_min': 100000, 'precio_max': 300000}
+    cursor = CursorAsyncFalso(fila=fila)
+    asyncio.run(repositorio.actualizar_propiedad(cursor, 7, {'price_usd': 210000.0}))
+
+    queries = [q for q, _ in cursor.sentencias]
+    assert queries[0].endswith("FOR UPDATE") and queries[1].startswith("UPDATE propiedades")
+    assert "SELECT precio_min, precio_max FROM estadisticas_barrio WHERE barrio = %s FOR UPDATE" in queries
+
+class ConexionFalsa:
+    def __init__(self, error=None):
+        self.error = error
+        self.commits = 0
+
+    async def commit(self):
+        if self.error:
+            raise self.error
+        self.commits += 1
+
+@pytest.mark.parametrize("falla_el_commit", [False, True])
+def test_indice_de_similares_se_actualiza_solo_despues_del_commit(monkeypatch, falla_el_commit):
+    from contextlib import asynccontextmanager
+    from fastapi.testclient import TestClient
+    from src.api import db_async
+    from src.api.main import app
+    from src.api.routers import propiedades
+    from src.ml.similares import SimilarPropertiesIndex
+
+    cursor = CursorAsyncFalso(fila={'precio_min': 100000, 'precio_max': 300000})
+    cursor.lastrowid = 42
+    cursor.connection = ConexionFalsa(pymysql.err.OperationalError(2013, "Lost connection") if falla_el_commit else None)
+
+    @asynccontextmanager
+    async def cursor_falso():
+        yield cursor
+    monkeypatch.setattr(db_async, "cursor_async", cursor_falso)
+    indice = SimilarPropertiesIndex()
+    monkeypatch.setattr(propiedades, "indice_similares", indice)
+
+    respuesta = TestClient(app).post("/propiedades/", json={
+        'source_id': 'nueva', 'price_usd': 150000, 'barrio': 'Palermo', 'ambientes': 2, 'superficie_total_m2': 50
+    })
+
+    if falla_el_commit:
+        assert respuesta.status_code == 500 and len(indice) == 0
+    else:
+        assert respuesta.status_code == 201 and len(indice) == 1 and cursor.connection.commits == 1
+
+# --- Integración contra una base MySQL (o compatible) desechable ---
+# Se ejecuta solo si TEST_DB_NAME apunta a una base de pruebas: las tablas se recrean.
+requiere_mysql = pytest.mark.skipif(not os.getenv("TEST_DB_NAME"), reason="TEST_DB_NAME no definida")
+
+async def _conectar():
+    import aiomysql
+    return await aiomysql.connect(
+        host=os.getenv("TEST_DB_HOST", "127.0.0.1"), port=int(os.getenv("TEST_DB_PORT", "3306")),
+        user=os.getenv("TEST_DB_USER", "root"), password=os.getenv("TEST_DB_PASSWORD", ""),
+        db=os.getenv("TEST_DB_NAME"), autocommit=False, cursorclass=aiomysql.DictCursor
+    )
+
+async def _crear_esquema(cursor):
+    with open(os.path.join(os.path.dirname(__file__), '..', 'scripts', 'schema.sql')) as f:
+        sentencias = [s for s in f.read().split(';') if 'CREATE TABLE' in s]
+    await cursor.execute("DROP TABLE IF EXISTS propiedades, estadisticas_barrio")
+    for sentencia in sentencias:
+        await cursor.execute(sentencia)
+
+@requiere_mysql
+def test_crud_asincrono_mantiene_estadisticas_consistentes():
+    async def escenario():
+        conn = await _conectar()
+        try:
+            async with conn.cursor() as cursor:
+                await _crear_esquema(cursor)
+                ids = []
+                for i, precio in enumerate([100000, 200000, 300000]):
+                    ids.append(await repositorio.crear_propiedad(cursor, {
+                        'source_id': f"test-{i}", 'price_usd': precio, 'barrio': 'Palermo',
+                        'ambientes': 2, 'superficie_total_m2': 50 + i
+                    }))
+                await repositorio.actualizar_propiedad(cursor, ids[0], {'price_usd': 150000})
+                await repositorio.eliminar_propiedad(cursor, ids[2])
+                await conn.commit()
+
+                materializadas = await repositorio.estadisticas_por_barrio(cursor)
+                await cursor.execute(repositorio.CONSULTA_ESTADISTICAS_DESDE_PROPIEDADES)
+                esperadas = await cursor.fetchall()
+                promedio = await repositorio.promedio_similares(
+                    cursor, {'barrio': 'Palermo', 'ambientes': 2, 'superficie_total_m2': 50}
+                )
+            return materializadas, list(esperadas), promedio
+        finally:
+            conn.close()
+
+    materializadas, esperadas, promedio = asyncio.run(escenario())
+    # suma_precio_m2 es DOUBLE y el AVG de la consulta original es DECIMAL: se comparan como float
+    assert [f['barrio'] for f in materializadas] == [f['barrio'] for f in esperadas]
+    for obtenida, esperada in zip(materializadas, esperadas):
+        for campo, valor in esperada.items():
+            if campo != 'barrio':
+                assert float(obtenida[campo]) == pytest.approx(float(valor), abs=0.01)
+    assert promedio == pytest.approx(175000.0)
@@ -0,0 +1,108 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from src.ml.artefactos import ArtifactBundle, ArtefactosNoDisponibles
+from src.ml.ejecutor import (
+    ConfiguracionEjecutor, EjecutorSaturado, InferenceExecutor, TiempoInferenciaAgotado, _predecir_en_worker,
+    predecir_arreglos
+)
+from src.ml.explicaciones import calcular_shap
+
+class BundleLento:
+    """Bundle mínimo cuya predicción tarda `demora` segundos."""
+    uncertainty_engine = None
+
+    def __init__(self, demora: float):
+        self.demora = demora
+
+    def predecir(self, X):
+        time.sleep(self.demora)
+        return np.zeros(len(X)), None
+
+@pytest.fixture(scope="module")
+def bundle_y_matriz(directorio_artefactos, datos_sinteticos):
+    df, _, _, _ = datos_sinteticos
+    bundle = ArtifactBundle(str(directorio_artefactos)).requerir()
+    return bundle, bundle.feature_encoder.transform(df.head(30).to_dict('records'))
+
+def test_backend_de_hilos(bundle_y_matriz):
+    bundle, X = bundle_y_matriz
+    ejecutor = InferenceExecutor(ConfiguracionEjecutor(workers=2))
+
+    for obtenido, esperado in zip(ejecutor.predecir(bundle, X), predecir_arreglos(bundle, X)):
+        np.testing.assert_array_equal(obtenido, esperado)
+    shap_values, base = ejecutor.explicar(bundle, X[:3], aproximada=True)
+    np.testing.assert_array_equal(shap_values, calcular_shap(bundle.obtener_explainer(), X[:3], True)[0])
+
+    stats = ejecutor.stats()
+    assert stats["completadas"] == 2 and stats["en_curso"] == 0 and stats["errores"] == 0
+    ejecutor.cerrar()
+
+def test_backend_de_procesos(bundle_y_matriz):
+    bundle, X = bundle_y_matriz
+    ejecutor = InferenceExecutor(ConfiguracionEjecutor(backend='procesos', workers=1, timeout=120, timeout_explicaciones=120))
+    try:
+        ejecutor.iniciar(bundle.directorio, explainer=False)
+        for obtenido, esperado in zip(ejecutor.predecir(bundle, X), predecir_arreglos(bundle, X)):
+            np.testing.assert_allclose(obtenido, esperado, rtol=1e-12)
+        shap_values, base = ejecutor.explicar(bundle, X[:3])
+        esperados, base_esperada = calcular_shap(bundle.obtener_explainer(), X[:3])
+        np.testing.assert_allclose(shap_values, esperados, rtol=1e-9)
+        assert base == pytest.approx(base_esperada)
+
+        # El worker no responde con artefactos de otra versión
+        with pytest.raises(ArtefactosNoDisponibles):
+            ejecutor._ejecutar(120, _predecir_en_worker, bundle.directorio, "otra-version", X)
+        assert ejecutor.stats()["workers_listos"] == 1
+    finally:
+        ejecutor.cerrar()
+    assert ejecutor.stats()["en_curso"] == 0
+
+def test_hilos_ejecuta_en_el_hilo_que_llama_con_limite_de_pendientes():
+    ejecutor = InferenceExecutor(ConfiguracionEjecutor(max_pendientes=1))
+    X = np.zeros((2, 3))
+    hilos, resultados = [], []
+
+    class BundleQueAnotaElHilo(BundleLento):
+        def predecir(self, X):
+            hilos.append(threading.current_thread())
+            return super().predecir(X)
+
+    hilo = threading.Thread(target=lambda: resultados.append(ejecutor.predecir(BundleQueAnotaElHilo(0.3), X)))
+    hilo.start()
+    time.sleep(0.05)
+    # La tarea en curso ocupa el único lugar
+    with pytest.raises(EjecutorSaturado):
+        ejecutor.predecir(BundleLento(0.0), X)
+    hilo.join()
+
+    assert hilos == [hilo] and len(resultados) == 1
+    with pytest.raises(ZeroDivisionError):
+        ejecutor._ejecutar_en_el_hilo(lambda: 1 / 0)
+    stats = ejecutor.stats()
+    assert stats["completadas"] == 1 and stats["errores"] == 1 and stats["rechazos_saturado"] == 1
+    assert stats["en_curso"] == 0
+
+def test_procesos_timeout_y_cierre():
+    ejecutor = InferenceExecutor(ConfiguracionEjecutor(backend='procesos', workers=1, timeout=0.05))
+
+    with pytest.raises(TiempoInferenciaAgotado):
+        ejecutor._ejecutar(0.05, time.sleep, 0.5)
+
+    # El cierre espera a la tarea vencida si ya había empezado
+    ejecutor.cerrar()
+    stats = ejecutor.stats()
+    assert stats["timeouts"] == 1 and stats["en_curso"] == 0
+
+def test_configuracion_desde_entorno(monkeypatch):
+    monkeypatch.setenv("ML_EJECUTOR", "procesos")
+    monkeypatch.setenv("ML_EJECUTOR_WORKERS", "3")
+    config = ConfiguracionEjecutor.desde_entorno()
+    assert config.backend == 'procesos' and config.workers == 3
+
+    monkeypatch.setenv("ML_EJECUTOR", "gpu")
+    with pytest.raises(ValueError):
+        ConfiguracionEjecutor.desde_entorno()
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+
+from src.ml.encoder import FeatureEncoder
+from src.ml.feature_engineering import crear_features_nlp
+
+def pipeline_pandas(items, vectorizer, model_columns):
+    """Pipeline original de `predict_price`, usado como referencia."""
+    input_df = pd.DataFrame(items)
+    nlp_features_df, _ = crear_features_nlp(input_df, 'description', vectorizer=vectorizer)
+    input_df_no_desc = input_df.drop(columns=['description'], errors='ignore')
+    input_enriquecido = pd.concat([input_df_no_desc, nlp_features_df], axis=1)
+    input_encoded = pd.get_dummies(input_enriquecido, columns=['barrio'], dtype=int)
+    return input_encoded.reindex(columns=model_columns, fill_value=0)
+
+def test_encoder_reproduce_el_pipeline_de_pandas(datos_sinteticos):
+    df, X, _, vectorizer = datos_sinteticos
+    model_columns = list(X.columns)
+    encoder = FeatureEncoder(model_columns, vectorizer)
+
+    items = df.head(50).to_dict(orient='records')
+    # Casos borde: descripción vacía o ausente, barrio eliminado por drop_first y barrio desconocido
+    items[0]['description'] = None
+    items[1]['description'] = ''
+    items[2]['barrio'] = 'Belgrano'
+    items[3]['barrio'] = 'Barrio Desconocido'
+
+    esperado = pipeline_pandas(items, vectorizer, model_columns).to_numpy(dtype=float)
+
+    np.testing.assert_allclose(encoder.transform(items), esperado)
+
+def test_encoder_una_fila(datos_sinteticos):
+    df, X, _, vectorizer = datos_sinteticos
+    encoder = FeatureEncoder(list(X.columns), vectorizer)
+    item = df.iloc[7].to_dict()
+
+    resultado = encoder.transform_one(item)
+
+    assert resultado.shape == (1, len(X.columns))
+    np.testing.assert_allclose(resultado, pipeline_pandas([item], vectorizer, list(X.columns)).to_numpy(dtype=float))
@@ -0,0 +1,79 @@
+import pytest
+
+from src.api.estadisticas import acumular_filas, registrar_baja, registrar_modificacion
+
+class CursorFalso:
+    """Registra las sentencias ejecutadas y devuelve una fila fija en fetchone."""
+    def __init__(self, fila=None):
+        self.fila = fila
+        self.sentencias = []
+
+    def execute(self, query, params=None):
+        self.sentencias.append((" ".join(query.split()), params))
+
+    def executemany(self, query, params):
+        self.sentencias.append((" ".join(query.split()), list(params)))
+
+    def fetchone(self):
+        return self.fila
+
+def test_acumular_filas_agrupa_por_barrio():
+    cursor = CursorFalso()
+    acumular_filas(cursor, [
+        {'barrio': 'Palermo', 'price_usd': 100000.0, 'superficie_total_m2': 50},
+        {'barrio': 'Palermo', 'price_usd': 300000.0, 'superficie_total_m2': 100},
+        {'barrio': 'Palermo', 'price_usd': None, 'superficie_total_m2': 40},
+        {'barrio': 'Flores', 'price_usd': 90000.0, 'superficie_total_m2': 45},
+        # Sin superficie válida: la consulta original tampoco la cuenta
+        {'barrio': 'Flores', 'price_usd': 500000.0, 'superficie_total_m2': None},
+    ])
+
+    (query, params), = cursor.sentencias
+    assert query.startswith("INSERT INTO estadisticas_barrio")
+    por_barrio = {p[0]: p[1:] for p in params}
+    assert por_barrio['Palermo'] == (3, 2, 400000.0, pytest.approx(5000.0), 100000.0, 300000.0)
+    assert por_barrio['Flores'] == (1, 1, 90000.0, pytest.approx(2000.0), 90000.0, 90000.0)
+
+def test_baja_de_un_extremo_recalcula_el_barrio():
+    cursor = CursorFalso(fila={'precio_min': 100000, 'precio_max': 300000})
+    registrar_baja(cursor, {'barrio': 'Palermo', 'price_usd': 300000.0, 'superficie_total_m2': 100})
+
+    queries = [q for q, _ in cursor.sentencias]
+    assert any(q.startswith("DELETE FROM estadisticas_barrio WHERE barrio") for q in queries)
+    assert any("FROM propiedades" in q for q in queries)
+
+def test_baja_intermedia_solo_resta():
+    cursor = CursorFalso(fila={'precio_min': 100000, 'precio_max': 300000})
+    registrar_baja(cursor, {'barrio': 'Palermo', 'price_usd': 200000.0, 'superficie_total_m2': 100})
+
+    queries = [q for q, _ in cursor.sentencias]
+    assert not any("FROM propiedades" in q for q in queries)
+    assert any(q.startswith("UPDATE estadisticas_barrio SET cantidad = cantidad - 1") for q in queries)
+
+def test_modificacion_de_un_extremo_en_el_mismo_barrio_no_suma_dos_veces():
+    cursor = CursorFalso(fila={'precio_min': 100000, 'precio_max': 300000})
+    anterior = {'barrio': 'Palermo', 'price_usd': 300000.0, 'superficie_total_m2': 100}
+    registrar_modificacion(cursor, anterior, {**anterior, 'price_usd': 350000.0})
+
+    queries = [q for q, _ in cursor.sentencias]
+    # El recálculo desde `propiedades` ya ve la fila actualizada: no se acumula encima
+    assert sum("FROM propiedades" in q for q in queries) == 1
+    assert not any("ON DUPLICATE KEY UPDATE" in q for q in queries)
+
+def test_modificacion_de_un_extremo_con_cambio_de_barrio_recalcula_los_dos():
+    cursor = CursorFalso(fila={'precio_min': 100000, 'precio_max': 300000})
+    anterior = {'barrio': 'Palermo', 'price_usd': 100000.0, 'superficie_total_m2': 100}
+    registrar_modificacion(cursor, anterior, {**anterior, 'barrio': 'Flores'})
+
+    recalculados = [p for q, p in cursor.sentencias if "FROM propiedades" in q]
+    assert recalculados == [('Palermo',), ('Flores',)]
+    assert not any("ON DUPLICATE KEY UPDATE" in q for q, _ in cursor.sentencias)
+
+def test_modificacion_intermedia_resta_y_suma():
+    cursor = CursorFalso(fila={'precio_min': 100000, 'precio_max': 300000})
+    anterior = {'barrio': 'Palermo', 'price_usd': 200000.0, 'superficie_total_m2': 100}
+    registrar_modificacion(cursor, anterior, {**anterior, 'price_usd': 250000.0})
+
+    queries = [q for q, _ in cursor.sentencias]
+    assert not any("FROM propiedades" in q for q in queries)
+    assert any("ON DUPLICATE KEY UPDATE" in q for q in queries)
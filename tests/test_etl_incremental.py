@@ -0,0 +1,181 @@
+import os
+
+import mysql.connector
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.poblar_db import (
+    ejecutar_etl_incremental, huellas_de_registros, transformar_datos, COLUMNAS_FINALES
+)
+from src.api.estadisticas import CONSULTA_ESTADISTICAS
+
+class BaseFalsa:
+    """Lo mínimo de MySQL que usa la carga incremental: `propiedades`, `etl_estado` y el checkpoint."""
+    def __init__(self):
+        self.propiedades = {}
+        self.estado = {}
+        self.checkpoints = {}
+        self.upserts = 0
+        self.fallar_en_upsert = None
+
+class CursorFalso:
+    def __init__(self, base):
+        self.base = base
+        self.resultado = []
+        self.rowcount = 0
+
+    def execute(self, query, params=None):
+        query = " ".join(query.split())
+        self.resultado = []
+        if query.startswith("SELECT COUNT(*)"):
+            self.resultado = [(1,)]
+        elif query.startswith("SELECT chunksize"):
+            self.resultado = [self.base.checkpoints[params[0]]] if params[0] in self.base.checkpoints else []
+        elif query.startswith("SELECT source_id, hash FROM etl_estado"):
+            self.resultado = [(i, self.base.estado[i]['hash']) for i in params if i in self.base.estado]
+        elif query.startswith("SELECT source_id, barrio FROM propiedades"):
+            self.resultado = [(i, self.base.propiedades[i]['barrio']) for i in params if i in self.base.propiedades]
+        elif query.startswith("INSERT INTO etl_checkpoints"):
+            corrida, _, chunksize, ultimo_lote, completa = params
+            self.base.checkpoints[corrida] = (chunksize, ultimo_lote, completa)
+        elif query.startswith("UPDATE etl_estado SET baja_en"):
+            ausentes = [e for e in self.base.estado.values() if e['visto_en'] != params[0] and not e['baja']]
+            for e in ausentes:
+                e['baja'] = True
+            self.rowcount = len(ausentes)
+
+    def executemany(self, query, params):
+        if query.strip().startswith("INSERT INTO propiedades"):
+            for fila in params:
+                if self.base.fallar_en_upsert == self.base.upserts:
+                    raise mysql.connector.Error("conexión perdida")
+                self.base.upserts += 1
+                self.base.propiedades[fila[0]] = dict(zip(COLUMNAS_FINALES, fila))
+        elif query.strip().startswith("INSERT INTO etl_estado"):
+            for source_id, huella, corrida in params:
+                self.base.estado[source_id] = {'hash': huella, 'visto_en': corrida, 'baja': False}
+
+    def fetchone(self):
+        return self.resultado[0] if self.resultado else None
+
+    def fetchall(self):
+        return self.resultado
+
+    def close(self):
+        pass
+
+class ConexionFalsa:
+    def __init__(self, base):
+        self.base = base
+
+    def cursor(self):
+        return CursorFalso(self.base)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+def escribir(crudo, path, mtime):
+    crudo.to_pickle(path)
+    os.utime(path, ns=(mtime, mtime))
+    return str(path)
+
+@pytest.fixture
+def crudo_valido(crudo):
+    # Solo filas con precio y barrio válidos y sin source_id repetidos, para contar exacto
+    transformado = transformar_datos(crudo, verbose=False)
+    validos = transformado[['price_usd', 'barrio']].notna().all(axis=1)
+    return crudo[validos.to_numpy()].head(1000).copy()
+
+def test_huella_ignora_scrap_date_y_detecta_cambios(crudo):
+    df = transformar_datos(crudo.head(50), verbose=False).dropna(subset=['price_usd'])
+    base = huellas_de_registros(df)
+
+    assert huellas_de_registros(df.assign(scrap_date='2030-01-01')) == base
+    cambiadas = huellas_de_registros(df.assign(price_usd=df['price_usd'] + 1))
+    assert all(a != b for a, b in zip(base, cambiadas))
+
+def test_huella_no_depende_de_como_se_representan_faltantes_y_numeros(crudo):
+    df = transformar_datos(crudo.head(5), verbose=False).reset_index(drop=True)
+    base = huellas_de_registros(df.assign(address=None, cocheras=2, price_usd=np.nan))
+
+    # None y NaN son el mismo faltante, y el dtype de las columnas numéricas no importa
+    assert huellas_de_registros(df.assign(address=np.nan, cocheras=2.0, price_usd=None)) == base
+    mezcla = df.assign(address=pd.Series([None, np.nan, pd.NA, None, np.nan], dtype=object),
+                       cocheras=pd.Series([2, 2.0, np.int64(2), 2, 2], dtype=object), price_usd=np.nan)
+    assert huellas_de_registros(mezcla) == base
+    assert huellas_de_registros(df.assign(address='nan', cocheras=2, price_usd=np.nan)) != base
+
+def test_segunda_corrida_sin_cambios_no_escribe(crudo_valido, tmp_path):
+    base = BaseFalsa()
+    archivo = escribir(crudo_valido, tmp_path / "dia1.pkl", 10**18)
+
+    primera = ejecutar_etl_incremental(archivo, ConexionFalsa(base), chunksize=300)
+    assert primera["nuevas"] == len(crudo_valido) == len(base.propiedades)
+
+    # Nuevo scrapping: mismo contenido salvo dos precios y una propiedad que desaparece
+    dia2 = crudo_valido.iloc[1:].copy()
+    dia2['scrap_date'] = '2024-01-02'
+    dia2.iloc[:2, dia2.columns.get_loc('Price')] = ["USD 999.999", "USD 888.888"]
+    base.upserts = 0
+    segunda = ejecutar_etl_incremental(escribir(dia2, tmp_path / "dia2.pkl", 2 * 10**18),
+                                       ConexionFalsa(base), chunksize=300, marcar_ausentes=True)
+
+    assert segunda["modificadas"] == 2 and segunda["nuevas"] == 0
+    assert segunda["sin_cambios"] == len(dia2) - 2
+    assert base.upserts == 2
+    assert segunda["ausentes"] == 1
+    assert base.propiedades[str(dia2['id'].iloc[0])]['price_usd'] == 999999.0
+
+def test_carga_cortada_se_reanuda_desde_el_checkpoint(crudo_valido, tmp_path):
+    base = BaseFalsa()
+    archivo = escribir(crudo_valido, tmp_path / "dia1.pkl", 10**18)
+    base.fallar_en_upsert = 300  # Falla al empezar el segundo lote de 300
+
+    assert ejecutar_etl_incremental(archivo, ConexionFalsa(base), chunksize=300) is None
+    (checkpoint,) = base.checkpoints.values()
+    assert checkpoint == (300, 1, False)
+
+    base.fallar_en_upsert = None
+    reanudada = ejecutar_etl_incremental(archivo, ConexionFalsa(base), chunksize=300)
+    assert reanudada["nuevas"] == len(crudo_valido) - 300
+    assert list(base.checkpoints.values())[0][2] is True
+    assert len(base.propiedades) == len(crudo_valido)
+
+    # El archivo ya se cargó completo: no se vuelve a recorrer
+    assert ejecutar_etl_incremental(archivo, ConexionFalsa(base), chunksize=300)["nuevas"] == 0
+
+# --- Integración contra una base MySQL (o compatible) desechable ---
+# Se ejecuta solo si TEST_DB_NAME apunta a una base de pruebas: las tablas se recrean.
+@pytest.mark.skipif(not os.getenv("TEST_DB_NAME"), reason="TEST_DB_NAME no definida")
+def test_incremental_contra_mysql(crudo_valido, tmp_path):
+    conn = mysql.connector.connect(
+        host=os.getenv("TEST_DB_HOST", "127.0.0.1"), port=int(os.getenv("TEST_DB_PORT", "3306")),
+        user=os.getenv("TEST_DB_USER", "root"), password=os.getenv("TEST_DB_PASSWORD", ""),
+        database=os.getenv("TEST_DB_NAME")
+    )
+    try:
+        cursor = conn.cursor()
+        cursor.execute("DROP TABLE IF EXISTS propiedades, estadisticas_barrio, etl_estado, etl_checkpoints")
+        with open(os.path.join(os.path.dirname(__file__), '..', 'scripts', 'schema.sql')) as f:
+            for sentencia in [s for s in f.read().split(';') if 'CREATE TABLE' in s]:
+                cursor.execute(sentencia)
+        conn.commit()
+
+        dia1 = escribir(crudo_valido, tmp_path / "dia1.pkl", 10**18)
+        assert ejecutar_etl_incremental(dia1, conn, chunksize=300)["nuevas"] == len(crudo_valido)
+
+        dia2 = crudo_valido.copy()
+        dia2.iloc[:3, dia2.columns.get_loc('Price')] = "USD 123.456"
+        totales = ejecutar_etl_incremental(escribir(dia2, tmp_path / "dia2.pkl", 2 * 10**18), conn, chunksize=300)
+        assert totales["modificadas"] == 3 and totales["sin_cambios"] == len(dia2) - 3
+
+        cursor.execute(CONSULTA_ESTADISTICAS)
+        materializadas = {fila[0]: fila[1] for fila in cursor.fetchall()}
+        cursor.execute("SELECT barrio, COUNT(*) FROM propiedades GROUP BY barrio")
+        assert materializadas == {fila[0]: fila[1] for fila in cursor.fetchall()}
+    finally:
+        conn.close()
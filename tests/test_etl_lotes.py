@@ -0,0 +1,110 @@
+import pandas as pd
+import pytest
+
+from scripts.poblar_db import (
+    leer_datos_en_lotes, leer_datos_crudos, calcular_mediana_expensas, transformar_datos,
+    cargar_datos, ejecutar_etl_por_lotes, mediana_y_lotes
+)
+
+class CursorFalso:
+    def __init__(self, insertadas):
+        self.insertadas = insertadas
+
+    def execute(self, query, params=None):
+        pass
+
+    def executemany(self, query, params):
+        if query.strip().startswith("INSERT INTO propiedades"):
+            self.insertadas.extend(params)
+
+    def fetchone(self):
+        return {'n': 1}
+
+    def close(self):
+        pass
+
+class ConexionFalsa:
+    """Acumula las filas insertadas en `propiedades` y cuenta los commits."""
+    def __init__(self):
+        self.insertadas = []
+        self.commits = 0
+
+    def cursor(self):
+        return CursorFalso(self.insertadas)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+def escribir(crudo, path):
+    if path.suffix == '.pkl':
+        crudo.to_pickle(path)
+    elif path.suffix == '.csv':
+        crudo.to_csv(path, index=False)
+    elif path.suffix == '.jsonl':
+        crudo.to_json(path, orient='records', lines=True, force_ascii=False)
+    else:
+        crudo.to_parquet(path, index=False)
+    return str(path)
+
+@pytest.fixture(params=['.pkl', '.csv', '.jsonl', '.parquet'])
+def archivo(request, crudo, tmp_path):
+    if request.param == '.parquet':
+        pytest.importorskip("pyarrow")
+    return escribir(crudo, tmp_path / f"crudo{request.param}")
+
+def test_transformar_por_lotes_equivale_a_procesar_todo(archivo):
+    completo = transformar_datos(leer_datos_crudos(archivo), verbose=False).reset_index(drop=True)
+
+    mediana = calcular_mediana_expensas(archivo, chunksize=700)
+    lotes = [transformar_datos(lote, mediana_expensas=mediana, verbose=False)
+             for lote in leer_datos_en_lotes(archivo, chunksize=700)]
+
+    assert len(lotes) == 5
+    pd.testing.assert_frame_equal(pd.concat(lotes, ignore_index=True), completo)
+
+def test_mediana_y_lotes_lee_el_pickle_una_sola_vez(archivo, monkeypatch):
+    esperada = calcular_mediana_expensas(archivo, chunksize=700)
+    esperados = list(leer_datos_en_lotes(archivo, chunksize=700))
+    lecturas = []
+    leer_pickle = pd.read_pickle
+    monkeypatch.setattr(pd, "read_pickle", lambda path: lecturas.append(path) or leer_pickle(path))
+
+    mediana, lotes = mediana_y_lotes(archivo, chunksize=700)
+    lotes = list(lotes)
+
+    assert mediana == esperada and len(lotes) == len(esperados)
+    for lote, esperado in zip(lotes, esperados):
+        pd.testing.assert_frame_equal(lote, esperado)
+    assert len(lecturas) == (1 if archivo.endswith('.pkl') else 0)
+
+def test_features_leidas_de_texto_son_listas(crudo, tmp_path):
+    archivo = escribir(crudo, tmp_path / "crudo.csv")
+    lote = next(leer_datos_en_lotes(archivo, chunksize=50))
+    assert lote['Features'].map(lambda v: isinstance(v, list) or pd.isna(v) or isinstance(v, str)).all()
+    assert isinstance(lote['Features'].dropna().iloc[0], (list, str))
+
+def test_etl_por_lotes_inserta_lo_mismo_que_la_carga_completa(crudo, tmp_path):
+    archivo = escribir(crudo, tmp_path / "crudo.jsonl")
+    completa, por_lotes = ConexionFalsa(), ConexionFalsa()
+
+    cargar_datos(transformar_datos(leer_datos_crudos(archivo), verbose=False), completa, verbose=False)
+    insertados = ejecutar_etl_por_lotes(archivo, por_lotes, chunksize=1000, batch_size=400)
+
+    assert insertados == len(completa.insertadas) > 0
+    assert por_lotes.insertadas == completa.insertadas
+
+def test_etl_por_lotes_con_workers_inserta_en_el_mismo_orden(crudo, tmp_path):
+    archivo = escribir(crudo, tmp_path / "crudo.pkl")
+    secuencial, paralelo = ConexionFalsa(), ConexionFalsa()
+
+    ejecutar_etl_por_lotes(archivo, secuencial, chunksize=500)
+    ejecutar_etl_por_lotes(archivo, paralelo, chunksize=500, workers=2)
+
+    assert paralelo.insertadas == secuencial.insertadas
+
+def test_formato_no_soportado(tmp_path):
+    with pytest.raises(ValueError):
+        next(leer_datos_en_lotes(str(tmp_path / "crudo.xlsx"), chunksize=10))
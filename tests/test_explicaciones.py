@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from src.ml import predict
+from src.ml.artefactos import ArtifactBundle
+from src.ml.explicaciones import clave_explicacion, explicar_filas, TOP_SHAP_VALUES
+from src.ml.registro import ModelRegistry
+
+@pytest.fixture
+def bundle(directorio_artefactos):
+    return ArtifactBundle(str(directorio_artefactos)).requerir()
+
+@pytest.mark.parametrize("aproximada", [False, True])
+def test_explicacion_por_lote_suma_la_prediccion(bundle, datos_sinteticos, aproximada):
+    df, _, _, _ = datos_sinteticos
+    items = df.head(8).to_dict('records')
+    X = bundle.feature_encoder.transform(items)
+
+    explicaciones = explicar_filas(bundle.obtener_explainer(), X, bundle.feature_encoder.columns, aproximada)
+
+    assert len(explicaciones) == 8
+    esperadas = bundle.model.predict(X)
+    for explicacion, esperada in zip(explicaciones, esperadas):
+        assert isinstance(explicacion["base_value"], float)
+        assert explicacion["prediction_usd"] == pytest.approx(esperada, rel=1e-6)
+        assert explicacion["approximate"] is aproximada
+        valores = [abs(v["value"]) for v in explicacion["shap_values"]]
+        assert len(valores) <= TOP_SHAP_VALUES and valores == sorted(valores, reverse=True)
+
+def test_lote_coincide_con_explicaciones_individuales(bundle, datos_sinteticos):
+    df, _, _, _ = datos_sinteticos
+    X = bundle.feature_encoder.transform(df.head(4).to_dict('records'))
+    explainer, columnas = bundle.obtener_explainer(), bundle.feature_encoder.columns
+
+    lote = explicar_filas(explainer, X, columnas)
+    individuales = [explicar_filas(explainer, X[i:i + 1], columnas)[0] for i in range(4)]
+
+    for a, b in zip(lote, individuales):
+        assert a["prediction_usd"] == pytest.approx(b["prediction_usd"])
+        assert [v["feature"] for v in a["shap_values"]] == [v["feature"] for v in b["shap_values"]]
+
+def test_cache_de_explicaciones_por_vector_codificado(directorio_artefactos, monkeypatch):
+    monkeypatch.setattr(predict, "registro", ModelRegistry(str(directorio_artefactos)))
+    monkeypatch.setattr(predict, "explanation_cache", predict.PredictionCache(max_size=100))
+    base = {'barrio': 'Palermo', 'ambientes': 2, 'dormitorios': 1, 'banos': 1,
+            'superficie_total_m2': 50, 'cocheras': 0}
+
+    primera = predict.explain_properties([{**base, 'description': 'balcon luminoso'}])
+    # Misma descripción para el vectorizer: mismo vector codificado, se sirve de la cache
+    segunda = predict.explain_properties([{**base, 'description': 'Luminoso, BALCON'}])
+    aproximada = predict.explain_properties([{**base, 'description': 'balcon luminoso'}], aproximada=True)
+
+    assert segunda == primera
+    assert aproximada[0]["approximate"] and not primera[0]["approximate"]
+    stats = predict.explanation_cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 2
+
+def test_clave_depende_de_version_y_modo():
+    fila = np.arange(5, dtype=float)
+    assert clave_explicacion("v1", fila, False) == clave_explicacion("v1", fila.copy(), False)
+    assert clave_explicacion("v1", fila, False) != clave_explicacion("v1", fila, True)
+    assert clave_explicacion("v1", fila, False) != clave_explicacion("v2", fila, False)
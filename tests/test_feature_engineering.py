@@ -1,12 +1,15 @@
 import pytest
+import numpy as np
 import pandas as pd
+from scipy import sparse as sp
 from sklearn.feature_extraction.text import TfidfVectorizer
 import sys
 import os
 
 # Añadir el directorio raíz al path para permitir la importación de módulos del proyecto
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from src.ml.feature_engineering import crear_features_nlp
+from src.ml.feature_engineering import crear_features_nlp, crear_matriz_de_diseno
+from src.ml.encoder import FeatureEncoder
 
 @pytest.fixture
 def sample_dataframe():
@@ -59,3 +62,40 @@ def test_crear_features_nlp_con_vectorizador_existente(sample_dataframe):
     # Verificar que la forma de la salida es correcta
     assert len(df_features) == len(test_data)
     assert df_features.shape[1] == len(vectorizer.vocabulary_)
+
+def test_crear_features_nlp_disperso(sample_dataframe):
+    """La opción dispersa devuelve la matriz del vectorizer sin densificar."""
+    matriz, vectorizer = crear_features_nlp(sample_dataframe, sparse=True)
+    denso, _ = crear_features_nlp(sample_dataframe, vectorizer=vectorizer)
+
+    assert sp.issparse(matriz)
+    np.testing.assert_array_equal(matriz.toarray(), denso.to_numpy())
+
+def test_matriz_dispersa_equivale_a_la_densa(datos_sinteticos):
+    """Mismas columnas y valores que el camino denso (concat + get_dummies) y que el FeatureEncoder."""
+    df, X_denso, _, vectorizer = datos_sinteticos
+    df = df.copy()
+    df.loc[3, 'barrio'] = None
+
+    X, columnas, _ = crear_matriz_de_diseno(df, vectorizer=vectorizer)
+    esperado, columnas_densas, _ = crear_matriz_de_diseno(df, vectorizer=vectorizer, sparse=False)
+
+    assert sp.isspmatrix_csr(X) and columnas == columnas_densas == list(X_denso.columns)
+    np.testing.assert_allclose(X.toarray(), esperado.to_numpy(dtype=float))
+    codificado = FeatureEncoder(columnas, vectorizer).transform(df.to_dict('records'))
+    np.testing.assert_allclose(X.toarray(), codificado)
+
+def test_vocabulario_grande_sin_densificar(datos_sinteticos):
+    """Los modelos que aceptan entrada dispersa se entrenan directo sobre la matriz CSR."""
+    from sklearn.ensemble import RandomForestRegressor
+    from xgboost import XGBRegressor
+
+    df, _, y, _ = datos_sinteticos
+    X, columnas, vectorizer = crear_matriz_de_diseno(df, max_features=5000)
+    assert X.shape[1] == len(columnas) and X.nnz < X.shape[0] * X.shape[1]
+
+    X_denso = X.toarray()
+    bosque = RandomForestRegressor(n_estimators=5, max_depth=4, random_state=0)
+    np.testing.assert_allclose(bosque.fit(X, y).predict(X_denso), bosque.fit(X_denso, y).predict(X_denso))
+    xgb = XGBRegressor(n_estimators=5, max_depth=3).fit(X, y)
+    assert xgb.predict(X).shape == (len(df),)
@@ -0,0 +1,75 @@
+import asyncio
+import time
+
+import pytest
+
+from src.api.micro_lotes import ConfiguracionMicroLotes, MicroBatcher
+from src.ml.ejecutor import EjecutorSaturado
+
+class FuncionLote:
+    """Duplica cada ítem y registra el tamaño de cada lote recibido."""
+    def __init__(self, demora: float = 0.0):
+        self.demora = demora
+        self.lotes = []
+
+    def __call__(self, items):
+        self.lotes.append(len(items))
+        time.sleep(self.demora)
+        return [{"error": "negativo"} if item < 0 else item * 2 for item in items]
+
+def enviar_concurrentes(agrupador: MicroBatcher, items):
+    async def todos():
+        return await asyncio.gather(*(agrupador.enviar(item) for item in items), return_exceptions=True)
+    return asyncio.run(todos())
+
+def test_pedidos_concurrentes_van_en_un_lote():
+    funcion = FuncionLote()
+    agrupador = MicroBatcher(funcion, ConfiguracionMicroLotes(max_espera_ms=50, max_lote=64))
+
+    assert enviar_concurrentes(agrupador, list(range(10))) == [i * 2 for i in range(10)]
+    assert funcion.lotes == [10]
+    stats = agrupador.stats()
+    assert stats["batches"] == 1 and stats["items"] == 10 and stats["mean_batch_size"] == 10
+    assert stats["batch_size_histogram"]["le_16"] == 1
+    assert 0 < stats["max_queue_delay_ms"] < 1000 and stats["pending"] == 0 and stats["in_flight"] == 0
+
+def test_lotes_limitados_por_tamano_y_concurrencia():
+    funcion = FuncionLote(demora=0.05)
+    config = ConfiguracionMicroLotes(max_espera_ms=1000, max_lote=4, max_concurrentes=1)
+    agrupador = MicroBatcher(funcion, config)
+
+    inicio = time.perf_counter()
+    assert enviar_concurrentes(agrupador, list(range(10))) == [i * 2 for i in range(10)]
+    # Los lotes llenos no esperan el máximo; el último (incompleto) sí
+    assert funcion.lotes == [4, 4, 2]
+    assert time.perf_counter() - inicio < 1.5
+
+def test_errores_por_item_y_por_lote():
+    agrupador = MicroBatcher(FuncionLote(), ConfiguracionMicroLotes(max_espera_ms=20))
+    resultados = enviar_concurrentes(agrupador, [1, -1, 3])
+    assert resultados[0] == 2 and resultados[2] == 6
+    assert isinstance(resultados[1], ValueError) and str(resultados[1]) == "negativo"
+
+    def falla(items):
+        raise RuntimeError("modelo no disponible")
+    agrupador = MicroBatcher(falla, ConfiguracionMicroLotes(max_espera_ms=20))
+    assert all(isinstance(r, RuntimeError) for r in enviar_concurrentes(agrupador, [1, 2]))
+    assert agrupador.stats()["errors"] == 1
+
+@pytest.mark.parametrize("espera, lote, habilitado", [(2, 64, True), (0, 64, False), (2, 1, False)])
+def test_configuracion_desde_entorno(monkeypatch, espera, lote, habilitado):
+    monkeypatch.setenv("PREDICT_MICROBATCH_MAX_WAIT_MS", str(espera))
+    monkeypatch.setenv("PREDICT_MICROBATCH_MAX_SIZE", str(lote))
+    assert ConfiguracionMicroLotes.desde_entorno().habilitado is habilitado
+
+def test_cola_llena_rechaza_con_saturado():
+    funcion = FuncionLote(demora=0.05)
+    config = ConfiguracionMicroLotes(max_espera_ms=1000, max_lote=2, max_concurrentes=1, max_pendientes=3)
+    agrupador = MicroBatcher(funcion, config)
+
+    # El primer lote sale lleno; de los 8 restantes solo 3 entran a la cola
+    resultados = enviar_concurrentes(agrupador, list(range(10)))
+    rechazados = [r for r in resultados if isinstance(r, EjecutorSaturado)]
+    assert len(rechazados) == 5
+    assert [r for r in resultados if not isinstance(r, Exception)] == [0, 2, 4, 6, 8]
+    assert agrupador.stats()["rejected"] == 5 and agrupador.stats()["pending"] == 0
@@ -0,0 +1,83 @@
+import shutil
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from xgboost import XGBRegressor
+
+from src.ml import motor_arboles
+from src.ml.artefactos import ArtifactBundle
+from src.ml.bosque_plano import BosquePlano, exportar_bosque
+from src.ml.motor_arboles import TreeEngine
+from src.ml.predict import _predecir_con_intervalo
+from src.ml.uncertainty import UncertaintyEngine
+
+@pytest.fixture(scope="module")
+def matriz(datos_sinteticos):
+    _, X, y, _ = datos_sinteticos
+    X = X.to_numpy(dtype=float)
+    X[::5, 0] = np.nan
+    return X, y.to_numpy()
+
+def motor_para(modelo, directorio) -> TreeEngine:
+    exportar_bosque(modelo, str(directorio))
+    return TreeEngine(BosquePlano.cargar(str(directorio)))
+
+def test_random_forest_igual_a_sklearn(matriz, tmp_path, monkeypatch):
+    X, y = matriz
+    modelo = RandomForestRegressor(n_estimators=15, random_state=0).fit(X, y)
+    motor = motor_para(modelo, tmp_path)
+
+    prediccion, por_arbol = motor.predecir(X)
+    np.testing.assert_allclose(prediccion, modelo.predict(X), rtol=1e-12)
+    np.testing.assert_array_equal(por_arbol, np.stack([arbol.predict(X) for arbol in modelo.estimators_], axis=1))
+    # Una fila sola y el lote recorrido de a grupos de árboles dan lo mismo
+    assert motor.predict(X[:1]) == pytest.approx(modelo.predict(X[:1]), rel=1e-12)
+    monkeypatch.setattr(motor_arboles, 'PARES_POR_BLOQUE', 64)
+    np.testing.assert_array_equal(motor.predecir(X)[1], por_arbol)
+
+def test_xgboost_igual_al_booster(matriz, tmp_path):
+    X, y = matriz
+    modelo = XGBRegressor(n_estimators=30, max_depth=5, random_state=0).fit(X, y)
+    motor = motor_para(modelo, tmp_path)
+
+    assert not motor.es_bosque
+    np.testing.assert_allclose(motor.predict(X), modelo.predict(X), rtol=1e-5)
+
+def test_cantidad_de_features_incorrecta(matriz, tmp_path):
+    X, y = matriz
+    motor = motor_para(RandomForestRegressor(n_estimators=2, random_state=0).fit(X, y), tmp_path)
+    with pytest.raises(ValueError):
+        motor.predict(X[:, 1:])
+
+def test_intervalos_iguales_con_el_motor(matriz, tmp_path):
+    X, y = matriz
+    modelo = RandomForestRegressor(n_estimators=15, max_depth=6, random_state=0).fit(X, y)
+    motor = motor_para(modelo, tmp_path)
+
+    for modo in ('arboles', 'cuantiles'):
+        prediccion, por_arbol = motor.predecir(X)
+        esperados = UncertaintyEngine(modelo, modo=modo).intervalos(X, modelo.predict(X))
+        np.testing.assert_allclose(UncertaintyEngine(motor, modo=modo).intervalos(X, prediccion, por_arbol), esperados)
+
+def test_bundle_predice_con_el_motor_y_difiere_el_pickle(directorio_artefactos, datos_sinteticos, tmp_path):
+    df, _, _, _ = datos_sinteticos
+    shutil.copytree(directorio_artefactos, tmp_path, dirs_exist_ok=True)
+    sklearn = ArtifactBundle(str(tmp_path), motor_inferencia='sklearn').requerir()
+    exportar_bosque(sklearn.model, str(tmp_path))
+
+    bundle = ArtifactBundle(str(tmp_path)).requerir()
+    assert bundle.tree_engine is not None and bundle.modelo_diferido
+    assert bundle.estado['modelo']["estado"] == "diferido"
+
+    X = bundle.feature_encoder.transform(df.head(20).to_dict('records'))
+    for obtenido, esperado in zip(_predecir_con_intervalo(bundle, X), _predecir_con_intervalo(sklearn, X)):
+        np.testing.assert_allclose(obtenido, esperado, rtol=1e-12)
+    assert bundle.modelo_diferido
+
+    # El explainer (o un lote grande) deserializa el modelo recién cuando lo necesita
+    assert bundle.obtener_explainer() is not None
+    assert not bundle.modelo_diferido and bundle.estado['modelo']["estado"] == "ok"
+
+    # Con el motor 'sklearn' el modelo plano se ignora
+    assert ArtifactBundle(str(tmp_path), motor_inferencia='sklearn').cargar().tree_engine is None
@@ -0,0 +1,52 @@
+import sqlite3
+from decimal import Decimal
+
+import pytest
+
+from src.api.paginacion import construir_consulta_propiedades, siguiente_cursor, decodificar_cursor, CursorInvalido
+
+@pytest.fixture
+def conexion():
+    """Tabla `propiedades` reducida en SQLite, con precios y superficies repetidos para probar desempates."""
+    sqlite3.register_adapter(Decimal, float)
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = lambda cur, fila: {col[0]: valor for col, valor in zip(cur.description, fila)}
+    conn.execute("CREATE TABLE propiedades (id INTEGER PRIMARY KEY, barrio TEXT, price_usd REAL, superficie_total_m2 INTEGER)")
+    conn.executemany(
+        "INSERT INTO propiedades VALUES (?, ?, ?, ?)",
+        [(i, 'Palermo' if i % 3 else 'Flores', float(100000 + (i % 7) * 1000) if i % 11 else None, 30 + i % 5)
+         for i in range(1, 101)]
+    )
+    yield conn
+    conn.close()
+
+def recorrer(conn, filtros, sort_by, order, limit):
+    vistos, token = [], None
+    while True:
+        query, params = construir_consulta_propiedades(filtros, sort_by, order, token, limit)
+        filas = conn.execute(query.replace('%s', '?'), params).fetchall()
+        vistos.extend(filas)
+        token = siguiente_cursor(filas, sort_by, order, limit)
+        if token is None:
+            return vistos
+
+@pytest.mark.parametrize("sort_by", ['id', 'price_usd', 'superficie_total_m2'])
+@pytest.mark.parametrize("order", ['asc', 'desc'])
+def test_keyset_recorre_todas_las_filas_una_vez_y_en_orden(conexion, sort_by, order):
+    filtros = [("barrio = %s", 'Palermo')]
+
+    vistos = recorrer(conexion, filtros, sort_by, order, limit=7)
+
+    query, params = construir_consulta_propiedades(filtros, sort_by, order, None, limit=1000)
+    esperado = conexion.execute(query.replace('%s', '?'), params).fetchall()
+    assert [f['id'] for f in vistos] == [f['id'] for f in esperado]
+    assert len({f['id'] for f in vistos}) == len(vistos)
+
+def test_cursor_de_otro_orden_es_rechazado(conexion):
+    filas = conexion.execute("SELECT * FROM propiedades ORDER BY id LIMIT 3").fetchall()
+    token = siguiente_cursor(filas, 'id', 'asc', 3)
+
+    with pytest.raises(CursorInvalido):
+        decodificar_cursor(token, 'price_usd', 'asc')
+    with pytest.raises(CursorInvalido):
+        decodificar_cursor("esto-no-es-un-cursor", 'id', 'asc')
@@ -0,0 +1,114 @@
+import asyncio
+
+import mysql.connector
+import pytest
+from fastapi import HTTPException
+
+from src.api import db_connection
+from src.api.db_async import GestorPoolAsync
+from src.api.db_connection import GestorPool
+from src.api.metricas_pool import ConfiguracionPool
+
+class ConexionAsyncFalsa:
+    def __init__(self, last_usage):
+        self.last_usage = last_usage
+        self.pings = 0
+
+    async def ping(self, reconnect=True):
+        self.pings += 1
+
+class PoolAsyncFalso:
+    def __init__(self, last_usage=None):
+        self.last_usage = last_usage
+
+    async def acquire(self):
+        loop_time = asyncio.get_running_loop().time()
+        return ConexionAsyncFalsa(loop_time if self.last_usage is None else loop_time - self.last_usage)
+
+    def release(self, conn):
+        pass
+
+def gestor_async(**config):
+    gestor = GestorPoolAsync(ConfiguracionPool(**config))
+    gestor._pool = PoolAsyncFalso()
+    return gestor
+
+def test_pool_async_saturado_responde_503_con_retry_after():
+    gestor = gestor_async(tamano=1, max_espera=0, retry_after=7)
+
+    async def escenario():
+        async with gestor.conexion():
+            with pytest.raises(HTTPException) as error:
+                async with gestor.conexion():
+                    pass
+        return error.value
+
+    error = asyncio.run(escenario())
+    assert error.status_code == 503
+    assert error.headers["Retry-After"] == "7"
+    stats = gestor.stats()
+    assert stats["rechazos_saturado"] == 1 and stats["en_uso"] == 0
+
+def test_pool_async_espera_acotada_y_registra_la_espera():
+    gestor = gestor_async(tamano=1, max_espera=5, timeout=0.05)
+
+    async def ocupar(segundos):
+        async with gestor.conexion():
+            await asyncio.sleep(segundos)
+
+    async def escenario():
+        # El segundo pedido obtiene la conexión al liberarse; el tercero agota el timeout
+        await asyncio.gather(ocupar(0.01), ocupar(0))
+        with pytest.raises(HTTPException):
+            await asyncio.gather(ocupar(0.2), ocupar(0))
+
+    asyncio.run(escenario())
+    stats = gestor.stats()
+    assert stats["timeouts"] == 1
+    assert stats["adquisiciones"] == 3
+    assert sum(stats["histograma_espera"].values()) == 3
+    assert stats["esperando"] == 0
+
+def test_pool_async_valida_conexiones_inactivas():
+    gestor = gestor_async(validar_inactivas=30)
+    gestor._pool = PoolAsyncFalso(last_usage=60)
+
+    async def escenario():
+        async with gestor.conexion() as conn:
+            return conn.pings
+
+    assert asyncio.run(escenario()) == 1
+    assert gestor.stats()["conexiones_revalidadas"] == 1
+
+class ConexionFalsa:
+    def close(self):
+        pass
+
+class PoolFalso:
+    def __init__(self, **kwargs):
+        pass
+
+    def get_connection(self):
+        return ConexionFalsa()
+
+def test_pool_sync_se_recrea_cuando_vuelve_la_base(monkeypatch):
+    def pool_caido(**kwargs):
+        raise mysql.connector.Error("base caída")
+
+    gestor = GestorPool(ConfiguracionPool(tamano=1, retry_after=0))
+    monkeypatch.setattr(db_connection.mysql.connector.pooling, "MySQLConnectionPool", pool_caido)
+    with pytest.raises(HTTPException) as error:
+        gestor.obtener_conexion()
+    assert error.value.status_code == 503 and not gestor.disponible
+
+    monkeypatch.setattr(db_connection.mysql.connector.pooling, "MySQLConnectionPool", PoolFalso)
+    conn = gestor.obtener_conexion()
+    assert gestor.disponible and gestor.stats()["en_uso"] == 1
+
+    # El pool tiene una sola conexión: con timeout 0 el segundo pedido falla con 503
+    gestor.config.timeout = 0
+    with pytest.raises(HTTPException):
+        gestor.obtener_conexion()
+    conn.close()
+    gestor.obtener_conexion().close()
+    assert gestor.stats()["en_uso"] == 0
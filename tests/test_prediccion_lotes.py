@@ -0,0 +1,66 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from src.ml import predict
+from src.ml.registro import ModelRegistry
+from src.api.main import app
+from src.api.routers import predictions as router_predicciones
+
+PROPIEDAD = {'barrio': 'Palermo', 'ambientes': 2, 'dormitorios': 1, 'banos': 1,
+             'superficie_total_m2': 50, 'cocheras': 0, 'description': 'balcon luminoso'}
+
+@pytest.fixture
+def modelo_sintetico(directorio_artefactos, monkeypatch):
+    monkeypatch.setattr(predict, "registro", ModelRegistry(str(directorio_artefactos)))
+    monkeypatch.setattr(predict, "prediction_cache", predict.PredictionCache(max_size=100))
+
+@pytest.fixture
+def sin_modelo(tmp_path, monkeypatch):
+    # Directorio vacío: cualquier intento de cargar los artefactos termina en 503
+    monkeypatch.setattr(predict, "registro", ModelRegistry(str(tmp_path)))
+
+@pytest.fixture
+def cliente():
+    return TestClient(app)
+
+def test_predict_prices_errores_por_item_y_orden_con_cache(modelo_sintetico):
+    grande = {**PROPIEDAD, 'superficie_total_m2': 200, 'ambientes': 5}
+    cacheada = predict.predict_prices([grande])[0]
+
+    resultados = predict.predict_prices([PROPIEDAD, {'barrio': 'Palermo'}, grande, "no es un dict"])
+
+    assert len(resultados) == 4
+    assert "error" in resultados[1] and "error" in resultados[3]
+    # El ítem que salió de la cache queda en su posición, entre los calculados
+    assert resultados[2] == cacheada
+    assert resultados[0] == predict.predict_price(PROPIEDAD)
+    assert resultados[0]["predicted_price_usd"] < resultados[2]["predicted_price_usd"]
+    assert predict.prediction_cache.stats()["hits"] >= 1
+
+def test_predict_prices_sin_items_validos_no_requiere_el_modelo(sin_modelo):
+    assert predict.predict_prices([{'barrio': 'Palermo'}]) == [
+        {"error": "Faltan campos requeridos: ['ambientes', 'dormitorios', 'banos', 'superficie_total_m2', 'cocheras']"}
+    ]
+    with pytest.raises(predict.ArtefactosNoDisponibles):
+        predict.predict_prices([PROPIEDAD])
+
+def test_batch_items_invalidos_no_hacen_fallar_al_resto(modelo_sintetico, cliente):
+    respuesta = cliente.post("/predict/batch", json=[PROPIEDAD, {**PROPIEDAD, 'ambientes': -1}, PROPIEDAD])
+
+    assert respuesta.status_code == 200
+    cuerpo = respuesta.json()
+    assert (cuerpo["n_success"], cuerpo["n_errors"]) == (2, 1)
+    assert [r["index"] for r in cuerpo["results"]] == [0, 1, 2]
+    assert cuerpo["results"][1]["error"].startswith("ambientes")
+    assert cuerpo["results"][0]["prediction"] == cuerpo["results"][2]["prediction"]
+
+def test_batch_solo_invalidos_responde_sin_el_modelo(sin_modelo, cliente):
+    respuesta = cliente.post("/predict/batch", json=[{'barrio': 'Palermo'}])
+    assert respuesta.status_code == 200
+    assert respuesta.json()["n_errors"] == 1
+
+    assert cliente.post("/predict/batch", json=[PROPIEDAD]).status_code == 503
+
+def test_batch_demasiado_grande(cliente, monkeypatch):
+    monkeypatch.setattr(router_predicciones, "MAX_BATCH_SIZE", 2)
+    assert cliente.post("/predict/batch", json=[PROPIEDAD] * 3).status_code == 413
@@ -0,0 +1,106 @@
+import os
+import pickle
+import shutil
+import threading
+
+import numpy as np
+import pytest
+
+from src.ml.registro import ModelRegistry, VersionInconsistente, VersionInexistente, VERSION_BASE
+
+ARCHIVOS = ('model.pkl', 'model_columns.pkl', 'tfidf_vectorizer.pkl')
+
+def copiar_version(origen, destino):
+    destino.mkdir(parents=True)
+    for nombre in ARCHIVOS:
+        shutil.copy(origen / nombre, destino / nombre)
+    return destino
+
+@pytest.fixture
+def registro(directorio_artefactos, tmp_path):
+    base = copiar_version(directorio_artefactos, tmp_path / "base")
+    copiar_version(directorio_artefactos, base / "versiones" / "v2")
+    return ModelRegistry(str(base))
+
+def test_activar_cambia_la_referencia_sin_afectar_al_bundle_en_uso(registro):
+    en_uso = registro.activa().requerir()
+
+    nueva = registro.activar("v2")
+
+    assert registro.activa() is nueva and nueva is not en_uso
+    assert registro.nombre_activa == "v2"
+    assert registro.disponibles() == [VERSION_BASE, "v2"]
+    # Un pedido que tomó el bundle anterior puede terminar con él
+    fila = np.zeros((1, en_uso.feature_encoder.n_features))
+    assert en_uso.model.predict(fila).shape == (1,)
+
+def test_version_inconsistente_no_se_activa(registro):
+    directorio = registro._directorio("v2")
+    with open(os.path.join(directorio, 'model_columns.pkl'), 'rb') as f:
+        columnas = pickle.load(f)
+    with open(os.path.join(directorio, 'model_columns.pkl'), 'wb') as f:
+        pickle.dump(columnas[:-1], f)
+
+    with pytest.raises(VersionInconsistente):
+        registro.activar("v2")
+    with pytest.raises(VersionInexistente):
+        registro.activar("no-existe")
+    assert registro.nombre_activa == VERSION_BASE
+
+def test_recargar_si_cambiaron_los_archivos(registro):
+    anterior = registro.activa().requerir()
+    assert not registro.recargar_si_cambio()
+
+    ruta = anterior.rutas['modelo']
+    stat = os.stat(ruta)
+    os.utime(ruta, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    assert registro.recargar_si_cambio()
+    assert registro.activa() is not anterior and registro.activa().version != anterior.version
+    assert not registro.recargar_si_cambio()
+
+def test_sombra_compara_contra_la_version_activa(registro, datos_sinteticos):
+    df, _, _, _ = datos_sinteticos
+    items = df.head(5).to_dict('records')
+    activa = registro.activa().requerir()
+    predicciones = activa.model.predict(activa.feature_encoder.transform(items))
+
+    registro.establecer_sombra("v2")
+    registro.puntuar_sombra(items, predicciones)
+    registro._cola_sombra.join()
+
+    comparacion = registro.reporte()["shadow_comparison"]
+    assert comparacion["n"] == 5 and comparacion["errors"] == 0 and comparacion["dropped"] == 0
+    # Misma versión copiada: las predicciones coinciden
+    assert comparacion["max_abs_diff_usd"] == pytest.approx(0.0)
+
+    registro.establecer_sombra(None)
+    assert registro.reporte()["shadow_comparison"] is None
+
+def test_sombra_descarta_con_la_cola_llena(directorio_artefactos, tmp_path, datos_sinteticos, monkeypatch):
+    base = copiar_version(directorio_artefactos, tmp_path / "base")
+    copiar_version(directorio_artefactos, base / "versiones" / "v2")
+    registro = ModelRegistry(str(base), max_pendientes_sombra=1)
+    df, _, _, _ = datos_sinteticos
+    items = df.head(3).to_dict('records')
+
+    registro.establecer_sombra("v2")
+    sombra = registro._sombra
+    predecir, empezo, seguir = sombra.predecir, threading.Event(), threading.Event()
+
+    def predecir_lento(X):
+        empezo.set()
+        seguir.wait(5)
+        return predecir(X)
+    monkeypatch.setattr(sombra, "predecir", predecir_lento)
+
+    registro.puntuar_sombra(items, np.zeros(3))
+    assert empezo.wait(5)
+    # El hilo de la sombra está ocupado: entra un lote a la cola y los dos siguientes se descartan
+    for _ in range(3):
+        registro.puntuar_sombra(items, np.zeros(3))
+    seguir.set()
+    registro._cola_sombra.join()
+
+    comparacion = registro.reporte()["shadow_comparison"]
+    assert comparacion["n"] == 6 and comparacion["dropped"] == 6
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from src.ml.similares import SimilarPropertiesIndex, rango_similares
+
+def promedio_fuerza_bruta(filas, data):
+    """Replica la consulta SQL `AVG(price_usd) ... WHERE barrio = ... AND ... BETWEEN ...`."""
+    ambientes_min, ambientes_max, superficie_min, superficie_max = rango_similares(data)
+    precios = [
+        f['price_usd'] for f in filas.values()
+        if f['barrio'] == data['barrio']
+        and f['price_usd'] is not None
+        and f['ambientes'] is not None and ambientes_min <= f['ambientes'] <= ambientes_max
+        and f['superficie_total_m2'] is not None and superficie_min <= f['superficie_total_m2'] <= superficie_max
+    ]
+    return float(np.mean(precios)) if precios else None
+
+@pytest.fixture
+def filas():
+    rng = np.random.default_rng(0)
+    return {
+        i: {
+            'id': i,
+            'barrio': str(rng.choice(['Palermo', 'Recoleta', 'Flores'])),
+            'ambientes': int(rng.integers(1, 6)),
+            'superficie_total_m2': int(rng.integers(20, 200)),
+            'price_usd': float(rng.integers(50_000, 500_000)) if rng.random() > 0.05 else None,
+        }
+        for i in range(1, 2001)
+    }
+
+CONSULTAS = [
+    {'barrio': b, 'ambientes': a, 'superficie_total_m2': s}
+    for b in ['Palermo', 'Recoleta', 'Flores', 'Belgrano'] for a in [1, 3, 5] for s in [25, 60, 150]
+]
+
+def test_indice_coincide_con_la_consulta_sql(filas):
+    indice = SimilarPropertiesIndex()
+    indice.cargar(filas.values())
+
+    for data in CONSULTAS:
+        assert indice.promedio_similares(data) == pytest.approx(promedio_fuerza_bruta(filas, data))
+
+def test_actualizaciones_incrementales(filas):
+    indice = SimilarPropertiesIndex()
+    indice.cargar(filas.values())
+
+    # Altas, modificaciones de precio y bajas, como las hacen los endpoints de escritura
+    filas[5000] = {'id': 5000, 'barrio': 'Palermo', 'ambientes': 3, 'superficie_total_m2': 60, 'price_usd': 1_000_000.0}
+    indice.upsert(filas[5000])
+    for i in range(1, 200, 7):
+        filas[i] = dict(filas[i], price_usd=123_456.0)
+        indice.upsert(filas[i])
+    for i in range(2, 300, 5):
+        del filas[i]
+        indice.remove(i)
+
+    for data in CONSULTAS:
+        assert indice.promedio_similares(data) == pytest.approx(promedio_fuerza_bruta(filas, data))
+    assert len(indice) == sum(1 for f in filas.values() if f['price_usd'] is not None)
@@ -0,0 +1,60 @@
+import json
+
+import numpy as np
+import pytest
+
+from src.ml.artefactos import ArtifactBundle
+from src.ml.registro import verificar_consistencia
+from src.ml.train import entrenar, obtener_matriz, preparar_datos
+
+GRILLAS_CHICAS = {
+    'RandomForest': {'n_estimators': [5], 'max_depth': [4]},
+    'XGBoost': {'n_estimators': [5], 'max_depth': [3]},
+}
+
+def respaldado_por_archivo(arreglo) -> bool:
+    """True si el arreglo es (o es una vista de) un np.memmap: joblib lo pasa por referencia."""
+    while arreglo is not None:
+        if isinstance(arreglo, np.memmap):
+            return True
+        arreglo = getattr(arreglo, 'base', None)
+    return False
+
+@pytest.fixture
+def datos(datos_sinteticos):
+    df, _, y, _ = datos_sinteticos
+    return preparar_datos(df.assign(price_usd=y))
+
+@pytest.mark.parametrize("sparse", [False, True])
+def test_matriz_cacheada_con_mmap(datos, datos_sinteticos, tmp_path, sparse):
+    _, X_notebook, _, _ = datos_sinteticos
+    X, y, columnas, _, huella, desde_cache = obtener_matriz(datos, str(tmp_path), sparse=sparse)
+    assert not desde_cache and columnas == list(X_notebook.columns)
+
+    X2, _, _, _, huella2, desde_cache = obtener_matriz(datos, str(tmp_path), sparse=sparse)
+    assert desde_cache and huella2 == huella
+    assert respaldado_por_archivo(X2.data if sparse else X2)
+    denso = X2.toarray() if sparse else np.asarray(X2)
+    np.testing.assert_allclose(denso, X_notebook.to_numpy(dtype=float), rtol=1e-6)
+
+    # Otros datos u otros parámetros: otra entrada de la cache
+    assert obtener_matriz(datos.head(100), str(tmp_path), sparse=sparse)[4] != huella
+    assert obtener_matriz(datos, str(tmp_path), max_features=5, sparse=sparse)[4] != huella
+
+def test_entrenar_escribe_artefactos_utilizables(datos, tmp_path):
+    salida = tmp_path / "version"
+    metricas = entrenar(datos, salida=str(salida), directorio_cache=str(tmp_path / "cache"),
+                        n_iter=1, cv=3, n_jobs=1, grillas=GRILLAS_CHICAS)
+
+    assert metricas["model"] in GRILLAS_CHICAS and metricas["datos"]["filas"] == len(datos)
+    with open(salida / "metrics.json") as f:
+        assert json.load(f)["rmse_usd_mean"] == pytest.approx(metricas["rmse_usd_mean"])
+    bundle = ArtifactBundle(str(salida))
+    assert verificar_consistencia(bundle) == []
+    assert bundle.model.get_params()["n_jobs"] is None
+    assert bundle.bosque_plano is not None and bundle.bosque_plano.meta["origen"] == type(bundle.model).__name__
+
+    # Mismo snapshot, mismo resultado
+    repetido = entrenar(datos, salida=str(salida), directorio_cache=str(tmp_path / "cache"),
+                        n_iter=1, cv=3, n_jobs=1, grillas=GRILLAS_CHICAS)
+    assert repetido["r2_score_mean"] == pytest.approx(metricas["r2_score_mean"])
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.poblar_db import (
+    limpiar_y_validar_precio, limpiar_y_validar_expensas, estandarizar_barrio, parsear_features,
+    limpiar_precios, limpiar_expensas, estandarizar_barrios, extraer_features,
+    transformar_datos, transformar_lotes, COLUMNAS_FEATURES
+)
+
+@pytest.mark.parametrize("vectorizada, fila_a_fila, columna", [
+    (limpiar_precios, limpiar_y_validar_precio, 'Price'),
+    (limpiar_expensas, limpiar_y_validar_expensas, 'Expensas'),
+])
+def test_limpieza_numerica_equivalente(crudo, vectorizada, fila_a_fila, columna):
+    esperado = crudo[columna].apply(fila_a_fila).astype(float)
+    pd.testing.assert_series_equal(vectorizada(crudo[columna]), esperado, check_names=False)
+
+def test_barrios_equivalentes(crudo):
+    esperado = crudo['Location'].apply(estandarizar_barrio)
+    obtenido = estandarizar_barrios(crudo['Location'])
+    assert obtenido.where(obtenido.notna(), None).tolist() == esperado.tolist()
+
+def test_features_equivalentes(crudo):
+    esperado = crudo['Features'].apply(parsear_features).apply(pd.Series)[COLUMNAS_FEATURES]
+    pd.testing.assert_frame_equal(extraer_features(crudo['Features']), esperado.astype(float))
+
+def test_columnas_sin_textos():
+    vacia = pd.Series([None, np.nan], dtype=object)
+    assert limpiar_precios(vacia).isna().all()
+    assert estandarizar_barrios(vacia).isna().all()
+    assert extraer_features(vacia).isna().all().all()
+
+def test_transformar_datos_mantiene_el_formato(crudo):
+    df = transformar_datos(crudo)
+
+    assert list(df.index) == list(crudo.index)
+    for col in ['ambientes', 'dormitorios', 'banos', 'cocheras']:
+        assert df[col].dtype == int
+    assert df['expensas_ars'].notna().all()
+    assert {'id', 'address', 'description', 'link', 'scrap_date'} <= set(df.columns)
+
+def test_transformacion_en_paralelo_es_determinista(crudo):
+    esperado = transformar_datos(crudo, verbose=False)
+    pd.testing.assert_frame_equal(transformar_datos(crudo, verbose=False, workers=3), esperado)
+
+    lotes = [crudo.iloc[i:i + 400] for i in range(0, len(crudo), 400)]
+    secuencial = [t for _, t in transformar_lotes(iter(lotes), 1000.0)]
+    paralelo = list(transformar_lotes(iter(lotes), 1000.0, workers=2))
+    assert [lote.index[0] for lote, _ in paralelo] == [lote.index[0] for lote in lotes]
+    pd.testing.assert_frame_equal(pd.concat(t for _, t in paralelo), pd.concat(secuencial))
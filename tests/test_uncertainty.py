@@ -0,0 +1,66 @@
+import pytest
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from xgboost import XGBRegressor
+
+from src.ml.uncertainty import UncertaintyEngine, calibrar_intervalos
+
+@pytest.fixture(scope="module")
+def bosque(datos_sinteticos):
+    _, X, y, _ = datos_sinteticos
+    return RandomForestRegressor(n_estimators=20, max_depth=6, random_state=0).fit(X, y)
+
+def test_predicciones_por_arbol_coinciden_con_cada_arbol(datos_sinteticos, bosque):
+    """Las predicciones vectorizadas deben ser idénticas a llamar a cada árbol por separado."""
+    _, X, _, _ = datos_sinteticos
+    engine = UncertaintyEngine(bosque)
+
+    esperado = np.stack([tree.predict(X.to_numpy()) for tree in bosque.estimators_], axis=1)
+
+    np.testing.assert_allclose(engine.predicciones_por_arbol(X), esperado)
+
+def test_modo_arboles_reproduce_el_intervalo_historico(datos_sinteticos, bosque):
+    _, X, _, _ = datos_sinteticos
+    engine = UncertaintyEngine(bosque)
+    filas = X.iloc[:5]
+    predictions = bosque.predict(filas)
+
+    lower, upper = engine.intervalos(filas, predictions)
+
+    for i in range(len(filas)):
+        por_arbol = [tree.predict(filas.iloc[[i]].to_numpy())[0] for tree in bosque.estimators_]
+        std = np.std(por_arbol)
+        assert lower[i] == pytest.approx(predictions[i] - 1.96 * std)
+        assert upper[i] == pytest.approx(predictions[i] + 1.96 * std)
+
+def test_modo_cuantiles_contiene_la_prediccion(datos_sinteticos, bosque):
+    _, X, _, _ = datos_sinteticos
+    engine = UncertaintyEngine(bosque, modo='cuantiles')
+    predictions = bosque.predict(X)
+
+    lower, upper = engine.intervalos(X, predictions)
+
+    assert np.all(lower <= upper)
+    assert np.all((lower <= predictions) & (predictions <= upper))
+
+def test_modo_conformal_da_intervalos_para_xgboost(datos_sinteticos):
+    _, X, y, _ = datos_sinteticos
+    modelo = XGBRegressor(n_estimators=20, max_depth=3).fit(X.iloc[:200], y.iloc[:200])
+    calibracion = calibrar_intervalos(y.iloc[200:], modelo.predict(X.iloc[200:]), cobertura=0.9, n_bins=3)
+
+    engine = UncertaintyEngine(modelo, calibracion=calibracion)
+    predictions = modelo.predict(X.iloc[200:])
+    lower, upper = engine.intervalos(X.iloc[200:], predictions)
+
+    assert engine.modo == 'conformal'
+    cobertura = np.mean((lower <= y.iloc[200:]) & (y.iloc[200:] <= upper))
+    assert cobertura >= 0.85
+
+def test_xgboost_sin_calibracion_no_inventa_intervalos(datos_sinteticos):
+    _, X, y, _ = datos_sinteticos
+    modelo = XGBRegressor(n_estimators=5, max_depth=2).fit(X, y)
+    engine = UncertaintyEngine(modelo)
+
+    assert engine.intervalos(X, modelo.predict(X)) == (None, None)
+    with pytest.raises(ValueError):
+        UncertaintyEngine(modelo, modo='arboles')
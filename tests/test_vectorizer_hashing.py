@@ -0,0 +1,60 @@
+import pickle
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from src.ml.artefactos import ArtifactBundle
+from src.ml.feature_engineering import crear_matriz_de_diseno
+from src.ml.vectorizer_hashing import HashingTfidfVectorizer
+
+TEXTOS = ["departamento luminoso con balcon", "balcon aterrazado y pileta", "pileta, sum y parrilla",
+          "reciclado a nuevo luminoso", "", "cochera y baulera"]
+
+def test_mismos_valores_que_tfidf_sin_colisiones():
+    hashing = HashingTfidfVectorizer(n_features=2 ** 18).fit(TEXTOS)
+    tfidf = TfidfVectorizer(stop_words='english').fit(TEXTOS)
+
+    a, b = hashing.transform(TEXTOS), tfidf.transform(TEXTOS)
+    for fila in range(len(TEXTOS)):
+        np.testing.assert_allclose(np.sort(a[fila].data), np.sort(b[fila].data))
+
+def test_actualizacion_por_lotes_equivale_a_entrenar_todo():
+    completo = HashingTfidfVectorizer(n_features=64).fit(TEXTOS)
+    por_lotes = HashingTfidfVectorizer(n_features=64)
+    for i in range(0, len(TEXTOS), 2):
+        por_lotes.partial_fit(TEXTOS[i:i + 2])
+
+    np.testing.assert_allclose(por_lotes.idf_, completo.idf_)
+    np.testing.assert_allclose(por_lotes.transform(TEXTOS).toarray(), completo.transform(TEXTOS).toarray())
+
+def test_guardar_y_cargar_con_mmap(tmp_path):
+    vectorizer = HashingTfidfVectorizer(n_features=64).fit(TEXTOS[:3])
+    vectorizer.guardar(str(tmp_path))
+
+    cargado = HashingTfidfVectorizer.cargar(str(tmp_path))
+    assert isinstance(cargado.idf_, np.memmap)
+    np.testing.assert_array_equal(cargado.transform(TEXTOS).toarray(), vectorizer.transform(TEXTOS).toarray())
+
+    # Se puede seguir actualizando y volver a guardar sobre el mismo directorio
+    cargado.partial_fit(TEXTOS[3:])
+    cargado.guardar(str(tmp_path))
+    np.testing.assert_allclose(HashingTfidfVectorizer.cargar(str(tmp_path)).idf_,
+                               HashingTfidfVectorizer(n_features=64).fit(TEXTOS).idf_)
+
+def test_mismo_transform_al_entrenar_y_al_predecir(datos_sinteticos, tmp_path):
+    df, _, y, _ = datos_sinteticos
+    X, columnas, vectorizer = crear_matriz_de_diseno(df, max_features=256, hashing=True)
+    modelo = RandomForestRegressor(n_estimators=5, max_depth=4, random_state=0).fit(X, y)
+
+    vectorizer.guardar(str(tmp_path))
+    for nombre, objeto in [('model.pkl', modelo), ('model_columns.pkl', columnas)]:
+        with open(tmp_path / nombre, 'wb') as f:
+            pickle.dump(objeto, f)
+
+    bundle = ArtifactBundle(str(tmp_path)).requerir()
+    assert isinstance(bundle.vectorizer, HashingTfidfVectorizer)
+    codificado = bundle.feature_encoder.transform(df.to_dict('records'))
+    np.testing.assert_allclose(codificado, X.toarray())
+    assert bundle.model.predict(codificado) == pytest.approx(modelo.predict(X))